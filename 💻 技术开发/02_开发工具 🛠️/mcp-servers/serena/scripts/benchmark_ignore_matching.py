@@ -0,0 +1,77 @@
+"""
+Compares the walking of a large directory tree with many nested .gitignore files using per-path gitignore checks
+(`find_all_non_ignored_files`) with a walk based on the directory-scoped `IgnoreMatcher`.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from serena.util.file_system import GitignoreParser, IgnoreMatcher, find_all_non_ignored_files, scan_directory
+
+
+def create_synthetic_tree(root_path: str, num_top_level_dirs: int, depth: int, fanout: int, files_per_dir: int) -> None:
+    """
+    Creates a tree in which every directory contains a .gitignore file, some source files, log files and a build directory.
+    """
+
+    def create_dir(rel_dir_path: str, level: int) -> None:
+        abs_dir_path = os.path.join(root_path, rel_dir_path)
+        os.makedirs(os.path.join(abs_dir_path, "build"), exist_ok=True)
+        with open(os.path.join(abs_dir_path, ".gitignore"), "w") as f:
+            f.write(f"/build/\n*.log\ngenerated_{level}/\n!keep.log\n")
+        for i in range(files_per_dir):
+            open(os.path.join(abs_dir_path, f"module_{i}.py"), "w").close()
+            open(os.path.join(abs_dir_path, f"debug_{i}.log"), "w").close()
+        open(os.path.join(abs_dir_path, "build", "output.o"), "w").close()
+        if level < depth:
+            for i in range(fanout):
+                create_dir(os.path.join(rel_dir_path, f"pkg_{i}"), level + 1)
+
+    with open(os.path.join(root_path, ".gitignore"), "w") as f:
+        f.write("*.tmp\n/dist/\n")
+    for i in range(num_top_level_dirs):
+        create_dir(f"component_{i}", 1)
+
+
+def walk_with_ignore_matcher(root_path: str) -> list[str]:
+    gitignore_parser = GitignoreParser(root_path)
+    matcher = IgnoreMatcher(
+        root_path, [spec.pathspec for spec in gitignore_parser.get_ignore_specs()], is_ignored_dirname=lambda dirname: dirname == ".git"
+    )
+    _, files = scan_directory(
+        root_path,
+        recursive=True,
+        is_ignored_entry=lambda entry: matcher.is_ignored(os.path.relpath(entry.path, root_path), entry.is_dir()),
+    )
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-top-level-dirs", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--files-per-dir", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_path:
+        create_synthetic_tree(root_path, args.num_top_level_dirs, args.depth, args.fanout, args.files_per_dir)
+        num_gitignore_files = len(GitignoreParser(root_path).get_ignore_specs())
+        print(f"Created tree with {num_gitignore_files} .gitignore files")
+
+        results = {}
+        for name, walk_fn in [("per-path gitignore checks", find_all_non_ignored_files), ("IgnoreMatcher", walk_with_ignore_matcher)]:
+            start_time = time.perf_counter()
+            files = walk_fn(root_path)
+            duration = time.perf_counter() - start_time
+            results[name] = sorted(files)
+            print(f"{name:<28}{duration:>10.3f} s{len(files):>10} files")
+
+        if len(set(map(tuple, results.values()))) != 1:
+            raise AssertionError("The walks returned different files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Replays language server traffic (i.e. the raw stdout of a language server, consisting of messages framed with Content-Length
+headers), comparing the line-based reading of messages with the chunk-based `MessageReader` and the available
+JSON codecs.
+Recorded traffic can be obtained by capturing a language server's stdout (e.g. by wrapping its command with `tee`);
+if no recording is given, synthetic traffic with large documentSymbol and references responses is used.
+"""
+
+import argparse
+import io
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from solidlsp.lsp_protocol_handler.server import JsonCodec, MessageReader, content_length, create_message, make_response
+
+
+def create_synthetic_traffic(num_messages: int, num_items: int) -> bytes:
+    stream = io.BytesIO()
+    for i in range(num_messages):
+        if i % 2 == 0:
+            result = [
+                {
+                    "name": f"symbol_{j}",
+                    "kind": 12,
+                    "range": {"start": {"line": j, "character": 0}, "end": {"line": j + 10, "character": 4}},
+                    "selectionRange": {"start": {"line": j, "character": 4}, "end": {"line": j, "character": 12}},
+                    "detail": "def symbol(self, argument: int) -> str",
+                    "children": [],
+                }
+                for j in range(num_items)
+            ]
+        else:
+            result = [
+                {
+                    "uri": f"file:///project/src/package/module_{j % 50}.py",
+                    "range": {"start": {"line": j, "character": 8}, "end": {"line": j, "character": 20}},
+                }
+                for j in range(num_items)
+            ]
+        stream.write(b"".join(create_message(make_response(i, result))))
+    return stream.getvalue()
+
+
+def read_bodies_line_based(stream: io.BufferedReader) -> list[bytes]:
+    """
+    Reads the message bodies line by line (as the language server handler did before using `MessageReader`)
+    """
+    bodies = []
+    while True:
+        line = stream.readline()
+        if not line:
+            return bodies
+        num_bytes = content_length(line)
+        if num_bytes is None:
+            continue
+        while line and line.strip():
+            line = stream.readline()
+        data = b""
+        while len(data) < num_bytes:
+            data += stream.read(num_bytes - len(data))
+        bodies.append(data)
+
+
+def read_bodies_chunked(stream: io.BufferedReader) -> list[bytes]:
+    reader = MessageReader(stream)
+    bodies = []
+    while (body := reader.read_message()) is not None:
+        bodies.append(body)
+    return bodies
+
+
+def replay_through_pipe(traffic: bytes, read_fn: Callable[[io.BufferedReader], list[bytes]]) -> list[bytes]:
+    """
+    Writes the traffic to a pipe in a background thread (like a language server process writing to its stdout)
+    and reads it with the given function.
+    """
+    read_fd, write_fd = os.pipe()
+
+    def write() -> None:
+        with open(write_fd, "wb") as f:
+            f.write(traffic)
+
+    writer_thread = threading.Thread(target=write, daemon=True)
+    writer_thread.start()
+    with open(read_fd, "rb") as stream:
+        bodies = read_fn(stream)
+    writer_thread.join()
+    return bodies
+
+
+def measure(fn: Callable[[], object], repetitions: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(repetitions):
+        fn()
+    return (time.perf_counter() - start_time) / repetitions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traffic-file", help="a file containing recorded language server stdout traffic")
+    parser.add_argument("--num-messages", type=int, default=20)
+    parser.add_argument("--num-items", type=int, default=5000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.traffic_file:
+        with open(args.traffic_file, "rb") as f:
+            traffic = f.read()
+    else:
+        traffic = create_synthetic_traffic(args.num_messages, args.num_items)
+
+    bodies = replay_through_pipe(traffic, read_bodies_chunked)
+    if bodies != replay_through_pipe(traffic, read_bodies_line_based):
+        raise AssertionError("The readers returned different messages")
+    print(f"Replaying {len(bodies)} messages ({len(traffic) / 1e6:.1f} MB)")
+
+    for name, read_fn in [("line-based", read_bodies_line_based), ("chunked", read_bodies_chunked)]:
+        duration = measure(lambda read_fn=read_fn: replay_through_pipe(traffic, read_fn), args.repetitions)
+        print(f"framing  {name:<12}{duration * 1000:>10.1f} ms{len(traffic) / duration / 1e6:>10.1f} MB/s")
+
+    codec_names = [JsonCodec.STDLIB_CODEC_NAME]
+    for codec_name in JsonCodec.FAST_CODEC_NAMES:
+        try:
+            JsonCodec(codec_name)
+            codec_names.append(codec_name)
+        except ImportError:
+            print(f"codec    {codec_name:<12}not installed")
+    for codec_name in codec_names:
+        codec = JsonCodec(codec_name)
+        payloads = [codec.decode(body) for body in bodies]
+        decode_duration = measure(lambda codec=codec: [codec.decode(body) for body in bodies], args.repetitions)
+        encode_duration = measure(lambda codec=codec, payloads=payloads: [codec.encode(payload) for payload in payloads], args.repetitions)
+        print(f"codec    {codec_name:<12}{decode_duration * 1000:>10.1f} ms (decode){encode_duration * 1000:>10.1f} ms (encode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the search backends of `search_files` on a synthetic source tree (by default comprising 50k files).
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from serena.text_utils import ProcessPoolSearchBackend, SearchBackend, ThreadingSearchBackend, search_files
+
+WORDS = ["alpha", "beta", "gamma", "delta", "value", "result", "config", "handler", "request", "response", "index", "cache"]
+
+
+def create_synthetic_tree(root_path: str, num_files: int, lines_per_file: int, seed: int = 42) -> list[str]:
+    """
+    Creates a tree of Python-like source files, distributed across nested directories.
+
+    :return: the paths of the files relative to the root
+    """
+    rng = random.Random(seed)
+    relative_paths = []
+    for i in range(num_files):
+        rel_dir = os.path.join(f"pkg_{i % 50}", f"module_{(i // 50) % 40}")
+        os.makedirs(os.path.join(root_path, rel_dir), exist_ok=True)
+        rel_path = os.path.join(rel_dir, f"file_{i}.py")
+        lines = []
+        for j in range(lines_per_file):
+            if j % 20 == 0:
+                lines.append(f"def {rng.choice(WORDS)}_{j}({rng.choice(WORDS)}, {rng.choice(WORDS)}):")
+            else:
+                lines.append(f"    {rng.choice(WORDS)} = {rng.choice(WORDS)}.{rng.choice(WORDS)}({rng.randint(0, 1000)})")
+        if i % 100 == 0:
+            lines.append("    raise NotImplementedError('TODO: handle the rare case')")
+        with open(os.path.join(root_path, rel_path), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        relative_paths.append(rel_path)
+    return relative_paths
+
+
+def run_search(backend: SearchBackend, relative_paths: list[str], root_path: str, pattern: str) -> tuple[float, list[tuple]]:
+    start_time = time.perf_counter()
+    matches = search_files(relative_paths, pattern, root_path=root_path, context_lines_before=1, context_lines_after=1, backend=backend)
+    duration = time.perf_counter() - start_time
+    comparable_matches = [(m.source_file_path, [(line.line_number, line.line_content) for line in m.lines]) for m in matches]
+    return duration, comparable_matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-files", type=int, default=50000)
+    parser.add_argument("--lines-per-file", type=int, default=100)
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    patterns = {
+        "rare literal": r"NotImplementedError\('TODO",
+        "frequent literal": "handler",
+        "regex": r"def [a-z]+_\d+\(cache,",
+        "unicode-aware regex": r"\w+_40\(index",
+    }
+
+    with tempfile.TemporaryDirectory() as root_path:
+        print(f"Creating {args.num_files} files with {args.lines_per_file} lines each ...")
+        relative_paths = create_synthetic_tree(root_path, args.num_files, args.lines_per_file)
+
+        backends: list[SearchBackend] = [ThreadingSearchBackend(), ProcessPoolSearchBackend()]
+        # start the worker processes before measuring
+        run_search(backends[1], relative_paths[:1], root_path, "x")
+
+        print(f"{'pattern':<22}{'backend':<28}{'best time [s]':>14}{'matches':>10}")
+        try:
+            for pattern_name, pattern in patterns.items():
+                reference_matches = None
+                for backend in backends:
+                    durations = []
+                    for _ in range(args.repetitions):
+                        duration, matches = run_search(backend, relative_paths, root_path, pattern)
+                        durations.append(duration)
+                    if reference_matches is None:
+                        reference_matches = matches
+                    elif matches != reference_matches:
+                        raise AssertionError(f"{backend.__class__.__name__} returned different matches for pattern {pattern!r}")
+                    print(f"{pattern_name:<22}{backend.__class__.__name__:<28}{min(durations):>14.3f}{len(matches):>10}")
+        finally:
+            ProcessPoolSearchBackend.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures the time it takes to import the Serena CLI (which is the startup path of `serena start-mcp-server`) using
+`python -X importtime` in fresh interpreters, and fails if the median import time exceeds the given budget or if any of
+the modules which shall only be loaded on first use (dashboard, token estimators, etc.) are imported at startup.
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+DEFERRED_MODULES = ("anthropic", "tiktoken", "flask", "serena.dashboard", "serena.gui_log_viewer", "requests", "joblib")
+"""modules which shall not be imported when starting Serena, because they are only needed for optional features"""
+
+_IMPORT_TIME_LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure_import_time(module: str) -> tuple[float, dict[str, float]]:
+    """
+    Imports the given module in a fresh interpreter.
+
+    :param module: the module to import
+    :return: a tuple (total_time, cumulative_times), where total_time is the time (in seconds) it took to import the module
+        and cumulative_times maps the names of all modules imported in the process to their cumulative import times (in seconds)
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True)
+    cumulative_times = {}
+    for line in process.stderr.splitlines():
+        match = _IMPORT_TIME_LINE_PATTERN.match(line)
+        if match:
+            cumulative_times[match.group(4)] = int(match.group(2)) / 1e6
+    return cumulative_times[module], cumulative_times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="serena.cli", help="the module whose import time to measure")
+    parser.add_argument("--runs", type=int, default=5, help="the number of interpreters in which to measure the import time")
+    parser.add_argument("--threshold-ms", type=float, default=750, help="the maximum admissible median import time")
+    parser.add_argument("--top", type=int, default=10, help="the number of top-level imports with the highest cumulative times to show")
+    args = parser.parse_args()
+
+    total_times = []
+    cumulative_times: dict[str, float] = {}
+    for _ in range(args.runs):
+        total_time, cumulative_times = measure_import_time(args.module)
+        total_times.append(total_time)
+    median_time_ms = statistics.median(total_times) * 1000
+    print(f"Importing {args.module} took {median_time_ms:.0f} ms (median of {args.runs} runs, budget {args.threshold_ms:.0f} ms)")
+    print("Slowest imports (cumulative, last run):")
+    slowest_modules = sorted(cumulative_times.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative_time in [item for item in slowest_modules if item[0] != args.module][: args.top]:
+        print(f"  {cumulative_time * 1000:>8.1f} ms  {name}")
+
+    failed = False
+    eagerly_imported_modules = [m for m in DEFERRED_MODULES if m in cumulative_times]
+    if eagerly_imported_modules:
+        print(f"FAILED: modules which shall be imported lazily were imported at startup: {eagerly_imported_modules}")
+        failed = True
+    if median_time_ms > args.threshold_ms:
+        print(f"FAILED: the import time exceeds the budget of {args.threshold_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the size, pickling and unpickling time of cached document symbols in their dictionary representation
+with the compact representation (`CompactDocumentSymbols`) for a synthetic project.
+"""
+
+import argparse
+import json
+import pickle
+import time
+
+from solidlsp.ls_cache import CompactDocumentSymbols
+
+
+def create_document_symbols(file_index: int, num_classes: int, num_methods: int) -> tuple[str, str, str, list[dict]]:
+    """
+    Creates the document symbols of a file as they are received from a language server (i.e. without shared objects).
+    """
+    relative_path = f"src/package_{file_index % 50}/module_{file_index}.py"
+    absolute_path = f"/home/user/projects/repository/{relative_path}"
+    uri = f"file://{absolute_path}"
+
+    def symbol(name: str, kind: int, line: int, num_lines: int, children: list[dict]) -> dict:
+        range_ = {"start": {"line": line, "character": 0}, "end": {"line": line + num_lines, "character": 0}}
+        return {
+            "name": name,
+            "kind": kind,
+            "range": range_,
+            "selectionRange": {"start": {"line": line, "character": 4}, "end": {"line": line, "character": 4 + len(name)}},
+            "location": {"uri": uri, "range": range_, "absolutePath": absolute_path, "relativePath": relative_path},
+            "children": children,
+        }
+
+    root_symbols = []
+    line = 0
+    for c in range(num_classes):
+        methods = [symbol(f"method_{m}", 6, line + 1 + 5 * m, 4, []) for m in range(num_methods)]
+        root_symbols.append(symbol(f"Class{c}", 5, line, 1 + 5 * num_methods, methods))
+        line += 2 + 5 * num_methods
+    return relative_path, absolute_path, uri, json.loads(json.dumps(root_symbols))
+
+
+def measure(name: str, entries: dict) -> None:
+    start_time = time.perf_counter()
+    pickled_entries = {key: pickle.dumps(value) for key, value in entries.items()}
+    pickle_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for pickled_value in pickled_entries.values():
+        pickle.loads(pickled_value)
+    unpickle_time = time.perf_counter() - start_time
+    size_mb = sum(len(v) for v in pickled_entries.values()) / (1024 * 1024)
+    print(f"{name:<12}{size_mb:>10.2f} MB{pickle_time:>10.3f} s{unpickle_time:>10.3f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-files", type=int, default=2000)
+    parser.add_argument("--num-classes", type=int, default=5)
+    parser.add_argument("--num-methods", type=int, default=9)
+    args = parser.parse_args()
+
+    dict_entries = {}
+    compact_entries = {}
+    for i in range(args.num_files):
+        relative_path, absolute_path, uri, root_symbols = create_document_symbols(i, args.num_classes, args.num_methods)
+        dict_entries[relative_path] = root_symbols
+        compact_entries[relative_path] = CompactDocumentSymbols.from_symbols(relative_path, absolute_path, uri, root_symbols)
+    num_symbols = sum(len(s) for s in compact_entries.values())
+    print(f"{args.num_files} files with {num_symbols} symbols")
+    print(f"{'':<12}{'size':>13}{'pickle':>12}{'unpickle':>12}")
+    measure("dicts", dict_entries)
+    measure("compact", compact_entries)
+
+    start_time = time.perf_counter()
+    for compact_symbols in compact_entries.values():
+        compact_symbols.to_symbols()
+    print(f"Creating the dictionary views of all files took {time.perf_counter() - start_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
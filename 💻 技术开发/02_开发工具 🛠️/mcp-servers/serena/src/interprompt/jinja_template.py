@@ -1,3 +1,6 @@
+import hashlib
+import os
+import threading
 from typing import Any
 
 import jinja2
@@ -12,27 +15,107 @@ class ParameterizedTemplateInterface:
     def get_parameters(self) -> list[str]: ...
 
 
+class _CompiledTemplate:
+    """
+    A compiled template along with the information derived from its source, which is shared by all `JinjaTemplate` instances
+    with the same template string
+    """
+
+    def __init__(self, template: jinja2.Template, parameters: list[str]) -> None:
+        self.template = template
+        self.parameters = parameters
+        self._static_rendering: str | None = None
+
+    def render(self, **params: Any) -> str:
+        # templates without parameters are static, so they are rendered only once
+        if self.parameters:
+            return self.template.render(**params)
+        if self._static_rendering is None:
+            self._static_rendering = self.template.render()
+        return self._static_rendering
+
+
 @singleton
 class _JinjaEnvProvider:
+    """
+    Provides the Jinja environment and a process-wide cache of compiled templates, which is keyed by the hash of the template source.
+    If a bytecode cache directory is set, the compiled templates are furthermore persisted, such that other processes need not
+    compile them again.
+    """
+
     def __init__(self) -> None:
         self._env: jinja2.Environment | None = None
+        self._bytecode_cache_dir: str | None = None
+        self._template_sources: dict[str, str] = {}
+        self._compiled_templates: dict[str, _CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def set_bytecode_cache_dir(self, bytecode_cache_dir: str | None) -> None:
+        """
+        :param bytecode_cache_dir: the directory in which to persist the bytecode of compiled templates; None to not persist it
+        """
+        with self._lock:
+            self._bytecode_cache_dir = bytecode_cache_dir
+            if self._env is not None:
+                self._env.bytecode_cache = self._create_bytecode_cache()
+
+    def _create_bytecode_cache(self) -> jinja2.BytecodeCache | None:
+        if self._bytecode_cache_dir is None:
+            return None
+        os.makedirs(self._bytecode_cache_dir, exist_ok=True)
+        return jinja2.FileSystemBytecodeCache(self._bytecode_cache_dir)
+
+    def _load_template_source(self, name: str) -> tuple[str, None, Any]:
+        # templates are named by the hash of their source, so a loaded template is always up to date
+        return self._template_sources[name], None, lambda: True
 
     def get_env(self) -> jinja2.Environment:
         if self._env is None:
-            self._env = jinja2.Environment()
+            # templates are cached by this provider rather than by the environment
+            self._env = jinja2.Environment(
+                loader=jinja2.FunctionLoader(self._load_template_source), bytecode_cache=self._create_bytecode_cache(), cache_size=0
+            )
         return self._env
 
+    def get_compiled_template(self, template_string: str) -> _CompiledTemplate:
+        """
+        :param template_string: the template source
+        :return: the compiled template, which is compiled (or loaded from the bytecode cache) only upon the first request
+        """
+        source_hash = hashlib.sha256(template_string.encode("utf-8")).hexdigest()
+        compiled_template = self._compiled_templates.get(source_hash)
+        if compiled_template is not None:
+            return compiled_template
+        with self._lock:
+            compiled_template = self._compiled_templates.get(source_hash)
+            if compiled_template is None:
+                env = self.get_env()
+                self._template_sources[source_hash] = template_string
+                template = env.get_template(source_hash)
+                parameters = sorted(jinja2.meta.find_undeclared_variables(env.parse(template_string)))
+                compiled_template = _CompiledTemplate(template, parameters)
+                self._compiled_templates[source_hash] = compiled_template
+            return compiled_template
+
+
+def set_template_bytecode_cache_dir(bytecode_cache_dir: str | None) -> None:
+    """
+    Sets the directory in which the bytecode of compiled templates is persisted, such that templates need not be compiled
+    again in other processes.
+
+    :param bytecode_cache_dir: the directory; None to not persist the bytecode
+    """
+    _JinjaEnvProvider().set_bytecode_cache_dir(bytecode_cache_dir)
+
 
 class JinjaTemplate(ParameterizedTemplateInterface):
     def __init__(self, template_string: str) -> None:
         self._template_string = template_string
-        self._template = _JinjaEnvProvider().get_env().from_string(self._template_string)
-        parsed_content = self._template.environment.parse(self._template_string)
-        self._parameters = sorted(jinja2.meta.find_undeclared_variables(parsed_content))
+        self._compiled_template = _JinjaEnvProvider().get_compiled_template(self._template_string)
 
     def render(self, **params: Any) -> str:
         """Renders the template with the given kwargs. You can find out which parameters are required by calling get_parameter_names()."""
-        return self._template.render(**params)
+        return self._compiled_template.render(**params)
 
     def get_parameters(self) -> list[str]:
         """A sorted list of parameter names that are extracted from the template string. It is impossible to know the types of the parameter
@@ -40,4 +123,4 @@ class JinjaTemplate(ParameterizedTemplateInterface):
 
         :return: the list of parameter names
         """
-        return self._parameters
+        return list(self._compiled_template.parameters)
@@ -10,7 +10,7 @@ import threading
 import webbrowser
 from collections import defaultdict
 from collections.abc import Callable
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
 from logging import Logger
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional, TypeVar
@@ -23,13 +23,14 @@ from serena import serena_version
 from serena.analytics import RegisteredTokenCountEstimator, ToolUsageStats
 from serena.config.context_mode import RegisteredContext, SerenaAgentContext, SerenaAgentMode
 from serena.config.serena_config import SerenaConfig, ToolInclusionDefinition, ToolSet, get_serena_managed_in_project_dir
-from serena.dashboard import SerenaDashboardAPI
 from serena.project import Project
 from serena.prompt_factory import SerenaPromptFactory
 from serena.tools import ActivateProjectTool, Tool, ToolMarker, ToolRegistry
 from serena.util.inspection import iter_subclasses
 from serena.util.logging import MemoryLogHandler
+from serena.util.task_executor import TaskExecutor, TaskQueueStats
 from solidlsp import SolidLanguageServer
+from solidlsp.ls_pool import LanguageServerLeases, LanguageServerManager, LanguageServerPool
 
 if TYPE_CHECKING:
     from serena.gui_log_viewer import GuiLogViewer
@@ -47,17 +48,22 @@ class ProjectNotFoundError(Exception):
 class LinesRead:
     def __init__(self) -> None:
         self.files: dict[str, set[tuple[int, int]]] = defaultdict(lambda: set())
+        # read-only tools (which record the lines they read) may be executed concurrently
+        self._lock = threading.Lock()
 
     def add_lines_read(self, relative_path: str, lines: tuple[int, int]) -> None:
-        self.files[relative_path].add(lines)
+        with self._lock:
+            self.files[relative_path].add(lines)
 
     def were_lines_read(self, relative_path: str, lines: tuple[int, int]) -> bool:
-        lines_read_in_file = self.files[relative_path]
-        return lines in lines_read_in_file
+        with self._lock:
+            lines_read_in_file = self.files[relative_path]
+            return lines in lines_read_in_file
 
     def invalidate_lines_read(self, relative_path: str) -> None:
-        if relative_path in self.files:
-            del self.files[relative_path]
+        with self._lock:
+            if relative_path in self.files:
+                del self.files[relative_path]
 
 
 class MemoriesManager:
@@ -111,6 +117,16 @@ class AvailableTools:
 
 
 class SerenaAgent:
+    MAX_FILES_TO_REINDEX_AFTER_CHANGE = 500
+    """
+    the maximum number of files whose symbols are re-indexed proactively after a batch of external file changes was detected
+    """
+    REINDEX_CHUNK_SIZE = 20
+    """
+    the number of files which are re-indexed per background task after file changes; the tasks are issued one after another,
+    such that tools which are issued in the meantime do not have to wait for all files to be re-indexed
+    """
+
     def __init__(
         self,
         project: str | None = None,
@@ -178,12 +194,30 @@ class SerenaAgent:
         if self.serena_config.record_tool_usage_stats:
             token_count_estimator = RegisteredTokenCountEstimator[self.serena_config.token_count_estimator]
             log.info(f"Tool usage statistics recording is enabled with token count estimator: {token_count_estimator.name}.")
-            self._tool_usage_stats = ToolUsageStats(token_count_estimator)
+            self._tool_usage_stats = ToolUsageStats(token_count_estimator, sampling_rate=self.serena_config.token_count_sampling_rate)
+
+        # create executor for starting the language server and running tools in other threads.
+        # Tasks are started in the order in which they are issued; read-only tools may run concurrently with each other,
+        # while all other tasks (including editing tools) are executed exclusively.
+        self._task_executor = TaskExecutor(
+            max_concurrent_read_only_tasks=self.serena_config.max_concurrent_read_only_tools, thread_name_prefix="SerenaAgentExecutor"
+        )
+        self._task_executor_lock = threading.Lock()
+        self._task_executor_task_index = 1
+        self._language_server_lock = threading.RLock()
+        # the language servers are kept running across project activations, such that they can be reused
+        self._language_server_manager = LanguageServerManager(
+            max_running_language_servers=self.serena_config.max_running_language_servers,
+            max_memory_mb=self.serena_config.max_language_server_memory_mb,
+            idle_timeout=self.serena_config.language_server_idle_timeout,
+        )
 
         # start the dashboard (web frontend), registering its log handler
         if self.serena_config.web_dashboard:
+            from serena.dashboard import SerenaDashboardAPI
+
             self._dashboard_thread, port = SerenaDashboardAPI(
-                get_memory_log_handler(), tool_names, tool_usage_stats=self._tool_usage_stats
+                get_memory_log_handler(), tool_names, tool_usage_stats=self._tool_usage_stats, task_executor=self._task_executor
             ).run_in_thread()
             dashboard_url = f"http://127.0.0.1:{port}/dashboard/index.html"
             log.info("Serena web dashboard started at %s", dashboard_url)
@@ -214,12 +248,6 @@ class SerenaAgent:
         self._exposed_tools = AvailableTools([t for t in self._all_tools.values() if self._base_tool_set.includes_name(t.get_name())])
         log.info(f"Number of exposed tools: {len(self._exposed_tools)}")
 
-        # create executor for starting the language server and running tools in another thread
-        # This executor is used to achieve linear task execution, so it is important to use a single-threaded executor.
-        self._task_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SerenaAgentExecutor")
-        self._task_executor_lock = threading.Lock()
-        self._task_executor_task_index = 1
-
         # Initialize the prompt factory
         self.prompt_factory = SerenaPromptFactory()
         self._project_activation_callback = project_activation_callback
@@ -227,7 +255,7 @@ class SerenaAgent:
         # project-specific instances, which will be initialized upon project activation
         self._active_project: Project | None = None
         self._active_project_root: str | None = None
-        self.language_server: SolidLanguageServer | None = None
+        self.language_server_pool: LanguageServerPool | None = None
         self.memories_manager: MemoriesManager | None = None
         self.lines_read: LinesRead | None = None
 
@@ -283,16 +311,21 @@ class SerenaAgent:
                 tool_inclusion_definitions.append(project.project_config)
         return tool_inclusion_definitions
 
-    def record_tool_usage_if_enabled(self, input_kwargs: dict, tool_result: str | dict, tool: Tool) -> None:
+    def record_tool_usage_if_enabled(self, input_kwargs: dict, tool_result: str | dict, tool: Tool, latency: float | None = None) -> None:
         """
         Record the usage of a tool with the given input and output strings if tool usage statistics recording is enabled.
+
+        :param input_kwargs: the tool's input arguments
+        :param tool_result: the tool's result
+        :param tool: the tool
+        :param latency: the duration of the tool's execution in seconds, if known
         """
         tool_name = tool.get_name()
         if self._tool_usage_stats is not None:
             input_str = str(input_kwargs)
             output_str = str(tool_result)
             log.debug(f"Recording tool usage for tool '{tool_name}'")
-            self._tool_usage_stats.record_tool_usage(tool_name, input_str, output_str)
+            self._tool_usage_stats.record_tool_usage(tool_name, input_str, output_str, latency=latency)
         else:
             log.debug(f"Tool usage statistics recording is disabled, not recording usage of '{tool_name}'.")
 
@@ -396,17 +429,23 @@ class SerenaAgent:
 
         log.info(f"Active tools ({len(self._active_tools)}): {', '.join(self.get_active_tool_names())}")
 
-    def issue_task(self, task: Callable[[], Any], name: str | None = None) -> Future:
+    def issue_task(self, task: Callable[[], Any], name: str | None = None, read_only: bool = False) -> Future:
         """
         Issue a task to the executor for asynchronous execution.
-        It is ensured that tasks are executed in the order they are issued, one after another.
+        It is ensured that tasks are started in the order they are issued. Tasks which are not read-only are executed
+        exclusively, i.e. they start only after all previously issued tasks have completed, and no other task runs
+        at the same time.
 
         :param task: the task to execute
-        :param name: the name of the task for logging purposes; if None, use the task function's name
+        :param name: the name of the task for logging purposes (and for the collection of queue statistics);
+            if None, use the task function's name
+        :param read_only: whether the task only reads data (without changing files or the state of the agent),
+            such that it may run concurrently with other read-only tasks
         :return: a Future object representing the execution of the task
         """
+        name = name or task.__name__
         with self._task_executor_lock:
-            task_name = f"Task-{self._task_executor_task_index}[{name or task.__name__}]"
+            task_name = f"Task-{self._task_executor_task_index}[{name}]"
             self._task_executor_task_index += 1
 
             def task_execution_wrapper() -> Any:
@@ -414,7 +453,13 @@ class SerenaAgent:
                     return task()
 
             log.info(f"Scheduling {task_name}")
-            return self._task_executor.submit(task_execution_wrapper)
+            return self._task_executor.submit(task_execution_wrapper, name=name, read_only=read_only)
+
+    def get_task_queue_stats(self) -> dict[str, TaskQueueStats]:
+        """
+        :return: a mapping from task names (the class names in the case of tools) to the queue statistics of the tasks
+        """
+        return self._task_executor.get_stats()
 
     def execute_task(self, task: Callable[[], T]) -> T:
         """
@@ -435,6 +480,9 @@ class SerenaAgent:
 
     def _activate_project(self, project: Project) -> None:
         log.info(f"Activating {project.project_name} at {project.project_root}")
+        if self._active_project is not None:
+            self._active_project.remove_file_change_listener(self._on_project_files_changed)
+            self._active_project.stop_file_watcher()
         self._active_project = project
         self._update_active_tools()
 
@@ -443,13 +491,23 @@ class SerenaAgent:
         self.lines_read = LinesRead()
 
         def init_language_server() -> None:
-            # start the language server
-            with LogTime("Language server initialization", logger=log):
-                self.reset_language_server()
-                assert self.language_server is not None
-
-        # initialize the language server in the background (if in language server mode)
+            try:
+                # start the language server
+                with LogTime("Language server initialization", logger=log):
+                    self.ensure_language_server_running()
+            finally:
+                # start watching the project's files (which requires scanning the project tree), unless another project
+                # was activated in the meantime
+                if self.serena_config.watch_project_files and project is self._active_project:
+                    try:
+                        project.start_file_watcher()
+                    except Exception as e:
+                        log.error(f"Could not start watching the files of project {project.project_name}: {e}", exc_info=e)
+
+        # initialize the language server and the file watcher in the background (if in language server mode)
         if self.is_using_language_server():
+            if self.serena_config.watch_project_files:
+                project.add_file_change_listener(self._on_project_files_changed, on_unknown_changes=self._on_unknown_project_file_changes)
             self.issue_task(init_language_server)
 
         if self._project_activation_callback is not None:
@@ -557,12 +615,23 @@ class SerenaAgent:
 
         return result_str
 
+    @property
+    def language_server(self) -> SolidLanguageServer | None:
+        """
+        :return: the language server for the main language of the active project if it is running, None otherwise
+        """
+        pool = self.language_server_pool
+        if pool is None:
+            return None
+        return pool.get_language_server_if_running(pool.main_language)
+
     def is_language_server_running(self) -> bool:
-        return self.language_server is not None and self.language_server.is_running()
+        return self.language_server is not None
 
-    def reset_language_server(self) -> None:
+    def _create_language_server_pool(self, project: Project) -> LanguageServerPool:
         """
-        Starts/resets the language server for the current project
+        Creates the pool of language servers for the given project, reattaching to the project's language servers
+        if they are still running (e.g. because the project was active before).
         """
         tool_timeout = self.serena_config.tool_timeout
         if tool_timeout is None or tool_timeout < 0:
@@ -572,26 +641,70 @@ class SerenaAgent:
                 raise ValueError(f"Tool timeout must be at least 10 seconds, but is {tool_timeout} seconds")
             ls_timeout = tool_timeout - 5  # the LS timeout is for a single call, it should be smaller than the tool timeout
 
-        # stop the language server if it is running
-        if self.is_language_server_running():
-            assert self.language_server is not None
-            log.info(f"Stopping the current language server at {self.language_server.repository_root_path} ...")
-            self.language_server.stop()
-            self.language_server = None
-
-        # instantiate and start the language server
-        assert self._active_project is not None
-        self.language_server = self._active_project.create_language_server(
-            log_level=self.serena_config.log_level,
-            ls_timeout=ls_timeout,
-            trace_lsp_communication=self.serena_config.trace_lsp_communication,
+        language_server_pool = LanguageServerPool(
+            project.project_root,
+            project.languages,
+            lambda language: project.create_language_server(
+                log_level=self.serena_config.log_level,
+                ls_timeout=ls_timeout,
+                trace_lsp_communication=self.serena_config.trace_lsp_communication,
+                language=language,
+                # without a file watcher, the language servers are not notified of changes to other files
+                file_changes_reported=self.serena_config.watch_project_files,
+            ),
+            manager=self._language_server_manager,
         )
-        log.info(f"Starting the language server for {self._active_project.project_name}")
-        self.language_server.start()
-        if not self.language_server.is_running():
-            raise RuntimeError(
-                f"Failed to start the language server for {self._active_project.project_name} at {self._active_project.project_root}"
-            )
+        # the language server of the active project's main language is never stopped by the manager
+        self._language_server_manager.set_pinned_keys([language_server_pool.get_key(project.language)])
+        for language, language_server in language_server_pool.get_running_language_servers().items():
+            log.info(f"Reattaching to the running {language.value} language server for {project.project_name}")
+            # the project configuration may have changed in the meantime
+            language_server.set_ignored_paths(project.ignored_patterns)
+            # files may have changed while the project was inactive (and its files were not watched)
+            language_server.discard_memoized_responses()
+            language_server.discard_verified_source_files()
+        return language_server_pool
+
+    def reset_language_server(self) -> None:
+        """
+        Starts/restarts the language servers for the current project: Running language servers of the project are stopped,
+        and the language server for the project's main language is started anew, while the ones for additional languages
+        are started on demand.
+        """
+        with self._language_server_lock:
+            # stop the language servers if they are running
+            if self.language_server_pool is not None:
+                log.info("Stopping the current language servers ...")
+                self.language_server_pool.stop_all()
+                self.language_server_pool = None
+            self.ensure_language_server_running()
+
+    def ensure_language_server_running(self) -> None:
+        """
+        Starts the language server for the current project's main language if it is not running (e.g. because it terminated
+        or because the project was just activated), reusing the language server if it is still running from a previous
+        activation of the project.
+        Language servers which terminated unexpectedly are restarted with an exponential backoff (see `LanguageServerManager`).
+        As tools may be executed concurrently, the check and the start are atomic, such that the language server is
+        started only once.
+        """
+        with self._language_server_lock:
+            project = self._active_project
+            assert project is not None
+            language_server_pool = self.language_server_pool
+            if (
+                language_server_pool is None
+                or language_server_pool.repository_root != project.project_root
+                or language_server_pool.languages != project.languages
+            ):
+                language_server_pool = self._create_language_server_pool(project)
+                self.language_server_pool = language_server_pool
+            if not self.is_language_server_running():
+                log.info(f"Starting the language server for {project.project_name}")
+                try:
+                    language_server_pool.get_language_server(project.language)
+                except RuntimeError as e:
+                    raise RuntimeError(f"Failed to start the language server for {project.project_name} at {project.project_root}") from e
 
     def get_tool(self, tool_class: type[TTool]) -> TTool:
         return self._all_tools[tool_class]  # type: ignore
@@ -603,6 +716,125 @@ class SerenaAgent:
         assert self.lines_read is not None
         self.lines_read.invalidate_lines_read(relative_path)
 
+    def _on_project_files_changed(self, relative_paths: set[str]) -> None:
+        """
+        Handles changes to files of the active project which were reported by the project's file watcher:
+        The cached information on the files is discarded (in an exclusive task), and the symbols of changed source files
+        are re-indexed in the background, in small read-only tasks that are issued one after another, such that tool executions
+        wait for at most one of them.
+        """
+        project = self._active_project
+        if project is None:
+            return
+        log.info(f"Detected changes to {len(relative_paths)} files in project {project.project_name}")
+        gitignore_changed = any(os.path.basename(p) == ".gitignore" for p in relative_paths)
+
+        def is_source_file(relative_path: str) -> bool:
+            try:
+                return not project.is_ignored_path(relative_path, ignore_non_source_files=True)
+            except FileNotFoundError:
+                return False
+
+        def update_after_file_changes() -> None:
+            # the running language servers are leased, such that they are not stopped while being updated
+            with LanguageServerLeases():
+                files_to_reindex = invalidate_cached_information()
+            if files_to_reindex:
+                issue_reindexing_task(files_to_reindex)
+
+        def invalidate_cached_information() -> list[str]:
+            """
+            :return: the source files to re-index
+            """
+            if project is not self._active_project:
+                return []
+            if self.lines_read is not None:
+                for relative_path in relative_paths:
+                    self.lines_read.invalidate_lines_read(relative_path)
+            language_server_pool = self.language_server_pool
+            if language_server_pool is None:
+                return []
+            running_language_servers = language_server_pool.get_running_language_servers()
+            for language_server in running_language_servers.values():
+                if gitignore_changed:
+                    language_server.set_ignored_paths(project.ignored_patterns)
+                language_server.invalidate_document_symbols(relative_paths)
+            # only files of languages whose language servers are running are re-indexed
+            files_to_reindex = sorted(
+                p for p in relative_paths if language_server_pool.get_language_of_file(p) in running_language_servers and is_source_file(p)
+            )
+            if len(files_to_reindex) > self.MAX_FILES_TO_REINDEX_AFTER_CHANGE:
+                log.info(
+                    f"Re-indexing only {self.MAX_FILES_TO_REINDEX_AFTER_CHANGE} of {len(files_to_reindex)} changed files; "
+                    "the remaining ones will be indexed on demand"
+                )
+                files_to_reindex = files_to_reindex[: self.MAX_FILES_TO_REINDEX_AFTER_CHANGE]
+            return files_to_reindex
+
+        def issue_reindexing_task(files_to_reindex: list[str]) -> None:
+            chunk = files_to_reindex[: self.REINDEX_CHUNK_SIZE]
+            remaining_files = files_to_reindex[self.REINDEX_CHUNK_SIZE :]
+
+            def reindex_files() -> None:
+                if project is not self._active_project:
+                    return
+                language_server_pool = self.language_server_pool
+                if language_server_pool is None:
+                    return
+                with LanguageServerLeases():
+                    for relative_path in chunk:
+                        language = language_server_pool.get_language_of_file(relative_path)
+                        assert language is not None
+                        # language servers which were stopped in the meantime are not started for re-indexing
+                        language_server = language_server_pool.get_language_server_if_running(language)
+                        if language_server is None:
+                            continue
+                        try:
+                            language_server.request_document_symbols(relative_path)
+                        except Exception as e:
+                            log.warning(f"Could not re-index {relative_path}: {e}")
+                if remaining_files:
+                    issue_reindexing_task(remaining_files)
+
+            self.issue_task(reindex_files, name="ReindexFilesAfterFileChanges", read_only=True)
+
+        self.issue_task(update_after_file_changes, name="UpdateLanguageServerAfterFileChanges")
+
+    def _on_unknown_project_file_changes(self) -> None:
+        """
+        Handles the case where changes to files of the active project may have been missed by the project's file watcher
+        (e.g. because events were lost or because the watcher failed): All information which relies on changes being reported
+        is discarded, and a failed watcher is restarted.
+        """
+        project = self._active_project
+        if project is None:
+            return
+        log.warning(
+            f"Changes to files in project {project.project_name} may have been missed; discarding the information that depends on them"
+        )
+
+        def update_after_unknown_changes() -> None:
+            if project is not self._active_project:
+                return
+            # the watcher is restarted first, such that no changes are missed after the information has been discarded
+            if not project.is_file_watcher_running():
+                log.info(f"Restarting the file watcher of project {project.project_name}")
+                project.stop_file_watcher()
+                try:
+                    project.start_file_watcher()
+                except Exception as e:
+                    log.error(f"Could not restart watching the files of project {project.project_name}: {e}", exc_info=e)
+            self.lines_read = LinesRead()
+            language_server_pool = self.language_server_pool
+            if language_server_pool is not None:
+                with LanguageServerLeases():
+                    for language_server in language_server_pool.get_running_language_servers().values():
+                        language_server.set_ignored_paths(project.ignored_patterns)
+                        language_server.discard_verified_source_files()
+                        language_server.discard_memoized_responses()
+
+        self.issue_task(update_after_unknown_changes, name="UpdateLanguageServerAfterUnknownFileChanges")
+
     def __del__(self) -> None:
         """
         Destructor to clean up the language server instance and GUI logger
@@ -610,11 +842,10 @@ class SerenaAgent:
         if not hasattr(self, "_is_initialized"):
             return
         log.info("SerenaAgent is shutting down ...")
-        if self.is_language_server_running():
-            log.info("Stopping the language server ...")
-            assert self.language_server is not None
-            self.language_server.save_cache()
-            self.language_server.stop()
+        if self._active_project is not None:
+            self._active_project.stop_file_watcher()
+        log.info("Stopping the language servers ...")
+        self._language_server_manager.stop_all()
         if self._gui_log_viewer:
             log.info("Stopping the GUI log window ...")
             self._gui_log_viewer.stop()
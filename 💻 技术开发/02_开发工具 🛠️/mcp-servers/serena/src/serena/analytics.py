@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import logging
+import math
+import queue
+import random
 import threading
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from copy import copy
-from dataclasses import asdict, dataclass
+from collections import defaultdict, deque
+from copy import deepcopy
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import TYPE_CHECKING
 
-from anthropic.types import MessageParam, MessageTokensCount
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from anthropic.types import MessageTokensCount
 
 log = logging.getLogger(__name__)
 
@@ -22,6 +26,49 @@ class TokenCountEstimator(ABC):
         This is an abstract method that should be implemented by subclasses.
         """
 
+    def estimate_token_counts(self, texts: list[str]) -> list[int]:
+        """
+        Estimate the numbers of tokens in the given texts.
+        Subclasses may override this method in order to process the texts more efficiently than one at a time.
+        """
+        return [self.estimate_token_count(text) for text in texts]
+
+
+class ApproximateTokenCountEstimator(TokenCountEstimator):
+    """
+    A cheap approximation of the token count based on the number of characters, assuming a fixed number of characters per token.
+    The ratio can be calibrated using the token counts of a more accurate estimator.
+    """
+
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        """
+        :param chars_per_token: the initial number of characters per token, which is used until calibration samples are added
+        """
+        self._chars_per_token = chars_per_token
+        self._num_calibration_chars = 0
+        self._num_calibration_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def chars_per_token(self) -> float:
+        return self._chars_per_token
+
+    def add_calibration_sample(self, text: str, token_count: int) -> None:
+        """
+        Calibrates the number of characters per token, using the (accurate) token count of the given text.
+        The ratio is determined over all calibration samples added so far.
+        """
+        with self._lock:
+            self._num_calibration_chars += len(text)
+            self._num_calibration_tokens += token_count
+            if self._num_calibration_chars > 0 and self._num_calibration_tokens > 0:
+                self._chars_per_token = self._num_calibration_chars / self._num_calibration_tokens
+
+    def estimate_token_count(self, text: str) -> int:
+        return math.ceil(len(text) / self._chars_per_token)
+
 
 class TiktokenCountEstimator(TokenCountEstimator):
     """
@@ -42,6 +89,9 @@ class TiktokenCountEstimator(TokenCountEstimator):
     def estimate_token_count(self, text: str) -> int:
         return len(self._encoding.encode(text))
 
+    def estimate_token_counts(self, texts: list[str]) -> list[int]:
+        return [len(tokens) for tokens in self._encoding.encode_batch(texts)]
+
 
 class AnthropicTokenCount(TokenCountEstimator):
     """
@@ -53,6 +103,7 @@ class AnthropicTokenCount(TokenCountEstimator):
 
     def __init__(self, model_name: str = "claude-sonnet-4-20250514", api_key: str | None = None):
         import anthropic
+        from dotenv import load_dotenv
 
         self._model_name = model_name
         if api_key is None:
@@ -60,6 +111,8 @@ class AnthropicTokenCount(TokenCountEstimator):
         self._anthropic_client = anthropic.Anthropic(api_key=api_key)
 
     def _send_count_tokens_request(self, text: str) -> MessageTokensCount:
+        from anthropic.types import MessageParam
+
         return self._anthropic_client.messages.count_tokens(
             model=self._model_name,
             messages=[MessageParam(role="user", content=text)],
@@ -75,6 +128,7 @@ _registered_token_estimator_instances_cache: dict[RegisteredTokenCountEstimator,
 class RegisteredTokenCountEstimator(Enum):
     TIKTOKEN_GPT4O = "TIKTOKEN_GPT4O"
     ANTHROPIC_CLAUDE_SONNET_4 = "ANTHROPIC_CLAUDE_SONNET_4"
+    CHAR_COUNT = "CHAR_COUNT"
 
     @classmethod
     def get_valid_names(cls) -> list[str]:
@@ -89,6 +143,8 @@ class RegisteredTokenCountEstimator(Enum):
                 return TiktokenCountEstimator(model_name="gpt-4o")
             case RegisteredTokenCountEstimator.ANTHROPIC_CLAUDE_SONNET_4:
                 return AnthropicTokenCount(model_name="claude-sonnet-4-20250514")
+            case RegisteredTokenCountEstimator.CHAR_COUNT:
+                return ApproximateTokenCountEstimator()
             case _:
                 raise ValueError(f"Unknown token count estimator: {self.value}")
 
@@ -100,16 +156,52 @@ class RegisteredTokenCountEstimator(Enum):
         return estimator_instance
 
 
+@dataclass
+class _RecordedToolCall:
+    tool_name: str
+    input_str: str
+    output_str: str
+    generation: int
+
+
 class ToolUsageStats:
     """
     A class to record and manage tool usage statistics.
+    The numbers of calls and the latencies are recorded immediately, while the token counts are determined asynchronously
+    (in batches) by a background thread, such that the (potentially expensive) token count estimation does not delay the
+    tool calls.
     """
 
-    def __init__(self, token_count_estimator: RegisteredTokenCountEstimator = RegisteredTokenCountEstimator.TIKTOKEN_GPT4O):
+    MAX_NUM_LATENCIES = 1000
+    """the maximum number of (most recent) latencies per tool from which the latency percentiles are computed"""
+    MAX_BATCH_SIZE = 64
+    """the maximum number of tool calls for which token counts are estimated in one batch"""
+
+    def __init__(
+        self,
+        token_count_estimator: RegisteredTokenCountEstimator = RegisteredTokenCountEstimator.TIKTOKEN_GPT4O,
+        sampling_rate: float = 1.0,
+    ):
+        """
+        :param token_count_estimator: the estimator with which to count tokens
+        :param sampling_rate: the fraction of tool calls (between 0 and 1) whose tokens are counted using the token count estimator;
+            the tokens of all other calls are approximated based on the number of characters, using a ratio that is calibrated on the
+            sampled calls
+        """
+        if not 0.0 <= sampling_rate <= 1.0:
+            raise ValueError(f"The sampling rate must be between 0 and 1, got {sampling_rate}")
         self._token_count_estimator = token_count_estimator.load_estimator()
         self._token_estimator_name = token_count_estimator.value
+        self._approximate_token_count_estimator = ApproximateTokenCountEstimator()
+        self._sampling_rate = sampling_rate
+        self._random = random.Random()
         self._tool_stats: dict[str, ToolUsageStats.Entry] = defaultdict(ToolUsageStats.Entry)
         self._tool_stats_lock = threading.Lock()
+        self._generation = 0
+        """incremented whenever the statistics are cleared, such that pending calls from before are disregarded"""
+        self._queue: queue.Queue[_RecordedToolCall] = queue.Queue()
+        self._worker_thread = threading.Thread(target=self._process_queue, name="ToolUsageStats", daemon=True)
+        self._worker_thread.start()
 
     @property
     def token_estimator_name(self) -> str:
@@ -123,36 +215,126 @@ class ToolUsageStats:
         num_times_called: int = 0
         input_tokens: int = 0
         output_tokens: int = 0
+        latencies: deque[float] = field(default_factory=lambda: deque(maxlen=ToolUsageStats.MAX_NUM_LATENCIES))
+        """the latencies (in seconds) of the most recent calls"""
 
-        def update_on_call(self, input_tokens: int, output_tokens: int) -> None:
+        def update_on_call(self, latency: float | None) -> None:
             """
-            Update the entry with the number of tokens used for a single call.
+            Update the entry for a single call.
             """
             self.num_times_called += 1
+            if latency is not None:
+                self.latencies.append(latency)
+
+        def update_token_counts(self, input_tokens: int, output_tokens: int) -> None:
+            """
+            Update the entry with the number of tokens used for a single call.
+            """
             self.input_tokens += input_tokens
             self.output_tokens += output_tokens
 
-    def _estimate_token_count(self, text: str) -> int:
-        return self._token_count_estimator.estimate_token_count(text)
+        def get_latency_percentile(self, percentile: float) -> float:
+            """
+            :param percentile: the percentile (between 0 and 100)
+            :return: the given percentile (nearest rank) of the recent latencies in seconds, or 0 if there are none
+            """
+            if not self.latencies:
+                return 0.0
+            sorted_latencies = sorted(self.latencies)
+            rank = max(1, math.ceil(percentile / 100 * len(sorted_latencies)))
+            return sorted_latencies[rank - 1]
+
+        def to_dict(self) -> dict[str, int | float]:
+            return {
+                "num_times_called": self.num_times_called,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "latency_p50": self.get_latency_percentile(50),
+                "latency_p95": self.get_latency_percentile(95),
+                "latency_p99": self.get_latency_percentile(99),
+            }
+
+    def _estimate_token_counts(self, texts: list[str]) -> list[int]:
+        """
+        Estimates the token counts of the given texts, using the token count estimator for a sample of the texts and
+        the (calibrated) approximation for all others.
+        """
+        token_counts = [0] * len(texts)
+        sampled_indices = []
+        for i, text in enumerate(texts):
+            if self._sampling_rate >= 1.0 or self._random.random() < self._sampling_rate:
+                sampled_indices.append(i)
+        if sampled_indices:
+            sampled_texts = [texts[i] for i in sampled_indices]
+            try:
+                sampled_token_counts = self._token_count_estimator.estimate_token_counts(sampled_texts)
+            except Exception as e:
+                log.error(f"Error estimating token counts, using approximations instead: {e}")
+                sampled_indices = []
+            else:
+                for i, text, token_count in zip(sampled_indices, sampled_texts, sampled_token_counts, strict=True):
+                    token_counts[i] = token_count
+                    self._approximate_token_count_estimator.add_calibration_sample(text, token_count)
+        sampled_index_set = set(sampled_indices)
+        for i, text in enumerate(texts):
+            if i not in sampled_index_set:
+                token_counts[i] = self._approximate_token_count_estimator.estimate_token_count(text)
+        return token_counts
+
+    def _process_queue(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.MAX_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                texts = [text for call in batch for text in (call.input_str, call.output_str)]
+                token_counts = self._estimate_token_counts(texts)
+                with self._tool_stats_lock:
+                    for i, call in enumerate(batch):
+                        if call.generation == self._generation:
+                            self._tool_stats[call.tool_name].update_token_counts(token_counts[2 * i], token_counts[2 * i + 1])
+            except Exception as e:
+                log.error(f"Error recording token counts of tool calls: {e}", exc_info=e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
 
     def get_stats(self, tool_name: str) -> ToolUsageStats.Entry:
         """
         Get (a copy of) the current usage statistics for a specific tool.
         """
         with self._tool_stats_lock:
-            return copy(self._tool_stats[tool_name])
+            return deepcopy(self._tool_stats[tool_name])
+
+    def record_tool_usage(self, tool_name: str, input_str: str, output_str: str, latency: float | None = None) -> None:
+        """
+        Records a call of the given tool.
+        The call is counted immediately, while the token counts are added asynchronously (see `wait_until_recorded`).
 
-    def record_tool_usage(self, tool_name: str, input_str: str, output_str: str) -> None:
-        input_tokens = self._estimate_token_count(input_str)
-        output_tokens = self._estimate_token_count(output_str)
+        :param tool_name: the name of the tool
+        :param input_str: the tool's input
+        :param output_str: the tool's output
+        :param latency: the duration of the call in seconds, if known
+        """
         with self._tool_stats_lock:
-            entry = self._tool_stats[tool_name]
-            entry.update_on_call(input_tokens, output_tokens)
+            self._tool_stats[tool_name].update_on_call(latency)
+            generation = self._generation
+        self._queue.put(_RecordedToolCall(tool_name=tool_name, input_str=input_str, output_str=output_str, generation=generation))
+
+    def wait_until_recorded(self) -> None:
+        """
+        Waits until the token counts of all tool calls recorded so far have been added to the statistics.
+        """
+        self._queue.join()
 
-    def get_tool_stats_dict(self) -> dict[str, dict[str, int]]:
+    def get_tool_stats_dict(self) -> dict[str, dict[str, int | float]]:
         with self._tool_stats_lock:
-            return {name: asdict(entry) for name, entry in self._tool_stats.items()}
+            return {name: entry.to_dict() for name, entry in self._tool_stats.items()}
 
     def clear(self) -> None:
         with self._tool_stats_lock:
             self._tool_stats.clear()
+            self._generation += 1
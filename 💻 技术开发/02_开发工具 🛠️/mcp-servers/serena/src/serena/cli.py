@@ -28,6 +28,7 @@ from serena.constants import (
     USER_CONTEXT_YAMLS_DIR,
     USER_MODE_YAMLS_DIR,
 )
+from serena.indexing import ProjectIndexer
 from serena.mcp import SerenaMCPFactory, SerenaMCPFactorySingleProcess
 from serena.project import Project
 from serena.tools import FindReferencingSymbolsTool, FindSymbolTool, GetSymbolsOverviewTool, SearchForPatternTool, ToolRegistry
@@ -435,8 +436,15 @@ class ProjectCommands(AutoRegisteringGroup):
         help="Log level for indexing.",
     )
     @click.option("--timeout", type=float, default=10, help="Timeout for indexing a single file.")
-    def index(project: str, log_level: str, timeout: float) -> None:
-        ProjectCommands._index_project(project, log_level, timeout=timeout)
+    @click.option("--workers", type=click.IntRange(min=1), default=1, help="Number of language servers to run in parallel.")
+    @click.option(
+        "--checkpoint-interval",
+        type=click.IntRange(min=1),
+        default=100,
+        help="Number of files after which each worker saves the symbols it indexed (interrupted runs resume from there).",
+    )
+    def index(project: str, log_level: str, timeout: float, workers: int, checkpoint_interval: int) -> None:
+        ProjectCommands._index_project(project, log_level, timeout=timeout, num_workers=workers, checkpoint_interval=checkpoint_interval)
 
     @staticmethod
     @click.command("index-deprecated", help="Deprecated alias for 'serena project index'.")
@@ -448,37 +456,42 @@ class ProjectCommands(AutoRegisteringGroup):
         ProjectCommands._index_project(project, log_level, timeout=timeout)
 
     @staticmethod
-    def _index_project(project: str, log_level: str, timeout: float) -> None:
+    def _index_project(project: str, log_level: str, timeout: float, num_workers: int = 1, checkpoint_interval: int = 100) -> None:
         lvl = logging.getLevelNamesMapping()[log_level.upper()]
         logging.configure(level=lvl)
         proj = Project.load(os.path.abspath(project))
         click.echo(f"Indexing symbols in project {project}…")
-        ls = proj.create_language_server(log_level=lvl, ls_timeout=timeout)
-        log_file = os.path.join(project, ".serena", "logs", "indexing.txt")
+        indexer = ProjectIndexer(proj, log_level=lvl, ls_timeout=timeout, num_workers=num_workers, checkpoint_interval=checkpoint_interval)
+        log_dir = os.path.join(project, ".serena", "logs")
+        log_file = os.path.join(log_dir, "indexing.txt")
+        timings_file = os.path.join(log_dir, "indexing_timings.csv")
+
+        files, num_up_to_date_files = indexer.find_files_to_index()
+        if num_up_to_date_files > 0:
+            click.echo(f"Skipping {num_up_to_date_files} files whose symbols are already up to date")
+        # the progress bar shows the number of files per second and the estimated remaining time
+        with tqdm(total=len(files), desc="Indexing", unit="file") as progress:
+            result = indexer.index(files, on_file_indexed=lambda _: progress.update())
+        click.echo(f"Symbols saved to {indexer.cache_path}")
+        click.echo(f"Indexed {len(result.file_results)} files in {result.duration:.1f}s ({result.files_per_second:.1f} files/s)")
 
-        collected_exceptions: list[Exception] = []
-        files_failed = []
-        with ls.start_server():
-            files = proj.gather_source_files()
-            for i, f in enumerate(tqdm(files, desc="Indexing")):
-                try:
-                    ls.request_document_symbols(f, include_body=False)
-                    ls.request_document_symbols(f, include_body=True)
-                except TimeoutError as e:
-                    log.error(f"Failed to index {f}, continuing.")
-                    collected_exceptions.append(e)
-                    files_failed.append(f)
-                if (i + 1) % 10 == 0:
-                    ls.save_cache()
-            ls.save_cache()
-        click.echo(f"Symbols saved to {ls.cache_path}")
-        if len(files_failed) > 0:
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+        if result.file_results:
+            result.write_timings(timings_file)
+            slowest_file_results = result.get_slowest_file_results(5)
+            click.echo("Slowest files:")
+            for file_result in slowest_file_results:
+                click.echo(f"  {file_result.duration:8.2f}s  {file_result.relative_path}")
+            click.echo(f"Timings of all files saved to {timings_file}")
+        failed_file_results = result.failed_file_results
+        if len(failed_file_results) > 0:
             with open(log_file, "w") as f:
-                for file, exception in zip(files_failed, collected_exceptions, strict=True):
-                    f.write(f"{file}\n")
-                    f.write(f"{exception}\n")
-            click.echo(f"Failed to index {len(files_failed)} files, see:\n{log_file}")
+                for file_result in failed_file_results:
+                    f.write(f"{file_result.relative_path}\n")
+                    f.write(f"{file_result.error}\n")
+            click.echo(f"Failed to index {len(failed_file_results)} files, see:\n{log_file}")
+        if result.num_unprocessed_files > 0:
+            click.echo(f"{result.num_unprocessed_files} files were not indexed; run the command again to resume indexing.")
 
     @staticmethod
     @click.command("is_ignored_path", help="Check if a path is ignored by the project configuration.")
@@ -518,7 +531,6 @@ class ProjectCommands(AutoRegisteringGroup):
         ls = proj.create_language_server()
         with ls.start_server():
             symbols, _ = ls.request_document_symbols(file, include_body=False)
-            ls.request_document_symbols(file, include_body=True)
             if verbose:
                 click.echo(f"Symbols in file '{file}':")
                 for symbol in symbols:
@@ -39,6 +39,9 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 T = TypeVar("T")
 DEFAULT_TOOL_TIMEOUT: float = 240
+DEFAULT_MAX_CONCURRENT_READ_ONLY_TOOLS = 4
+DEFAULT_MAX_RUNNING_LANGUAGE_SERVERS = 3
+DEFAULT_LANGUAGE_SERVER_IDLE_TIMEOUT = 1800.0
 
 
 @singleton
@@ -52,6 +55,10 @@ class SerenaPaths:
         """
         the path to the user's Serena configuration directory, which is typically ~/.serena
         """
+        self.prompt_template_bytecode_cache_dir: str = os.path.join(self.user_config_dir, "cache", "prompt_templates")
+        """
+        the directory in which the bytecode of compiled prompt templates is persisted
+        """
 
     def get_next_log_file_path(self, prefix: str) -> str:
         """
@@ -162,6 +169,8 @@ def is_running_in_docker() -> bool:
 class ProjectConfig(ToolInclusionDefinition, ToStringMixin):
     project_name: str
     language: Language
+    additional_languages: list[Language] = field(default_factory=list)
+    """further languages of the project, for which language servers are started on demand (in addition to the one for `language`)"""
     ignored_paths: list[str] = field(default_factory=list)
     read_only: bool = False
     ignore_all_files_in_gitignore: bool = True
@@ -220,24 +229,41 @@ class ProjectConfig(ToolInclusionDefinition, ToStringMixin):
     def rel_path_to_project_yml(cls) -> str:
         return os.path.join(SERENA_MANAGED_DIR_NAME, cls.SERENA_DEFAULT_PROJECT_FILE)
 
-    @classmethod
-    def _from_dict(cls, data: dict[str, Any]) -> Self:
-        """
-        Create a ProjectConfig instance from a configuration dictionary
-        """
-        language_str = data["language"].lower()
-        project_name = data["project_name"]
+    @staticmethod
+    def _parse_language(language_str: str, project_name: str) -> Language:
+        language_str = language_str.lower()
         # backwards compatibility
         if language_str == "javascript":
             log.warning(f"Found deprecated project language `javascript` in project {project_name}, please change to `typescript`")
             language_str = "typescript"
         try:
-            language = Language(language_str)
+            return Language(language_str)
         except ValueError as e:
-            raise ValueError(f"Invalid language: {data['language']}.\nValid languages are: {[l.value for l in Language]}") from e
+            raise ValueError(f"Invalid language: {language_str}.\nValid languages are: {[l.value for l in Language]}") from e
+
+    @property
+    def languages(self) -> list[Language]:
+        """
+        :return: all languages of the project, starting with the main language
+        """
+        return [self.language, *self.additional_languages]
+
+    @classmethod
+    def _from_dict(cls, data: dict[str, Any]) -> Self:
+        """
+        Create a ProjectConfig instance from a configuration dictionary
+        """
+        project_name = data["project_name"]
+        language = cls._parse_language(data["language"], project_name)
+        additional_languages = []
+        for additional_language_str in data.get("additional_languages") or []:
+            additional_language = cls._parse_language(additional_language_str, project_name)
+            if additional_language != language and additional_language not in additional_languages:
+                additional_languages.append(additional_language)
         return cls(
             project_name=project_name,
             language=language,
+            additional_languages=additional_languages,
             ignored_paths=data.get("ignored_paths", []),
             excluded_tools=data.get("excluded_tools", []),
             included_optional_tools=data.get("included_optional_tools", []),
@@ -329,6 +355,37 @@ class SerenaConfig(ToolInclusionDefinition, ToStringMixin):
     web_dashboard: bool = True
     web_dashboard_open_on_launch: bool = True
     tool_timeout: float = DEFAULT_TOOL_TIMEOUT
+    max_concurrent_read_only_tools: int = DEFAULT_MAX_CONCURRENT_READ_ONLY_TOOLS
+    """
+    the maximum number of read-only tools (e.g. symbol lookups, file reads and searches) that may be executed concurrently;
+    tools which can edit files are always executed exclusively
+    """
+    max_running_language_servers: int = DEFAULT_MAX_RUNNING_LANGUAGE_SERVERS
+    """
+    the maximum number of language servers that may be running at the same time. Language servers are kept running
+    when another project is activated, such that they can be reused when switching back;
+    the least recently used language servers are stopped when the limit is exceeded
+    """
+    max_language_server_memory_mb: float | None = None
+    """
+    the maximum total memory (in MB) of the running language servers, beyond which the least recently used language servers
+    are stopped (None for no limit); the language server of the active project's main language is never stopped
+    """
+    language_server_idle_timeout: float | None = DEFAULT_LANGUAGE_SERVER_IDLE_TIMEOUT
+    """
+    the time (in seconds) after which language servers which have not been used are stopped (None for no timeout);
+    the language server of the active project's main language is never stopped
+    """
+    watch_project_files: bool = True
+    """
+    whether to watch the files of the active project for external changes (e.g. by editors or git operations),
+    updating the symbol cache of the language server in the background
+    """
+    use_trigram_search_index: bool = False
+    """
+    whether to use a persistent trigram index (stored in the project's cache directory) when searching for patterns,
+    such that files which cannot contain matches are not read
+    """
     loaded_commented_yaml: CommentedMap | None = None
     config_file_path: str | None = None
     """
@@ -350,6 +407,11 @@ class SerenaConfig(ToolInclusionDefinition, ToStringMixin):
     on the first run, which can take some time and require internet access. Others, like the Anthropic ones, may require an API key
     and rate limits may apply.
     """
+    token_count_sampling_rate: float = 1.0
+    """Only relevant if `record_tool_usage` is True; the fraction of tool calls (between 0 and 1) whose tokens are counted
+    with the token count estimator. The tokens of all other calls are approximated based on their number of characters,
+    calibrated on the counted calls, which reduces the overhead of expensive estimators.
+    """
 
     CONFIG_FILE = "serena_config.yml"
     CONFIG_FILE_DOCKER = "serena_config.docker.yml"  # Docker-specific config file; auto-generated if missing, mounted via docker-compose for user customization
@@ -445,7 +507,19 @@ class SerenaConfig(ToolInclusionDefinition, ToStringMixin):
         instance.web_dashboard = loaded_commented_yaml.get("web_dashboard", True)
         instance.web_dashboard_open_on_launch = loaded_commented_yaml.get("web_dashboard_open_on_launch", True)
         instance.tool_timeout = loaded_commented_yaml.get("tool_timeout", DEFAULT_TOOL_TIMEOUT)
+        instance.max_concurrent_read_only_tools = loaded_commented_yaml.get(
+            "max_concurrent_read_only_tools", DEFAULT_MAX_CONCURRENT_READ_ONLY_TOOLS
+        )
+        instance.max_running_language_servers = loaded_commented_yaml.get(
+            "max_running_language_servers", DEFAULT_MAX_RUNNING_LANGUAGE_SERVERS
+        )
+        instance.max_language_server_memory_mb = loaded_commented_yaml.get("max_language_server_memory_mb", None)
+        instance.language_server_idle_timeout = loaded_commented_yaml.get(
+            "language_server_idle_timeout", DEFAULT_LANGUAGE_SERVER_IDLE_TIMEOUT
+        )
         instance.trace_lsp_communication = loaded_commented_yaml.get("trace_lsp_communication", False)
+        instance.watch_project_files = loaded_commented_yaml.get("watch_project_files", True)
+        instance.use_trigram_search_index = loaded_commented_yaml.get("use_trigram_search_index", False)
         instance.excluded_tools = loaded_commented_yaml.get("excluded_tools", [])
         instance.included_optional_tools = loaded_commented_yaml.get("included_optional_tools", [])
         instance.jetbrains = loaded_commented_yaml.get("jetbrains", False)
@@ -453,6 +527,7 @@ class SerenaConfig(ToolInclusionDefinition, ToStringMixin):
         instance.token_count_estimator = loaded_commented_yaml.get(
             "token_count_estimator", RegisteredTokenCountEstimator.TIKTOKEN_GPT4O.name
         )
+        instance.token_count_sampling_rate = loaded_commented_yaml.get("token_count_sampling_rate", 1.0)
 
         # re-save the configuration file if any migrations were performed
         if num_project_migrations > 0:
@@ -11,6 +11,7 @@ from sensai.util import logging
 from serena.analytics import ToolUsageStats
 from serena.constants import SERENA_DASHBOARD_DIR
 from serena.util.logging import MemoryLogHandler
+from serena.util.task_executor import TaskExecutor
 
 log = logging.getLogger(__name__)
 
@@ -18,12 +19,19 @@ log = logging.getLogger(__name__)
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 
+MAX_LOG_POLL_TIMEOUT = 30.0
+"""the maximum time (in seconds) for which a request for log messages may wait for new messages"""
+
+
 class RequestLog(BaseModel):
     start_idx: int = 0
+    timeout: float = 0.0
+    """the time (in seconds) to wait for new messages if there are none (long polling); if 0, respond immediately"""
 
 
 class ResponseLog(BaseModel):
     messages: list[str]
+    start_idx: int
     max_idx: int
 
 
@@ -32,7 +40,11 @@ class ResponseToolNames(BaseModel):
 
 
 class ResponseToolStats(BaseModel):
-    stats: dict[str, dict[str, int]]
+    stats: dict[str, dict[str, int | float]]
+
+
+class ResponseTaskQueueStats(BaseModel):
+    stats: dict[str, dict[str, float]]
 
 
 class SerenaDashboardAPI:
@@ -44,12 +56,14 @@ class SerenaDashboardAPI:
         tool_names: list[str],
         shutdown_callback: Callable[[], None] | None = None,
         tool_usage_stats: ToolUsageStats | None = None,
+        task_executor: TaskExecutor | None = None,
     ) -> None:
         self._memory_log_handler = memory_log_handler
         self._tool_names = tool_names
         self._shutdown_callback = shutdown_callback
         self._app = Flask(__name__)
         self._tool_usage_stats = tool_usage_stats
+        self._task_executor = task_executor
         self._setup_routes()
 
     @property
@@ -93,6 +107,11 @@ class SerenaDashboardAPI:
             self._clear_tool_stats()
             return {"status": "cleared"}
 
+        @self._app.route("/get_task_queue_stats", methods=["GET"])
+        def get_task_queue_stats_route() -> dict[str, Any]:
+            result = self._get_task_queue_stats()
+            return result.model_dump()
+
         @self._app.route("/get_token_count_estimator_name", methods=["GET"])
         def get_token_count_estimator_name() -> dict[str, str]:
             estimator_name = self._tool_usage_stats.token_estimator_name if self._tool_usage_stats else "unknown"
@@ -104,9 +123,9 @@ class SerenaDashboardAPI:
             return {"status": "shutting down"}
 
     def _get_log_messages(self, request_log: RequestLog) -> ResponseLog:
-        all_messages = self._memory_log_handler.get_log_messages()
-        requested_messages = all_messages[request_log.start_idx :] if request_log.start_idx <= len(all_messages) else []
-        return ResponseLog(messages=requested_messages, max_idx=len(all_messages) - 1)
+        timeout = min(max(request_log.timeout, 0.0), MAX_LOG_POLL_TIMEOUT)
+        log_messages = self._memory_log_handler.get_log_messages_from(request_log.start_idx, timeout=timeout)
+        return ResponseLog(messages=log_messages.messages, start_idx=log_messages.start_idx, max_idx=log_messages.max_idx)
 
     def _get_tool_names(self) -> ResponseToolNames:
         return ResponseToolNames(tool_names=self._tool_names)
@@ -117,6 +136,12 @@ class SerenaDashboardAPI:
         else:
             return ResponseToolStats(stats={})
 
+    def _get_task_queue_stats(self) -> ResponseTaskQueueStats:
+        if self._task_executor is not None:
+            return ResponseTaskQueueStats(stats={name: entry.to_dict() for name, entry in self._task_executor.get_stats().items()})
+        else:
+            return ResponseTaskQueueStats(stats={})
+
     def _clear_tool_stats(self) -> None:
         if self._tool_usage_stats is not None:
             self._tool_usage_stats.clear()
@@ -0,0 +1,271 @@
+"""
+Indexing of a project's symbols, i.e. populating the persistent document symbols cache of the project's language server
+"""
+
+import csv
+import functools
+import logging
+import math
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from serena.constants import SERENA_LOG_FORMAT
+from serena.project import Project
+from solidlsp import SolidLanguageServer
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class FileIndexingResult:
+    relative_path: str
+    duration: float
+    """the time (in seconds) it took to index the file"""
+    error: str | None = None
+    """the error which occurred while indexing the file (None if it was indexed successfully)"""
+
+
+@dataclass
+class ProjectIndexingResult:
+    file_results: list[FileIndexingResult] = field(default_factory=list)
+    """the results for the files that were processed, in the order in which they were completed"""
+    num_unprocessed_files: int = 0
+    """the number of files which were not processed, because indexing was interrupted or workers terminated unexpectedly"""
+    duration: float = 0.0
+    """the total time (in seconds) it took to index the files"""
+
+    @property
+    def failed_file_results(self) -> list[FileIndexingResult]:
+        return [r for r in self.file_results if r.error is not None]
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.file_results) / self.duration if self.duration > 0 else 0.0
+
+    def get_slowest_file_results(self, n: int) -> list[FileIndexingResult]:
+        return sorted(self.file_results, key=lambda r: r.duration, reverse=True)[:n]
+
+    def write_timings(self, path: str) -> None:
+        """
+        Writes the time it took to index each file to a CSV file, slowest files first.
+
+        :param path: the path of the CSV file
+        """
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "seconds", "error"])
+            for r in self.get_slowest_file_results(len(self.file_results)):
+                writer.writerow([r.relative_path, f"{r.duration:.3f}", r.error or ""])
+
+
+def _create_language_server(project_root: str, log_level: int, ls_timeout: float | None) -> SolidLanguageServer:
+    return Project.load(project_root).create_language_server(log_level=log_level, ls_timeout=ls_timeout)
+
+
+def _index_files(
+    create_language_server: Callable[[], SolidLanguageServer],
+    checkpoint_interval: int,
+    shard_queue: Any,
+    result_queue: Any,
+    stop_event: Any,
+) -> None:
+    """
+    Indexes shards of files (obtained from the shard queue until a None shard is received or the stop event is set),
+    reporting a `FileIndexingResult` for each file to the result queue and None upon termination.
+    This function is run either in a worker process or (if there is a single worker) in a thread of the main process.
+
+    :param create_language_server: the function with which to create the (not yet started) language server to use
+    :param checkpoint_interval: the number of files after which the cache is saved
+    """
+    try:
+        language_server = create_language_server()
+        with language_server.start_server():
+            num_files_since_checkpoint = 0
+            try:
+                while not stop_event.is_set():
+                    shard = shard_queue.get()
+                    if shard is None:
+                        break
+                    for relative_path in shard:
+                        if stop_event.is_set():
+                            break
+                        start_time = time.perf_counter()
+                        error = None
+                        try:
+                            language_server.request_document_symbols(relative_path, include_body=False)
+                        except Exception as e:
+                            log.error(f"Failed to index {relative_path}, continuing: {e}")
+                            error = f"{e.__class__.__name__}: {e}"
+                        result_queue.put(FileIndexingResult(relative_path, time.perf_counter() - start_time, error))
+                        num_files_since_checkpoint += 1
+                        if num_files_since_checkpoint >= checkpoint_interval:
+                            language_server.save_cache()
+                            num_files_since_checkpoint = 0
+            finally:
+                language_server.save_cache()
+    except Exception as e:
+        log.error(f"Indexing worker failed: {e}", exc_info=e)
+    finally:
+        result_queue.put(None)
+
+
+def _index_files_in_worker_process(log_level: int, *args: Any) -> None:
+    # interruptions are handled by the main process, which stops the workers via the stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=log_level, format=SERENA_LOG_FORMAT)
+    _index_files(*args)
+
+
+class ProjectIndexer:
+    """
+    Indexes the symbols of a project's source files by requesting their document symbols, which are thereby saved to the
+    persistent document symbols cache of the project's (main) language server.
+
+    The files are distributed in shards to several workers, each of which runs a language server of its own in a separate process.
+    Workers save the cache after every `checkpoint_interval` files (and whenever they terminate), and files whose symbols are
+    already cached are skipped, such that an interrupted run is resumed from the last checkpoint when indexing again.
+    """
+
+    MAX_SHARD_SIZE = 100
+    """the maximum number of files that are sent to a worker in a single shard"""
+
+    def __init__(
+        self,
+        project: Project,
+        log_level: int = logging.WARNING,
+        ls_timeout: float | None = 10,
+        num_workers: int = 1,
+        checkpoint_interval: int = 100,
+    ) -> None:
+        """
+        :param project: the project to index
+        :param log_level: the log level for the language servers
+        :param ls_timeout: the timeout for indexing a single file
+        :param num_workers: the number of language servers to run in parallel; if it is 1, the language server is run in
+            the current process
+        :param checkpoint_interval: the number of files each worker indexes before saving the cache
+        """
+        if num_workers < 1:
+            raise ValueError(f"The number of workers must be positive, got {num_workers}")
+        self.project = project
+        self.log_level = log_level
+        self.ls_timeout = ls_timeout
+        self.num_workers = num_workers
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        # the language server is not started; it serves to check the cache and to set up the language server's dependencies
+        # before any workers are started
+        self._language_server = project.create_language_server(log_level=log_level, ls_timeout=ls_timeout)
+
+    @property
+    def cache_path(self) -> str:
+        return str(self._language_server.cache_path)
+
+    def find_files_to_index(self) -> tuple[list[str], int]:
+        """
+        :return: a tuple (relative_paths, num_up_to_date_files), where relative_paths contains the project's source files
+            whose symbols are not yet cached (or may have changed) and num_up_to_date_files is the number of source files whose
+            cached symbols are up to date
+        """
+        relative_paths = []
+        num_up_to_date_files = 0
+        for relative_path in self.project.gather_source_files():
+            if self._language_server.is_document_symbols_cache_up_to_date(relative_path):
+                num_up_to_date_files += 1
+            else:
+                relative_paths.append(relative_path)
+        return relative_paths, num_up_to_date_files
+
+    def _create_shards(self, relative_paths: list[str]) -> list[list[str]]:
+        # files are kept in order (such that files of the same directory are processed by the same language server),
+        # but several shards are used per worker to balance the load
+        shard_size = max(1, min(self.MAX_SHARD_SIZE, math.ceil(len(relative_paths) / (4 * self.num_workers))))
+        return [relative_paths[i : i + shard_size] for i in range(0, len(relative_paths), shard_size)]
+
+    def index(
+        self, relative_paths: list[str], on_file_indexed: Callable[[FileIndexingResult], None] | None = None
+    ) -> ProjectIndexingResult:
+        """
+        Indexes the given files. If indexing is interrupted (KeyboardInterrupt), the workers are stopped after
+        saving the files they indexed so far and the partial result is returned (a second interruption is raised).
+
+        :param relative_paths: the relative paths of the files to index (see `find_files_to_index`)
+        :param on_file_indexed: a function to call (in the current thread) whenever a file was processed
+        :return: the result
+        """
+        result = ProjectIndexingResult()
+        if not relative_paths:
+            return result
+        shards = self._create_shards(relative_paths)
+        num_workers = min(self.num_workers, len(shards))
+        workers: list[threading.Thread | multiprocessing.process.BaseProcess]
+        if num_workers == 1:
+            shard_queue: Any = queue.Queue()
+            result_queue: Any = queue.Queue()
+            stop_event: Any = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=_index_files,
+                    args=(lambda: self._language_server, self.checkpoint_interval, shard_queue, result_queue, stop_event),
+                    name="IndexingWorker",
+                )
+            ]
+        else:
+            # use spawn rather than fork, because forking a process with running threads is unsafe
+            mp_context = multiprocessing.get_context("spawn")
+            shard_queue = mp_context.Queue()
+            # shards which remain unprocessed (after an interruption) shall not prevent the current process from exiting
+            shard_queue.cancel_join_thread()
+            result_queue = mp_context.Queue()
+            stop_event = mp_context.Event()
+            create_language_server = functools.partial(_create_language_server, self.project.project_root, self.log_level, self.ls_timeout)
+            workers = [
+                mp_context.Process(
+                    target=_index_files_in_worker_process,
+                    args=(self.log_level, create_language_server, self.checkpoint_interval, shard_queue, result_queue, stop_event),
+                    name=f"IndexingWorker-{i}",
+                )
+                for i in range(num_workers)
+            ]
+        for shard in shards:
+            shard_queue.put(shard)
+        for _ in range(num_workers):
+            shard_queue.put(None)
+
+        log.info(f"Indexing {len(relative_paths)} files in {len(shards)} shards with {num_workers} workers")
+        start_time = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        num_running_workers = num_workers
+        # results are received until all workers have terminated, because worker processes can only terminate
+        # once the results they put into the queue have been received
+        while num_running_workers > 0:
+            try:
+                file_result = result_queue.get(timeout=1)
+            except queue.Empty:
+                # a worker process which was killed cannot report its termination
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+            except KeyboardInterrupt:
+                if stop_event.is_set():
+                    raise
+                log.warning("Indexing was interrupted; stopping the workers after saving the files they indexed")
+                stop_event.set()
+                continue
+            if file_result is None:
+                num_running_workers -= 1
+                continue
+            result.file_results.append(file_result)
+            if on_file_indexed is not None:
+                on_file_indexed(file_result)
+        for worker in workers:
+            worker.join()
+        result.duration = time.perf_counter() - start_time
+        result.num_unprocessed_files = len(relative_paths) - len(result.file_results)
+        return result
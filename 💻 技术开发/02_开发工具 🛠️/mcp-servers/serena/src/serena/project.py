@@ -1,13 +1,18 @@
 import logging
 import os
+import stat
+import threading
+from collections.abc import Callable
 from pathlib import Path
 
 import pathspec
 
-from serena.config.serena_config import DEFAULT_TOOL_TIMEOUT, ProjectConfig
+from serena.config.serena_config import DEFAULT_TOOL_TIMEOUT, ProjectConfig, get_serena_managed_in_project_dir
 from serena.constants import SERENA_MANAGED_DIR_IN_HOME
 from serena.text_utils import MatchedConsecutiveLines, search_files
-from serena.util.file_system import GitignoreParser, match_path
+from serena.util.file_system import GitignoreParser, IgnoreMatcher
+from serena.util.file_watcher import FileWatcher, create_file_watcher
+from serena.util.trigram_index import TrigramIndex
 from solidlsp import SolidLanguageServer
 from solidlsp.ls_config import Language, LanguageServerConfig
 from solidlsp.ls_logger import LanguageServerLogger
@@ -21,9 +26,22 @@ class Project:
         self.project_root = project_root
         self.project_config = project_config
         self.is_newly_created = is_newly_created
-
+        self._ignored_patterns: list[str] = []
+        self._ignore_spec: pathspec.PathSpec = pathspec.PathSpec([])
+        self._refresh_ignore_spec()
+        self._file_watcher: FileWatcher | None = None
+        self._file_change_listeners: list[tuple[Callable[[set[str]], None], Callable[[], None] | None]] = []
+        """pairs of listeners for reported changes and (optional) listeners for unknown changes"""
+        self._file_change_listeners_lock = threading.Lock()
+        self._trigram_index: TrigramIndex | None = None
+
+    def _refresh_ignore_spec(self) -> None:
+        """
+        (Re-)determines the ignored paths from the project configuration and (if configured) the gitignore files.
+        """
         # gather ignored paths from the project configuration and gitignore files
-        ignored_patterns = project_config.ignored_paths
+        project_config = self.project_config
+        ignored_patterns = list(project_config.ignored_paths)
         if len(ignored_patterns) > 0:
             log.info(f"Using {len(ignored_patterns)} ignored paths from the explicit project configuration.")
             log.debug(f"Ignored paths: {ignored_patterns}")
@@ -45,6 +63,14 @@ class Project:
             processed_patterns.append(pattern)
         log.debug(f"Processing {len(processed_patterns)} ignored paths")
         self._ignore_spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, processed_patterns)
+        self._ignore_matcher = IgnoreMatcher(self.project_root, [self._ignore_spec], is_ignored_dirname=self._is_ignored_dirname)
+
+    @property
+    def ignored_patterns(self) -> list[str]:
+        """
+        :return: the patterns of the paths that are ignored, either explicitly or implicitly through .gitignore files
+        """
+        return self._ignored_patterns
 
     @property
     def project_name(self) -> str:
@@ -54,6 +80,23 @@ class Project:
     def language(self) -> Language:
         return self.project_config.language
 
+    @property
+    def languages(self) -> list[Language]:
+        """
+        :return: all languages of the project, starting with the main language
+        """
+        return self.project_config.languages
+
+    def get_language_of_file(self, relative_path: str) -> Language | None:
+        """
+        :param relative_path: the relative path of a file
+        :return: the first of the project's languages whose source files match the file name, or None if no language matches
+        """
+        for language in self.languages:
+            if language.get_source_fn_matcher().is_relevant_filename(relative_path):
+                return language
+        return None
+
     @classmethod
     def load(cls, project_root: str | Path, autogenerate: bool = True) -> "Project":
         project_root = Path(project_root).resolve()
@@ -87,46 +130,39 @@ class Project:
     def _is_ignored_dirname(self, dirname: str) -> bool:
         return dirname.startswith(".")
 
-    def _is_ignored_relative_path(self, relative_path: str | Path, ignore_non_source_files: bool = True) -> bool:
+    def _is_ignored_relative_path(
+        self, relative_path: str | Path, ignore_non_source_files: bool = True, is_dir: bool | None = None
+    ) -> bool:
         """
         Determine whether an existing path should be ignored based on file type and ignore patterns.
         Raises `FileNotFoundError` if the path does not exist.
 
         :param relative_path: Relative path to check
         :param ignore_non_source_files: whether files that are not source files (according to the file masks
-            determined by the project's programming language) shall be ignored
+            determined by the project's programming languages) shall be ignored
+        :param is_dir: whether the path refers to a directory; if None, it will be determined (and the existence of
+            the path will be checked)
 
         :return: whether the path should be ignored
         """
-        abs_path = os.path.join(self.project_root, relative_path)
-        if not os.path.exists(abs_path):
-            raise FileNotFoundError(f"File {abs_path} not found, the ignore check cannot be performed")
+        relative_path = str(relative_path)
+        if is_dir is None:
+            abs_path = os.path.join(self.project_root, relative_path)
+            try:
+                is_dir = stat.S_ISDIR(os.stat(abs_path).st_mode)
+            except OSError:
+                raise FileNotFoundError(f"File {abs_path} not found, the ignore check cannot be performed") from None
 
         # Check file extension if it's a file
-        is_file = os.path.isfile(abs_path)
-        if is_file and ignore_non_source_files:
-            fn_matcher = self.language.get_source_fn_matcher()
-            if not fn_matcher.is_relevant_filename(abs_path):
+        if not is_dir and ignore_non_source_files:
+            if self.get_language_of_file(relative_path) is None:
                 return True
 
-        # Create normalized path for consistent handling
-        rel_path = Path(relative_path)
-
         # always ignore paths inside .git
-        if len(rel_path.parts) > 0 and rel_path.parts[0] == ".git":
+        if relative_path.replace(os.sep, "/").lstrip("/").split("/", 1)[0] == ".git":
             return True
 
-        # Check each part of the path against always fulfilled ignore conditions
-        dir_parts = rel_path.parts
-        if is_file:
-            dir_parts = dir_parts[:-1]
-        for part in dir_parts:
-            if not part:  # Skip empty parts (e.g., from leading '/')
-                continue
-            if self._is_ignored_dirname(part):
-                return True
-
-        return match_path(str(relative_path), self.get_ignore_spec(), root_path=self.project_root)
+        return self._ignore_matcher.is_ignored(relative_path, is_dir)
 
     def is_ignored_path(self, path: str | Path, ignore_non_source_files: bool = False) -> bool:
         """
@@ -134,7 +170,7 @@ class Project:
 
         :param path: the path to check, can be absolute or relative
         :param ignore_non_source_files: whether to ignore files that are not source files
-            (according to the file masks determined by the project's programming language)
+            (according to the file masks determined by the project's programming languages)
         """
         path = Path(path)
         if path.is_absolute():
@@ -192,19 +228,46 @@ class Project:
         if os.path.isfile(start_path):
             return [relative_path]
         else:
-            for root, dirs, files in os.walk(start_path, followlinks=True):
-                dirs[:] = [d for d in dirs if not self._is_ignored_relative_path(os.path.join(root, d))]
-                for file in files:
-                    rel_file_path = os.path.relpath(os.path.join(root, file), start=self.project_root)
-                    try:
-                        if not self._is_ignored_relative_path(rel_file_path):
-                            rel_file_paths.append(rel_file_path)
-                    except FileNotFoundError:
+            # walk the tree depth-first (in the same order as os.walk), pruning ignored directories
+            rel_dir_paths = [os.path.relpath(start_path, self.project_root)]
+            while rel_dir_paths:
+                rel_dir_path = rel_dir_paths.pop()
+                if rel_dir_path == ".":
+                    rel_dir_path = ""
+                try:
+                    with os.scandir(os.path.join(self.project_root, rel_dir_path)) as entries_iterator:
+                        entries = list(entries_iterator)
+                except OSError as e:
+                    log.debug(f"Cannot scan directory {rel_dir_path}: {e}")
+                    continue
+                rel_subdir_paths = []
+                for entry in entries:
+                    rel_entry_path = os.path.join(rel_dir_path, entry.name)
+                    # NOTE: like os.walk(followlinks=True), this follows symlinks to directories
+                    if entry.is_dir():
+                        if not self._is_ignored_relative_path(rel_entry_path, is_dir=True):
+                            rel_subdir_paths.append(rel_entry_path)
+                    elif entry.is_file():
+                        if not self._is_ignored_relative_path(rel_entry_path, is_dir=False):
+                            rel_file_paths.append(rel_entry_path)
+                    else:
                         log.warning(
-                            f"File {rel_file_path} not found (possibly due it being a symlink), skipping it in request_parsed_files",
+                            f"File {rel_entry_path} not found (possibly due it being a symlink), skipping it in request_parsed_files",
                         )
+                rel_dir_paths.extend(reversed(rel_subdir_paths))
             return rel_file_paths
 
+    def is_ignored_dir_entry(self, entry: os.DirEntry, ignore_non_source_files: bool = False) -> bool:
+        """
+        Checks whether the given directory entry (as obtained via `os.scandir` for a directory within the project) is ignored,
+        without requiring additional stat calls.
+
+        :param entry: the directory entry
+        :param ignore_non_source_files: whether to ignore files that are not source files
+        """
+        relative_path = os.path.relpath(entry.path, self.project_root)
+        return self._is_ignored_relative_path(relative_path, ignore_non_source_files=ignore_non_source_files, is_dir=entry.is_dir())
+
     def search_source_files_for_pattern(
         self,
         pattern: str,
@@ -213,6 +276,7 @@ class Project:
         context_lines_after: int = 0,
         paths_include_glob: str | None = None,
         paths_exclude_glob: str | None = None,
+        use_trigram_index: bool = False,
     ) -> list[MatchedConsecutiveLines]:
         """
         Search for a pattern across all (non-ignored) source files
@@ -223,6 +287,8 @@ class Project:
         :param context_lines_after: Number of lines of context to include after each match
         :param paths_include_glob: Glob pattern to filter which files to include in the search
         :param paths_exclude_glob: Glob pattern to filter which files to exclude from the search. Takes precedence over paths_include_glob.
+        :param use_trigram_index: whether to use the project's trigram index (see `get_trigram_index`) in order to
+            avoid reading files which cannot contain matches
         :return: List of matched consecutive lines with context
         """
         relative_file_paths = self.gather_source_files(relative_path=relative_path)
@@ -234,8 +300,19 @@ class Project:
             context_lines_after=context_lines_after,
             paths_include_glob=paths_include_glob,
             paths_exclude_glob=paths_exclude_glob,
+            trigram_index=self.get_trigram_index() if use_trigram_index else None,
         )
 
+    def get_trigram_index(self) -> TrigramIndex:
+        """
+        :return: the persistent trigram index of the project's files (which is stored in the project's cache directory
+            and updated incrementally whenever it is used)
+        """
+        if self._trigram_index is None:
+            db_path = os.path.join(get_serena_managed_in_project_dir(self.project_root), "cache", "search", "trigram_index.db")
+            self._trigram_index = TrigramIndex(db_path, self.project_root)
+        return self._trigram_index
+
     def retrieve_content_around_line(
         self, relative_file_path: str, line: int, context_lines_before: int = 0, context_lines_after: int = 0
     ) -> MatchedConsecutiveLines:
@@ -258,35 +335,104 @@ class Project:
             source_file_path=relative_file_path,
         )
 
+    def add_file_change_listener(self, listener: Callable[[set[str]], None], on_unknown_changes: Callable[[], None] | None = None) -> None:
+        """
+        Registers a function to be called with the (relative) paths of files (or removed directories) which changed on disk
+        while the file watcher is running. The listener is called in the watcher's thread.
+        If a .gitignore file changed, the ignored paths are updated before listeners are called.
+
+        :param listener: the function to call with the paths of changed files
+        :param on_unknown_changes: the function to call (in the watcher's thread) if changes may have been missed, i.e. if any
+            file may have changed; if the watcher failed, it is no longer running when the function is called (see `is_file_watcher_running`)
+        """
+        with self._file_change_listeners_lock:
+            self._file_change_listeners.append((listener, on_unknown_changes))
+
+    def remove_file_change_listener(self, listener: Callable[[set[str]], None]) -> None:
+        with self._file_change_listeners_lock:
+            self._file_change_listeners = [entry for entry in self._file_change_listeners if entry[0] != listener]
+
+    def start_file_watcher(self) -> None:
+        """
+        Starts watching the (non-ignored) directories of the project for changes to files, which are reported to the
+        registered file change listeners.
+        Has no effect if the watcher is already running.
+        """
+        if self._file_watcher is not None:
+            return
+
+        def is_ignored_dir(relative_path: str) -> bool:
+            return self._is_ignored_relative_path(relative_path)
+
+        self._file_watcher = create_file_watcher(
+            self.project_root, self._on_files_changed, is_ignored_dir=is_ignored_dir, on_unknown_changes=self._on_unknown_file_changes
+        )
+
+    def stop_file_watcher(self) -> None:
+        if self._file_watcher is not None:
+            self._file_watcher.stop()
+            self._file_watcher = None
+
+    def is_file_watcher_running(self) -> bool:
+        return self._file_watcher is not None and self._file_watcher.is_running()
+
+    def _on_files_changed(self, relative_paths: set[str]) -> None:
+        if self.project_config.ignore_all_files_in_gitignore and any(os.path.basename(p) == ".gitignore" for p in relative_paths):
+            log.info("A .gitignore file changed, updating the ignored paths")
+            self._refresh_ignore_spec()
+        with self._file_change_listeners_lock:
+            listeners = [listener for listener, _ in self._file_change_listeners]
+        for listener in listeners:
+            listener(relative_paths)
+
+    def _on_unknown_file_changes(self) -> None:
+        if self.project_config.ignore_all_files_in_gitignore:
+            self._refresh_ignore_spec()
+        with self._file_change_listeners_lock:
+            listeners = [listener for _, listener in self._file_change_listeners if listener is not None]
+        for listener in listeners:
+            listener()
+
     def create_language_server(
         self,
         log_level: int = logging.INFO,
         ls_timeout: float | None = DEFAULT_TOOL_TIMEOUT - 5,
         trace_lsp_communication: bool = False,
+        language: Language | None = None,
+        file_changes_reported: bool = True,
     ) -> SolidLanguageServer:
         """
         Create a language server for a project. Note that you will have to start it
         before performing any LS operations.
 
-        :param project: either a path to the project root or a ProjectConfig instance.
-            If no project.yml is found, the default project configuration will be used.
         :param log_level: the log level for the language server
         :param ls_timeout: the timeout for the language server
         :param trace_lsp_communication: whether to trace LSP communication
+        :param language: the language for which to create the language server; if None, use the project's main language
+        :param file_changes_reported: whether changes to the project's files are reported to the language server (e.g. by watching
+            the files); if not, the results of definition, references and hover requests are not memoized, and symbol name lookups
+            check all files on disk
         :return: the language server
         """
+        if language is None:
+            language = self.language
         ls_config = LanguageServerConfig(
-            code_language=self.language,
+            code_language=language,
             ignored_paths=self._ignored_patterns,
             trace_lsp_communication=trace_lsp_communication,
         )
         ls_logger = LanguageServerLogger(log_level=log_level)
 
-        log.info(f"Creating language server instance for {self.project_root}.")
+        solidlsp_settings = SolidLSPSettings(solidlsp_dir=SERENA_MANAGED_DIR_IN_HOME)
+        if not file_changes_reported:
+            solidlsp_settings.position_request_memo_size = 0
+            solidlsp_settings.file_changes_reported = False
+
+        log.info(f"Creating {language.value} language server instance for {self.project_root}.")
         return SolidLanguageServer.create(
             ls_config,
             ls_logger,
             self.project_root,
             timeout=ls_timeout,
-            solidlsp_settings=SolidLSPSettings(solidlsp_dir=SERENA_MANAGED_DIR_IN_HOME),
+            solidlsp_settings=solidlsp_settings,
         )
@@ -1,8 +1,13 @@
+import logging
 import os
 
+from interprompt.jinja_template import set_template_bytecode_cache_dir
+from serena.config.serena_config import SerenaPaths
 from serena.constants import PROMPT_TEMPLATES_DIR_IN_USER_HOME, PROMPT_TEMPLATES_DIR_INTERNAL
 from serena.generated.generated_prompt_factory import PromptFactory
 
+log = logging.getLogger(__name__)
+
 
 class SerenaPromptFactory(PromptFactory):
     """
@@ -11,4 +16,8 @@ class SerenaPromptFactory(PromptFactory):
 
     def __init__(self) -> None:
         os.makedirs(PROMPT_TEMPLATES_DIR_IN_USER_HOME, exist_ok=True)
+        try:
+            set_template_bytecode_cache_dir(SerenaPaths().prompt_template_bytecode_cache_dir)
+        except OSError as e:
+            log.warning(f"Could not set up the prompt template bytecode cache, templates will be compiled in each process: {e}")
         super().__init__(prompts_dir=[PROMPT_TEMPLATES_DIR_IN_USER_HOME, PROMPT_TEMPLATES_DIR_INTERNAL])
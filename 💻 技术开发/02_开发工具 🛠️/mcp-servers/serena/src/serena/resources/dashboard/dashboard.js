@@ -45,13 +45,17 @@ class LogMessage {
   };
 }
 
+// the time (in seconds) for which the server may hold a request for new log messages
+const LOG_POLL_TIMEOUT_SECONDS = 20;
+
 class Dashboard {
     constructor() {
         let self = this;
 
         this.toolNames = [];
         this.currentMaxIdx = -1;
-        this.pollInterval = null;
+        this.pollTimeout = null;
+        this.pollRequest = null;
         this.failureCount = 0;
         this.$logContainer = $('#log-container');
         this.$errorContainer = $('#error-container');
@@ -69,6 +73,7 @@ class Dashboard {
         this.tokensChart = null;
         this.inputChart = null;
         this.outputChart = null;
+        this.latencyChart = null;
 
         // register event handlers
         this.$loadButton.click(this.loadLogs.bind(this));
@@ -128,7 +133,7 @@ class Dashboard {
                 self.$logContainer.empty();
 
                 // Update max_idx
-                self.currentMaxIdx = response.max_idx || -1;
+                self.currentMaxIdx = response.max_idx;
 
                 // Display each log message
                 if (response.messages && response.messages.length > 0) {
@@ -161,12 +166,15 @@ class Dashboard {
     pollForNewLogs() {
         let self = this;
         console.log("Polling logs", this.currentMaxIdx);
-        $.ajax({
+        // long polling: the server responds as soon as there are new messages (or after the timeout)
+        this.pollRequest = $.ajax({
             url: '/get_log_messages',
             type: 'POST',
             contentType: 'application/json',
+            timeout: (LOG_POLL_TIMEOUT_SECONDS + 10) * 1000,
             data: JSON.stringify({
-                start_idx: self.currentMaxIdx + 1
+                start_idx: self.currentMaxIdx + 1,
+                timeout: LOG_POLL_TIMEOUT_SECONDS
             }),
             success: function(response) {
                 self.failureCount = 0;
@@ -185,37 +193,40 @@ class Dashboard {
                         self.displayLogMessage(message);
                     });
 
-                    // Update max_idx
-                    self.currentMaxIdx = response.max_idx || self.currentMaxIdx;
-
                     // Auto-scroll to bottom if user was already at bottom
                     if (wasAtBottom) {
                         logContainer.scrollTop = logContainer.scrollHeight;
                     }
-                } else {
-                    // Update max_idx even if no new messages
-                    self.currentMaxIdx = response.max_idx || self.currentMaxIdx;
                 }
+                // Update max_idx
+                self.currentMaxIdx = response.max_idx;
+                self.pollTimeout = setTimeout(self.pollForNewLogs.bind(self), 0);
             },
             error: function(xhr, status, error) {
+                if (status === 'abort') {
+                    return;
+                }
                 console.error('Error polling for new logs:', error);
                 self.failureCount++;
                 if (self.failureCount >= 3) {
                     console.log('Server appears to be down, closing tab');
                     window.close();
                 }
+                self.pollTimeout = setTimeout(self.pollForNewLogs.bind(self), 1000);
             }
         });
     }
 
     startPeriodicPolling() {
-        // Clear any existing interval
-        if (this.pollInterval) {
-            clearInterval(this.pollInterval);
+        // Stop any ongoing polling
+        if (this.pollTimeout) {
+            clearTimeout(this.pollTimeout);
+        }
+        if (this.pollRequest) {
+            this.pollRequest.abort();
         }
 
-        // Start polling every second (1000ms)
-        this.pollInterval = setInterval(this.pollForNewLogs.bind(this), 1000);
+        this.pollForNewLogs();
     }
 
     toggleStats() {
@@ -283,6 +294,10 @@ class Dashboard {
         const inputTokens = names.map(n => stats[n].input_tokens);
         const outputTokens = names.map(n => stats[n].output_tokens);
         const totalTokens = names.map(n => stats[n].input_tokens + stats[n].output_tokens);
+        const toMillis = (seconds) => Math.round((seconds || 0) * 10000) / 10;
+        const latencyP50 = names.map(n => toMillis(stats[n].latency_p50));
+        const latencyP95 = names.map(n => toMillis(stats[n].latency_p95));
+        const latencyP99 = names.map(n => toMillis(stats[n].latency_p99));
         
         // Calculate totals for summary table
         const totalCalls = counts.reduce((sum, count) => sum + count, 0);
@@ -296,11 +311,13 @@ class Dashboard {
         const tokensCtx = document.getElementById('tokens-chart');
         const inputCtx = document.getElementById('input-chart');
         const outputCtx = document.getElementById('output-chart');
+        const latencyCtx = document.getElementById('latency-chart');
 
         if (this.countChart) this.countChart.destroy();
         if (this.tokensChart) this.tokensChart.destroy();
         if (this.inputChart) this.inputChart.destroy();
         if (this.outputChart) this.outputChart.destroy();
+        if (this.latencyChart) this.latencyChart.destroy();
 
         // Update summary table
         this.updateSummaryTable(totalCalls, totalInputTokens, totalOutputTokens);
@@ -476,6 +493,56 @@ class Dashboard {
                 }
             }
         });
+
+        // Latency percentiles bar chart
+        this.latencyChart = new Chart(latencyCtx, {
+            type: 'bar',
+            data: {
+                labels: names,
+                datasets: [
+                    { label: 'p50', data: latencyP50, backgroundColor: '#36A2EB' },
+                    { label: 'p95', data: latencyP95, backgroundColor: '#FFCE56' },
+                    { label: 'p99', data: latencyP99, backgroundColor: '#FF6384' }
+                ]
+            },
+            options: {
+                responsive: true,
+                plugins: {
+                    legend: {
+                        labels: {
+                            color: textColor
+                        }
+                    },
+                    datalabels: {
+                        display: false
+                    }
+                },
+                scales: {
+                    x: {
+                        ticks: {
+                            color: textColor
+                        },
+                        grid: {
+                            color: gridColor
+                        }
+                    },
+                    y: {
+                        beginAtZero: true,
+                        title: {
+                            display: true,
+                            text: 'Latency (ms)',
+                            color: textColor
+                        },
+                        ticks: {
+                            color: textColor
+                        },
+                        grid: {
+                            color: gridColor
+                        }
+                    }
+                }
+            }
+        });
     }
 
     generateColors(count) {
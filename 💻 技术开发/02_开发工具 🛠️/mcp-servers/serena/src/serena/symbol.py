@@ -10,9 +10,12 @@ from sensai.util.string import ToStringMixin
 
 from solidlsp import SolidLanguageServer
 from solidlsp.ls import ReferenceInSymbol as LSPReferenceInSymbol
+from solidlsp.ls_config import Language
+from solidlsp.ls_pool import LanguageServerPool
 from solidlsp.ls_types import Position, SymbolKind, UnifiedSymbolInformation
 
 from .project import Project
+from .util.file_system import walk_directory
 
 if TYPE_CHECKING:
     from .agent import SerenaAgent
@@ -441,13 +444,22 @@ class ReferenceInLanguageServerSymbol(ToStringMixin):
 
 
 class LanguageServerSymbolRetriever:
-    def __init__(self, lang_server: SolidLanguageServer, agent: Union["SerenaAgent", None] = None) -> None:
+    def __init__(
+        self,
+        lang_server: SolidLanguageServer,
+        agent: Union["SerenaAgent", None] = None,
+        language_server_pool: LanguageServerPool | None = None,
+    ) -> None:
         """
         :param lang_server: the language server to use for symbol retrieval as well as editing operations.
         :param agent: the agent to use (only needed for marking files as modified). You can pass None if you don't
             need an agent to be aware of file modifications performed by the symbol manager.
+        :param language_server_pool: the pool of language servers for a project with several languages; if provided,
+            files are handled by the language servers of their respective languages (started on demand), and `lang_server`
+            is used only for files which do not belong to any of the languages
         """
         self._lang_server = lang_server
+        self._language_server_pool = language_server_pool
         self.agent = agent
 
     def set_language_server(self, lang_server: SolidLanguageServer) -> None:
@@ -457,8 +469,69 @@ class LanguageServerSymbolRetriever:
         """
         self._lang_server = lang_server
 
-    def get_language_server(self) -> SolidLanguageServer:
-        return self._lang_server
+    def get_language_server(self, relative_path: str | None = None) -> SolidLanguageServer:
+        """
+        :param relative_path: the relative path of a file; if None, the main language server is returned
+        :return: the language server which handles the given file
+        """
+        if relative_path is None or self._language_server_pool is None:
+            return self._lang_server
+        language = self._language_server_pool.get_language_of_file(relative_path)
+        if language is None:
+            return self._lang_server
+        return self._language_server_pool.get_language_server(language)
+
+    def _get_language_servers(self, within_relative_path: str | None) -> list[SolidLanguageServer]:
+        """
+        :param within_relative_path: the relative path of a file or directory; None for the entire project
+        :return: the language servers which handle the files within the given path
+        """
+        if self._language_server_pool is None:
+            return [self._lang_server]
+        if within_relative_path is not None and os.path.isfile(os.path.join(self._lang_server.repository_root_path, within_relative_path)):
+            return [self.get_language_server(within_relative_path)]
+        # language servers which are not running are started only if there are files of their language within the path
+        running_languages = set(self._language_server_pool.get_running_language_servers())
+        languages_with_files = self._find_languages_with_files(
+            within_relative_path, [l for l in self._language_server_pool.languages if l not in running_languages]
+        )
+        return [
+            self._language_server_pool.get_language_server(language)
+            for language in self._language_server_pool.languages
+            if language in running_languages or language in languages_with_files
+        ]
+
+    def _find_languages_with_files(self, within_relative_path: str | None, languages: list[Language]) -> set[Language]:
+        """
+        :param within_relative_path: the relative path of a directory; None for the entire project
+        :param languages: the languages to look for
+        :return: the subset of the given languages which have (non-ignored) source files within the given directory
+        """
+        assert self._language_server_pool is not None
+        found_languages: set[Language] = set()
+        if not languages:
+            return found_languages
+        repository_root = self._lang_server.repository_root_path
+
+        def is_ignored_entry(entry: os.DirEntry) -> bool:
+            relative_path = os.path.relpath(entry.path, repository_root)
+            return self._lang_server.is_ignored_path(relative_path, ignore_unsupported_files=False, is_dir=entry.is_dir())
+
+        scanned_entries = walk_directory(
+            os.path.join(repository_root, within_relative_path or ""),
+            recursive=True,
+            relative_to=repository_root,
+            is_ignored_entry=is_ignored_entry,
+        )
+        for scanned_entry in scanned_entries:
+            if scanned_entry.is_dir:
+                continue
+            language = self._language_server_pool.get_language_of_file(scanned_entry.path)
+            if language in languages:
+                found_languages.add(language)
+                if len(found_languages) == len(languages):
+                    break
+        return found_languages
 
     def find_by_name(
         self,
@@ -473,9 +546,22 @@ class LanguageServerSymbolRetriever:
         Find all symbols that match the given name. See docstring of `Symbol.find` for more details.
         The only parameter not mentioned there is `within_relative_path`, which can be used to restrict the search
         to symbols within a specific file or directory.
+        Searches within directories use the language servers' symbol name indices where possible.
         """
         symbols: list[LanguageServerSymbol] = []
-        symbol_roots = self._lang_server.request_full_symbol_tree(within_relative_path=within_relative_path, include_body=include_body)
+        symbol_roots: list[UnifiedSymbolInformation] = []
+        is_file = within_relative_path is not None and os.path.isfile(
+            os.path.join(self._lang_server.repository_root_path, within_relative_path)
+        )
+        for lang_server in self._get_language_servers(within_relative_path):
+            if not is_file:
+                indexed_symbols = self._find_by_name_in_index(
+                    lang_server, name_path, include_body, include_kinds, exclude_kinds, substring_matching, within_relative_path
+                )
+                if indexed_symbols is not None:
+                    symbols.extend(indexed_symbols)
+                    continue
+            symbol_roots.extend(lang_server.request_full_symbol_tree(within_relative_path=within_relative_path, include_body=include_body))
         for root in symbol_roots:
             symbols.extend(
                 LanguageServerSymbol(root).find(
@@ -484,15 +570,67 @@ class LanguageServerSymbolRetriever:
             )
         return symbols
 
+    @staticmethod
+    def _find_by_name_in_index(
+        lang_server: SolidLanguageServer,
+        name_path: str,
+        include_body: bool,
+        include_kinds: Sequence[SymbolKind] | None,
+        exclude_kinds: Sequence[SymbolKind] | None,
+        substring_matching: bool,
+        within_relative_path: str | None,
+    ) -> list[LanguageServerSymbol] | None:
+        """
+        Finds the symbols matching the given name path within a directory using the language server's symbol name index,
+        yielding the same result as a search of the full symbol tree (see `find_by_name`).
+
+        :return: the matching symbols or None if the search requires the full symbol tree, because package or file symbols
+            (which are not indexed) could match
+        """
+        name = name_path.strip(LanguageServerSymbol._NAME_PATH_SEP).split(LanguageServerSymbol._NAME_PATH_SEP)[-1]
+        if not name:
+            return None
+
+        def is_kind_included(kind: SymbolKind) -> bool:
+            if include_kinds is not None and kind not in include_kinds:
+                return False
+            return not (exclude_kinds is not None and kind in exclude_kinds)
+
+        indexed_symbols, is_path_name_match = lang_server.request_symbols_by_name(
+            name, substring_matching=substring_matching, within_relative_path=within_relative_path
+        )
+        if is_path_name_match and (is_kind_included(SymbolKind.Package) or is_kind_included(SymbolKind.File)):
+            return None
+
+        symbols = []
+        symbols_by_path: dict[str, list[UnifiedSymbolInformation]] = {}
+        for indexed_symbol in indexed_symbols:
+            if not is_kind_included(SymbolKind(indexed_symbol.kind)):
+                continue
+            if not LanguageServerSymbol.match_name_path(name_path, indexed_symbol.name_path_parts, substring_matching=substring_matching):
+                continue
+            file_symbols = symbols_by_path.get(indexed_symbol.relative_path)
+            if file_symbols is None:
+                file_symbols, _ = lang_server.request_document_symbols(indexed_symbol.relative_path, include_body=include_body)
+                symbols_by_path[indexed_symbol.relative_path] = file_symbols
+            # the file may have changed since it was indexed
+            if (
+                indexed_symbol.symbol_index < len(file_symbols)
+                and file_symbols[indexed_symbol.symbol_index]["name"] == indexed_symbol.name_path_parts[-1]
+            ):
+                symbols.append(LanguageServerSymbol(file_symbols[indexed_symbol.symbol_index]))
+        return symbols
+
     def get_document_symbols(self, relative_path: str) -> list[LanguageServerSymbol]:
-        symbol_dicts, roots = self._lang_server.request_document_symbols(relative_path, include_body=False)
+        symbol_dicts, roots = self.get_language_server(relative_path).request_document_symbols(relative_path, include_body=False)
         symbols = [LanguageServerSymbol(s) for s in symbol_dicts]
         return symbols
 
     def find_by_location(self, location: LanguageServerSymbolLocation) -> LanguageServerSymbol | None:
         if location.relative_path is None:
             return None
-        symbol_dicts, roots = self._lang_server.request_document_symbols(location.relative_path, include_body=False)
+        lang_server = self.get_language_server(location.relative_path)
+        symbol_dicts, roots = lang_server.request_document_symbols(location.relative_path, include_body=False)
         for symbol_dict in symbol_dicts:
             symbol = LanguageServerSymbol(symbol_dict)
             if symbol.location == location:
@@ -561,7 +699,7 @@ class LanguageServerSymbolRetriever:
         assert symbol_location.relative_path is not None
         assert symbol_location.line is not None
         assert symbol_location.column is not None
-        references = self._lang_server.request_referencing_symbols(
+        references = self.get_language_server(symbol_location.relative_path).request_referencing_symbols(
             relative_file_path=symbol_location.relative_path,
             line=symbol_location.line,
             column=symbol_location.column,
@@ -589,7 +727,9 @@ class LanguageServerSymbolRetriever:
             return cls(name_path=symbol.get_name_path(), kind=int(symbol.symbol_kind))
 
     def get_symbol_overview(self, relative_path: str) -> dict[str, list[SymbolOverviewElement]]:
-        path_to_unified_symbols = self._lang_server.request_overview(relative_path)
+        path_to_unified_symbols: dict[str, list[UnifiedSymbolInformation]] = {}
+        for lang_server in self._get_language_servers(relative_path):
+            path_to_unified_symbols.update(lang_server.request_overview(relative_path))
         result = {}
         for file_path, unified_symbols in path_to_unified_symbols.items():
             # TODO: maybe include not just top-level symbols? We could filter by kind to exclude variables
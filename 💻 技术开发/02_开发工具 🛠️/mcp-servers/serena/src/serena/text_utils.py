@@ -1,13 +1,22 @@
 import fnmatch
 import logging
+import math
+import multiprocessing
 import os
 import re
-from collections.abc import Callable
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Any, Self
+from itertools import repeat
+from typing import Self
 
-from joblib import Parallel, delayed
+from serena.util import file_search
+from serena.util.file_search import iter_match_line_ranges
+from serena.util.trigram_index import TrigramIndex
 
 log = logging.getLogger(__name__)
 
@@ -96,7 +105,27 @@ class MatchedConsecutiveLines:
     def from_file_contents(
         cls, file_contents: str, line: int, context_lines_before: int = 0, context_lines_after: int = 0, source_file_path: str | None = None
     ) -> Self:
-        line_contents = file_contents.split("\n")
+        return cls.from_file_lines(
+            file_contents.split("\n"),
+            line=line,
+            context_lines_before=context_lines_before,
+            context_lines_after=context_lines_after,
+            source_file_path=source_file_path,
+        )
+
+    @classmethod
+    def from_file_lines(
+        cls,
+        line_contents: Sequence[str],
+        line: int,
+        context_lines_before: int = 0,
+        context_lines_after: int = 0,
+        source_file_path: str | None = None,
+    ) -> Self:
+        """
+        Like `from_file_contents`, but for file contents that were already split into lines, such that
+        multiple ranges of lines can be extracted from a file without splitting it repeatedly.
+        """
         start_lineno = max(0, line - context_lines_before)
         end_lineno = min(len(line_contents) - 1, line + context_lines_after)
         text_lines: list[TextLine] = []
@@ -112,6 +141,26 @@ class MatchedConsecutiveLines:
         return cls(lines=text_lines, source_file_path=source_file_path)
 
 
+def _create_matched_consecutive_lines(
+    lines: Sequence[str], first_line_num: int, start_line_num: int, end_line_num: int, source_file_path: str | None
+) -> MatchedConsecutiveLines:
+    """
+    :param lines: the contents of the consecutive lines, the first of which has the (1-based) line number `first_line_num`
+    :param start_line_num: the (1-based) number of the first matched line
+    :param end_line_num: the (1-based) number of the last matched line
+    """
+    text_lines = []
+    for line_num, line_content in enumerate(lines, start=first_line_num):
+        if line_num < start_line_num:
+            match_type = LineType.BEFORE_MATCH
+        elif line_num > end_line_num:
+            match_type = LineType.AFTER_MATCH
+        else:
+            match_type = LineType.MATCH
+        text_lines.append(TextLine(line_number=line_num, line_content=line_content, match_type=match_type))
+    return MatchedConsecutiveLines(lines=text_lines, source_file_path=source_file_path)
+
+
 def glob_to_regex(glob_pat: str) -> str:
     regex_parts: list[str] = []
     i = 0
@@ -179,39 +228,20 @@ def search_text(
         # For multiline matches, we need to use the DOTALL flag to make '.' match newlines
         compiled_pattern = re.compile(pattern, re.DOTALL)
         # Search across the entire content as a single string
-        for match in compiled_pattern.finditer(content):
-            start_pos = match.start()
-            end_pos = match.end()
-
-            # Find the line numbers for the start and end positions
-            start_line_num = content[:start_pos].count("\n") + 1
-            end_line_num = content[:end_pos].count("\n") + 1
-
-            # Calculate the range of lines to include in the context
-            context_start = max(1, start_line_num - context_lines_before)
-            context_end = min(total_lines, end_line_num + context_lines_after)
-
-            # Create TextLine objects for the context
-            context_lines = []
-            for i in range(context_start - 1, context_end):
-                line_num = i + 1
-                if context_start <= line_num < start_line_num:
-                    match_type = LineType.BEFORE_MATCH
-                elif end_line_num < line_num <= context_end:
-                    match_type = LineType.AFTER_MATCH
-                else:
-                    match_type = LineType.MATCH
-
-                context_lines.append(TextLine(line_number=line_num, line_content=lines[i], match_type=match_type))
-
-            matches.append(MatchedConsecutiveLines(lines=context_lines, source_file_path=source_file_path))
+        for context_start, start_line_num, end_line_num, context_end in iter_match_line_ranges(
+            compiled_pattern, content, total_lines, context_lines_before, context_lines_after
+        ):
+            matches.append(
+                _create_matched_consecutive_lines(
+                    lines[context_start - 1 : context_end], context_start, start_line_num, end_line_num, source_file_path
+                )
+            )
     else:
         # TODO: extremely inefficient! Since we currently don't use this option in SerenaAgent or LanguageServer,
         #   it is not urgent to fix, but should be either improved or the option should be removed.
         # Search line by line, normal compile without DOTALL
         compiled_pattern = re.compile(pattern)
         for i, line in enumerate(lines):
-            line_num = i + 1
             if compiled_pattern.search(line):
                 # Calculate the range of lines to include in the context
                 context_start = max(0, i - context_lines_before)
@@ -287,6 +317,180 @@ def glob_match(pattern: str, path: str) -> bool:
         return fnmatch.fnmatch(path, pattern)
 
 
+@dataclass
+class FileSearchResult:
+    path: str
+    matches: list[MatchedConsecutiveLines]
+    error: str | None = None
+    """the error which prevented the file from being searched (if any)"""
+
+
+class SearchBackend(ABC):
+    """
+    A strategy for searching a list of files for a pattern (as done by `search_files`)
+    """
+
+    @abstractmethod
+    def search(
+        self,
+        relative_file_paths: list[str],
+        pattern: str,
+        root_path: str,
+        file_reader: Callable[[str], str],
+        context_lines_before: int,
+        context_lines_after: int,
+    ) -> list[FileSearchResult]:
+        """
+        Searches the given files for the pattern (allowing multi-line matches).
+
+        :return: a result for each of the given files
+        """
+
+
+class ThreadingSearchBackend(SearchBackend):
+    """
+    Searches the files in a pool of threads, reading each file completely.
+    This supports arbitrary file readers but is limited by the GIL, so it is best suited for small numbers of files.
+    """
+
+    def search(
+        self,
+        relative_file_paths: list[str],
+        pattern: str,
+        root_path: str,
+        file_reader: Callable[[str], str],
+        context_lines_before: int,
+        context_lines_after: int,
+    ) -> list[FileSearchResult]:
+        def process_single_file(path: str) -> FileSearchResult:
+            """Process a single file - this function will be parallelized."""
+            try:
+                abs_path = os.path.join(root_path, path)
+                file_content = file_reader(abs_path)
+                search_results = search_text(
+                    pattern,
+                    content=file_content,
+                    source_file_path=path,
+                    allow_multiline_match=True,
+                    context_lines_before=context_lines_before,
+                    context_lines_after=context_lines_after,
+                )
+                if len(search_results) > 0:
+                    log.debug(f"Found {len(search_results)} matches in {path}")
+                return FileSearchResult(path=path, matches=search_results)
+            except Exception as e:
+                log.debug(f"Error processing {path}: {e}")
+                return FileSearchResult(path=path, matches=[], error=str(e))
+
+        # Execute in parallel using joblib (imported lazily to keep it off the startup path)
+        from joblib import Parallel, delayed
+
+        return Parallel(
+            n_jobs=-1,
+            backend="threading",
+        )(delayed(process_single_file)(path) for path in relative_file_paths)
+
+
+class ProcessPoolSearchBackend(SearchBackend):
+    """
+    Searches the files in a pool of worker processes, to which the list of files is distributed in chunks.
+    Files are memory-mapped rather than read into strings where possible, and workers transfer matches in a compact form,
+    only decoding the lines that are part of matches (or their context).
+    Only the default file reader is supported.
+    The pool is started on first use and shared by all instances.
+    """
+
+    MAX_CHUNK_SIZE = 500
+    """the maximum number of files that are sent to a worker process in a single task"""
+
+    _executor: ProcessPoolExecutor | None = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, max_workers: int | None = None):
+        """
+        :param max_workers: the number of worker processes to use for the shared pool (if it is not yet started);
+            if None, use the number of CPUs
+        """
+        self._max_workers = max_workers
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        cls = ProcessPoolSearchBackend
+        with cls._executor_lock:
+            if cls._executor is None:
+                # use spawn rather than fork, because forking a process with running threads is unsafe
+                cls._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return cls._executor
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Shuts down the shared pool of worker processes (it is restarted when needed).
+        """
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(cancel_futures=True)
+                cls._executor = None
+
+    def search(
+        self,
+        relative_file_paths: list[str],
+        pattern: str,
+        root_path: str,
+        file_reader: Callable[[str], str],
+        context_lines_before: int,
+        context_lines_after: int,
+    ) -> list[FileSearchResult]:
+        if file_reader is not default_file_reader:
+            raise ValueError(f"{self.__class__.__name__} does not support custom file readers")
+        if not relative_file_paths:
+            return []
+        executor = self._get_executor()
+        num_workers = self._max_workers or os.cpu_count() or 1
+        # use several chunks per worker to balance the load
+        chunk_size = max(1, min(self.MAX_CHUNK_SIZE, math.ceil(len(relative_file_paths) / (4 * num_workers))))
+        chunks = [relative_file_paths[i : i + chunk_size] for i in range(0, len(relative_file_paths), chunk_size)]
+        try:
+            compact_chunk_results = list(
+                executor.map(
+                    file_search.search_files_compact,
+                    chunks,
+                    repeat(root_path),
+                    repeat(pattern),
+                    repeat(context_lines_before),
+                    repeat(context_lines_after),
+                )
+            )
+        except BrokenProcessPool as e:
+            log.warning(f"The search worker processes terminated unexpectedly ({e}); falling back to threads")
+            self.shutdown()
+            return ThreadingSearchBackend().search(
+                relative_file_paths, pattern, root_path, file_reader, context_lines_before, context_lines_after
+            )
+
+        results = []
+        for compact_results in compact_chunk_results:
+            for path, compact_matches, error in compact_results:
+                if error is None:
+                    try:
+                        matches = [
+                            _create_matched_consecutive_lines(lines, context_start, start_line, end_line, path)
+                            for context_start, start_line, end_line, lines in compact_matches
+                        ]
+                    except Exception as e:
+                        matches, error = [], str(e)
+                if error is not None:
+                    log.debug(f"Error processing {path}: {error}")
+                results.append(FileSearchResult(path=path, matches=matches if error is None else [], error=error))
+        return results
+
+
+PROCESS_POOL_SEARCH_MIN_FILES = 2000
+"""
+the minimum number of files for which `search_files` uses a `ProcessPoolSearchBackend` by default; for fewer files,
+the cost of starting the worker processes outweighs the gains
+"""
+
+
 def search_files(
     relative_file_paths: list[str],
     pattern: str,
@@ -296,6 +500,8 @@ def search_files(
     context_lines_after: int = 0,
     paths_include_glob: str | None = None,
     paths_exclude_glob: str | None = None,
+    trigram_index: TrigramIndex | None = None,
+    backend: SearchBackend | None = None,
 ) -> list[MatchedConsecutiveLines]:
     """
     Search for a pattern in a list of files.
@@ -309,6 +515,10 @@ def search_files(
     :param context_lines_after: Number of context lines to include after matches
     :param paths_include_glob: Optional glob pattern to include files from the list
     :param paths_exclude_glob: Optional glob pattern to exclude files from the list
+    :param trigram_index: Optional index (for `root_path`) with which files that cannot contain matches are excluded
+        before any file is read
+    :param backend: the backend with which to search the files. If None, use a `ProcessPoolSearchBackend` for
+        at least `PROCESS_POOL_SEARCH_MIN_FILES` files (if the default file reader is used) and a `ThreadingSearchBackend` otherwise.
     :return: List of MatchedConsecutiveLines objects
     """
     # Pre-filter paths (done sequentially to avoid overhead)
@@ -323,43 +533,29 @@ def search_files(
             continue
         filtered_paths.append(path)
 
-    log.info(f"Processing {len(filtered_paths)} files.")
+    if trigram_index is not None:
+        num_paths = len(filtered_paths)
+        filtered_paths = trigram_index.filter_candidates(pattern, filtered_paths)
+        log.info(f"Trigram index narrowed down the search from {num_paths} to {len(filtered_paths)} files")
 
-    def process_single_file(path: str) -> dict[str, Any]:
-        """Process a single file - this function will be parallelized."""
-        try:
-            abs_path = os.path.join(root_path, path)
-            file_content = file_reader(abs_path)
-            search_results = search_text(
-                pattern,
-                content=file_content,
-                source_file_path=path,
-                allow_multiline_match=True,
-                context_lines_before=context_lines_before,
-                context_lines_after=context_lines_after,
-            )
-            if len(search_results) > 0:
-                log.debug(f"Found {len(search_results)} matches in {path}")
-            return {"path": path, "results": search_results, "error": None}
-        except Exception as e:
-            log.debug(f"Error processing {path}: {e}")
-            return {"path": path, "results": [], "error": str(e)}
-
-    # Execute in parallel using joblib
-    results = Parallel(
-        n_jobs=-1,
-        backend="threading",
-    )(delayed(process_single_file)(path) for path in filtered_paths)
+    if backend is None:
+        if file_reader is default_file_reader and len(filtered_paths) >= PROCESS_POOL_SEARCH_MIN_FILES:
+            backend = ProcessPoolSearchBackend()
+        else:
+            backend = ThreadingSearchBackend()
+
+    log.info(f"Processing {len(filtered_paths)} files with {backend.__class__.__name__}.")
+    results = backend.search(filtered_paths, pattern, root_path, file_reader, context_lines_before, context_lines_after)
 
     # Collect results and errors
     matches = []
     skipped_file_error_tuples = []
 
     for result in results:
-        if result["error"]:
-            skipped_file_error_tuples.append((result["path"], result["error"]))
+        if result.error:
+            skipped_file_error_tuples.append((result.path, result.error))
         else:
-            matches.extend(result["results"])
+            matches.extend(result.matches)
 
     if skipped_file_error_tuples:
         log.debug(f"Failed to read {len(skipped_file_error_tuples)} files: {skipped_file_error_tuples}")
@@ -10,15 +10,44 @@ import json
 import os
 import re
 from collections import defaultdict
+from collections.abc import Iterator
 from fnmatch import fnmatch
 from pathlib import Path
 
 from serena.text_utils import search_files
-from serena.tools import SUCCESS_RESULT, TOOL_DEFAULT_MAX_ANSWER_LENGTH, EditedFileContext, Tool, ToolMarkerCanEdit, ToolMarkerOptional
-from serena.util.file_system import scan_directory
-
-
-class ReadFileTool(Tool):
+from serena.tools import (
+    SUCCESS_RESULT,
+    TOOL_DEFAULT_MAX_ANSWER_LENGTH,
+    EditedFileContext,
+    Tool,
+    ToolMarkerCanEdit,
+    ToolMarkerOptional,
+    ToolMarkerReadOnly,
+)
+from serena.util.file_system import ScannedEntry, scan_directory, walk_directory
+
+
+def _collect_scanned_entries_as_json(entries: Iterator[ScannedEntry], include_dirs: bool, max_answer_chars: int) -> str:
+    """
+    Collects the given entries in a JSON object with the lists "dirs" (if `include_dirs`) and "files".
+    If the JSON representation would exceed `max_answer_chars`, the iteration is stopped early (such that no further
+    directories are scanned) and a corresponding message is returned instead.
+    """
+    result: dict[str, list[str]] = {"dirs": [], "files": []} if include_dirs else {"files": []}
+    n_chars = len(json.dumps(result))
+    for entry in entries:
+        if entry.is_dir and not include_dirs:
+            continue
+        entry_list = result["dirs"] if entry.is_dir else result["files"]
+        # account for the entry and, unless it is the first in the list, the separator
+        n_chars += len(json.dumps(entry.path)) + (2 if entry_list else 0)
+        if n_chars > max_answer_chars:
+            return Tool._get_too_long_answer(f"more than {max_answer_chars} characters")
+        entry_list.append(entry.path)
+    return json.dumps(result)
+
+
+class ReadFileTool(Tool, ToolMarkerReadOnly):
     """
     Reads a file within the project directory.
     """
@@ -84,17 +113,21 @@ class CreateTextFileTool(Tool, ToolMarkerCanEdit):
         return json.dumps(answer)
 
 
-class ListDirTool(Tool):
+class ListDirTool(Tool, ToolMarkerReadOnly):
     """
     Lists files and directories in the given directory (optionally with recursion).
     """
 
-    def apply(self, relative_path: str, recursive: bool, max_answer_chars: int = TOOL_DEFAULT_MAX_ANSWER_LENGTH) -> str:
+    def apply(
+        self, relative_path: str, recursive: bool, max_depth: int | None = None, max_answer_chars: int = TOOL_DEFAULT_MAX_ANSWER_LENGTH
+    ) -> str:
         """
         Lists all non-gitignored files and directories in the given directory (optionally with recursion).
 
         :param relative_path: the relative path to the directory to list; pass "." to scan the project root
         :param recursive: whether to scan subdirectories recursively
+        :param max_depth: if recursive, the maximum depth of the listed entries (1 for the entries directly contained in the
+            directory); null for no limit. Use it to get an overview of large directory trees.
         :param max_answer_chars: if the output is longer than this number of characters,
             no content will be returned. Don't adjust unless there is really no other way to get the content
             required for the task.
@@ -111,29 +144,37 @@ class ListDirTool(Tool):
 
         self.project.validate_relative_path(relative_path)
 
-        dirs, files = scan_directory(
-            os.path.join(self.get_project_root(), relative_path),
-            relative_to=self.get_project_root(),
-            recursive=recursive,
-            is_ignored_dir=self.project.is_ignored_path,
-            is_ignored_file=self.project.is_ignored_path,
+        return _collect_scanned_entries_as_json(
+            walk_directory(
+                os.path.join(self.get_project_root(), relative_path),
+                relative_to=self.get_project_root(),
+                recursive=recursive,
+                is_ignored_entry=self.project.is_ignored_dir_entry,
+                max_depth=max_depth,
+            ),
+            include_dirs=True,
+            max_answer_chars=max_answer_chars,
         )
 
-        result = json.dumps({"dirs": dirs, "files": files})
-        return self._limit_length(result, max_answer_chars)
-
 
-class FindFileTool(Tool):
+class FindFileTool(Tool, ToolMarkerReadOnly):
     """
     Finds files in the given relative paths
     """
 
-    def apply(self, file_mask: str, relative_path: str) -> str:
+    def apply(
+        self, file_mask: str, relative_path: str, max_depth: int | None = None, max_answer_chars: int = TOOL_DEFAULT_MAX_ANSWER_LENGTH
+    ) -> str:
         """
         Finds non-gitignored files matching the given file mask within the given relative path
 
         :param file_mask: the filename or file mask (using the wildcards * or ?) to search for
         :param relative_path: the relative path to the directory to search in; pass "." to scan the project root
+        :param max_depth: the maximum depth of the files to find (1 for the files directly contained in the directory);
+            null for no limit
+        :param max_answer_chars: if the output is longer than this number of characters,
+            no content will be returned. Don't adjust unless there is really no other way to get the content
+            required for the task.
         :return: a JSON object with the list of matching files
         """
         self.project.validate_relative_path(relative_path)
@@ -141,23 +182,23 @@ class FindFileTool(Tool):
         dir_to_scan = os.path.join(self.get_project_root(), relative_path)
 
         # find the files by ignoring everything that doesn't match
-        def is_ignored_file(abs_path: str) -> bool:
-            if self.project.is_ignored_path(abs_path):
+        def is_ignored_entry(entry: os.DirEntry) -> bool:
+            if self.project.is_ignored_dir_entry(entry):
                 return True
-            filename = os.path.basename(abs_path)
-            return not fnmatch(filename, file_mask)
-
-        dirs, files = scan_directory(
-            path=dir_to_scan,
-            recursive=True,
-            is_ignored_dir=self.project.is_ignored_path,
-            is_ignored_file=is_ignored_file,
-            relative_to=self.get_project_root(),
+            return not entry.is_dir() and not fnmatch(entry.name, file_mask)
+
+        return _collect_scanned_entries_as_json(
+            walk_directory(
+                path=dir_to_scan,
+                recursive=True,
+                is_ignored_entry=is_ignored_entry,
+                relative_to=self.get_project_root(),
+                max_depth=max_depth,
+            ),
+            include_dirs=False,
+            max_answer_chars=max_answer_chars,
         )
 
-        result = json.dumps({"files": files})
-        return result
-
 
 class ReplaceRegexTool(Tool, ToolMarkerCanEdit):
     """
@@ -295,7 +336,7 @@ class InsertAtLineTool(Tool, ToolMarkerCanEdit, ToolMarkerOptional):
         return SUCCESS_RESULT
 
 
-class SearchForPatternTool(Tool):
+class SearchForPatternTool(Tool, ToolMarkerReadOnly):
     """
     Performs a search for a pattern in the project.
     """
@@ -373,6 +414,7 @@ class SearchForPatternTool(Tool):
                 context_lines_after=context_lines_after,
                 paths_include_glob=paths_include_glob.strip(),
                 paths_exclude_glob=paths_exclude_glob.strip(),
+                use_trigram_index=self.agent.serena_config.use_trigram_search_index,
             )
         else:
             if os.path.isfile(abs_path):
@@ -381,8 +423,7 @@ class SearchForPatternTool(Tool):
                 dirs, rel_paths_to_search = scan_directory(
                     path=abs_path,
                     recursive=True,
-                    is_ignored_dir=self.project.is_ignored_path,
-                    is_ignored_file=self.project.is_ignored_path,
+                    is_ignored_entry=self.project.is_ignored_dir_entry,
                     relative_to=self.get_project_root(),
                 )
             # TODO (maybe): not super efficient to walk through the files again and filter if glob patterns are provided
@@ -393,6 +434,7 @@ class SearchForPatternTool(Tool):
                 root_path=self.get_project_root(),
                 paths_include_glob=paths_include_glob,
                 paths_exclude_glob=paths_exclude_glob,
+                trigram_index=self.project.get_trigram_index() if self.agent.serena_config.use_trigram_search_index else None,
             )
         # group matches by file
         file_to_matches: dict[str, list[str]] = defaultdict(list)
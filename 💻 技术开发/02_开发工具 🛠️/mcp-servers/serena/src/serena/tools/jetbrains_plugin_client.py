@@ -7,7 +7,6 @@ import logging
 from pathlib import Path
 from typing import Any, Optional, Self, TypeVar
 
-import requests
 from sensai.util.string import ToStringMixin
 
 from serena.project import Project
@@ -43,6 +42,9 @@ class JetBrainsPluginClient(ToStringMixin):
     last_port: int | None = None
 
     def __init__(self, port: int, timeout: int = 30):
+        # requests is imported lazily, since the client is only used with the JetBrains backend
+        import requests
+
         self.base_url = f"http://127.0.0.1:{port}"
         self.timeout = timeout
         self.session = requests.Session()
@@ -76,6 +78,8 @@ class JetBrainsPluginClient(ToStringMixin):
             return False
 
     def _make_request(self, method: str, endpoint: str, data: Optional[dict] = None) -> dict[str, Any]:
+        import requests
+
         url = f"{self.base_url}{endpoint}"
 
         try:
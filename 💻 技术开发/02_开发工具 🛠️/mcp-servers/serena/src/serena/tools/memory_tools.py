@@ -1,6 +1,6 @@
 import json
 
-from serena.tools import TOOL_DEFAULT_MAX_ANSWER_LENGTH, Tool
+from serena.tools import TOOL_DEFAULT_MAX_ANSWER_LENGTH, Tool, ToolMarkerReadOnly
 
 
 class WriteMemoryTool(Tool):
@@ -21,7 +21,7 @@ class WriteMemoryTool(Tool):
         return self.memories_manager.save_memory(memory_name, content)
 
 
-class ReadMemoryTool(Tool):
+class ReadMemoryTool(Tool, ToolMarkerReadOnly):
     """
     Reads the memory with the given name from Serena's project-specific memory store.
     """
@@ -36,7 +36,7 @@ class ReadMemoryTool(Tool):
         return self.memories_manager.load_memory(memory_file_name)
 
 
-class ListMemoriesTool(Tool):
+class ListMemoriesTool(Tool, ToolMarkerReadOnly):
     """
     Lists memories in Serena's project-specific memory store.
     """
@@ -9,6 +9,7 @@ from collections.abc import Sequence
 from copy import copy
 from typing import Any
 
+from serena.text_utils import MatchedConsecutiveLines
 from serena.tools import (
     SUCCESS_RESULT,
     TOOL_DEFAULT_MAX_ANSWER_LENGTH,
@@ -197,14 +198,20 @@ class FindReferencingSymbolsTool(Tool, ToolMarkerSymbolicRead):
             exclude_kinds=parsed_exclude_kinds,
         )
         reference_dicts = []
+        # the references are typically concentrated in few files, each of which is read and split only once
+        file_lines_by_path: dict[str, list[str]] = {}
         for ref in references_in_symbols:
             ref_dict = ref.symbol.to_dict(kind=True, location=True, depth=0, include_body=include_body)
             ref_dict = _sanitize_symbol_dict(ref_dict)
             if not include_body:
                 ref_relative_path = ref.symbol.location.relative_path
                 assert ref_relative_path is not None, f"Referencing symbol {ref.symbol.name} has no relative path, this is likely a bug."
-                content_around_ref = self.project.retrieve_content_around_line(
-                    relative_file_path=ref_relative_path, line=ref.line, context_lines_before=1, context_lines_after=1
+                file_lines = file_lines_by_path.get(ref_relative_path)
+                if file_lines is None:
+                    file_lines = self.project.read_file(ref_relative_path).split("\n")
+                    file_lines_by_path[ref_relative_path] = file_lines
+                content_around_ref = MatchedConsecutiveLines.from_file_lines(
+                    file_lines, line=ref.line, context_lines_before=1, context_lines_after=1, source_file_path=ref_relative_path
                 )
                 ref_dict["content_around_reference"] = content_around_ref.to_display_string()
             reference_dicts.append(ref_dict)
@@ -1,5 +1,6 @@
 import inspect
 import os
+import time
 from abc import ABC
 from collections.abc import Iterable
 from dataclasses import dataclass
@@ -15,7 +16,9 @@ from serena.prompt_factory import PromptFactory
 from serena.symbol import LanguageServerSymbolRetriever
 from serena.util.class_decorators import singleton
 from serena.util.inspection import iter_subclasses
+from solidlsp.ls_deadline import RequestDeadline
 from solidlsp.ls_exceptions import SolidLSPException
+from solidlsp.ls_pool import LanguageServerLeases
 
 if TYPE_CHECKING:
     from serena.agent import LinesRead, MemoriesManager, SerenaAgent
@@ -50,7 +53,7 @@ class Component(ABC):
             raise Exception("Cannot create LanguageServerSymbolRetriever; agent is not in language server mode.")
         language_server = self.agent.language_server
         assert language_server is not None
-        return LanguageServerSymbolRetriever(language_server, agent=self.agent)
+        return LanguageServerSymbolRetriever(language_server, agent=self.agent, language_server_pool=self.agent.language_server_pool)
 
     @property
     def project(self) -> Project:
@@ -95,7 +98,14 @@ class ToolMarkerOptional(ToolMarker):
     """
 
 
-class ToolMarkerSymbolicRead(ToolMarker):
+class ToolMarkerReadOnly(ToolMarker):
+    """
+    Marker class for tools that neither modify files nor change the state of the agent, such that they can be
+    executed concurrently with other read-only tools.
+    """
+
+
+class ToolMarkerSymbolicRead(ToolMarkerReadOnly):
     """
     Marker class for tools that perform symbol read operations.
     """
@@ -152,6 +162,15 @@ class Tool(Component):
         """
         return issubclass(cls, ToolMarkerCanEdit)
 
+    @classmethod
+    def is_read_only(cls) -> bool:
+        """
+        Returns whether this tool is read-only and can thus be executed concurrently with other read-only tools.
+
+        :return: True if the tool is read-only, False otherwise
+        """
+        return issubclass(cls, ToolMarkerReadOnly) and not issubclass(cls, ToolMarkerCanEdit)
+
     @classmethod
     def get_tool_description(cls) -> str:
         docstring = cls.__doc__
@@ -217,21 +236,34 @@ class Tool(Component):
     @staticmethod
     def _limit_length(result: str, max_answer_chars: int) -> str:
         if (n_chars := len(result)) > max_answer_chars:
-            result = (
-                f"The answer is too long ({n_chars} characters). "
-                + "Please try a more specific tool query or raise the max_answer_chars parameter."
-            )
+            result = Tool._get_too_long_answer(f"{n_chars} characters")
         return result
 
+    @staticmethod
+    def _get_too_long_answer(length_description: str) -> str:
+        return (
+            f"The answer is too long ({length_description}). "
+            + "Please try a more specific tool query or raise the max_answer_chars parameter."
+        )
+
     def is_active(self) -> bool:
         return self.agent.tool_is_active(self.__class__)
 
     def apply_ex(self, log_call: bool = True, catch_exceptions: bool = True, **kwargs) -> str:  # type: ignore
         """
-        Applies the tool with logging and exception handling, using the given keyword arguments
+        Applies the tool with logging and exception handling, using the given keyword arguments.
+        The tool timeout (which includes the time the tool waits to be started) is applied as a deadline to the
+        language server requests the tool makes; if the tool times out, its pending requests are cancelled.
+        The language servers the tool obtains are leased until it terminates, such that they are not stopped while in use.
         """
+        tool_timeout = self.agent.serena_config.tool_timeout
+        deadline = RequestDeadline(tool_timeout)
 
         def task() -> str:
+            with deadline, LanguageServerLeases():
+                return apply_tool()
+
+        def apply_tool() -> str:
             apply_fn = self.get_apply_fn()
 
             try:
@@ -250,23 +282,23 @@ class Tool(Component):
                             "Error: No active project. Ask to user to select a project from this list: "
                             + f"{self.agent.serena_config.project_names}"
                         )
-                    if self.agent.is_using_language_server() and not self.agent.is_language_server_running():
-                        log.info("Language server is not running. Starting it ...")
-                        self.agent.reset_language_server()
+                    if self.agent.is_using_language_server():
+                        self.agent.ensure_language_server_running()
 
                 # apply the actual tool
+                start_time = time.perf_counter()
                 try:
                     result = apply_fn(**kwargs)
                 except SolidLSPException as e:
                     if e.is_language_server_terminated():
                         log.error(f"Language server terminated while executing tool ({e}). Restarting the language server and retrying ...")
-                        self.agent.reset_language_server()
+                        self.agent.ensure_language_server_running()
                         result = apply_fn(**kwargs)
                     else:
                         raise
 
                 # record tool usage
-                self.agent.record_tool_usage_if_enabled(kwargs, result, self)
+                self.agent.record_tool_usage_if_enabled(kwargs, result, self, latency=time.perf_counter() - start_time)
 
             except Exception as e:
                 if not catch_exceptions:
@@ -278,16 +310,17 @@ class Tool(Component):
             if log_call:
                 log.info(f"Result: {result}")
 
-            try:
-                if self.agent.language_server is not None:
-                    self.agent.language_server.save_cache()
-            except Exception as e:
-                log.error(f"Error saving language server cache: {e}")
-
+            # Note: changes to the language server's cache are saved in the background (not on the tool's request path)
             return result
 
-        future = self.agent.issue_task(task, name=self.__class__.__name__)
-        return future.result(timeout=self.agent.serena_config.tool_timeout)
+        future = self.agent.issue_task(task, name=self.__class__.__name__, read_only=self.is_read_only())
+        try:
+            return future.result(timeout=tool_timeout)
+        except TimeoutError:
+            # the task is not started if it is still queued; otherwise its (current and future) language server requests are abandoned
+            future.cancel()
+            deadline.cancel()
+            raise
 
 
 class EditedFileContext:
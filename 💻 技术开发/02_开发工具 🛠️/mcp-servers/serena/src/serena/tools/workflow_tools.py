@@ -5,10 +5,10 @@ Tools supporting the general workflow of the agent
 import json
 import platform
 
-from serena.tools import Tool, ToolMarkerDoesNotRequireActiveProject, ToolMarkerOptional
+from serena.tools import Tool, ToolMarkerDoesNotRequireActiveProject, ToolMarkerOptional, ToolMarkerReadOnly
 
 
-class CheckOnboardingPerformedTool(Tool):
+class CheckOnboardingPerformedTool(Tool, ToolMarkerReadOnly):
     """
     Checks whether project onboarding was already performed.
     """
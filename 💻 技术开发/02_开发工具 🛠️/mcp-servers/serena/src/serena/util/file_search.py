@@ -0,0 +1,233 @@
+"""
+Low-level, dependency-free functions for searching files for regular expressions, which are used by the search backends
+in `serena.text_utils`. This module is imported by the worker processes of the process pool backend and should thus
+remain lightweight.
+"""
+
+import mmap
+import os
+import re
+import re._constants as sre_constants
+import re._parser as sre_parse
+from collections.abc import Iterator
+
+CompactMatch = tuple[int, int, int, tuple[str, ...]]
+"""
+a match in compact form: (first context line, first matched line, last matched line, contents of all lines from the first
+context line to the last context line), where line numbers are 1-based
+"""
+
+MMAP_MIN_FILE_SIZE = 64 * 1024
+"""the minimum size of files which are memory-mapped; smaller files are read into a buffer, which is cheaper"""
+
+# characters which, apart from "\n", are treated as line boundaries by str.splitlines or universal newlines (UTF-8-encoded)
+_SPECIAL_LINE_BOUNDARIES = (b"\r", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+_BYTE_COMPATIBLE_AT_CODES = {
+    sre_constants.AT_BEGINNING,
+    sre_constants.AT_BEGINNING_STRING,
+    sre_constants.AT_END,
+    sre_constants.AT_END_STRING,
+}
+
+
+def iter_match_line_ranges(
+    compiled_pattern: re.Pattern, content: str, total_lines: int, context_lines_before: int, context_lines_after: int
+) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Finds all matches of the pattern in the content.
+
+    :return: an iterator of tuples (context_start, start_line, end_line, context_end) of 1-based line numbers
+    """
+    num_newlines = 0
+    counted_up_to = 0
+    for match in compiled_pattern.finditer(content):
+        start_pos = match.start()
+        num_newlines += content.count("\n", counted_up_to, start_pos)
+        counted_up_to = start_pos
+        start_line_num = num_newlines + 1
+        end_line_num = start_line_num + content.count("\n", start_pos, match.end())
+        context_start = max(1, start_line_num - context_lines_before)
+        context_end = min(total_lines, end_line_num + context_lines_after)
+        yield context_start, start_line_num, end_line_num, context_end
+
+
+def is_byte_compatible_pattern(pattern: str) -> bool:
+    """
+    Determines whether the pattern (compiled with DOTALL) can be applied to the UTF-8 encoding of a text instead of the
+    text itself, yielding the same matches.
+    This is the case if the pattern can only ever match ASCII characters (which are encoded as single bytes that do not
+    occur in the encodings of other characters) and does not depend on Unicode character properties.
+    """
+    try:
+        parsed_pattern = sre_parse.parse(pattern, re.DOTALL)
+    except re.error:
+        return False
+    if parsed_pattern.state.flags & (re.IGNORECASE | re.ASCII) or parsed_pattern.state.grouprefpos:
+        return False
+    return _is_byte_compatible_sequence(list(parsed_pattern))
+
+
+def _is_byte_compatible_sequence(items: list) -> bool:
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            if av >= 128:
+                return False
+        elif op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.LITERAL:
+                    if item_av >= 128:
+                        return False
+                elif item_op is sre_constants.RANGE:
+                    if item_av[1] >= 128:
+                        return False
+                else:
+                    return False
+        elif op is sre_constants.AT:
+            if av not in _BYTE_COMPATIBLE_AT_CODES:
+                return False
+        elif op is sre_constants.SUBPATTERN:
+            _group, add_flags, del_flags, sub_pattern = av
+            if (add_flags | del_flags) & (re.IGNORECASE | re.ASCII | re.UNICODE) or not _is_byte_compatible_sequence(list(sub_pattern)):
+                return False
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT):
+            if not _is_byte_compatible_sequence(list(av[2])):
+                return False
+        elif op is sre_constants.BRANCH:
+            if not all(_is_byte_compatible_sequence(list(sub_pattern)) for sub_pattern in av[1]):
+                return False
+        elif op in (sre_constants.ATOMIC_GROUP,):
+            if not _is_byte_compatible_sequence(list(av)):
+                return False
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if not _is_byte_compatible_sequence(list(av[1])):
+                return False
+        else:
+            # e.g. ANY, NOT_LITERAL, CATEGORY, group references
+            return False
+    return True
+
+
+def _search_text_compact(
+    compiled_pattern: re.Pattern, content: str, context_lines_before: int, context_lines_after: int
+) -> list[CompactMatch]:
+    lines = content.splitlines()
+    result = []
+    for context_start, start_line, end_line, context_end in iter_match_line_ranges(
+        compiled_pattern, content, len(lines), context_lines_before, context_lines_after
+    ):
+        result.append((context_start, start_line, end_line, tuple(lines[context_start - 1 : context_end])))
+    return result
+
+
+def _search_bytes_compact(
+    compiled_bytes_pattern: re.Pattern, data: bytes | mmap.mmap, context_lines_before: int, context_lines_after: int
+) -> list[CompactMatch] | None:
+    """
+    Searches the (possibly memory-mapped) UTF-8 content of a file, decoding only the lines that are part of a match
+    (or its context).
+
+    :return: the matches or None if the search must be performed on the decoded text instead
+    """
+    # the decoded text uses other line boundaries (e.g. "\r\n" is read as "\n"), which affect both the matches (of patterns
+    # referring to line ends) and the line numbers
+    if any(data.find(line_boundary) != -1 for line_boundary in _SPECIAL_LINE_BOUNDARIES):
+        return None
+    size = len(data)
+    result: list[CompactMatch] = []
+    num_newlines = 0
+    counted_up_to = 0
+    for match in compiled_bytes_pattern.finditer(data):
+        start_pos, end_pos = match.span()
+        if start_pos >= size:
+            # an (empty) match at the very end is not associated with a line of content
+            return None
+        num_newlines += data[counted_up_to:start_pos].count(b"\n")
+        counted_up_to = start_pos
+        start_line = num_newlines + 1
+        end_line = start_line + data[start_pos:end_pos].count(b"\n")
+        context_start = max(1, start_line - context_lines_before)
+
+        # determine the offset at which the first context line starts
+        line_start_pos = data.rfind(b"\n", 0, start_pos) + 1
+        for _ in range(start_line - context_start):
+            line_start_pos = data.rfind(b"\n", 0, line_start_pos - 1) + 1
+
+        # collect the lines up to the last context line (or the last line of the file)
+        lines = []
+        line_num = context_start
+        while line_num <= end_line + context_lines_after and line_start_pos < size:
+            line_end_pos = data.find(b"\n", line_start_pos)
+            if line_end_pos == -1:
+                line_end_pos = size
+            lines.append(data[line_start_pos:line_end_pos].decode("utf-8"))
+            line_start_pos = line_end_pos + 1
+            line_num += 1
+        result.append((context_start, start_line, end_line, tuple(lines)))
+    if result:
+        # files which are not valid UTF-8 are not searched (consistent with searching the decoded text)
+        str(data, "utf-8")
+    return result
+
+
+def search_file_compact(
+    path: str, pattern: str, context_lines_before: int = 0, context_lines_after: int = 0, use_bytes_pattern: bool | None = None
+) -> list[CompactMatch]:
+    """
+    Searches the given UTF-8 file for the given pattern (compiled with DOTALL), searching the file's bytes (memory-mapping
+    large files) rather than decoding it where possible.
+    The results are equivalent to the ones of `serena.text_utils.search_text` with `allow_multiline_match=True`.
+    Raises an exception if the file cannot be read or if it contains matches but cannot be decoded.
+
+    :param path: the path of the file
+    :param pattern: the regular expression
+    :param context_lines_before: the number of context lines to include before matches
+    :param context_lines_after: the number of context lines to include after matches
+    :param use_bytes_pattern: whether the pattern may be applied to the file's bytes (see `is_byte_compatible_pattern`);
+        if None, it is determined for the given pattern
+    :return: the matches in compact form
+    """
+    if use_bytes_pattern is None:
+        use_bytes_pattern = is_byte_compatible_pattern(pattern)
+    with open(path, "rb") as f:
+        if use_bytes_pattern:
+            compiled_bytes_pattern = re.compile(pattern.encode("ascii"), re.DOTALL)
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_FILE_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    result = _search_bytes_compact(compiled_bytes_pattern, data, context_lines_before, context_lines_after)
+                if result is not None:
+                    return result
+                content = f.read()
+            else:
+                content = f.read()
+                result = _search_bytes_compact(compiled_bytes_pattern, content, context_lines_before, context_lines_after)
+                if result is not None:
+                    return result
+        else:
+            content = f.read()
+    text = content.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    return _search_text_compact(re.compile(pattern, re.DOTALL), text, context_lines_before, context_lines_after)
+
+
+def search_files_compact(
+    relative_file_paths: list[str], root_path: str, pattern: str, context_lines_before: int = 0, context_lines_after: int = 0
+) -> list[tuple[str, list[CompactMatch], str | None]]:
+    """
+    Searches the given files (this is the unit of work of a search worker process).
+
+    :return: a list of tuples (relative_path, matches, error) for each file
+    """
+    use_bytes_pattern = is_byte_compatible_pattern(pattern)
+    result: list[tuple[str, list[CompactMatch], str | None]] = []
+    for relative_path in relative_file_paths:
+        try:
+            matches = search_file_compact(
+                os.path.join(root_path, relative_path),
+                pattern,
+                context_lines_before=context_lines_before,
+                context_lines_after=context_lines_after,
+                use_bytes_pattern=use_bytes_pattern,
+            )
+            result.append((relative_path, matches, None))
+        except Exception as e:
+            result.append((relative_path, [], str(e)))
+    return result
@@ -1,7 +1,8 @@
 import glob
 import logging
 import os
-from collections.abc import Callable
+import re
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import NamedTuple
@@ -19,63 +20,122 @@ class ScanResult(NamedTuple):
     files: list[str]
 
 
-def scan_directory(
+class ScannedEntry(NamedTuple):
+    """An entry found while walking a directory tree."""
+
+    path: str
+    is_dir: bool
+
+
+def walk_directory(
     path: str,
     recursive: bool = False,
     relative_to: str | None = None,
     is_ignored_dir: Callable[[str], bool] = lambda x: False,
     is_ignored_file: Callable[[str], bool] = lambda x: False,
-) -> ScanResult:
+    is_ignored_entry: Callable[[os.DirEntry], bool] | None = None,
+    max_depth: int | None = None,
+) -> Iterator[ScannedEntry]:
     """
+    Walks the given directory iteratively (depth-first, in the order of `os.scandir`), yielding non-ignored entries
+    as they are found. The contents of ignored directories are not scanned.
+    Consumers may stop the iteration at any time, in which case no further directories are scanned.
+
     :param path: the path to scan
     :param recursive: whether to recursively scan subdirectories
     :param relative_to: the path to which the results should be relative to; if None, provide absolute paths
     :param is_ignored_dir: a function with which to determine whether the given directory (abs. path) shall be ignored
     :param is_ignored_file: a function with which to determine whether the given file (abs. path) shall be ignored
-    :return: the list of directories and files
+    :param is_ignored_entry: a function with which to determine whether the given directory entry (file or directory)
+        shall be ignored; if provided, it is used instead of `is_ignored_dir` and `is_ignored_file`, which avoids
+        determining the type of the entry again
+    :param max_depth: the maximum depth of the entries to yield (1 for the entries directly contained in the given directory);
+        if None, the depth is unlimited if `recursive` is True (and 1 otherwise)
+    :return: an iterator of the directories and files that are not ignored
     """
-    files = []
-    directories = []
-
+    if not recursive:
+        max_depth = 1
     abs_path = os.path.abspath(path)
-    rel_base = os.path.abspath(relative_to) if relative_to else None
-
+    if relative_to:
+        result_base_path = os.path.relpath(abs_path, os.path.abspath(relative_to))
+        if result_base_path == ".":
+            result_base_path = ""
+    else:
+        result_base_path = abs_path
+
+    # stack of (iterator over the remaining entries of a directory, result path of the directory, depth of the entries)
+    stack: list[tuple[Iterator[os.DirEntry], str, int]] = [(iter(_list_directory_entries(abs_path)), result_base_path, 1)]
+    while stack:
+        entries, dir_result_path, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        result_path = os.path.join(dir_result_path, entry.name) if dir_result_path else entry.name
+        try:
+            if entry.is_file():
+                is_dir = False
+                is_ignored = is_ignored_entry(entry) if is_ignored_entry is not None else is_ignored_file(entry.path)
+            elif entry.is_dir():
+                is_dir = True
+                is_ignored = is_ignored_entry(entry) if is_ignored_entry is not None else is_ignored_dir(entry.path)
+            else:
+                continue
+        except PermissionError as ex:
+            # Skip files/directories that cannot be accessed due to permission issues
+            log.debug(f"Skipping entry due to permission error: {entry.path}", exc_info=ex)
+            continue
+        if is_ignored:
+            continue
+        yield ScannedEntry(result_path, is_dir)
+        if is_dir and (max_depth is None or depth < max_depth):
+            stack.append((iter(_list_directory_entries(entry.path)), result_path, depth + 1))
+
+
+def _list_directory_entries(abs_path: str) -> list[os.DirEntry]:
     try:
         with os.scandir(abs_path) as entries:
-            for entry in entries:
-                try:
-                    entry_path = entry.path
+            return list(entries)
+    except OSError as ex:
+        # Skip the entire directory if it cannot be accessed (e.g. due to permissions or because it was removed in the meantime)
+        log.debug(f"Skipping directory that cannot be listed: {abs_path}", exc_info=ex)
+        return []
 
-                    if rel_base:
-                        result_path = os.path.relpath(entry_path, rel_base)
-                    else:
-                        result_path = entry_path
-
-                    if entry.is_file():
-                        if not is_ignored_file(entry_path):
-                            files.append(result_path)
-                    elif entry.is_dir():
-                        if not is_ignored_dir(entry_path):
-                            directories.append(result_path)
-                            if recursive:
-                                sub_result = scan_directory(
-                                    entry_path,
-                                    recursive=True,
-                                    relative_to=relative_to,
-                                    is_ignored_dir=is_ignored_dir,
-                                    is_ignored_file=is_ignored_file,
-                                )
-                                files.extend(sub_result.files)
-                                directories.extend(sub_result.directories)
-                except PermissionError as ex:
-                    # Skip files/directories that cannot be accessed due to permission issues
-                    log.debug(f"Skipping entry due to permission error: {entry.path}", exc_info=ex)
-                    continue
-    except PermissionError as ex:
-        # Skip the entire directory if it cannot be accessed
-        log.debug(f"Skipping directory due to permission error: {abs_path}", exc_info=ex)
-        return ScanResult([], [])
 
+def scan_directory(
+    path: str,
+    recursive: bool = False,
+    relative_to: str | None = None,
+    is_ignored_dir: Callable[[str], bool] = lambda x: False,
+    is_ignored_file: Callable[[str], bool] = lambda x: False,
+    is_ignored_entry: Callable[[os.DirEntry], bool] | None = None,
+) -> ScanResult:
+    """
+    Scans the given directory, collecting all non-ignored entries (see `walk_directory`).
+
+    :param path: the path to scan
+    :param recursive: whether to recursively scan subdirectories
+    :param relative_to: the path to which the results should be relative to; if None, provide absolute paths
+    :param is_ignored_dir: a function with which to determine whether the given directory (abs. path) shall be ignored
+    :param is_ignored_file: a function with which to determine whether the given file (abs. path) shall be ignored
+    :param is_ignored_entry: a function with which to determine whether the given directory entry (file or directory)
+        shall be ignored; if provided, it is used instead of `is_ignored_dir` and `is_ignored_file`
+    :return: the list of directories and files
+    """
+    files = []
+    directories = []
+    for entry in walk_directory(
+        path,
+        recursive=recursive,
+        relative_to=relative_to,
+        is_ignored_dir=is_ignored_dir,
+        is_ignored_file=is_ignored_file,
+        is_ignored_entry=is_ignored_entry,
+    ):
+        if entry.is_dir:
+            directories.append(entry.path)
+        else:
+            files.append(entry.path)
     return ScanResult(directories, files)
 
 
@@ -303,6 +363,127 @@ class GitignoreParser:
         self._load_gitignore_files()
 
 
+@dataclass
+class _DirectoryScope:
+    has_ignored_dirname: bool
+    """whether the directory or one of its ancestors has a name that is always ignored"""
+    patterns_by_spec: list[list[tuple[re.Pattern, bool, tuple[str, ...]]]]
+    """
+    for each path spec, the (regex, include, literal_dir_prefix) triples of the patterns which can apply to paths within
+    the directory, in reverse order (such that the first matching pattern determines the result)
+    """
+
+
+class IgnoreMatcher:
+    """
+    Determines whether paths in a directory tree are ignored, based on gitignore-style path specs and a condition on
+    directory names.
+
+    Patterns are checked only for paths in directories they can apply to: Patterns that are anchored to a directory
+    (e.g. the ones collected from nested .gitignore files) are skipped for all other directories. The applicable patterns
+    are determined once per directory and cached, as is the condition on directory names.
+    The type of the path (file or directory) must be provided by the caller, so no stat calls are required
+    when walking a tree via `os.scandir`.
+    """
+
+    def __init__(
+        self, root_path: str, path_specs: list[PathSpec], is_ignored_dirname: Callable[[str], bool] = lambda dirname: False
+    ) -> None:
+        """
+        :param root_path: the root path of the directory tree
+        :param path_specs: the path specs with patterns relative to the root path; a path is ignored if it is matched
+            by any of the specs
+        :param is_ignored_dirname: a function with which to determine whether a directory with the given name (and its
+            entire subtree) shall always be ignored
+        """
+        self.root_path = os.path.abspath(root_path)
+        self._is_ignored_dirname = is_ignored_dirname
+        self._dir_scopes: dict[str, _DirectoryScope] = {}
+        root_patterns_by_spec = []
+        for path_spec in path_specs:
+            patterns = []
+            for pattern in path_spec.patterns:
+                regex = getattr(pattern, "regex", None)
+                if pattern.include is None or regex is None:
+                    continue
+                patterns.append((regex, pattern.include, self._get_literal_dir_prefix(getattr(pattern, "pattern", None))))
+            root_patterns_by_spec.append(list(reversed(patterns)))
+        self._dir_scopes[""] = _DirectoryScope(has_ignored_dirname=False, patterns_by_spec=root_patterns_by_spec)
+
+    @staticmethod
+    def _get_literal_dir_prefix(pattern: str | None) -> tuple[str, ...]:
+        """
+        :return: the leading path components (without wildcards) which all paths matched by the given pattern must begin with;
+            empty if the pattern is not anchored
+        """
+        if not isinstance(pattern, str):
+            return ()
+        pattern = pattern.removeprefix("!")
+        if pattern.startswith("/"):
+            pattern = pattern[1:]
+        elif "/" not in pattern.rstrip("/"):
+            return ()
+        prefix = []
+        for component in pattern.split("/"):
+            if component in ("", ".", "..") or any(c in component for c in "*?[\\"):
+                break
+            prefix.append(component)
+        return tuple(prefix)
+
+    def _get_directory_scope(self, rel_dir_path: str) -> _DirectoryScope:
+        scope = self._dir_scopes.get(rel_dir_path)
+        if scope is not None:
+            return scope
+        parent_path, _, dirname = rel_dir_path.rpartition("/")
+        parent_scope = self._get_directory_scope(parent_path)
+        components = tuple(rel_dir_path.split("/"))
+        num_components = len(components)
+
+        def is_applicable(prefix: tuple[str, ...]) -> bool:
+            n = min(num_components, len(prefix))
+            return prefix[:n] == components[:n]
+
+        scope = _DirectoryScope(
+            has_ignored_dirname=parent_scope.has_ignored_dirname or self._is_ignored_dirname(dirname),
+            patterns_by_spec=[[p for p in patterns if is_applicable(p[2])] for patterns in parent_scope.patterns_by_spec],
+        )
+        self._dir_scopes[rel_dir_path] = scope
+        return scope
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        """
+        :param relative_path: a path relative to the root path
+        :param is_dir: whether the path refers to a directory
+        :return: whether the path is ignored, i.e. whether it is matched by one of the path specs or is contained in
+            (or is) a directory with an ignored name
+        """
+        rel_path = relative_path.replace(os.sep, "/").strip("/")
+        if rel_path in ("", "."):
+            return False
+        if "/." in "/" + rel_path or "//" in rel_path:
+            rel_path = os.path.normpath(rel_path).replace(os.sep, "/")
+        parent_path, _, name = rel_path.rpartition("/")
+        scope = self._get_directory_scope(parent_path)
+        if scope.has_ignored_dirname or (is_dir and self._is_ignored_dirname(name)):
+            return True
+        path_to_match = rel_path + "/" if is_dir else rel_path
+        for patterns in scope.patterns_by_spec:
+            for regex, include, _ in patterns:
+                if regex.match(path_to_match) is not None:
+                    if include:
+                        return True
+                    break
+        return False
+
+    def is_ignored_entry(self, entry: os.DirEntry, rel_dir_path: str) -> bool:
+        """
+        :param entry: an entry obtained via `os.scandir`
+        :param rel_dir_path: the path of the directory containing the entry, relative to the root path
+        :return: whether the entry is ignored (see `is_ignored`)
+        """
+        return self.is_ignored(f"{rel_dir_path}/{entry.name}" if rel_dir_path else entry.name, entry.is_dir())
+
+
 def match_path(relative_path: str, path_spec: PathSpec, root_path: str = "") -> bool:
     """
     Match a relative path against a given pathspec. Just pathspec.match_file() is not enough,
@@ -0,0 +1,380 @@
+"""
+Watching of directory trees for changes to files, using inotify (on Linux) or polling (everywhere else)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+
+class FileWatcher(ABC):
+    """
+    Watches a directory tree (recursively) for created, modified, deleted and moved files.
+    Changes are collected and reported in batches, once no further changes occurred for a short period of time,
+    such that bulk operations (like git checkouts) result in few notifications.
+    If changes may have been missed (e.g. because events were lost or because the watching failed), this is reported
+    as well, such that consumers can discard all information that relies on changes being reported.
+    """
+
+    def __init__(
+        self,
+        root_path: str,
+        on_changes: Callable[[set[str]], None],
+        is_ignored_dir: Callable[[str], bool] | None = None,
+        debounce_seconds: float = 0.5,
+        on_unknown_changes: Callable[[], None] | None = None,
+    ):
+        """
+        :param root_path: the root directory to watch
+        :param on_changes: the function to call (in the watcher's thread) with the set of paths (relative to the root)
+            of the files that changed; for directories which were deleted or moved away, the path of the directory is reported
+        :param is_ignored_dir: a function which, given a directory path relative to the root, determines whether the
+            directory shall not be watched
+        :param debounce_seconds: the time without further changes after which collected changes are reported
+        :param on_unknown_changes: the function to call (in the watcher's thread) if changes may have been missed, i.e. if
+            any file may have changed; this is also the case if the watching fails, after which the watcher stops
+        """
+        self.root_path = os.path.abspath(root_path)
+        self._on_changes = on_changes
+        self._on_unknown_changes = on_unknown_changes
+        self._is_ignored_dir_fn = is_ignored_dir
+        self._debounce_seconds = debounce_seconds
+        self._pending_changes: set[str] = set()
+        self._last_change_time = 0.0
+        self._pending_changes_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._has_failed = False
+
+    def start(self) -> None:
+        """
+        Starts watching in a background thread.
+        """
+        self._stop_event.clear()
+        self._has_failed = False
+        self._setup()
+        self._thread = threading.Thread(target=self._run_loop, name=self.__class__.__name__, daemon=True)
+        self._thread.start()
+        log.info(f"Started {self.__class__.__name__} for {self.root_path}")
+
+    def stop(self) -> None:
+        """
+        Stops watching; changes which were not yet reported are discarded.
+        """
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._has_failed
+
+    def _relative_path(self, path: str) -> str:
+        return os.path.relpath(path, self.root_path)
+
+    def _is_ignored_dir(self, path: str) -> bool:
+        if self._is_ignored_dir_fn is None:
+            return False
+        rel_path = self._relative_path(path)
+        if rel_path == ".":
+            return False
+        try:
+            return self._is_ignored_dir_fn(rel_path)
+        except FileNotFoundError:
+            return True
+
+    def _walk_dirs(self, start_path: str) -> list[str]:
+        """
+        :return: all non-ignored directories in the tree below the given path (including the path itself)
+        """
+        result = []
+        for root, dirs, _ in os.walk(start_path):
+            result.append(root)
+            dirs[:] = [d for d in dirs if not self._is_ignored_dir(os.path.join(root, d))]
+        return result
+
+    def _walk_files(self, start_path: str) -> list[str]:
+        result: list[str] = []
+        for root, dirs, files in os.walk(start_path):
+            dirs[:] = [d for d in dirs if not self._is_ignored_dir(os.path.join(root, d))]
+            result.extend(os.path.join(root, f) for f in files)
+        return result
+
+    def _record_changes(self, paths: list[str]) -> None:
+        if not paths:
+            return
+        with self._pending_changes_lock:
+            self._pending_changes.update(self._relative_path(p) for p in paths)
+            self._last_change_time = time.monotonic()
+
+    def _report_due_changes(self) -> None:
+        with self._pending_changes_lock:
+            if not self._pending_changes or time.monotonic() - self._last_change_time < self._debounce_seconds:
+                return
+            changes = self._pending_changes
+            self._pending_changes = set()
+        try:
+            self._on_changes(changes)
+        except Exception as e:
+            log.error(f"Error while handling changes to {len(changes)} files in {self.root_path}: {e}", exc_info=e)
+
+    def _report_unknown_changes(self) -> None:
+        """
+        Reports that changes may have been missed, which supersedes the changes that were not yet reported.
+        """
+        with self._pending_changes_lock:
+            self._pending_changes = set()
+        if self._on_unknown_changes is None:
+            return
+        try:
+            self._on_unknown_changes()
+        except Exception as e:
+            log.error(f"Error while handling unknown changes in {self.root_path}: {e}", exc_info=e)
+
+    def _run_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                self._wait_for_changes(min(self._debounce_seconds, 0.5))
+                self._report_due_changes()
+        except Exception as e:
+            log.error(f"{self.__class__.__name__} for {self.root_path} failed: {e}", exc_info=e)
+            self._has_failed = True
+            self._report_unknown_changes()
+        finally:
+            self._teardown()
+
+    def _setup(self) -> None:
+        """
+        Prepares the watching (in the calling thread), raising an exception if watching is not possible.
+        """
+
+    def _teardown(self) -> None:
+        """
+        Releases resources (in the watcher's thread) after the watching has stopped.
+        """
+
+    @abstractmethod
+    def _wait_for_changes(self, timeout: float) -> None:
+        """
+        Waits for at most the given time, recording all changes that are detected (via `_record_changes`).
+        """
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Detects changes by periodically comparing the modification times and sizes of all files in the tree.
+    """
+
+    def __init__(
+        self,
+        root_path: str,
+        on_changes: Callable[[set[str]], None],
+        is_ignored_dir: Callable[[str], bool] | None = None,
+        debounce_seconds: float = 0.5,
+        on_unknown_changes: Callable[[], None] | None = None,
+        poll_interval_seconds: float = 2.0,
+    ):
+        """
+        :param poll_interval_seconds: the time between two scans of the tree
+        """
+        super().__init__(
+            root_path, on_changes, is_ignored_dir=is_ignored_dir, debounce_seconds=debounce_seconds, on_unknown_changes=on_unknown_changes
+        )
+        self._poll_interval_seconds = poll_interval_seconds
+        self._next_poll_time = 0.0
+        self._snapshot: dict[str, tuple[int, int]] = {}
+
+    def _take_snapshot(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for path in self._walk_files(self.root_path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _setup(self) -> None:
+        self._snapshot = self._take_snapshot()
+        self._next_poll_time = time.monotonic() + self._poll_interval_seconds
+
+    def _wait_for_changes(self, timeout: float) -> None:
+        remaining_time = self._next_poll_time - time.monotonic()
+        if remaining_time > 0:
+            self._stop_event.wait(min(timeout, remaining_time))
+            return
+        snapshot = self._take_snapshot()
+        changed_paths = [p for p, signature in snapshot.items() if self._snapshot.get(p) != signature]
+        changed_paths.extend(p for p in self._snapshot if p not in snapshot)
+        self._snapshot = snapshot
+        self._record_changes(changed_paths)
+        self._next_poll_time = time.monotonic() + self._poll_interval_seconds
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Detects changes via the Linux inotify API, which requires a watch for every (non-ignored) directory in the tree.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(
+        self,
+        root_path: str,
+        on_changes: Callable[[set[str]], None],
+        is_ignored_dir: Callable[[str], bool] | None = None,
+        debounce_seconds: float = 0.5,
+        on_unknown_changes: Callable[[], None] | None = None,
+    ):
+        super().__init__(
+            root_path, on_changes, is_ignored_dir=is_ignored_dir, debounce_seconds=debounce_seconds, on_unknown_changes=on_unknown_changes
+        )
+        self._libc: ctypes.CDLL | None = None
+        self._fd = -1
+        self._dir_by_watch_descriptor: dict[int, str] = {}
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return sys.platform.startswith("linux")
+
+    def _setup(self) -> None:
+        if not self.is_supported():
+            raise OSError("inotify is not supported on this platform")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            for path in self._walk_dirs(self.root_path):
+                self._add_watch(path)
+        except OSError:
+            self._teardown()
+            raise
+
+    def _teardown(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._dir_by_watch_descriptor = {}
+
+    def _add_watch(self, path: str) -> None:
+        assert self._libc is not None
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            error_code = ctypes.get_errno()
+            # the directory may have been removed in the meantime; all other errors (e.g. exceeding the watch limit) are fatal
+            if error_code in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error_code, f"inotify_add_watch failed for {path} (consider increasing fs.inotify.max_user_watches)")
+        self._dir_by_watch_descriptor[wd] = path
+
+    def _remove_watches(self, path: str) -> None:
+        """
+        Removes the watches of the given directory and of the directories below it (e.g. because the directory was moved away,
+        such that the watched paths are no longer valid).
+        """
+        assert self._libc is not None
+        prefix = os.path.join(path, "")
+        for wd, dir_path in list(self._dir_by_watch_descriptor.items()):
+            if dir_path == path or dir_path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dir_by_watch_descriptor[wd]
+
+    def _wait_for_changes(self, timeout: float) -> None:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return
+
+        changed_paths = []
+        is_overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, name_length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+
+            if mask & self.IN_Q_OVERFLOW:
+                log.warning(f"inotify event queue overflowed for {self.root_path}; reporting unknown changes")
+                is_overflow = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._dir_by_watch_descriptor.pop(wd, None)
+                continue
+            dir_path = self._dir_by_watch_descriptor.get(wd)
+            if dir_path is None:
+                continue
+            path = os.path.join(dir_path, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not self._is_ignored_dir(path):
+                    # files in the new directory may have been created before the watch was added
+                    for new_dir in self._walk_dirs(path):
+                        self._add_watch(new_dir)
+                    changed_paths.extend(self._walk_files(path))
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    # the files in the directory are not reported individually if the directory was moved away
+                    if mask & self.IN_MOVED_FROM:
+                        self._remove_watches(path)
+                    changed_paths.append(path)
+            else:
+                changed_paths.append(path)
+        if is_overflow:
+            self._report_unknown_changes()
+        else:
+            self._record_changes(changed_paths)
+
+
+def create_file_watcher(
+    root_path: str,
+    on_changes: Callable[[set[str]], None],
+    is_ignored_dir: Callable[[str], bool] | None = None,
+    debounce_seconds: float = 0.5,
+    on_unknown_changes: Callable[[], None] | None = None,
+) -> FileWatcher:
+    """
+    Creates and starts a file watcher for the given directory tree, using inotify where it is available and
+    falling back to polling otherwise.
+
+    See :class:`FileWatcher` for a description of the parameters.
+    """
+    if InotifyFileWatcher.is_supported():
+        watcher: FileWatcher = InotifyFileWatcher(
+            root_path, on_changes, is_ignored_dir=is_ignored_dir, debounce_seconds=debounce_seconds, on_unknown_changes=on_unknown_changes
+        )
+        try:
+            watcher.start()
+            return watcher
+        except OSError as e:
+            log.warning(f"Could not watch {root_path} via inotify ({e}); falling back to polling")
+    watcher = PollingFileWatcher(
+        root_path, on_changes, is_ignored_dir=is_ignored_dir, debounce_seconds=debounce_seconds, on_unknown_changes=on_unknown_changes
+    )
+    watcher.start()
+    return watcher
@@ -1,17 +1,25 @@
 import queue
 import threading
 from collections.abc import Callable
+from dataclasses import dataclass
 
 from sensai.util import logging
 
 from serena.constants import SERENA_LOG_FORMAT
 
+DEFAULT_MAX_LOG_MESSAGES = 50_000
+"""the default maximum number of log messages retained in memory (e.g. for display in the dashboard)"""
+
 
 class MemoryLogHandler(logging.Handler):
-    def __init__(self, level: int = logging.NOTSET) -> None:
+    def __init__(self, level: int = logging.NOTSET, max_messages: int = DEFAULT_MAX_LOG_MESSAGES) -> None:
+        """
+        :param level: the minimum level of the messages to handle
+        :param max_messages: the maximum number of messages to retain; older messages are discarded
+        """
         super().__init__(level=level)
         self.setFormatter(logging.Formatter(SERENA_LOG_FORMAT))
-        self._log_buffer = LogBuffer()
+        self._log_buffer = LogBuffer(max_messages=max_messages)
         self._log_queue: queue.Queue[str] = queue.Queue()
         self._stop_event = threading.Event()
         self._emit_callbacks: list[Callable[[str], None]] = []
@@ -48,20 +56,86 @@ class MemoryLogHandler(logging.Handler):
     def get_log_messages(self) -> list[str]:
         return self._log_buffer.get_log_messages()
 
+    def get_log_messages_from(self, start_idx: int, timeout: float = 0.0) -> "LogMessages":
+        return self._log_buffer.get_log_messages_from(start_idx, timeout=timeout)
+
+
+@dataclass(kw_only=True)
+class LogMessages:
+    """
+    A contiguous range of the messages of a log buffer
+    """
+
+    messages: list[str]
+    start_idx: int
+    """the index of the first message; greater than the requested index if the messages before it were discarded"""
+    max_idx: int
+    """the index of the last message that was added to the buffer (-1 if no messages were added yet)"""
+
 
 class LogBuffer:
     """
-    A thread-safe buffer for storing log messages.
+    A thread-safe, fixed-capacity ring buffer for storing log messages.
+    Every message is assigned a consecutive index, such that clients can read the messages added since their last read
+    in time proportional to the number of new messages.
+    Once the capacity is reached, the oldest messages are discarded.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, max_messages: int = DEFAULT_MAX_LOG_MESSAGES) -> None:
+        """
+        :param max_messages: the maximum number of messages to retain
+        """
+        if max_messages < 1:
+            raise ValueError(f"The maximum number of messages must be at least 1, got {max_messages}")
+        self._max_messages = max_messages
         self._log_messages: list[str] = []
-        self._lock = threading.Lock()
+        self._num_messages_added = 0
+        self._condition = threading.Condition()
 
     def append(self, msg: str) -> None:
-        with self._lock:
-            self._log_messages.append(msg)
+        with self._condition:
+            if len(self._log_messages) < self._max_messages:
+                self._log_messages.append(msg)
+            else:
+                self._log_messages[self._num_messages_added % self._max_messages] = msg
+            self._num_messages_added += 1
+            self._condition.notify_all()
+
+    def _get_messages_in_range(self, start_idx: int, end_idx: int) -> list[str]:
+        """
+        Must be called while holding the lock.
+
+        :param start_idx: the index of the first message, which must be retained
+        :param end_idx: the index after the last message, which must not exceed the number of messages added
+        """
+        start_pos = start_idx % self._max_messages
+        end_pos = start_pos + end_idx - start_idx
+        if end_pos <= len(self._log_messages):
+            return self._log_messages[start_pos:end_pos]
+        return self._log_messages[start_pos:] + self._log_messages[: end_pos - self._max_messages]
 
     def get_log_messages(self) -> list[str]:
-        with self._lock:
-            return self._log_messages.copy()
+        """
+        :return: all retained messages (oldest first)
+        """
+        return self.get_log_messages_from(0).messages
+
+    def get_log_messages_from(self, start_idx: int, timeout: float = 0.0) -> LogMessages:
+        """
+        Gets the retained messages with indices greater than or equal to the given index.
+
+        :param start_idx: the index of the first message to return
+        :param timeout: the maximum time (in seconds) to wait for a message with the given index to be added if there is
+            none yet; if 0, return immediately
+        :return: the messages
+        """
+        with self._condition:
+            if timeout > 0:
+                self._condition.wait_for(lambda: self._num_messages_added > start_idx, timeout=timeout)
+            start_idx = max(start_idx, self._num_messages_added - len(self._log_messages))
+            end_idx = max(start_idx, self._num_messages_added)
+            return LogMessages(
+                messages=self._get_messages_in_range(start_idx, end_idx),
+                start_idx=start_idx,
+                max_idx=self._num_messages_added - 1,
+            )
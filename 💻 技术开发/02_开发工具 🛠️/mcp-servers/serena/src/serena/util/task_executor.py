@@ -0,0 +1,171 @@
+"""
+Execution of tasks in background threads, where read-only tasks may run concurrently and all other tasks run exclusively
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass(kw_only=True)
+class TaskQueueStats:
+    """
+    Statistics on the scheduling of the tasks with a given name
+    """
+
+    num_queued: int = 0
+    """the number of tasks which are currently waiting to be started"""
+    num_running: int = 0
+    """the number of tasks which are currently running"""
+    num_started: int = 0
+    """the number of tasks which were started so far"""
+    total_wait_time: float = 0.0
+    """the total time (in seconds) that the started tasks waited before being started"""
+    max_wait_time: float = 0.0
+    """the maximum time (in seconds) that a started task waited before being started"""
+
+    @property
+    def mean_wait_time(self) -> float:
+        return self.total_wait_time / self.num_started if self.num_started > 0 else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self), "mean_wait_time": self.mean_wait_time}
+
+
+@dataclass
+class _QueuedTask:
+    fn: Callable[[], Any]
+    name: str
+    read_only: bool
+    future: Future
+    issue_time: float
+
+
+class TaskExecutor:
+    """
+    Executes tasks in background threads, applying a readers/writer scheme:
+    Read-only tasks may run concurrently with each other (up to a maximum number), while all other tasks run exclusively.
+    Tasks are started in the order in which they are issued, i.e. a task never overtakes a task that was issued before it:
+    An exclusive task is started once all previously issued tasks have completed, and tasks issued after an exclusive task
+    are started only once the exclusive task has completed.
+    In particular, with a maximum of one concurrent task, the tasks are executed one after another.
+    """
+
+    def __init__(self, max_concurrent_read_only_tasks: int = 1, thread_name_prefix: str = "TaskExecutor"):
+        """
+        :param max_concurrent_read_only_tasks: the maximum number of read-only tasks that may run at the same time
+        :param thread_name_prefix: the prefix of the names of the executor's threads
+        """
+        if max_concurrent_read_only_tasks < 1:
+            raise ValueError(f"The maximum number of concurrent tasks must be at least 1, got {max_concurrent_read_only_tasks}")
+        self._max_concurrent_read_only_tasks = max_concurrent_read_only_tasks
+        self._thread_pool = ThreadPoolExecutor(max_workers=max_concurrent_read_only_tasks, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._queue: deque[_QueuedTask] = deque()
+        self._num_running_read_only_tasks = 0
+        self._is_exclusive_task_running = False
+        self._stats: dict[str, TaskQueueStats] = {}
+
+    @property
+    def max_concurrent_read_only_tasks(self) -> int:
+        return self._max_concurrent_read_only_tasks
+
+    def submit(self, fn: Callable[[], Any], name: str, read_only: bool = False) -> Future:
+        """
+        Issues a task for asynchronous execution.
+
+        :param fn: the function to execute
+        :param name: the name of the task, under which statistics are collected
+        :param read_only: whether the task may run concurrently with other read-only tasks
+        :return: a Future representing the execution of the task
+        """
+        future: Future = Future()
+        with self._lock:
+            self._queue.append(_QueuedTask(fn=fn, name=name, read_only=read_only, future=future, issue_time=time.perf_counter()))
+            self._get_stats_entry(name).num_queued += 1
+            self._start_due_tasks()
+        return future
+
+    def _get_stats_entry(self, name: str) -> TaskQueueStats:
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = TaskQueueStats()
+            self._stats[name] = entry
+        return entry
+
+    def _start_due_tasks(self) -> None:
+        """
+        Starts the tasks at the head of the queue which may run at this point.
+        Must be called while holding the lock.
+        """
+        while self._queue and not self._is_exclusive_task_running:
+            task = self._queue[0]
+            if task.read_only:
+                if self._num_running_read_only_tasks >= self._max_concurrent_read_only_tasks:
+                    break
+                self._num_running_read_only_tasks += 1
+            else:
+                if self._num_running_read_only_tasks > 0:
+                    break
+                self._is_exclusive_task_running = True
+            self._queue.popleft()
+
+            wait_time = time.perf_counter() - task.issue_time
+            stats = self._get_stats_entry(task.name)
+            stats.num_queued -= 1
+            stats.num_running += 1
+            stats.num_started += 1
+            stats.total_wait_time += wait_time
+            stats.max_wait_time = max(stats.max_wait_time, wait_time)
+            self._thread_pool.submit(self._run_task, task)
+
+    def _run_task(self, task: _QueuedTask) -> None:
+        try:
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    result = task.fn()
+                except BaseException as e:
+                    task.future.set_exception(e)
+                else:
+                    task.future.set_result(result)
+        finally:
+            with self._lock:
+                if task.read_only:
+                    self._num_running_read_only_tasks -= 1
+                else:
+                    self._is_exclusive_task_running = False
+                self._stats[task.name].num_running -= 1
+                self._start_due_tasks()
+
+    def get_stats(self) -> dict[str, TaskQueueStats]:
+        """
+        :return: a mapping from task names to (copies of) the statistics of the respective tasks
+        """
+        with self._lock:
+            return {name: TaskQueueStats(**asdict(entry)) for name, entry in self._stats.items()}
+
+    def get_queue_length(self) -> int:
+        """
+        :return: the number of tasks which are waiting to be started
+        """
+        with self._lock:
+            return len(self._queue)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the executor, cancelling all tasks which have not yet been started.
+
+        :param wait: whether to wait for the running tasks to complete
+        """
+        with self._lock:
+            queued_tasks = list(self._queue)
+            self._queue.clear()
+            for task in queued_tasks:
+                self._stats[task.name].num_queued -= 1
+        for task in queued_tasks:
+            task.future.cancel()
+        self._thread_pool.shutdown(wait=wait)
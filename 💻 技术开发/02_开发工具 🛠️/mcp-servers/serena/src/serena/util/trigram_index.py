@@ -0,0 +1,304 @@
+"""
+A persistent trigram index for narrowing down the files which can contain matches of a regular expression
+"""
+
+import hashlib
+import logging
+import os
+import re
+import re._constants as sre_constants
+import re._parser as sre_parse
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# lower-cases ASCII letters and maps all non-ASCII bytes to a single byte (queries only ever contain ASCII trigrams)
+_NORMALIZATION_TABLE = bytes((b + 32 if 65 <= b <= 90 else b) if b < 128 else 128 for b in range(256))
+# characters which, when matched case-insensitively, also match non-ASCII characters (e.g. "k" matches the Kelvin sign)
+_CASE_INSENSITIVE_NON_ASCII_EQUIVALENTS = {"i", "k", "s"}
+
+
+def normalize_content(data: bytes) -> bytes:
+    """
+    Normalizes file content for trigram extraction in the same way in which text is normalized when read in text mode
+    (universal newlines), lower-casing ASCII letters.
+    """
+    return data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").translate(_NORMALIZATION_TABLE)
+
+
+def extract_trigrams(normalized_data: bytes) -> set[bytes]:
+    return {normalized_data[i : i + 3] for i in range(len(normalized_data) - 2)}
+
+
+@dataclass
+class TrigramQuery:
+    """
+    A necessary condition for a text to contain a match of a regular expression: the text must contain all the
+    trigrams and, for each list of alternatives, must satisfy at least one of the alternative queries.
+    A query without trigrams and alternatives is satisfied by every text.
+    """
+
+    trigrams: set[bytes] = field(default_factory=set)
+    alternatives: list[list["TrigramQuery"]] = field(default_factory=list)
+
+    def is_unrestricted(self) -> bool:
+        return not self.trigrams and not self.alternatives
+
+    def add(self, query: "TrigramQuery") -> None:
+        self.trigrams.update(query.trigrams)
+        self.alternatives.extend(query.alternatives)
+
+    @classmethod
+    def from_regex(cls, pattern: str, flags: int = re.DOTALL) -> "TrigramQuery":
+        """
+        Derives the query from a regular expression. The query is conservative: every text containing a match of the
+        pattern satisfies the query. Invalid patterns result in an unrestricted query.
+        """
+        try:
+            parsed_pattern = sre_parse.parse(pattern, flags)
+        except re.error:
+            return cls()
+        return cls._from_sequence(list(parsed_pattern), bool(parsed_pattern.state.flags & re.IGNORECASE))
+
+    @classmethod
+    def _from_sequence(cls, items: list, ignore_case: bool) -> "TrigramQuery":
+        query = cls()
+        literal_run: list[str] = []
+
+        def end_literal_run() -> None:
+            if len(literal_run) >= 3:
+                query.trigrams.update(extract_trigrams("".join(literal_run).lower().encode("ascii")))
+            literal_run.clear()
+
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                char = chr(av)
+                if char.isascii() and not (ignore_case and char.lower() in _CASE_INSENSITIVE_NON_ASCII_EQUIVALENTS):
+                    literal_run.append(char)
+                    continue
+            end_literal_run()
+            if op is sre_constants.SUBPATTERN:
+                _group, add_flags, del_flags, sub_pattern = av
+                sub_ignore_case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+                query.add(cls._from_sequence(list(sub_pattern), sub_ignore_case))
+            elif op is sre_constants.ATOMIC_GROUP:
+                query.add(cls._from_sequence(list(av), ignore_case))
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT):
+                min_repetitions, _max_repetitions, sub_pattern = av
+                if min_repetitions >= 1:
+                    query.add(cls._from_sequence(list(sub_pattern), ignore_case))
+            elif op is sre_constants.BRANCH:
+                alternatives = [cls._from_sequence(list(sub_pattern), ignore_case) for sub_pattern in av[1]]
+                if not any(alternative.is_unrestricted() for alternative in alternatives):
+                    query.alternatives.append(alternatives)
+        end_literal_run()
+        return query
+
+
+class TrigramIndex:
+    """
+    Maps the files of a directory tree to the (normalized) trigrams they contain, such that the files which cannot
+    contain a match of a regular expression can be excluded without reading them.
+
+    The index is persisted in an SQLite database and kept up to date incrementally: files whose size and
+    modification time changed are re-read and re-indexed only if their content hash changed.
+    The inverted index (trigram -> files) is held in memory and built when the index is first used.
+    """
+
+    MIN_FILE_AGE_NS = 2_000_000_000
+    """
+    the minimum age (time since the last modification) a file must have for its size and modification time to be
+    considered sufficient evidence for the file not having changed
+    """
+
+    def __init__(self, db_path: str | Path, root_path: str):
+        """
+        :param db_path: the path to the database file, which will be created if it does not exist
+        :param root_path: the root directory against which the relative paths of files are resolved
+        """
+        self.db_path = Path(db_path)
+        self.root_path = root_path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._postings: dict[bytes, array] = {}
+        self._entry_by_path: dict[str, tuple[int, int, int, str]] = {}
+        """maps relative paths to tuples (file_id, mtime_ns, size, content_hash)"""
+        self._path_by_file_id: dict[int, str] = {}
+        self._next_file_id = 0
+
+    def _open(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            log.error(f"Trigram index {self.db_path} could not be opened ({e}); rebuilding it")
+            for suffix in ("", "-wal", "-shm"):
+                Path(str(self.db_path) + suffix).unlink(missing_ok=True)
+            self._conn = self._connect()
+        for path, mtime_ns, size, content_hash, trigrams in self._conn.execute(
+            "SELECT path, mtime_ns, size, content_hash, trigrams FROM files"
+        ):
+            self._add_to_postings(path, mtime_ns, size, content_hash, trigrams)
+        log.info(f"Loaded trigram index with {len(self._entry_by_path)} files from {self.db_path}")
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, trigrams BLOB NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def _add_to_postings(self, path: str, mtime_ns: int, size: int, content_hash: str, trigrams: bytes) -> None:
+        file_id = self._next_file_id
+        self._next_file_id += 1
+        self._entry_by_path[path] = (file_id, mtime_ns, size, content_hash)
+        self._path_by_file_id[file_id] = path
+        postings = self._postings
+        for i in range(0, len(trigrams), 3):
+            trigram = trigrams[i : i + 3]
+            file_ids = postings.get(trigram)
+            if file_ids is None:
+                postings[trigram] = array("i", (file_id,))
+            else:
+                file_ids.append(file_id)
+
+    def _remove_from_postings(self, path: str) -> None:
+        # the file's id is merely invalidated; the postings are rebuilt once invalid ids make up a large part of them
+        entry = self._entry_by_path.pop(path, None)
+        if entry is not None:
+            del self._path_by_file_id[entry[0]]
+
+    def _rebuild_postings_if_needed(self) -> None:
+        num_invalid_ids = self._next_file_id - len(self._path_by_file_id)
+        if num_invalid_ids < 1000 or num_invalid_ids < len(self._path_by_file_id):
+            return
+        log.info(f"Rebuilding the inverted trigram index (discarding {num_invalid_ids} outdated file entries)")
+        assert self._conn is not None
+        self._postings = {}
+        self._entry_by_path = {}
+        self._path_by_file_id = {}
+        self._next_file_id = 0
+        for path, mtime_ns, size, content_hash, trigrams in self._conn.execute(
+            "SELECT path, mtime_ns, size, content_hash, trigrams FROM files"
+        ):
+            self._add_to_postings(path, mtime_ns, size, content_hash, trigrams)
+
+    def update(self, relative_paths: Iterable[str]) -> None:
+        """
+        Brings the index up to date for the given files, (re-)indexing all files which are new or have changed.
+        Files which no longer exist are removed from the index.
+        """
+        with self._lock:
+            conn = self._open()
+            changed_rows = []
+            removed_paths = []
+            signature_updates = []
+            for path in relative_paths:
+                try:
+                    st = os.stat(os.path.join(self.root_path, path))
+                except OSError:
+                    if path in self._entry_by_path:
+                        removed_paths.append(path)
+                    continue
+                entry = self._entry_by_path.get(path)
+                if (
+                    entry is not None
+                    and entry[1] == st.st_mtime_ns
+                    and entry[2] == st.st_size
+                    and time.time_ns() - st.st_mtime_ns >= self.MIN_FILE_AGE_NS
+                ):
+                    continue
+                try:
+                    with open(os.path.join(self.root_path, path), "rb") as f:
+                        data = f.read()
+                except OSError as e:
+                    log.debug(f"Could not read {path} for indexing: {e}")
+                    continue
+                content_hash = hashlib.md5(data).hexdigest()
+                if entry is not None and entry[3] == content_hash:
+                    self._entry_by_path[path] = (entry[0], st.st_mtime_ns, st.st_size, content_hash)
+                    signature_updates.append((st.st_mtime_ns, st.st_size, path))
+                    continue
+                trigrams = b"".join(sorted(extract_trigrams(normalize_content(data))))
+                self._remove_from_postings(path)
+                self._add_to_postings(path, st.st_mtime_ns, st.st_size, content_hash, trigrams)
+                changed_rows.append((path, st.st_mtime_ns, st.st_size, content_hash, trigrams))
+
+            for path in removed_paths:
+                self._remove_from_postings(path)
+            if changed_rows or removed_paths or signature_updates:
+                log.info(f"Updating trigram index: {len(changed_rows)} files (re-)indexed, {len(removed_paths)} removed")
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO files (path, mtime_ns, size, content_hash, trigrams) VALUES (?, ?, ?, ?, ?)", changed_rows
+                    )
+                    conn.executemany("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", signature_updates)
+                    conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed_paths])
+                self._rebuild_postings_if_needed()
+
+    def _evaluate(self, query: TrigramQuery) -> set[int] | None:
+        """
+        :return: the ids of the files satisfying the query or None if the query is unrestricted
+        """
+        result: set[int] | None = None
+        for trigram in sorted(query.trigrams, key=lambda t: len(self._postings.get(t, ()))):
+            file_ids = self._postings.get(trigram)
+            if file_ids is None:
+                return set()
+            if result is None:
+                result = set(file_ids)
+            else:
+                result.intersection_update(file_ids)
+            if not result:
+                return result
+        for alternatives in query.alternatives:
+            matching_file_ids: set[int] = set()
+            for alternative in alternatives:
+                alternative_file_ids = self._evaluate(alternative)
+                assert alternative_file_ids is not None
+                matching_file_ids.update(alternative_file_ids)
+            if result is None:
+                result = matching_file_ids
+            else:
+                result.intersection_update(matching_file_ids)
+        return result
+
+    def filter_candidates(self, pattern: str, relative_paths: list[str]) -> list[str]:
+        """
+        Updates the index for the given files and determines the ones which may contain a match of the given pattern
+        (the matches themselves still need to be verified).
+
+        :param pattern: the regular expression (compiled with DOTALL) to search for
+        :param relative_paths: the paths of the files to search, relative to the root path
+        :return: the subset of the given paths (in the given order) which may contain matches
+        """
+        query = TrigramQuery.from_regex(pattern)
+        if query.is_unrestricted():
+            return relative_paths
+        self.update(relative_paths)
+        with self._lock:
+            file_ids = self._evaluate(query)
+            if file_ids is None:
+                return relative_paths
+            candidate_paths = {self._path_by_file_id[file_id] for file_id in file_ids if file_id in self._path_by_file_id}
+            # files which could not be indexed (e.g. because they could not be read) are kept
+            return [p for p in relative_paths if p in candidate_paths or p not in self._entry_by_path]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,4 +1,6 @@
+import contextvars
 import dataclasses
+import functools
 import hashlib
 import json
 import logging
@@ -6,28 +8,39 @@ import os
 import pathlib
 import pickle
 import shutil
+import stat
 import subprocess
 import threading
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from collections.abc import Iterator
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from copy import copy
 from pathlib import Path, PurePath
-from time import sleep
-from typing import Self, Union, cast
+from time import sleep, time_ns
+from typing import Any, Self, Union, cast
 
 import pathspec
 
 from serena.text_utils import MatchedConsecutiveLines
-from serena.util.file_system import match_path
+from serena.util.file_system import IgnoreMatcher, walk_directory
 from solidlsp import ls_types
+from solidlsp.ls_cache import (
+    CachedFileMetadata,
+    CompactDocumentSymbols,
+    DebouncedCacheSaver,
+    DocumentSymbolsStore,
+    FileSignature,
+    SingleFlightMemo,
+)
 from solidlsp.ls_config import Language, LanguageServerConfig
-from solidlsp.ls_exceptions import SolidLSPException
+from solidlsp.ls_exceptions import RequestCancelledException, SolidLSPException
 from solidlsp.ls_handler import SolidLanguageServerHandler
 from solidlsp.ls_logger import LanguageServerLogger
+from solidlsp.ls_symbol_index import IndexedSymbol, SymbolNameIndex
 from solidlsp.ls_types import UnifiedSymbolInformation
-from solidlsp.ls_utils import FileUtils, PathUtils, TextUtils
+from solidlsp.ls_utils import ContainingSymbolIndex, FileUtils, LineBuffer, LineOffsetTable, PathUtils
 from solidlsp.lsp_protocol_handler import lsp_types
 from solidlsp.lsp_protocol_handler import lsp_types as LSPTypes
 from solidlsp.lsp_protocol_handler.lsp_constants import LSPConstants
@@ -51,31 +64,75 @@ class ReferenceInSymbol:
     character: int
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
+class SourceTreeEntry:
+    """A directory or file found while walking the source tree (see `SolidLanguageServer._walk_source_tree`)"""
+
+    walk_path: str
+    """the absolute path of the entry as walked (i.e. without resolving symbolic links), which uniquely identifies it within the walk"""
+    parent_walk_path: str | None
+    """the walk path of the directory containing the entry; None for the directory at which the walk starts"""
+    relative_path: str
+    """the path of the entry relative to the repository root, with symbolic links resolved"""
+    absolute_path: str
+    """the absolute path of the entry; for directories, symbolic links are resolved"""
+    is_dir: bool
+
+
 class LSPFileBuffer:
     """
     This class is used to store the contents of an open LSP file in memory.
+    The contents are held in a `LineBuffer`, such that edits do not require the full text to be rebuilt and rescanned;
+    the full text and its hash are computed lazily.
     """
 
-    # uri of the file
-    uri: str
+    def __init__(self, uri: str, contents: str, version: int, language_id: str, ref_count: int):
+        """
+        :param uri: the uri of the file
+        :param contents: the contents of the file
+        :param version: the version of the file
+        :param language_id: the language id of the file
+        :param ref_count: the reference count of the file
+        """
+        self.uri = uri
+        self.version = version
+        self.language_id = language_id
+        self.ref_count = ref_count
+        self._line_buffer = LineBuffer(contents)
+        self._content_hash: str | None = None
 
-    # The contents of the file
-    contents: str
+    @property
+    def contents(self) -> str:
+        return self._line_buffer.get_text()
 
-    # The version of the file
-    version: int
+    @contents.setter
+    def contents(self, contents: str) -> None:
+        self._line_buffer.set_text(contents)
+        self._content_hash = None
 
-    # The language id of the file
-    language_id: str
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = hashlib.md5(self.contents.encode("utf-8")).hexdigest()
+        return self._content_hash
 
-    # reference count of the file
-    ref_count: int
+    def insert_text_at_position(self, line: int, col: int, text_to_be_inserted: str) -> tuple[int, int]:
+        """
+        Inserts the given text at the given zero-indexed line and column.
 
-    content_hash: str = ""
+        :return: the line and column after the inserted text
+        """
+        self._content_hash = None
+        return self._line_buffer.insert_text(line, col, text_to_be_inserted)
 
-    def __post_init__(self):
-        self.content_hash = hashlib.md5(self.contents.encode("utf-8")).hexdigest()
+    def delete_text_between_positions(self, start_line: int, start_col: int, end_line: int, end_col: int) -> str:
+        """
+        Deletes the text between the given zero-indexed positions.
+
+        :return: the deleted text
+        """
+        self._content_hash = None
+        return self._line_buffer.delete_text(start_line, start_col, end_line, end_col)
 
 
 class SolidLanguageServer(ABC):
@@ -84,6 +141,30 @@ class SolidLanguageServer(ABC):
     It is used to communicate with Language Servers of different programming languages.
     """
 
+    FILE_METADATA_MIN_AGE_NS = 2_000_000_000
+    """
+    the minimum age (time since the last modification) a file must have for its metadata to be reused based on the file's signature
+    """
+    CACHE_SAVE_MAX_DELAY_SECONDS = 5.0
+    """the maximum time for which changes to the document symbols cache are pending before they are saved in the background"""
+    CACHE_SAVE_MAX_PENDING_CHANGES = 1000
+    """the number of pending changes to the document symbols cache at which they are saved in the background without further delay"""
+    MAX_DOCUMENT_SYMBOLS_VIEWS = 1000
+    """
+    the maximum number of files for which the dictionary view of the cached document symbols is retained (the least recently
+    used views being discarded); the cache itself holds the symbols of all files in a compact representation
+    """
+    MAX_SOURCE_FILE_LISTINGS = 16
+    """
+    the maximum number of directories for which the source files collected for symbol name lookups are retained (the least recently
+    used listings being discarded)
+    """
+    _ABANDONED_REQUEST_EXCEPTIONS = (RequestCancelledException, TimeoutError)
+    """
+    the exceptions with which requests are abandoned by the requesting operation; if a request is shared by several operations
+    (see `_position_request_memo`), the other operations repeat the request
+    """
+
     # To be overridden and extended by subclasses
     def is_ignored_dirname(self, dirname: str) -> bool:
         """
@@ -277,15 +358,57 @@ class SolidLanguageServer(ABC):
 
         self.language_id = language_id
         self.open_file_buffers: dict[str, LSPFileBuffer] = {}
+        self._open_file_buffers_lock = threading.RLock()
         self.language = Language(language_id)
 
         # load cache first to prevent any racing conditions due to asyncio stuff
-        self._document_symbols_cache: dict[
+        self._document_symbols_cache: dict[str, tuple[str, CompactDocumentSymbols]] = {}
+        """Maps file paths to a tuple of (file_content_hash, document_symbols)"""
+        self._document_symbols_views: OrderedDict[
             str, tuple[str, tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]]
-        ] = {}
-        """Maps file paths to a tuple of (file_content_hash, result_of_request_document_symbols)"""
+        ] = OrderedDict()
+        """
+        Maps file paths to a tuple of (file_content_hash, result_of_request_document_symbols) for the most recently used
+        entries of the document symbols cache
+        """
+        self._symbol_name_index = SymbolNameIndex()
+        """an index of the names of the symbols in the (in-memory) document symbols cache"""
+        self._position_request_memo = SingleFlightMemo(self._solidlsp_settings.position_request_memo_size)
+        """
+        memoizes the responses to definition, references and hover requests, keyed by the request type, file, content hash and position;
+        as the responses may depend on the content of other files, the memo is cleared whenever any file changes
+        """
         self._cache_lock = threading.Lock()
-        self._cache_has_changed: bool = False
+        self._changed_cache_keys: set[str] = set()
+        """the keys of the in-memory cache entries which have not yet been saved to the persistent store"""
+        self._file_metadata_cache: dict[str, CachedFileMetadata] = {}
+        """Maps relative file paths to metadata (content hash, range) of the file content which was last read from disk"""
+        self._changed_file_metadata_paths: set[str] = set()
+        """the paths of the in-memory file metadata entries which have not yet been saved to the persistent store"""
+        self._source_file_listings: OrderedDict[str, tuple[list[str], list[str]]] = OrderedDict()
+        """
+        maps directories to the results of `_collect_source_files` for the most recently searched directories; retained only
+        if changes to files are reported (see `SolidLSPSettings.file_changes_reported`) and discarded when files are created or deleted
+        """
+        self._listed_source_files: set[str] = set()
+        """the relative paths of the files within the retained source file listings"""
+        self._listed_source_dirs: set[str] = set()
+        """the relative paths of the directories containing the files within the retained source file listings"""
+        self._verified_document_symbols_paths: set[str] = set()
+        """
+        the relative paths of the files whose cached document symbols were found to be up to date and which have not been
+        reported as changed (or opened) since; used only if changes to files are reported
+        """
+        self._file_change_generation = 0
+        """incremented whenever changes to files are reported, such that checks that were concurrent with a change are not retained"""
+        self._document_symbols_store: DocumentSymbolsStore | None = None
+        self._cache_save_lock = threading.Lock()
+        self._cache_saver = DebouncedCacheSaver(
+            self.save_cache,
+            max_delay_seconds=self.CACHE_SAVE_MAX_DELAY_SECONDS,
+            max_pending_changes=self.CACHE_SAVE_MAX_PENDING_CHANGES,
+            name=f"DocumentSymbolsCacheSaver[{language_id}]",
+        )
         self.load_cache()
 
         self.server_started = False
@@ -309,17 +432,8 @@ class SolidLanguageServer(ABC):
             start_independent_lsp_process=config.start_independent_lsp_process,
         )
 
-        # Set up the pathspec matcher for the ignored paths
-        # for all absolute paths in ignored_paths, convert them to relative paths
-        processed_patterns = []
-        for pattern in set(config.ignored_paths):
-            # Normalize separators (pathspec expects forward slashes)
-            pattern = pattern.replace(os.path.sep, "/")
-            processed_patterns.append(pattern)
-        self.logger.log(f"Processing {len(processed_patterns)} ignored paths from the config", logging.DEBUG)
-
-        # Create a pathspec matcher from the processed patterns
-        self._ignore_spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, processed_patterns)
+        self._ignore_spec: pathspec.PathSpec = pathspec.PathSpec([])
+        self.set_ignored_paths(config.ignored_paths)
 
         self._server_context = None
         self._request_timeout: float | None = None
@@ -340,6 +454,27 @@ class SolidLanguageServer(ABC):
         """
         self.server.set_request_timeout(timeout)
 
+    def set_ignored_paths(self, ignored_paths: list[str]) -> None:
+        """
+        Sets the patterns of the paths that are to be ignored (replacing the ones that were configured initially).
+
+        :param ignored_paths: gitignore-style patterns
+        """
+        # Set up the pathspec matcher for the ignored paths
+        # for all absolute paths in ignored_paths, convert them to relative paths
+        processed_patterns = []
+        for pattern in set(ignored_paths):
+            # Normalize separators (pathspec expects forward slashes)
+            pattern = pattern.replace(os.path.sep, "/")
+            processed_patterns.append(pattern)
+        self.logger.log(f"Processing {len(processed_patterns)} ignored paths", logging.DEBUG)
+
+        # Create a pathspec matcher from the processed patterns
+        self._ignore_spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, processed_patterns)
+        self._ignore_matcher = IgnoreMatcher(self.repository_root_path, [self._ignore_spec], is_ignored_dirname=self.is_ignored_dirname)
+        with self._cache_lock:
+            self._discard_source_file_listings()
+
     def get_ignore_spec(self) -> pathspec.PathSpec:
         """Returns the pathspec matcher for the paths that were configured to be ignored through
         the multilspy config.
@@ -352,41 +487,32 @@ class SolidLanguageServer(ABC):
         """
         return self._ignore_spec
 
-    def is_ignored_path(self, relative_path: str, ignore_unsupported_files: bool = True) -> bool:
+    def is_ignored_path(self, relative_path: str, ignore_unsupported_files: bool = True, is_dir: bool | None = None) -> bool:
         """
         Determine if a path should be ignored based on file type
         and ignore patterns.
 
         :param relative_path: Relative path to check
         :param ignore_unsupported_files: whether files that are not supported source files should be ignored
+        :param is_dir: whether the path refers to a directory; if None, it will be determined (and the existence of
+            the path will be checked)
 
         :return: True if the path should be ignored, False otherwise
         """
-        abs_path = os.path.join(self.repository_root_path, relative_path)
-        if not os.path.exists(abs_path):
-            raise FileNotFoundError(f"File {abs_path} not found, the ignore check cannot be performed")
+        if is_dir is None:
+            abs_path = os.path.join(self.repository_root_path, relative_path)
+            try:
+                is_dir = stat.S_ISDIR(os.stat(abs_path).st_mode)
+            except OSError:
+                raise FileNotFoundError(f"File {abs_path} not found, the ignore check cannot be performed") from None
 
         # Check file extension if it's a file
-        is_file = os.path.isfile(abs_path)
-        if is_file and ignore_unsupported_files:
+        if not is_dir and ignore_unsupported_files:
             fn_matcher = self.language.get_source_fn_matcher()
-            if not fn_matcher.is_relevant_filename(abs_path):
-                return True
-
-        # Create normalized path for consistent handling
-        rel_path = Path(relative_path)
-
-        # Check each part of the path against always fulfilled ignore conditions
-        dir_parts = rel_path.parts
-        if is_file:
-            dir_parts = dir_parts[:-1]
-        for part in dir_parts:
-            if not part:  # Skip empty parts (e.g., from leading '/')
-                continue
-            if self.is_ignored_dirname(part):
+            if not fn_matcher.is_relevant_filename(relative_path):
                 return True
 
-        return match_path(relative_path, self.get_ignore_spec(), root_path=self.repository_root_path)
+        return self._ignore_matcher.is_ignored(relative_path, is_dir)
 
     def _shutdown(self, timeout: float = 5.0):
         """
@@ -475,41 +601,51 @@ class SolidLanguageServer(ABC):
         absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
         uri = pathlib.Path(absolute_file_path).as_uri()
 
-        if uri in self.open_file_buffers:
-            assert self.open_file_buffers[uri].uri == uri
-            assert self.open_file_buffers[uri].ref_count >= 1
+        # the bookkeeping is synchronised, as files may be opened by concurrently executed (read-only) operations
+        with self._open_file_buffers_lock:
+            # the content of open files may be modified in memory, so their cached symbols must be checked again in name lookups
+            with self._cache_lock:
+                self._verified_document_symbols_paths.discard(relative_file_path)
+            if uri in self.open_file_buffers:
+                assert self.open_file_buffers[uri].uri == uri
+                assert self.open_file_buffers[uri].ref_count >= 1
 
-            self.open_file_buffers[uri].ref_count += 1
-            yield self.open_file_buffers[uri]
-            self.open_file_buffers[uri].ref_count -= 1
-        else:
-            contents = FileUtils.read_file(self.logger, absolute_file_path)
+                self.open_file_buffers[uri].ref_count += 1
+            else:
+                # the signature is determined before reading, such that a concurrent modification will result in a signature mismatch later on
+                signature = FileSignature.from_path(absolute_file_path) if os.path.exists(absolute_file_path) else None
+                contents = FileUtils.read_file(self.logger, absolute_file_path)
 
-            version = 0
-            self.open_file_buffers[uri] = LSPFileBuffer(uri, contents, version, self.language_id, 1)
+                version = 0
+                self.open_file_buffers[uri] = LSPFileBuffer(uri, contents, version, self.language_id, 1)
+                if signature is not None:
+                    self._store_file_metadata(relative_file_path, signature, self.open_file_buffers[uri])
 
-            self.server.notify.did_open_text_document(
-                {
-                    LSPConstants.TEXT_DOCUMENT: {
-                        LSPConstants.URI: uri,
-                        LSPConstants.LANGUAGE_ID: self.language_id,
-                        LSPConstants.VERSION: 0,
-                        LSPConstants.TEXT: contents,
+                self.server.notify.did_open_text_document(
+                    {
+                        LSPConstants.TEXT_DOCUMENT: {
+                            LSPConstants.URI: uri,
+                            LSPConstants.LANGUAGE_ID: self.language_id,
+                            LSPConstants.VERSION: 0,
+                            LSPConstants.TEXT: contents,
+                        }
                     }
-                }
-            )
-            yield self.open_file_buffers[uri]
-            self.open_file_buffers[uri].ref_count -= 1
+                )
+            file_buffer = self.open_file_buffers[uri]
 
-        if self.open_file_buffers[uri].ref_count == 0:
-            self.server.notify.did_close_text_document(
-                {
-                    LSPConstants.TEXT_DOCUMENT: {
-                        LSPConstants.URI: uri,
+        yield file_buffer
+
+        with self._open_file_buffers_lock:
+            file_buffer.ref_count -= 1
+            if file_buffer.ref_count == 0:
+                self.server.notify.did_close_text_document(
+                    {
+                        LSPConstants.TEXT_DOCUMENT: {
+                            LSPConstants.URI: uri,
+                        }
                     }
-                }
-            )
-            del self.open_file_buffers[uri]
+                )
+                del self.open_file_buffers[uri]
 
     def insert_text_at_position(self, relative_file_path: str, line: int, column: int, text_to_be_inserted: str) -> ls_types.Position:
         """
@@ -537,8 +673,8 @@ class SolidLanguageServer(ABC):
         file_buffer = self.open_file_buffers[uri]
         file_buffer.version += 1
 
-        new_contents, new_l, new_c = TextUtils.insert_text_at_position(file_buffer.contents, line, column, text_to_be_inserted)
-        file_buffer.contents = new_contents
+        new_l, new_c = file_buffer.insert_text_at_position(line, column, text_to_be_inserted)
+        self._position_request_memo.clear()
         self.server.notify.did_change_text_document(
             {
                 LSPConstants.TEXT_DOCUMENT: {
@@ -582,10 +718,10 @@ class SolidLanguageServer(ABC):
 
         file_buffer = self.open_file_buffers[uri]
         file_buffer.version += 1
-        new_contents, deleted_text = TextUtils.delete_text_between_positions(
-            file_buffer.contents, start_line=start["line"], start_col=start["character"], end_line=end["line"], end_col=end["character"]
+        deleted_text = file_buffer.delete_text_between_positions(
+            start_line=start["line"], start_col=start["character"], end_line=end["line"], end_col=end["character"]
         )
-        file_buffer.contents = new_contents
+        self._position_request_memo.clear()
         self.server.notify.did_change_text_document(
             {
                 LSPConstants.TEXT_DOCUMENT: {
@@ -618,7 +754,7 @@ class SolidLanguageServer(ABC):
             )
             raise SolidLSPException("Language Server not started")
 
-        with self.open_file(relative_file_path):
+        with self.open_file(relative_file_path) as file_buffer:
             # sending request to the language server and waiting for response
             definition_params = cast(
                 DefinitionParams,
@@ -632,7 +768,11 @@ class SolidLanguageServer(ABC):
                     },
                 },
             )
-            response = self._send_definition_request(definition_params)
+            response = self._position_request_memo.get(
+                ("definition", relative_file_path, file_buffer.content_hash, line, column),
+                lambda: self._send_definition_request(definition_params),
+                recompute_on=self._ABANDONED_REQUEST_EXCEPTIONS,
+            )
 
         ret: list[ls_types.Location] = []
         if isinstance(response, list):
@@ -716,9 +856,13 @@ class SolidLanguageServer(ABC):
             sleep(self._get_wait_time_for_cross_file_referencing())
             self._has_waited_for_cross_file_references = True
 
-        with self.open_file(relative_file_path):
+        with self.open_file(relative_file_path) as file_buffer:
             try:
-                response = self._send_references_request(relative_file_path, line=line, column=column)
+                response = self._position_request_memo.get(
+                    ("references", relative_file_path, file_buffer.content_hash, line, column),
+                    lambda: self._send_references_request(relative_file_path, line=line, column=column),
+                    recompute_on=self._ABANDONED_REQUEST_EXCEPTIONS,
+                )
             except Exception as e:
                 # Catch LSP internal error (-32603) and raise a more informative exception
                 if isinstance(e, LSPError) and getattr(e, "code", None) == -32603:
@@ -935,12 +1079,32 @@ class SolidLanguageServer(ABC):
             where the parent attribute will be the file symbol which in turn may have a package symbol as parent.
             If you need a symbol tree that contains file symbols as well, you should use `request_full_symbol_tree` instead.
         """
-        # TODO: it's kinda dumb to not use the cache if include_body is False after include_body was True once
-        #   Should be fixed in the future, it's a small performance optimization
-        cache_key = f"{relative_file_path}-{include_body}"
+        if not include_body:
+            return self._request_document_symbols(relative_file_path)
+
+        # the cached symbols do not contain bodies; they are cut out of the file content on demand
+        with self.open_file(relative_file_path) as file_data:
+            _, root_symbols = self._request_document_symbols(relative_file_path)
+            return self._copy_symbols_with_bodies(root_symbols, LineOffsetTable(file_data.contents))
+
+    def _request_document_symbols(
+        self, relative_file_path: str
+    ) -> tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]:
+        """
+        Retrieves the document symbols (without bodies) of the given file, using the cache if the file has not changed.
+        """
+        cache_key = relative_file_path
+        file_metadata = self._get_file_metadata_if_unchanged(relative_file_path)
+        if file_metadata is not None:
+            with self._cache_lock:
+                file_hash_and_result = self._get_cached_document_symbols(cache_key)
+            if file_hash_and_result is not None and file_hash_and_result[0] == file_metadata.content_hash:
+                self.logger.log(f"Returning cached document symbols for unchanged file {relative_file_path}", logging.DEBUG)
+                return file_hash_and_result[1]
+
         with self.open_file(relative_file_path) as file_data:
             with self._cache_lock:
-                file_hash_and_result = self._document_symbols_cache.get(cache_key)
+                file_hash_and_result = self._get_cached_document_symbols(cache_key)
                 if file_hash_and_result is not None:
                     file_hash, result = file_hash_and_result
                     if file_hash == file_data.content_hash:
@@ -949,7 +1113,7 @@ class SolidLanguageServer(ABC):
                     else:
                         self.logger.log(f"Content for {relative_file_path} has changed. Will overwrite in-memory cache", logging.DEBUG)
                 else:
-                    self.logger.log(f"No cache hit for symbols with {include_body=} in {relative_file_path}", logging.DEBUG)
+                    self.logger.log(f"No cache hit for symbols in {relative_file_path}", logging.DEBUG)
 
             self.logger.log(f"Requesting document symbols for {relative_file_path} from the Language Server", logging.DEBUG)
             response = self.server.send.document_symbol(
@@ -989,8 +1153,6 @@ class SolidLanguageServer(ABC):
                 location["absolutePath"] = absolute_path
             if "relativePath" not in location:
                 location["relativePath"] = relative_file_path
-            if include_body:
-                item["body"] = self.retrieve_symbol_body(item)
             # handle missing selectionRange
             if "selectionRange" not in item:
                 if "range" in item:
@@ -1041,11 +1203,40 @@ class SolidLanguageServer(ABC):
 
         result = flat_all_symbol_list, root_nodes
         self.logger.log(f"Caching document symbols for {relative_file_path}", logging.DEBUG)
+        compact_document_symbols = self._create_compact_document_symbols(relative_file_path, root_nodes)
         with self._cache_lock:
-            self._document_symbols_cache[cache_key] = (file_data.content_hash, result)
-            self._cache_has_changed = True
+            self._document_symbols_cache[cache_key] = (file_data.content_hash, compact_document_symbols)
+            self._symbol_name_index.set_file_symbols(cache_key, compact_document_symbols)
+            self._add_document_symbols_view(cache_key, (file_data.content_hash, result))
+            self._changed_cache_keys.add(cache_key)
+            self._notify_cache_changes()
         return result
 
+    def _copy_symbols_with_bodies(
+        self, root_symbols: list[ls_types.UnifiedSymbolInformation], line_offsets: LineOffsetTable
+    ) -> tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]:
+        """
+        Creates copies of the given symbol trees in which all symbols contain their bodies, leaving the given symbols unchanged.
+
+        :param root_symbols: the root symbols of a file
+        :param line_offsets: the offset table of the file's content
+        :return: a tuple (all_symbols, root_symbols) as returned by `request_document_symbols`
+        """
+        all_symbols: list[ls_types.UnifiedSymbolInformation] = []
+
+        def copy_with_body(
+            symbol: ls_types.UnifiedSymbolInformation, parent: ls_types.UnifiedSymbolInformation | None
+        ) -> ls_types.UnifiedSymbolInformation:
+            symbol_copy = copy(symbol)
+            symbol_copy["body"] = self.retrieve_symbol_body(symbol, line_offsets=line_offsets)
+            symbol_copy["parent"] = parent
+            all_symbols.append(symbol_copy)
+            symbol_copy["children"] = [copy_with_body(child, symbol_copy) for child in symbol["children"]]
+            return symbol_copy
+
+        copied_root_symbols = [copy_with_body(root_symbol, None) for root_symbol in root_symbols]
+        return all_symbols, copied_root_symbols
+
     def request_full_symbol_tree(
         self, within_relative_path: str | None = None, include_body: bool = False
     ) -> list[ls_types.UnifiedSymbolInformation]:
@@ -1082,105 +1273,349 @@ class SolidLanguageServer(ABC):
                     _, root_nodes = self.request_document_symbols(within_relative_path, include_body=include_body)
                     return root_nodes
 
-        # Helper function to recursively process directories
-        def process_directory(rel_dir_path: str) -> list[ls_types.UnifiedSymbolInformation]:
-            abs_dir_path = self.repository_root_path if rel_dir_path == "." else os.path.join(self.repository_root_path, rel_dir_path)
-            abs_dir_path = os.path.realpath(abs_dir_path)
+        # Walk the directory tree once, creating the package symbols as well as (not yet populated) file symbols
+        # in walk order. The file symbols are populated as the document symbol requests complete, such that
+        # the structure of the tree does not depend on the order in which the language server responds.
+        root_symbols: list[ls_types.UnifiedSymbolInformation] = []
+        file_symbols: list[ls_types.UnifiedSymbolInformation] = []
+        package_symbols: dict[str, ls_types.UnifiedSymbolInformation] = {}
+        for entry in self._walk_source_tree(within_relative_path):
+            parent_symbol = package_symbols[entry.parent_walk_path] if entry.parent_walk_path is not None else None
+            name = os.path.basename(entry.absolute_path)
+            if entry.is_dir:
+                package_symbol = ls_types.UnifiedSymbolInformation(  # type: ignore
+                    name=name,
+                    kind=ls_types.SymbolKind.Package,
+                    location=ls_types.Location(
+                        uri=str(pathlib.Path(entry.absolute_path).as_uri()),
+                        range={"start": {"line": 0, "character": 0}, "end": {"line": 0, "character": 0}},
+                        absolutePath=entry.absolute_path,
+                        relativePath=entry.relative_path,
+                    ),
+                    children=[],
+                )
+                if parent_symbol is None:
+                    root_symbols.append(package_symbol)
+                else:
+                    parent_symbol["children"].append(package_symbol)
+                    package_symbol["parent"] = parent_symbol
+                package_symbols[entry.walk_path] = package_symbol
+            else:
+                assert parent_symbol is not None
+                # Create file symbol and link it with the package; range and children are added in _populate_file_symbol
+                file_symbol = ls_types.UnifiedSymbolInformation(  # type: ignore
+                    name=os.path.splitext(name)[0],
+                    kind=ls_types.SymbolKind.File,
+                    location=ls_types.Location(  # type: ignore
+                        uri=str(pathlib.Path(entry.absolute_path).as_uri()),
+                        absolutePath=entry.absolute_path,
+                        relativePath=entry.relative_path,
+                    ),
+                    children=[],
+                    parent=parent_symbol,
+                )
+                parent_symbol["children"].append(file_symbol)
+                file_symbols.append(file_symbol)
 
-            if self.is_ignored_path(str(Path(abs_dir_path).relative_to(self.repository_root_path))):
-                self.logger.log(f"Skipping directory: {rel_dir_path}\n(because it should be ignored)", logging.DEBUG)
-                return []
+        self._populate_file_symbols(file_symbols, include_body=include_body)
+        return root_symbols
 
-            result = []
-            try:
-                contained_dir_or_file_names = os.listdir(abs_dir_path)
-            except OSError:
-                return []
+    def _walk_source_tree(self, within_relative_path: str | None) -> Iterator[SourceTreeEntry]:
+        """
+        Walks the (non-ignored) directories and files within the given directory, depth-first and in the order of `os.scandir`,
+        starting with the directory itself. The relative paths of entries are determined with symbolic links resolved.
+        The walk defines the structure of the full symbol tree (see `request_full_symbol_tree`).
 
-            # Create package symbol for directory
-            package_symbol = ls_types.UnifiedSymbolInformation(  # type: ignore
-                name=os.path.basename(abs_dir_path),
-                kind=ls_types.SymbolKind.Package,
-                location=ls_types.Location(
-                    uri=str(pathlib.Path(abs_dir_path).as_uri()),
-                    range={"start": {"line": 0, "character": 0}, "end": {"line": 0, "character": 0}},
-                    absolutePath=str(abs_dir_path),
-                    relativePath=str(Path(abs_dir_path).resolve().relative_to(self.repository_root_path)),
-                ),
-                children=[],
+        :param within_relative_path: the relative path of a directory; None for the entire project
+        :return: an iterator of the entries, where each directory precedes its contents
+        """
+        start_abs_path = os.path.realpath(os.path.join(self.repository_root_path, within_relative_path or "."))
+        start_rel_path = str(Path(start_abs_path).relative_to(self.repository_root_path))
+        if self.is_ignored_path(start_rel_path, is_dir=True):
+            return
+
+        def get_abs_path(rel_path: str) -> str:
+            return self.repository_root_path if rel_path == "." else os.path.join(self.repository_root_path, rel_path)
+
+        dir_rel_paths: dict[str, str] = {start_abs_path: start_rel_path}
+        """maps the walk paths of the directories to their (resolved) relative paths"""
+        file_rel_paths: dict[str, str] = {}
+        """maps the walk paths of the files which were found but not yet yielded to their (resolved) relative paths"""
+
+        def is_ignored_entry(entry: os.DirEntry) -> bool:
+            if entry.is_symlink():
+                try:
+                    rel_path = str(Path(entry.path).resolve().relative_to(self.repository_root_path))
+                except ValueError:
+                    # the link points outside of the repository
+                    return True
+            else:
+                parent_rel_path = dir_rel_paths[os.path.dirname(entry.path)]
+                rel_path = entry.name if parent_rel_path == "." else os.path.join(parent_rel_path, entry.name)
+            # the entry's type is known from scanning the directory, so no further stat calls are required
+            is_dir = entry.is_dir()
+            if self.is_ignored_path(rel_path, is_dir=is_dir):
+                return True
+            if is_dir:
+                dir_rel_paths[entry.path] = rel_path
+            else:
+                file_rel_paths[entry.path] = rel_path
+            return False
+
+        yield SourceTreeEntry(start_abs_path, None, start_rel_path, start_abs_path, True)
+        for scanned_entry in walk_directory(start_abs_path, recursive=True, is_ignored_entry=is_ignored_entry):
+            parent_walk_path = os.path.dirname(scanned_entry.path)
+            if scanned_entry.is_dir:
+                rel_path = dir_rel_paths[scanned_entry.path]
+                abs_path = get_abs_path(rel_path)
+            else:
+                rel_path = file_rel_paths.pop(scanned_entry.path)
+                abs_path = os.path.join(get_abs_path(dir_rel_paths[parent_walk_path]), os.path.basename(scanned_entry.path))
+            yield SourceTreeEntry(scanned_entry.path, parent_walk_path, rel_path, abs_path, scanned_entry.is_dir)
+
+    def _collect_source_files(self, within_relative_path: str | None) -> tuple[list[str], list[str]]:
+        """
+        Collects the (non-ignored) source files within the given directory (see `_walk_source_tree`).
+
+        :param within_relative_path: the relative path of a directory; None for the entire project
+        :return: a tuple (path_names, relative_file_paths), where path_names contains the names of the package and file symbols
+            which `request_full_symbol_tree` creates for the directories and files, and relative_file_paths contains the
+            relative paths of the files in the order in which `request_full_symbol_tree` visits them
+        """
+        path_names: list[str] = []
+        relative_file_paths: list[str] = []
+        for entry in self._walk_source_tree(within_relative_path):
+            name = os.path.basename(entry.absolute_path)
+            if entry.is_dir:
+                path_names.append(name)
+            else:
+                path_names.append(os.path.splitext(name)[0])
+                relative_file_paths.append(entry.relative_path)
+        return path_names, relative_file_paths
+
+    def is_document_symbols_cache_up_to_date(self, relative_file_path: str) -> bool:
+        """
+        Checks whether the document symbols of the given file are cached for its current content, without reading the file
+        and without requiring the language server to be running.
+
+        :param relative_file_path: the relative path of the file
+        :return: True if the cache contains an up-to-date entry; False if the file is unknown or may have changed since it was cached
+        """
+        file_metadata = self._get_file_metadata_if_unchanged(relative_file_path)
+        if file_metadata is None:
+            return False
+        with self._cache_lock:
+            file_hash_and_symbols = self._get_cached_compact_document_symbols(relative_file_path)
+        return file_hash_and_symbols is not None and file_hash_and_symbols[0] == file_metadata.content_hash
+
+    def _get_source_files(self, within_relative_path: str | None) -> tuple[list[str], list[str]]:
+        """
+        Gets the source files within the given directory (see `_collect_source_files`).
+        If changes to files are reported, the result is retained until files are created or deleted, such that repeated
+        lookups do not have to walk the directory tree again.
+        """
+        if not self._solidlsp_settings.file_changes_reported:
+            return self._collect_source_files(within_relative_path)
+        listing_key = within_relative_path or "."
+        with self._cache_lock:
+            source_files = self._source_file_listings.get(listing_key)
+            if source_files is not None:
+                self._source_file_listings.move_to_end(listing_key)
+                return source_files
+            generation = self._file_change_generation
+        source_files = self._collect_source_files(within_relative_path)
+        with self._cache_lock:
+            if generation == self._file_change_generation:
+                self._source_file_listings[listing_key] = source_files
+                if len(self._source_file_listings) > self.MAX_SOURCE_FILE_LISTINGS:
+                    self._source_file_listings.popitem(last=False)
+                self._listed_source_files.clear()
+                self._listed_source_dirs.clear()
+                for _, relative_file_paths in self._source_file_listings.values():
+                    self._listed_source_files.update(relative_file_paths)
+                    for relative_file_path in relative_file_paths:
+                        relative_dir_path = os.path.dirname(relative_file_path)
+                        while relative_dir_path and relative_dir_path not in self._listed_source_dirs:
+                            self._listed_source_dirs.add(relative_dir_path)
+                            relative_dir_path = os.path.dirname(relative_dir_path)
+        return source_files
+
+    def _discard_source_file_listings(self) -> None:
+        """
+        Discards the retained source file listings (see `_get_source_files`). Must be called while holding the cache lock.
+        """
+        self._file_change_generation += 1
+        self._source_file_listings.clear()
+        self._listed_source_files.clear()
+        self._listed_source_dirs.clear()
+
+    def _ensure_document_symbols_cached(self, relative_file_paths: list[str]) -> None:
+        """
+        Ensures that the document symbols cache (and thus the symbol name index) contains up-to-date entries for the given files,
+        requesting the symbols of files which were not yet cached or which have changed.
+        If changes to files are reported, files whose entries were already found to be up to date are not checked again
+        (until they are reported as changed).
+        """
+        if not self._solidlsp_settings.file_changes_reported:
+            uncached_file_paths = [path for path in relative_file_paths if not self.is_document_symbols_cache_up_to_date(path)]
+            self._run_document_symbol_requests(
+                [functools.partial(self._request_document_symbols, relative_file_path) for relative_file_path in uncached_file_paths]
             )
-            result.append(package_symbol)
+            return
 
-            for contained_dir_or_file_name in contained_dir_or_file_names:
-                contained_dir_or_file_abs_path = os.path.join(abs_dir_path, contained_dir_or_file_name)
-                contained_dir_or_file_rel_path = str(Path(contained_dir_or_file_abs_path).resolve().relative_to(self.repository_root_path))
-                if self.is_ignored_path(contained_dir_or_file_rel_path):
-                    self.logger.log(f"Skipping item: {contained_dir_or_file_rel_path}\n(because it should be ignored)", logging.DEBUG)
-                    continue
+        with self._cache_lock:
+            unverified_file_paths = [path for path in relative_file_paths if path not in self._verified_document_symbols_paths]
+            generation = self._file_change_generation
+        if not unverified_file_paths:
+            return
+        uncached_file_paths = [path for path in unverified_file_paths if not self.is_document_symbols_cache_up_to_date(path)]
+        self._run_document_symbol_requests(
+            [functools.partial(self._request_document_symbols, relative_file_path) for relative_file_path in uncached_file_paths]
+        )
+        # files which are open are not verified (see `open_file`)
+        with self._open_file_buffers_lock, self._cache_lock:
+            if generation != self._file_change_generation:
+                return
+            for relative_file_path in unverified_file_paths:
+                is_open = pathlib.Path(self.repository_root_path, relative_file_path).as_uri() in self.open_file_buffers
+                # files whose metadata was not stored (as they were modified very recently) cannot be checked cheaply later on
+                if not is_open and relative_file_path in self._document_symbols_cache and relative_file_path in self._file_metadata_cache:
+                    self._verified_document_symbols_paths.add(relative_file_path)
+
+    def request_symbols_by_name(
+        self, name: str, substring_matching: bool = False, within_relative_path: str | None = None
+    ) -> tuple[list[IndexedSymbol], bool]:
+        """
+        Finds the document symbols with the given name within the given directory using the symbol name index, which, unlike
+        a search of the full symbol tree (see `request_full_symbol_tree`), does not require all symbols to be traversed.
+        Files whose symbols are not yet cached (or have changed) are indexed first.
+        If changes to files are reported (see `SolidLSPSettings.file_changes_reported`), the source files and the validity of
+        their cached symbols are determined only once (and again after changes were reported), such that lookups do not
+        have to access all files. As a safeguard against changes which were not reported, the files containing matches are
+        checked; if one of them changed, all retained information is discarded and the lookup is repeated.
+
+        :param name: the name to search for
+        :param substring_matching: whether to find all symbols whose names contain the given name
+        :param within_relative_path: the relative path of the directory to search in; None for the entire project
+        :return: a tuple (indexed_symbols, is_path_name_match), where indexed_symbols contains the matching symbols (ordered as in
+            the full symbol tree), and is_path_name_match indicates whether the name also matches the name of a package or file symbol
+            of the full symbol tree (which are not indexed)
+        """
+        for attempt in range(2):
+            path_names, relative_file_paths = self._get_source_files(within_relative_path)
+            self._ensure_document_symbols_cached(relative_file_paths)
+            with self._cache_lock:
+                indexed_symbols = self._symbol_name_index.find(
+                    name, substring_matching=substring_matching, relative_paths=relative_file_paths
+                )
+            if attempt > 0 or not self._solidlsp_settings.file_changes_reported:
+                break
+            if self._are_verified_files_unchanged({indexed_symbol.relative_path for indexed_symbol in indexed_symbols}):
+                break
+        if substring_matching:
+            is_path_name_match = any(name in path_name for path_name in path_names)
+        else:
+            is_path_name_match = name in path_names
+        return indexed_symbols, is_path_name_match
 
-                if os.path.isdir(contained_dir_or_file_abs_path):
-                    child_symbols = process_directory(contained_dir_or_file_rel_path)
-                    package_symbol["children"].extend(child_symbols)
-                    for child in child_symbols:
-                        child["parent"] = package_symbol
-
-                elif os.path.isfile(contained_dir_or_file_abs_path):
-                    _, file_root_nodes = self.request_document_symbols(contained_dir_or_file_rel_path, include_body=include_body)
-
-                    # Create file symbol, link with children
-                    file_rel_path = str(Path(contained_dir_or_file_abs_path).resolve().relative_to(self.repository_root_path))
-                    with self.open_file(file_rel_path) as file_data:
-                        fileRange = self._get_range_from_file_content(file_data.contents)
-                    file_symbol = ls_types.UnifiedSymbolInformation(  # type: ignore
-                        name=os.path.splitext(contained_dir_or_file_name)[0],
-                        kind=ls_types.SymbolKind.File,
-                        range=fileRange,
-                        selectionRange=fileRange,
-                        location=ls_types.Location(
-                            uri=str(pathlib.Path(contained_dir_or_file_abs_path).as_uri()),
-                            range=fileRange,
-                            absolutePath=str(contained_dir_or_file_abs_path),
-                            relativePath=str(Path(contained_dir_or_file_abs_path).resolve().relative_to(self.repository_root_path)),
-                        ),
-                        children=file_root_nodes,
-                        parent=package_symbol,
-                    )
-                    for child in file_root_nodes:
-                        child["parent"] = file_symbol
-
-                    # Link file symbol with package
-                    package_symbol["children"].append(file_symbol)
-
-                    # TODO: Not sure if this is actually still needed given recent changes to relative path handling
-                    def fix_relative_path(nodes: list[ls_types.UnifiedSymbolInformation]):
-                        for node in nodes:
-                            if "location" in node and "relativePath" in node["location"]:
-                                path = Path(node["location"]["relativePath"])
-                                if path.is_absolute():
-                                    try:
-                                        path = path.relative_to(self.repository_root_path)
-                                        node["location"]["relativePath"] = str(path)
-                                    except Exception:
-                                        pass
-                            if "children" in node:
-                                fix_relative_path(node["children"])
-
-                    fix_relative_path(file_root_nodes)
+    def _are_verified_files_unchanged(self, relative_file_paths: Iterable[str]) -> bool:
+        """
+        Checks whether those of the given files whose cached symbols were verified (see `_ensure_document_symbols_cached`)
+        are unchanged on disk. If a file changed without the change being reported, the retained source file listings and
+        verifications cannot be trusted and are discarded.
 
-            return result
+        :return: True if the files are unchanged, False if the retained information was discarded
+        """
+        with self._cache_lock:
+            verified_file_paths = [path for path in relative_file_paths if path in self._verified_document_symbols_paths]
+        changed_file_paths = [path for path in verified_file_paths if not self.is_document_symbols_cache_up_to_date(path)]
+        if not changed_file_paths:
+            return True
+        self.logger.log(
+            f"Detected unreported changes to {len(changed_file_paths)} files (e.g. {changed_file_paths[0]}); "
+            "discarding the retained source files",
+            logging.WARNING,
+        )
+        self.discard_verified_source_files()
+        return False
 
-        # Start from the root or the specified directory
-        start_rel_path = within_relative_path or "."
-        return process_directory(start_rel_path)
+    def _populate_file_symbols(self, file_symbols: list[ls_types.UnifiedSymbolInformation], include_body: bool) -> None:
+        """
+        Populates the given file symbols (see `_populate_file_symbol`), keeping up to
+        `document_symbol_request_window` document symbol requests in flight at the same time.
+        """
+        self._run_document_symbol_requests(
+            [functools.partial(self._populate_file_symbol, file_symbol, include_body) for file_symbol in file_symbols]
+        )
+
+    def _run_document_symbol_requests(self, requests: list[Callable[[], Any]]) -> None:
+        """
+        Runs the given functions, each of which requests the document symbols of a file, keeping up to
+        `document_symbol_request_window` requests in flight at the same time.
+        """
+        window = self._solidlsp_settings.document_symbol_request_window
+        if window <= 1 or len(requests) <= 1:
+            for request in requests:
+                request()
+            return
+
+        self.logger.log(f"Requesting document symbols for {len(requests)} files with up to {window} requests in flight", logging.DEBUG)
+        with ThreadPoolExecutor(max_workers=window, thread_name_prefix="DocumentSymbolRequest") as executor:
+            # the requests are run in copies of the current context, such that the current request deadline (if any) applies to them
+            futures = [executor.submit(contextvars.copy_context().run, request) for request in requests]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _populate_file_symbol(self, file_symbol: ls_types.UnifiedSymbolInformation, include_body: bool) -> None:
+        """
+        Adds the range and the (root) document symbols as children to the given file symbol
+        created by `request_full_symbol_tree`.
+        """
+        file_rel_path = file_symbol["location"]["relativePath"]
+        assert file_rel_path is not None
+        _, file_root_nodes = self.request_document_symbols(file_rel_path, include_body=include_body)
+        file_metadata = self._get_file_metadata_if_unchanged(file_rel_path)
+        if file_metadata is not None:
+            file_range = file_metadata.range
+        else:
+            with self.open_file(file_rel_path) as file_data:
+                file_range = self._get_range_from_file_content(file_data.contents)
+
+        file_symbol["range"] = file_range
+        file_symbol["selectionRange"] = file_range
+        file_symbol["location"]["range"] = file_range
+        file_symbol["children"] = file_root_nodes
+        for child in file_root_nodes:
+            child["parent"] = file_symbol
+
+        # TODO: Not sure if this is actually still needed given recent changes to relative path handling
+        def fix_relative_path(nodes: list[ls_types.UnifiedSymbolInformation]) -> None:
+            for node in nodes:
+                if "location" in node and "relativePath" in node["location"]:
+                    path = Path(node["location"]["relativePath"])
+                    if path.is_absolute():
+                        try:
+                            path = path.relative_to(self.repository_root_path)
+                            node["location"]["relativePath"] = str(path)
+                        except Exception:
+                            pass
+                if "children" in node:
+                    fix_relative_path(node["children"])
+
+        fix_relative_path(file_root_nodes)
 
     @staticmethod
     def _get_range_from_file_content(file_content: str) -> ls_types.Range:
         """
         Get the range for the given file.
         """
-        lines = file_content.split("\n")
-        end_line = len(lines)
-        end_column = len(lines[-1])
+        end_line = file_content.count("\n") + 1
+        end_column = len(file_content) - (file_content.rfind("\n") + 1)
         return ls_types.Range(start=ls_types.Position(line=0, character=0), end=ls_types.Position(line=end_line, character=end_column))
 
     def request_dir_overview(self, relative_dir_path: str) -> dict[str, list[UnifiedSymbolInformation]]:
@@ -1242,15 +1677,19 @@ class SolidLanguageServer(ABC):
 
         :return None
         """
-        with self.open_file(relative_file_path):
-            response = self.server.send.hover(
-                {
-                    "textDocument": {"uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()},
-                    "position": {
-                        "line": line,
-                        "character": column,
-                    },
-                }
+        with self.open_file(relative_file_path) as file_buffer:
+            response = self._position_request_memo.get(
+                ("hover", relative_file_path, file_buffer.content_hash, line, column),
+                lambda: self.server.send.hover(
+                    {
+                        "textDocument": {"uri": pathlib.Path(os.path.join(self.repository_root_path, relative_file_path)).as_uri()},
+                        "position": {
+                            "line": line,
+                            "character": column,
+                        },
+                    }
+                ),
+                recompute_on=self._ABANDONED_REQUEST_EXCEPTIONS,
             )
 
         if response is None:
@@ -1260,9 +1699,16 @@ class SolidLanguageServer(ABC):
 
         return ls_types.Hover(**response)
 
-    def retrieve_symbol_body(self, symbol: ls_types.UnifiedSymbolInformation | LSPTypes.DocumentSymbol | LSPTypes.SymbolInformation) -> str:
+    def retrieve_symbol_body(
+        self,
+        symbol: ls_types.UnifiedSymbolInformation | LSPTypes.DocumentSymbol | LSPTypes.SymbolInformation,
+        line_offsets: LineOffsetTable | None = None,
+    ) -> str:
         """
         Load the body of the given symbol. If the body is already contained in the symbol, just return it.
+
+        :param symbol: the symbol
+        :param line_offsets: the offset table of the content of the symbol's file; if None, the file is read
         """
         existing_body = symbol.get("body", None)
         if existing_body:
@@ -1271,15 +1717,13 @@ class SolidLanguageServer(ABC):
         assert "location" in symbol
         symbol_start_line = symbol["location"]["range"]["start"]["line"]
         symbol_end_line = symbol["location"]["range"]["end"]["line"]
-        assert "relativePath" in symbol["location"]
-        symbol_file = self.retrieve_full_file_content(symbol["location"]["relativePath"])
-        symbol_lines = symbol_file.split("\n")
-        symbol_body = "\n".join(symbol_lines[symbol_start_line : symbol_end_line + 1])
+        if line_offsets is None:
+            assert "relativePath" in symbol["location"]
+            line_offsets = LineOffsetTable(self.retrieve_full_file_content(symbol["location"]["relativePath"]))
 
-        # remove leading indentation
+        # the leading indentation is removed
         symbol_start_column = symbol["location"]["range"]["start"]["character"]
-        symbol_body = symbol_body[symbol_start_column:]
-        return symbol_body
+        return line_offsets.get_lines(symbol_start_line, symbol_end_line, start_column=symbol_start_column)
 
     def request_referencing_symbols(
         self,
@@ -1321,17 +1765,108 @@ class SolidLanguageServer(ABC):
         if not references:
             return []
 
-        # For each reference, find the containing symbol
+        # Find the containing symbols of all references, processing the references of each file together
+        references_by_path: dict[str, list[tuple[int, ls_types.Location]]] = defaultdict(list)
+        for ref_index, ref in enumerate(references):
+            ref_relative_path = ref["relativePath"]
+            if ref_relative_path is None:
+                # the reference is not within the repository (so there is no containing symbol to be found)
+                self.logger.log(f"Skipping reference without a relative path: {ref['absolutePath']}", logging.DEBUG)
+                continue
+            references_by_path[ref_relative_path].append((ref_index, ref))
+        containing_symbols: list[ls_types.UnifiedSymbolInformation | None] = [None] * len(references)
+        for ref_path, indexed_refs in references_by_path.items():
+            file_containing_symbols = self._request_containing_symbols_of_references(
+                ref_path, [ref for _, ref in indexed_refs], include_body=include_body, include_file_symbols=include_file_symbols
+            )
+            for (ref_index, _), containing_symbol in zip(indexed_refs, file_containing_symbols, strict=True):
+                containing_symbols[ref_index] = containing_symbol
+
         result = []
         incoming_symbol = None
-        for ref in references:
-            ref_path = ref["relativePath"]
+        for ref, containing_symbol in zip(references, containing_symbols, strict=True):
             ref_line = ref["range"]["start"]["line"]
             ref_col = ref["range"]["start"]["character"]
+            if containing_symbol is None or (not include_file_symbols and containing_symbol["kind"] == ls_types.SymbolKind.File):
+                continue
+
+            assert "location" in containing_symbol
+            assert "selectionRange" in containing_symbol
+
+            # Checking for self-reference
+            if (
+                containing_symbol["location"]["relativePath"] == relative_file_path
+                and containing_symbol["selectionRange"]["start"]["line"] == ref_line
+                and containing_symbol["selectionRange"]["start"]["character"] == ref_col
+            ):
+                incoming_symbol = containing_symbol
+                if include_self:
+                    result.append(ReferenceInSymbol(symbol=containing_symbol, line=ref_line, character=ref_col))
+                    continue
+                self.logger.log(f"Found self-reference for {incoming_symbol['name']}, skipping it since {include_self=}", logging.DEBUG)
+                continue
+
+            # checking whether reference is an import
+            # This is neither really safe nor elegant, but if we don't do it,
+            # there is no way to distinguish between definitions and imports as import is not a symbol-type
+            # and we get the type referenced symbol resulting from imports...
+            if (
+                not include_imports
+                and incoming_symbol is not None
+                and containing_symbol["name"] == incoming_symbol["name"]
+                and containing_symbol["kind"] == incoming_symbol["kind"]
+            ):
+                self.logger.log(
+                    f"Found import of referenced symbol {incoming_symbol['name']}"
+                    f"in {containing_symbol['location']['relativePath']}, skipping",
+                    logging.DEBUG,
+                )
+                continue
+
+            result.append(ReferenceInSymbol(symbol=containing_symbol, line=ref_line, character=ref_col))
+
+        return result
+
+    def _request_containing_symbols_of_references(
+        self, relative_file_path: str, references: list[ls_types.Location], include_body: bool, include_file_symbols: bool
+    ) -> list[ls_types.UnifiedSymbolInformation | None]:
+        """
+        Finds the containing symbols of the given references within the same file, retrieving the file's symbols
+        and indexing their ranges only once.
+
+        :param relative_file_path: the relative path of the file containing the references
+        :param references: the references
+        :param include_body: whether to include the bodies of the symbols
+        :param include_file_symbols: whether to return file symbols for references for which no containing symbol is found
+        :return: the containing symbol of each reference (or None)
+        """
+        with self.open_file(relative_file_path) as file_data:
+            file_contents = file_data.contents
+            lines = file_contents.split("\n")
+            symbols, _ = self.request_document_symbols(relative_file_path)
+            self._normalize_symbol_locations(symbols, relative_file_path)
+            index = ContainingSymbolIndex(self._get_container_candidates(symbols))
+            line_offsets = LineOffsetTable(file_contents) if include_body else None
+            file_symbol: ls_types.UnifiedSymbolInformation | None = None
+
+            result: list[ls_types.UnifiedSymbolInformation | None] = []
+            for ref in references:
+                ref_line = ref["range"]["start"]["line"]
+                ref_col = ref["range"]["start"]["character"]
+
+                containing_symbol = None
+                if lines[ref_line].strip() == "":
+                    self.logger.log(
+                        f"Passing empty lines to request_container_symbol is currently not supported, {relative_file_path=}, {ref_line=}",
+                        logging.ERROR,
+                    )
+                else:
+                    containing_symbol = index.find_containing_symbol(ref_line, ref_col)
+                    if containing_symbol is not None and include_body:
+                        # the symbol is copied, as the cached symbols shall not hold bodies
+                        containing_symbol = copy(containing_symbol)
+                        containing_symbol["body"] = self.retrieve_symbol_body(containing_symbol, line_offsets=line_offsets)
 
-            with self.open_file(ref_path) as file_data:
-                # Get the containing symbol for this reference
-                containing_symbol = self.request_containing_symbol(ref_path, ref_line, ref_col, include_body=include_body)
                 if containing_symbol is None:
                     # TODO: HORRIBLE HACK! I don't know how to do it better for now...
                     # THIS IS BOUND TO BREAK IN MANY CASES! IT IS ALSO SPECIFIC TO PYTHON!
@@ -1346,11 +1881,10 @@ class SolidLanguageServer(ABC):
                     # The hack is to try to find a variable symbol in the containing module
                     # by using the text of the reference to find the variable name (In a very heuristic way)
                     # and then look for a symbol with that name and kind Variable
-                    ref_text = file_data.contents.split("\n")[ref_line]
+                    ref_text = lines[ref_line]
                     if "." in ref_text:
                         containing_symbol_name = ref_text.split(".")[0]
-                        all_symbols, _ = self.request_document_symbols(ref_path)
-                        for symbol in all_symbols:
+                        for symbol in symbols:
                             if symbol["name"] == containing_symbol_name and symbol["kind"] == ls_types.SymbolKind.Variable:
                                 containing_symbol = copy(symbol)
                                 containing_symbol["location"] = ref
@@ -1360,71 +1894,34 @@ class SolidLanguageServer(ABC):
                 # We failed retrieving the symbol, falling back to creating a file symbol
                 if containing_symbol is None and include_file_symbols:
                     self.logger.log(
-                        f"Could not find containing symbol for {ref_path}:{ref_line}:{ref_col}. Returning file symbol instead",
+                        f"Could not find containing symbol for {relative_file_path}:{ref_line}:{ref_col}. Returning file symbol instead",
                         logging.WARNING,
                     )
-                    fileRange = self._get_range_from_file_content(file_data.contents)
-                    location = ls_types.Location(
-                        uri=str(pathlib.Path(os.path.join(self.repository_root_path, ref_path)).as_uri()),
-                        range=fileRange,
-                        absolutePath=str(os.path.join(self.repository_root_path, ref_path)),
-                        relativePath=ref_path,
-                    )
-                    name = os.path.splitext(os.path.basename(ref_path))[0]
+                    if file_symbol is None:
+                        file_symbol = self._create_file_symbol(relative_file_path, file_contents, include_body)
+                    containing_symbol = copy(file_symbol)
 
-                    if include_body:
-                        body = self.retrieve_full_file_content(ref_path)
-                    else:
-                        body = ""
-
-                    containing_symbol = ls_types.UnifiedSymbolInformation(
-                        kind=ls_types.SymbolKind.File,
-                        range=fileRange,
-                        selectionRange=fileRange,
-                        location=location,
-                        name=name,
-                        children=[],
-                        body=body,
-                    )
-                if containing_symbol is None or (not include_file_symbols and containing_symbol["kind"] == ls_types.SymbolKind.File):
-                    continue
-
-                assert "location" in containing_symbol
-                assert "selectionRange" in containing_symbol
-
-                # Checking for self-reference
-                if (
-                    containing_symbol["location"]["relativePath"] == relative_file_path
-                    and containing_symbol["selectionRange"]["start"]["line"] == ref_line
-                    and containing_symbol["selectionRange"]["start"]["character"] == ref_col
-                ):
-                    incoming_symbol = containing_symbol
-                    if include_self:
-                        result.append(ReferenceInSymbol(symbol=containing_symbol, line=ref_line, character=ref_col))
-                        continue
-                    self.logger.log(f"Found self-reference for {incoming_symbol['name']}, skipping it since {include_self=}", logging.DEBUG)
-                    continue
-
-                # checking whether reference is an import
-                # This is neither really safe nor elegant, but if we don't do it,
-                # there is no way to distinguish between definitions and imports as import is not a symbol-type
-                # and we get the type referenced symbol resulting from imports...
-                if (
-                    not include_imports
-                    and incoming_symbol is not None
-                    and containing_symbol["name"] == incoming_symbol["name"]
-                    and containing_symbol["kind"] == incoming_symbol["kind"]
-                ):
-                    self.logger.log(
-                        f"Found import of referenced symbol {incoming_symbol['name']}"
-                        f"in {containing_symbol['location']['relativePath']}, skipping",
-                        logging.DEBUG,
-                    )
-                    continue
-
-                result.append(ReferenceInSymbol(symbol=containing_symbol, line=ref_line, character=ref_col))
+                result.append(containing_symbol)
+            return result
 
-        return result
+    def _create_file_symbol(self, relative_file_path: str, file_contents: str, include_body: bool) -> ls_types.UnifiedSymbolInformation:
+        file_range = self._get_range_from_file_content(file_contents)
+        absolute_file_path = str(os.path.join(self.repository_root_path, relative_file_path))
+        location = ls_types.Location(
+            uri=str(pathlib.Path(absolute_file_path).as_uri()),
+            range=file_range,
+            absolutePath=absolute_file_path,
+            relativePath=relative_file_path,
+        )
+        return ls_types.UnifiedSymbolInformation(
+            kind=ls_types.SymbolKind.File,
+            range=file_range,
+            selectionRange=file_range,
+            location=location,
+            name=os.path.splitext(os.path.basename(relative_file_path))[0],
+            children=[],
+            body=file_contents if include_body else "",
+        )
 
     def request_containing_symbol(
         self,
@@ -1472,29 +1969,7 @@ class SolidLanguageServer(ABC):
                 return None
 
         symbols, _ = self.request_document_symbols(relative_file_path)
-
-        # make jedi and pyright api compatible
-        # the former has no location, the later has no range
-        # we will just always add location of the desired format to all symbols
-        for symbol in symbols:
-            if "location" not in symbol:
-                range = symbol["range"]
-                location = ls_types.Location(
-                    uri=f"file:/{absolute_file_path}",
-                    range=range,
-                    absolutePath=absolute_file_path,
-                    relativePath=relative_file_path,
-                )
-                symbol["location"] = location
-            else:
-                location = symbol["location"]
-                assert "range" in location
-                location["absolutePath"] = absolute_file_path
-                location["relativePath"] = relative_file_path
-                location["uri"] = Path(absolute_file_path).as_uri()
-
-        # Allowed container kinds, currently only for Python
-        container_symbol_kinds = {ls_types.SymbolKind.Method, ls_types.SymbolKind.Function, ls_types.SymbolKind.Class}
+        self._normalize_symbol_locations(symbols, relative_file_path)
 
         def is_position_in_range(line: int, range_d: ls_types.Range) -> bool:
             start = range_d["start"]
@@ -1511,15 +1986,7 @@ class SolidLanguageServer(ABC):
                     column_condition = column >= start["character"]
             return line_condition and column_condition
 
-        # Only consider containers that are not one-liners (otherwise we may get imports)
-        candidate_containers = [
-            s
-            for s in symbols
-            if s["kind"] in container_symbol_kinds and s["location"]["range"]["start"]["line"] != s["location"]["range"]["end"]["line"]
-        ]
-        var_containers = [s for s in symbols if s["kind"] == ls_types.SymbolKind.Variable]
-        candidate_containers.extend(var_containers)
-
+        candidate_containers = self._get_container_candidates(symbols)
         if not candidate_containers:
             return None
 
@@ -1535,11 +2002,57 @@ class SolidLanguageServer(ABC):
             # Return the one with the greatest starting position (i.e. the innermost container).
             containing_symbol = max(containing_symbols, key=lambda s: s["location"]["range"]["start"]["line"])
             if include_body:
+                # the symbol is copied, as the cached symbols shall not hold bodies
+                containing_symbol = copy(containing_symbol)
                 containing_symbol["body"] = self.retrieve_symbol_body(containing_symbol)
             return containing_symbol
         else:
             return None
 
+    def _normalize_symbol_locations(self, symbols: list[ls_types.UnifiedSymbolInformation], relative_file_path: str) -> None:
+        """
+        Makes sure that all the given symbols of the given file have a location of the same format.
+        """
+        absolute_file_path = str(PurePath(self.repository_root_path, relative_file_path))
+        # make jedi and pyright api compatible
+        # the former has no location, the later has no range
+        # we will just always add location of the desired format to all symbols
+        for symbol in symbols:
+            if "location" not in symbol:
+                range = symbol["range"]
+                location = ls_types.Location(
+                    uri=f"file:/{absolute_file_path}",
+                    range=range,
+                    absolutePath=absolute_file_path,
+                    relativePath=relative_file_path,
+                )
+                symbol["location"] = location
+            else:
+                location = symbol["location"]
+                assert "range" in location
+                location["absolutePath"] = absolute_file_path
+                location["relativePath"] = relative_file_path
+                location["uri"] = Path(absolute_file_path).as_uri()
+
+    @staticmethod
+    def _get_container_candidates(symbols: list[ls_types.UnifiedSymbolInformation]) -> list[ls_types.UnifiedSymbolInformation]:
+        """
+        :return: the symbols which are considered as containers of positions, in order of preference for containers
+            starting on the same line
+        """
+        # Allowed container kinds, currently only for Python
+        container_symbol_kinds = {ls_types.SymbolKind.Method, ls_types.SymbolKind.Function, ls_types.SymbolKind.Class}
+
+        # Only consider containers that are not one-liners (otherwise we may get imports)
+        candidate_containers = [
+            s
+            for s in symbols
+            if s["kind"] in container_symbol_kinds and s["location"]["range"]["start"]["line"] != s["location"]["range"]["end"]["line"]
+        ]
+        var_containers = [s for s in symbols if s["kind"] == ls_types.SymbolKind.Variable]
+        candidate_containers.extend(var_containers)
+        return candidate_containers
+
     def request_container_of_symbol(
         self, symbol: ls_types.UnifiedSymbolInformation, include_body: bool = False
     ) -> ls_types.UnifiedSymbolInformation | None:
@@ -1607,46 +2120,281 @@ class SolidLanguageServer(ABC):
     @property
     def cache_path(self) -> Path:
         """
-        The path to the cache file for the document symbols.
+        The path to the persistent store for the document symbols.
         """
-        return Path(self.repository_root_path) / ".serena" / "cache" / self.language_id / "document_symbols_cache_v23-06-25.pkl"
+        return self._cache_dir / "document_symbols_cache_v25-10-26.db"
 
-    def save_cache(self):
+    @property
+    def _cache_dir(self) -> Path:
+        return Path(self.repository_root_path) / ".serena" / "cache" / self.language_id
+
+    @property
+    def _legacy_cache_path(self) -> Path:
+        """
+        The path to the pickle file in which the document symbols were stored by previous versions.
+        """
+        return self._cache_dir / "document_symbols_cache_v23-06-25.pkl"
+
+    def _get_cached_document_symbols(
+        self, cache_key: str
+    ) -> tuple[str, tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]] | None:
+        """
+        Retrieves an entry from the in-memory cache, loading it from the persistent store if it was not yet loaded.
+        Must be called while holding the cache lock.
+        """
+        file_hash_and_result = self._document_symbols_views.get(cache_key)
+        if file_hash_and_result is not None:
+            self._document_symbols_views.move_to_end(cache_key)
+            return file_hash_and_result
+        file_hash_and_symbols = self._get_cached_compact_document_symbols(cache_key)
+        if file_hash_and_symbols is None:
+            return None
+        file_hash, compact_document_symbols = file_hash_and_symbols
+        file_hash_and_result = (file_hash, compact_document_symbols.to_symbols())
+        self._add_document_symbols_view(cache_key, file_hash_and_result)
+        return file_hash_and_result
+
+    def _get_cached_compact_document_symbols(self, cache_key: str) -> tuple[str, CompactDocumentSymbols] | None:
+        """
+        Retrieves an entry from the in-memory cache in its compact representation, loading it from the persistent store
+        if it was not yet loaded.
+        Must be called while holding the cache lock.
+        """
+        file_hash_and_symbols = self._document_symbols_cache.get(cache_key)
+        if file_hash_and_symbols is None and self._document_symbols_store is not None:
+            file_hash_and_symbols = self._document_symbols_store.get(cache_key)
+            if file_hash_and_symbols is not None:
+                self._document_symbols_cache[cache_key] = file_hash_and_symbols
+                self._symbol_name_index.set_file_symbols(cache_key, file_hash_and_symbols[1])
+        return file_hash_and_symbols
+
+    def _add_document_symbols_view(
+        self,
+        cache_key: str,
+        file_hash_and_result: tuple[str, tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]],
+    ) -> None:
+        """
+        Retains the dictionary view of a cache entry, discarding the least recently used views if necessary.
+        Must be called while holding the cache lock.
+        """
+        self._document_symbols_views[cache_key] = file_hash_and_result
+        self._document_symbols_views.move_to_end(cache_key)
+        while len(self._document_symbols_views) > self.MAX_DOCUMENT_SYMBOLS_VIEWS:
+            self._document_symbols_views.popitem(last=False)
+
+    def _create_compact_document_symbols(
+        self, relative_file_path: str, root_symbols: list[ls_types.UnifiedSymbolInformation]
+    ) -> CompactDocumentSymbols:
+        absolute_path = os.path.join(self.repository_root_path, relative_file_path)
+        return CompactDocumentSymbols.from_symbols(relative_file_path, absolute_path, pathlib.Path(absolute_path).as_uri(), root_symbols)
+
+    def _store_file_metadata(self, relative_file_path: str, signature: FileSignature, file_buffer: LSPFileBuffer) -> None:
+        """
+        Remembers the content hash and range of a file which was just read from disk, such that they can be reused
+        for as long as the file's signature does not change.
+        Files which were modified very recently are skipped, because a further modification within the granularity of the
+        file system's timestamps could go unnoticed.
+        """
+        if time_ns() - signature.mtime_ns < self.FILE_METADATA_MIN_AGE_NS:
+            return
+        metadata = CachedFileMetadata(
+            signature=signature, content_hash=file_buffer.content_hash, range=self._get_range_from_file_content(file_buffer.contents)
+        )
         with self._cache_lock:
-            if not self._cache_has_changed:
-                self.logger.log("No changes to document symbols cache, skipping save", logging.DEBUG)
-                return
+            self._file_metadata_cache[relative_file_path] = metadata
+            self._changed_file_metadata_paths.add(relative_file_path)
+            self._notify_cache_changes()
+
+    def _get_file_metadata_if_unchanged(self, relative_file_path: str) -> CachedFileMetadata | None:
+        """
+        Retrieves the metadata of the given file without reading it, provided that the file has not changed on disk
+        since the metadata was stored and that the file is not currently open (as the content of open files may have
+        been modified in memory).
+
+        :return: the metadata or None if the file has to be read to obtain up-to-date information
+        """
+        absolute_file_path = os.path.join(self.repository_root_path, relative_file_path)
+        if pathlib.Path(absolute_file_path).as_uri() in self.open_file_buffers:
+            return None
+        with self._cache_lock:
+            metadata = self._file_metadata_cache.get(relative_file_path)
+            if metadata is None and self._document_symbols_store is not None:
+                metadata = self._document_symbols_store.get_file_metadata(relative_file_path)
+                if metadata is not None:
+                    self._file_metadata_cache[relative_file_path] = metadata
+        if metadata is None:
+            return None
+        try:
+            signature = FileSignature.from_path(absolute_file_path)
+        except OSError:
+            return None
+        if signature != metadata.signature:
+            return None
+        return metadata
+
+    def discard_memoized_responses(self) -> None:
+        """
+        Discards the memoized responses to position-based requests (definition, references, hover), which may depend on the
+        content of any file, e.g. because files may have changed without the language server being notified.
+        """
+        self._position_request_memo.clear()
+
+    def discard_verified_source_files(self) -> None:
+        """
+        Discards the source file listings and the verification of cached document symbols retained by symbol name lookups
+        (see `SolidLSPSettings.file_changes_reported`), e.g. because files may have changed without the changes being reported.
+        """
+        with self._cache_lock:
+            self._discard_source_file_listings()
+            self._verified_document_symbols_paths.clear()
+
+    def invalidate_document_symbols(self, relative_file_paths: Iterable[str]) -> None:
+        """
+        Discards the cached document symbols (and file metadata) of the given files, e.g. because they are known to have
+        changed on disk. Persisted entries are overwritten as soon as the files' symbols are requested again.
+        Memoized responses to position-based requests (which may depend on the content of any file) are discarded as well.
+        """
+        self.discard_memoized_responses()
+        relative_file_paths = list(relative_file_paths)
+        file_kinds = {path: self._get_file_kind(path) for path in relative_file_paths}
+        with self._cache_lock:
+            self._file_change_generation += 1
+            if any(self._may_change_source_file_listings(path, kind) for path, kind in file_kinds.items()):
+                self._discard_source_file_listings()
+            # the files within directories which were removed (or moved) are not reported individually
+            removed_dir_prefixes = tuple(
+                os.path.join(path, "")
+                for path, kind in file_kinds.items()
+                if kind == "dir" or (kind is None and path not in self._verified_document_symbols_paths)
+            )
+            if removed_dir_prefixes:
+                self._verified_document_symbols_paths = {
+                    path for path in self._verified_document_symbols_paths if not path.startswith(removed_dir_prefixes)
+                }
+            for relative_file_path in relative_file_paths:
+                self._verified_document_symbols_paths.discard(relative_file_path)
+                self._document_symbols_cache.pop(relative_file_path, None)
+                self._document_symbols_views.pop(relative_file_path, None)
+                self._symbol_name_index.remove_file(relative_file_path)
+                self._changed_cache_keys.discard(relative_file_path)
+                self._file_metadata_cache.pop(relative_file_path, None)
+                self._changed_file_metadata_paths.discard(relative_file_path)
+
+    def _get_file_kind(self, relative_path: str) -> str | None:
+        """
+        :return: "file" or "dir" depending on the type of the given path, or None if it does not exist
+        """
+        try:
+            mode = os.stat(os.path.join(self.repository_root_path, relative_path)).st_mode
+        except OSError:
+            return None
+        if stat.S_ISDIR(mode):
+            return "dir"
+        return "file" if stat.S_ISREG(mode) else None
+
+    def _may_change_source_file_listings(self, relative_path: str, kind: str | None) -> bool:
+        """
+        Determines whether a change to the given path may affect the retained source file listings (see `_get_source_files`),
+        i.e. whether a listed file or directory was deleted or replaced or whether a source file or a directory was created.
+        Must be called while holding the cache lock.
+
+        :param relative_path: the relative path which was reported as changed
+        :param kind: the current type of the path (see `_get_file_kind`)
+        """
+        if not self._source_file_listings:
+            return False
+        if relative_path in self._listed_source_files:
+            return kind != "file"
+        if relative_path in self._listed_source_dirs or kind == "dir":
+            return True
+        return kind == "file" and not self.is_ignored_path(relative_path, is_dir=False)
+
+    def _notify_cache_changes(self) -> None:
+        """
+        Notifies the background saver of the changes to the cache. Must be called while holding the cache lock.
+        """
+        self._cache_saver.notify_changes(len(self._changed_cache_keys) + len(self._changed_file_metadata_paths))
+
+    def save_cache(self):
+        """
+        Writes all document symbols cache entries that changed since the last save to the persistent store.
+        Changes are saved automatically in the background (see `DebouncedCacheSaver`), so calling this method is required
+        only where changes must be persisted immediately.
+        """
+        # the writing itself happens without holding the cache lock, such that concurrent cache accesses are not blocked
+        with self._cache_save_lock:
+            with self._cache_lock:
+                if not self._changed_cache_keys and not self._changed_file_metadata_paths:
+                    self.logger.log("No changes to document symbols cache, skipping save", logging.DEBUG)
+                    return
+                if self._document_symbols_store is None:
+                    self.logger.log("Document symbols store is unavailable, cannot save the cache", logging.WARNING)
+                    return
+                document_symbols_store = self._document_symbols_store
 
-            self.logger.log(f"Saving updated document symbols cache to {self.cache_path}", logging.INFO)
-            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-            try:
-                with open(self.cache_path, "wb") as f:
-                    pickle.dump(self._document_symbols_cache, f)
-                self._cache_has_changed = False
-            except Exception as e:
                 self.logger.log(
-                    f"Failed to save document symbols cache to {self.cache_path}: {e}. "
-                    "Note: this may have resulted in a corrupted cache file.",
-                    logging.ERROR,
+                    f"Saving {len(self._changed_cache_keys)} updated document symbols cache entries to {self.cache_path}", logging.INFO
                 )
+                changed_entries = {
+                    key: self._document_symbols_cache[key] for key in self._changed_cache_keys if key in self._document_symbols_cache
+                }
+                changed_file_metadata = {
+                    path: self._file_metadata_cache[path] for path in self._changed_file_metadata_paths if path in self._file_metadata_cache
+                }
+                self._changed_cache_keys.clear()
+                self._changed_file_metadata_paths.clear()
 
-    def load_cache(self):
-        if not self.cache_path.exists():
-            return
+            try:
+                document_symbols_store.put_many(changed_entries)
+                document_symbols_store.put_file_metadata(changed_file_metadata)
+            except Exception as e:
+                self.logger.log(f"Failed to save document symbols cache to {self.cache_path}: {e}", logging.ERROR)
+                # the entries remain marked as changed (unless they were discarded in the meantime), such that saving is retried
+                with self._cache_lock:
+                    self._changed_cache_keys.update(key for key in changed_entries if key in self._document_symbols_cache)
+                    self._changed_file_metadata_paths.update(path for path in changed_file_metadata if path in self._file_metadata_cache)
+                return
+        document_symbols_store.compact_in_background_if_needed()
 
+    def load_cache(self):
+        """
+        Opens the persistent store for the document symbols; the entries themselves are loaded lazily.
+        If a cache file from a previous version exists, its entries are migrated to the store.
+        Stores of other (outdated) versions are removed.
+        """
         with self._cache_lock:
-            self.logger.log(f"Loading document symbols cache from {self.cache_path}", logging.INFO)
             try:
-                with open(self.cache_path, "rb") as f:
-                    self._document_symbols_cache = pickle.load(f)
-                self.logger.log(f"Loaded {len(self._document_symbols_cache)} document symbols from cache.", logging.INFO)
+                self._document_symbols_store = DocumentSymbolsStore(self.cache_path)
             except Exception as e:
-                # cache often becomes corrupt, so just skip loading it
-                self.logger.log(
-                    f"Failed to load document symbols cache from {self.cache_path}: {e}. Possible cause: the cache file is corrupted. "
-                    "Check for any errors related to saving the cache in the logs.",
-                    logging.ERROR,
-                )
+                self.logger.log(f"Failed to open document symbols store {self.cache_path}: {e}. Symbols will not be cached", logging.ERROR)
+                return
+            self.logger.log(f"Opened document symbols store {self.cache_path}", logging.INFO)
+
+            for path in self._cache_dir.glob("document_symbols_cache_v*.db*"):
+                if not path.name.startswith(self.cache_path.name):
+                    self.logger.log(f"Removing outdated document symbols store {path}", logging.INFO)
+                    path.unlink(missing_ok=True)
+
+            if self._legacy_cache_path.exists():
+                self.logger.log(f"Migrating document symbols cache from {self._legacy_cache_path}", logging.INFO)
+                try:
+                    with open(self._legacy_cache_path, "rb") as f:
+                        legacy_cache = pickle.load(f)
+                    # the legacy cache was keyed by f"{relative_file_path}-{include_body}"; only the entries without bodies are kept
+                    migrated_entries = {}
+                    for key, (file_hash, (_, root_symbols)) in legacy_cache.items():
+                        if key.endswith("-False"):
+                            relative_file_path = key.removesuffix("-False")
+                            migrated_entries[relative_file_path] = (
+                                file_hash,
+                                self._create_compact_document_symbols(relative_file_path, root_symbols),
+                            )
+                    self._document_symbols_store.put_many(migrated_entries)
+                    self.logger.log(f"Migrated {len(migrated_entries)} document symbols cache entries.", logging.INFO)
+                except Exception as e:
+                    # the legacy cache often became corrupt, so just skip it
+                    self.logger.log(f"Failed to migrate document symbols cache from {self._legacy_cache_path}: {e}", logging.ERROR)
+                self._legacy_cache_path.unlink(missing_ok=True)
 
     def request_workspace_symbol(self, query: str) -> list[ls_types.UnifiedSymbolInformation] | None:
         """
@@ -1685,12 +2433,33 @@ class SolidLanguageServer(ABC):
             f"Starting language server with language {self.language_server.language} for {self.language_server.repository_root_path}",
             logging.INFO,
         )
+        if self._document_symbols_store is None:
+            self.load_cache()
         self._server_context = self._start_server_process()
         return self
 
     def stop(self, shutdown_timeout: float = 2.0) -> None:
+        # changes to the cache which are still pending are saved right away
+        self._cache_saver.stop()
+        self.save_cache()
+        self._close_cache()
         self._shutdown(timeout=shutdown_timeout)
 
+    def _close_cache(self) -> None:
+        """
+        Closes the persistent store for the document symbols (waiting for a compaction that is in progress to complete).
+        The in-memory cache is retained, and the store is reopened when the language server is started again.
+        """
+        with self._cache_save_lock:
+            with self._cache_lock:
+                document_symbols_store = self._document_symbols_store
+                self._document_symbols_store = None
+            if document_symbols_store is not None:
+                try:
+                    document_symbols_store.close()
+                except Exception as e:
+                    self.logger.log(f"Failed to close document symbols store {self.cache_path}: {e}", logging.ERROR)
+
     @property
     def language_server(self) -> Self:
         return self
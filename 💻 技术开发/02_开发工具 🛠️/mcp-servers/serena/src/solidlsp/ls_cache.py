@@ -0,0 +1,581 @@
+"""
+Persistent storage for the document symbols cache of language servers and in-memory caching of request results
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, NamedTuple, Self, TypeVar
+
+from solidlsp import ls_types
+from solidlsp.ls_deadline import RequestDeadline
+
+log = logging.getLogger(__name__)
+
+
+class FileSignature(NamedTuple):
+    """
+    Stat information with which changes to a file can be detected without reading it
+    """
+
+    mtime_ns: int
+    size: int
+    inode: int
+
+    @classmethod
+    def from_path(cls, path: str) -> Self:
+        st = os.stat(path)
+        return cls(mtime_ns=st.st_mtime_ns, size=st.st_size, inode=st.st_ino)
+
+
+@dataclass(frozen=True)
+class CachedFileMetadata:
+    """
+    Information on the content of a file which was read at the time the file had the given signature
+    """
+
+    signature: FileSignature
+    content_hash: str
+    range: ls_types.Range
+    """the range spanning the full file content"""
+
+
+class CompactDocumentSymbols:
+    """
+    A compact, columnar representation of the document symbols of a single file, as held in the document symbols cache.
+
+    The file's paths are stored only once (rather than in the location of every symbol), and the symbols' ranges and kinds
+    are stored in packed integer arrays. The symbols are stored in pre-order, with the tree structure being represented by
+    the index of each symbol's parent. Further (less common) attributes of the symbols are stored per symbol in a sparse mapping.
+    The dictionary view of the symbols (with locations, children and parent references) is created on demand via `to_symbols`.
+    """
+
+    __slots__ = ("absolute_path", "extras", "kinds", "names", "parent_indices", "ranges", "relative_path", "uri")
+
+    NUM_RANGE_VALUES = 12
+    """
+    the number of values stored per symbol in `ranges`: the start line, start character, end line and end character of
+    the location's range, the symbol's range and the symbol's selection range (-1 if the respective range is absent)
+    """
+    _RANGE_KEYS = ("range", "selectionRange")
+    _COLUMNAR_KEYS = frozenset(("name", "kind", "location", "range", "selectionRange", "children", "parent", "body"))
+
+    def __init__(
+        self,
+        relative_path: str,
+        absolute_path: str,
+        uri: str,
+        names: list[str],
+        kinds: array,
+        ranges: array,
+        parent_indices: array,
+        extras: dict[int, dict[str, Any]],
+    ) -> None:
+        self.relative_path = relative_path
+        self.absolute_path = absolute_path
+        self.uri = uri
+        self.names = names
+        self.kinds = kinds
+        self.ranges = ranges
+        self.parent_indices = parent_indices
+        """the index of each symbol's parent (-1 for root symbols)"""
+        self.extras = extras
+        """a mapping from symbol indices to attributes which are not stored in the columns (including locations in other files)"""
+
+    @classmethod
+    def from_symbols(cls, relative_path: str, absolute_path: str, uri: str, root_symbols: list[ls_types.UnifiedSymbolInformation]) -> Self:
+        """
+        :param relative_path: the relative path of the file
+        :param absolute_path: the absolute path of the file
+        :param uri: the URI of the file
+        :param root_symbols: the root symbols of the file, whose descendants are given by their children (bodies are not retained)
+        :return: the compact representation of the symbols
+        """
+        names: list[str] = []
+        kinds = array("H")
+        ranges = array("i")
+        parent_indices = array("i")
+        extras: dict[int, dict[str, Any]] = {}
+
+        def append_range(range_: ls_types.Range | None) -> None:
+            if range_ is None:
+                ranges.extend((-1, -1, -1, -1))
+            else:
+                start, end = range_["start"], range_["end"]
+                ranges.extend((start["line"], start["character"], end["line"], end["character"]))
+
+        def add(symbol: ls_types.UnifiedSymbolInformation, parent_index: int) -> None:
+            index = len(names)
+            names.append(symbol["name"])
+            kinds.append(symbol["kind"])
+            parent_indices.append(parent_index)
+            extra = {key: value for key, value in symbol.items() if key not in cls._COLUMNAR_KEYS}
+            location = symbol.get("location")
+            if (
+                location is not None
+                and location.get("uri") == uri
+                and location.get("absolutePath") == absolute_path
+                and location.get("relativePath") == relative_path
+                and "range" in location
+                and len(location) == 4
+            ):
+                append_range(location["range"])
+            else:
+                append_range(None)
+                if location is not None:
+                    extra["location"] = location
+            for key in cls._RANGE_KEYS:
+                append_range(symbol.get(key))  # type: ignore
+            if extra:
+                extras[index] = extra
+            for child in symbol.get("children", []):
+                add(child, index)
+
+        for root_symbol in root_symbols:
+            add(root_symbol, -1)
+        return cls(relative_path, absolute_path, uri, names, kinds, ranges, parent_indices, extras)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_symbols(self) -> tuple[list[ls_types.UnifiedSymbolInformation], list[ls_types.UnifiedSymbolInformation]]:
+        """
+        Creates the dictionary view of the symbols.
+
+        :return: a tuple (all_symbols, root_symbols), where all_symbols contains all symbols in pre-order and root_symbols
+            contains the root symbols; all symbols have a location, children and a parent (which is None for root symbols)
+        """
+        all_symbols: list[ls_types.UnifiedSymbolInformation] = []
+        root_symbols: list[ls_types.UnifiedSymbolInformation] = []
+        ranges = self.ranges
+
+        def get_range(offset: int) -> ls_types.Range | None:
+            if ranges[offset] < 0:
+                return None
+            return {
+                "start": {"line": ranges[offset], "character": ranges[offset + 1]},
+                "end": {"line": ranges[offset + 2], "character": ranges[offset + 3]},
+            }
+
+        for index, name in enumerate(self.names):
+            offset = index * self.NUM_RANGE_VALUES
+            symbol: dict[str, Any] = {"name": name, "kind": self.kinds[index]}
+            location_range = get_range(offset)
+            if location_range is not None:
+                symbol["location"] = {
+                    "uri": self.uri,
+                    "range": location_range,
+                    "absolutePath": self.absolute_path,
+                    "relativePath": self.relative_path,
+                }
+            for i, key in enumerate(self._RANGE_KEYS, start=1):
+                range_ = get_range(offset + 4 * i)
+                if range_ is not None:
+                    symbol[key] = range_
+            extra = self.extras.get(index)
+            if extra is not None:
+                symbol.update(extra)
+            symbol["children"] = []
+            parent_index = self.parent_indices[index]
+            if parent_index < 0:
+                symbol["parent"] = None
+                root_symbols.append(symbol)  # type: ignore
+            else:
+                parent = all_symbols[parent_index]
+                symbol["parent"] = parent
+                parent["children"].append(symbol)  # type: ignore
+            all_symbols.append(symbol)  # type: ignore
+        return all_symbols, root_symbols
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(self.__slots__, state, strict=True):
+            setattr(self, name, value)
+
+
+class DocumentSymbolsStore:
+    """
+    A persistent, incrementally updated store for document symbols, backed by SQLite.
+
+    Every entry (typically corresponding to a single file) is stored as a separate row, consisting of the
+    hash of the file content from which the entry was computed and the pickled entry value.
+    Entries are thus loaded lazily (only when they are requested) and saving writes only the entries that changed.
+    Writes are transactional, so an interrupted save cannot corrupt entries that were saved previously.
+    """
+
+    COMPACTION_MIN_FREE_PAGES = 256
+    """the minimum number of free pages in the database file for a compaction to be considered"""
+    COMPACTION_MIN_FREE_FRACTION = 0.25
+    """the minimum fraction of free pages (relative to all pages) for a compaction to be triggered"""
+
+    def __init__(self, db_path: str | Path) -> None:
+        """
+        :param db_path: the path to the database file, which will be created if it does not exist
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._compaction_thread: threading.Thread | None = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            log.error(f"Document symbols store {self.db_path} could not be opened ({e}); discarding it and starting from scratch")
+            self._remove_db_files()
+            self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, content_hash TEXT NOT NULL, value BLOB NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_metadata (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "inode INTEGER NOT NULL, content_hash TEXT NOT NULL, end_line INTEGER NOT NULL, end_character INTEGER NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def _remove_db_files(self) -> None:
+        for suffix in ("", "-wal", "-shm"):
+            path = str(self.db_path) + suffix
+            if os.path.exists(path):
+                os.remove(path)
+
+    def get(self, key: str) -> tuple[str, Any] | None:
+        """
+        :param key: the key of the entry
+        :return: a tuple (content_hash, value) or None if there is no (readable) entry for the given key
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        content_hash, pickled_value = row
+        try:
+            return content_hash, pickle.loads(pickled_value)
+        except Exception as e:
+            log.warning(f"Could not unpickle document symbols cache entry for {key} ({e}); discarding it")
+            self.delete([key])
+            return None
+
+    def put_many(self, entries: dict[str, tuple[str, Any]]) -> None:
+        """
+        Stores the given entries in a single transaction, replacing existing entries with the same keys.
+
+        :param entries: a mapping from keys to tuples (content_hash, value)
+        """
+        rows = [(key, content_hash, pickle.dumps(value)) for key, (content_hash, value) in entries.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO entries (key, content_hash, value) VALUES (?, ?, ?)", rows)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def get_file_metadata(self, path: str) -> CachedFileMetadata | None:
+        """
+        :param path: the (relative) path of the file
+        :return: the metadata that was stored for the file or None if there is none
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, inode, content_hash, end_line, end_character FROM file_metadata WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        mtime_ns, size, inode, content_hash, end_line, end_character = row
+        return CachedFileMetadata(
+            signature=FileSignature(mtime_ns=mtime_ns, size=size, inode=inode),
+            content_hash=content_hash,
+            range=ls_types.Range(
+                start=ls_types.Position(line=0, character=0), end=ls_types.Position(line=end_line, character=end_character)
+            ),
+        )
+
+    def put_file_metadata(self, metadata_by_path: dict[str, CachedFileMetadata]) -> None:
+        """
+        Stores the given file metadata in a single transaction, replacing existing metadata for the same paths.
+        """
+        rows = [
+            (
+                path,
+                m.signature.mtime_ns,
+                m.signature.size,
+                m.signature.inode,
+                m.content_hash,
+                m.range["end"]["line"],
+                m.range["end"]["character"],
+            )
+            for path, m in metadata_by_path.items()
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO file_metadata (path, mtime_ns, size, inode, content_hash, end_line, end_character) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT key FROM entries")]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def needs_compaction(self) -> bool:
+        """
+        :return: whether the database file contains a significant amount of unused space (which accumulates as
+            entries are replaced or deleted)
+        """
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return free_pages >= self.COMPACTION_MIN_FREE_PAGES and free_pages >= self.COMPACTION_MIN_FREE_FRACTION * page_count
+
+    def compact(self) -> None:
+        """
+        Compacts the database file, releasing unused space.
+        """
+        log.info(f"Compacting document symbols store {self.db_path}")
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
+    def compact_in_background_if_needed(self) -> None:
+        """
+        Starts a compaction in a background thread if the store needs it (and no compaction is currently running).
+        """
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        if not self.needs_compaction():
+            return
+
+        def compact() -> None:
+            try:
+                self.compact()
+            except Exception as e:
+                log.warning(f"Compaction of document symbols store {self.db_path} failed: {e}")
+
+        self._compaction_thread = threading.Thread(target=compact, name="DocumentSymbolsStoreCompaction", daemon=True)
+        self._compaction_thread.start()
+
+    def close(self) -> None:
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        with self._lock:
+            self._conn.close()
+
+
+class DebouncedCacheSaver:
+    """
+    Saves a cache in a background thread, such that the threads which modify the cache do not have to wait for the
+    cache to be written.
+    Modifications are batched: A save is performed once changes have been pending for a given time or once the number
+    of pending changes reaches a threshold, whichever happens first.
+    """
+
+    def __init__(
+        self, save_fn: Callable[[], None], max_delay_seconds: float = 5.0, max_pending_changes: int = 1000, name: str = "CacheSaver"
+    ) -> None:
+        """
+        :param save_fn: the function which saves all pending changes (synchronously)
+        :param max_delay_seconds: the maximum time for which changes may be pending before they are saved
+        :param max_pending_changes: the number of pending changes at which a save is performed without further delay
+        :param name: the name of the background thread
+        """
+        self._save_fn = save_fn
+        self._max_delay_seconds = max_delay_seconds
+        self._max_pending_changes = max_pending_changes
+        self._name = name
+        self._condition = threading.Condition()
+        self._first_pending_change_time: float | None = None
+        self._num_pending_changes = 0
+        self._is_stopped = False
+        self._thread: threading.Thread | None = None
+
+    def notify_changes(self, num_pending_changes: int) -> None:
+        """
+        Notifies the saver that the cache has unsaved changes.
+
+        :param num_pending_changes: the total number of changes which are currently pending
+        """
+        with self._condition:
+            if self._is_stopped:
+                return
+            if self._first_pending_change_time is None:
+                self._first_pending_change_time = time.monotonic()
+            self._num_pending_changes = num_pending_changes
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            elif num_pending_changes >= self._max_pending_changes:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._is_stopped:
+                        return
+                    if self._first_pending_change_time is not None:
+                        remaining_time = self._first_pending_change_time + self._max_delay_seconds - time.monotonic()
+                        if remaining_time <= 0 or self._num_pending_changes >= self._max_pending_changes:
+                            break
+                        self._condition.wait(remaining_time)
+                    else:
+                        self._condition.wait()
+                self._first_pending_change_time = None
+                self._num_pending_changes = 0
+            try:
+                self._save_fn()
+            except Exception as e:
+                log.error(f"Error while saving cache in the background: {e}", exc_info=e)
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, waiting for a save that is in progress to complete; pending changes are not saved
+        (and should thus be saved by the caller). Further notifications will start a new thread.
+        """
+        with self._condition:
+            self._is_stopped = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._condition:
+            self._thread = None
+            self._first_pending_change_time = None
+            self._num_pending_changes = 0
+            self._is_stopped = False
+
+
+T = TypeVar("T")
+
+
+class SingleFlightMemo:
+    """
+    Memoizes the results of computations (such as language server requests) for the most recently used keys and coalesces
+    concurrent computations for the same key: While a computation is in flight, further requests for the same key wait
+    for its result instead of starting computations of their own.
+
+    Memoized results are shared by all requesters and must therefore not be modified.
+    Exceptions are propagated to all requesters that waited for the failed computation but are not memoized.
+    The type of a result is determined by the computation, so the computations for a key must all return the same type
+    (which is ensured by including the kind of computation in the key).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        :param max_entries: the maximum number of results to memoize; if 0, results are not memoized, but concurrent
+            computations are still coalesced
+        """
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results: OrderedDict[Hashable, Any] = OrderedDict()
+        self._in_flight: dict[Hashable, Future[Any]] = {}
+        self._generation = 0
+        """incremented whenever the memo is cleared, such that results of computations started before are discarded"""
+        self.num_hits = 0
+        """the number of requests which were served from memoized results or by waiting for a computation in flight"""
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: Hashable, compute: Callable[[], T], recompute_on: tuple[type[BaseException], ...] = ()) -> T:
+        """
+        :param key: the key identifying the computation
+        :param compute: the function performing the computation, which is called only if the result for the given key
+            is neither memoized nor currently being computed
+        :param recompute_on: the types of exceptions which, if raised by a computation in flight that was started by another
+            requester (e.g. because the other requester's time budget was exhausted), shall not be propagated but cause
+            a new computation to be requested (once)
+        :return: the result of the computation
+        :raises TimeoutError: if the current deadline (see `RequestDeadline`) passes while waiting for a computation in flight
+        :raises RequestCancelledException: if the current deadline is cancelled while waiting for a computation in flight
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.num_hits += 1
+                return self._results[key]
+            in_flight_future = self._in_flight.get(key)
+            if in_flight_future is None:
+                future: Future[T] = Future()
+                self._in_flight[key] = future
+                generation = self._generation
+            else:
+                self.num_hits += 1
+        if in_flight_future is not None:
+            self._wait_for_computation(in_flight_future)
+            try:
+                return in_flight_future.result()
+            except recompute_on:
+                return self.get(key, compute)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if generation == self._generation and self._max_entries > 0:
+                self._results[key] = result
+                while len(self._results) > self._max_entries:
+                    self._results.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def _wait_for_computation(future: Future[Any]) -> None:
+        """
+        Waits for the given computation in flight to complete, for at most the remaining time of the current deadline;
+        without a current deadline, this returns right away (the result then being awaited without a time limit).
+
+        :param future: the future of the computation
+        """
+        deadline = RequestDeadline.get_current()
+        if deadline is None:
+            return
+        is_done = threading.Event()
+        future.add_done_callback(lambda _: is_done.set())
+        remove_cancellation_callback = deadline.add_cancellation_callback(is_done.set)
+        try:
+            is_done.wait(deadline.get_remaining_time())
+        finally:
+            remove_cancellation_callback()
+        if not future.done():
+            deadline.check("The wait for a computation in flight")
+            raise TimeoutError("The wait for a computation in flight exceeded the operation's deadline")
+
+    def clear(self) -> None:
+        """
+        Discards all memoized results, e.g. because the state on which they depend has changed.
+        Requests for computations that are still in flight will start new computations.
+        """
+        with self._lock:
+            self._results.clear()
+            self._in_flight.clear()
+            self._generation += 1
@@ -0,0 +1,117 @@
+"""
+Deadlines for the language server requests made within an operation (such as the execution of a tool)
+"""
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from typing import Self
+
+from solidlsp.ls_exceptions import RequestCancelledException
+
+_current_deadline: contextvars.ContextVar["RequestDeadline | None"] = contextvars.ContextVar("current_request_deadline", default=None)
+
+
+class RequestDeadline:
+    """
+    A time budget for the language server requests made within an operation, which can furthermore be cancelled.
+    Entering the deadline as a context manager makes it the current deadline (see `get_current`), which the language server
+    handler applies to all requests made in the same context: A request waits for its response at most for the remaining time,
+    and requests in flight are abandoned (and cancelled in the language server) as soon as the deadline is cancelled.
+
+    Deadlines are tracked via a context variable, so functions which are run in other threads on behalf of the operation
+    should be run in a copy of the current context (see `contextvars.copy_context`).
+    """
+
+    def __init__(self, timeout: float | None) -> None:
+        """
+        :param timeout: the time budget in seconds, measured from now; None for no time limit (the deadline can still be cancelled)
+        """
+        self._expiry_time = time.monotonic() + timeout if timeout is not None else None
+        self._lock = threading.Lock()
+        self._is_cancelled = False
+        self._cancellation_callbacks: dict[int, Callable[[], None]] = {}
+        self._next_callback_id = 0
+        self._context_tokens: list[contextvars.Token] = []
+
+    @staticmethod
+    def get_current() -> "RequestDeadline | None":
+        """
+        :return: the deadline which applies to the current context (if any)
+        """
+        return _current_deadline.get()
+
+    def __enter__(self) -> Self:
+        self._context_tokens.append(_current_deadline.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:  # type: ignore
+        _current_deadline.reset(self._context_tokens.pop())
+
+    def get_remaining_time(self) -> float | None:
+        """
+        :return: the remaining time in seconds (which is 0 if the deadline has passed); None if there is no time limit
+        """
+        if self._expiry_time is None:
+            return None
+        return max(0.0, self._expiry_time - time.monotonic())
+
+    def get_request_timeout(self, timeout: float | None) -> float | None:
+        """
+        :param timeout: the timeout that would apply to a request without the deadline
+        :return: the timeout to apply to a request made now, i.e. the given timeout limited to the remaining time
+        """
+        remaining_time = self.get_remaining_time()
+        if remaining_time is None:
+            return timeout
+        if timeout is None:
+            return remaining_time
+        return min(timeout, remaining_time)
+
+    def is_cancelled(self) -> bool:
+        return self._is_cancelled
+
+    def check(self, description: str) -> None:
+        """
+        Raises an exception if no further requests shall be made, because the deadline was cancelled or has passed.
+
+        :param description: a description of the request that is about to be made (for the exception message)
+        """
+        if self._is_cancelled:
+            raise RequestCancelledException(f"{description} was not sent, because the operation was cancelled")
+        if self.get_remaining_time() == 0:
+            raise TimeoutError(f"{description} was not sent, because the operation's deadline has passed")
+
+    def cancel(self) -> None:
+        """
+        Cancels the deadline, notifying all requests that are currently waiting for a response.
+        """
+        with self._lock:
+            if self._is_cancelled:
+                return
+            self._is_cancelled = True
+            callbacks = list(self._cancellation_callbacks.values())
+            self._cancellation_callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+    def add_cancellation_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registers a function to call when the deadline is cancelled; if it already was cancelled, the function is called immediately.
+
+        :param callback: the function to call
+        :return: a function with which to unregister the callback
+        """
+        with self._lock:
+            if not self._is_cancelled:
+                callback_id = self._next_callback_id
+                self._next_callback_id += 1
+                self._cancellation_callbacks[callback_id] = callback
+                return lambda: self._remove_cancellation_callback(callback_id)
+        callback()
+        return lambda: None
+
+    def _remove_cancellation_callback(self, callback_id: int) -> None:
+        with self._lock:
+            self._cancellation_callbacks.pop(callback_id, None)
@@ -38,3 +38,10 @@ class SolidLSPException(Exception):
                 s += " "
             s += f"(caused by {self.cause})"
         return s
+
+
+class RequestCancelledException(SolidLSPException):
+    """
+    Exception raised when a request to the language server was abandoned, because the operation on whose behalf it was made
+    was cancelled (see `RequestDeadline`)
+    """
@@ -5,7 +5,6 @@ import os
 import platform
 import subprocess
 import threading
-import time
 from collections.abc import Callable
 from dataclasses import dataclass
 from queue import Empty, Queue
@@ -14,18 +13,20 @@ from typing import Any
 import psutil
 from sensai.util.string import ToStringMixin
 
-from solidlsp.ls_exceptions import SolidLSPException
+from solidlsp.ls_deadline import RequestDeadline
+from solidlsp.ls_exceptions import RequestCancelledException, SolidLSPException
 from solidlsp.ls_request import LanguageServerRequest
 from solidlsp.lsp_protocol_handler.lsp_requests import LspNotification
 from solidlsp.lsp_protocol_handler.lsp_types import ErrorCodes
 from solidlsp.lsp_protocol_handler.server import (
     ENCODING,
+    JSON_CODEC,
     LSPError,
+    MessageReader,
     MessageType,
     PayloadLike,
     ProcessLaunchInfo,
     StringDict,
-    content_length,
     create_message,
     make_error_response,
     make_notification,
@@ -310,23 +311,6 @@ class SolidLanguageServerHandler:
         if self.logger is not None:
             self.logger("client", "logger", message)
 
-    @staticmethod
-    def _read_bytes_from_process(process, stream, num_bytes):
-        """Read exactly num_bytes from process stdout"""
-        data = b""
-        while len(data) < num_bytes:
-            chunk = stream.read(num_bytes - len(data))
-            if not chunk:
-                if process.poll() is not None:
-                    raise LanguageServerTerminatedException(
-                        f"Process terminated while trying to read response (read {num_bytes} of {len(data)} bytes before termination)"
-                    )
-                # Process still running but no data available yet, retry after a short delay
-                time.sleep(0.01)
-                continue
-            data += chunk
-        return data
-
     def _read_ls_process_stdout(self) -> None:
         """
         Continuously read from the language server process stdout and handle the messages
@@ -334,25 +318,16 @@ class SolidLanguageServerHandler:
         """
         exception: Exception | None = None
         try:
-            while self.process and self.process.stdout:
-                if self.process.poll() is not None:  # process has terminated
-                    break
-                line = self.process.stdout.readline()
-                if not line:
-                    continue
-                try:
-                    num_bytes = content_length(line)
-                except ValueError:
-                    continue
-                if num_bytes is None:
-                    continue
-                while line and line.strip():
-                    line = self.process.stdout.readline()
-                if not line:
-                    continue
-                body = self._read_bytes_from_process(self.process, self.process.stdout, num_bytes)
-
-                self._handle_body(body)
+            process = self.process
+            if process is not None and process.stdout is not None:
+                message_reader = MessageReader(process.stdout)
+                while self.process is process:
+                    body = message_reader.read_message()
+                    if body is None:  # stdout was closed, i.e. the process has terminated
+                        if message_reader.has_partial_message():
+                            raise LanguageServerTerminatedException("Process terminated while trying to read response")
+                        break
+                    self._handle_body(body)
         except LanguageServerTerminatedException as e:
             exception = e
         except (BrokenPipeError, ConnectionResetError) as e:
@@ -397,7 +372,7 @@ class SolidLanguageServerHandler:
         Parse the body text received from the language server process and invoke the appropriate handler
         """
         try:
-            self._receive_payload(json.loads(body))
+            self._receive_payload(JSON_CODEC.decode(body))
         except OSError as ex:
             self._log(f"malformed {ENCODING}: {ex}")
         except UnicodeDecodeError as ex:
@@ -443,6 +418,16 @@ class SolidLanguageServerHandler:
         # Use lock to prevent race conditions on tasks and task_counter
         self._send_payload(make_error_response(request_id, err))
 
+    def _cancel_request(self, request_id: int) -> None:
+        """
+        Abandons the pending request with the given id, asking the server to cancel it (unless it has already responded)
+        """
+        with self._response_handlers_lock:
+            request = self._pending_requests.pop(request_id, None)
+        if request is not None:
+            log.info("Cancelling %s", request)
+            self.notify.cancel_request({"id": request_id})
+
     def _cancel_pending_requests(self, exception: Exception) -> None:
         """
         Cancel all pending requests by setting their results to an error
@@ -456,8 +441,18 @@ class SolidLanguageServerHandler:
 
     def send_request(self, method: str, params: dict | None = None) -> PayloadLike:
         """
-        Send request to the server, register the request id, and wait for the response
+        Send request to the server, register the request id, and wait for the response.
+
+        If a `RequestDeadline` applies to the current context, the request waits at most for the deadline's remaining time
+        and is abandoned if the deadline is cancelled. Requests which are abandoned (including requests timing out)
+        are cancelled in the server via `$/cancelRequest`.
         """
+        deadline = RequestDeadline.get_current()
+        timeout = self._request_timeout
+        if deadline is not None:
+            deadline.check(f"Request {method}")
+            timeout = deadline.get_request_timeout(timeout)
+
         with self._request_id_lock:
             request_id = self.request_id
             self.request_id += 1
@@ -470,15 +465,34 @@ class SolidLanguageServerHandler:
 
         self._send_payload(make_request(method, request_id, params))
 
-        self._log(f"Waiting for response to request {method} with params:\n{params}")
-        result = request.get_result(timeout=self._request_timeout)
+        remove_cancellation_callback = None
+        if deadline is not None:
+            remove_cancellation_callback = deadline.add_cancellation_callback(
+                lambda: request.on_error(RequestCancelledException(f"Request {method} was cancelled"))
+            )
+        # Note: the (potentially large) payloads are formatted only if communication is traced
+        if self.logger is not None:
+            self._log(f"Waiting for response to request {method} with params:\n{params}")
+        try:
+            result = request.get_result(timeout=timeout)
+        except TimeoutError:
+            self._cancel_request(request_id)
+            raise
+        finally:
+            if remove_cancellation_callback is not None:
+                remove_cancellation_callback()
         log.debug("Completed: %s", request)
 
+        if isinstance(result.error, RequestCancelledException):
+            self._cancel_request(request_id)
+            raise result.error
+
         self._log("Processing result")
         if result.is_error():
             raise SolidLSPException(f"Error processing request {method} with params:\n{params}", cause=result.error) from result.error
 
-        self._log(f"Returning non-error result, which is:\n{result.payload}")
+        if self.logger is not None:
+            self._log(f"Returning non-error result, which is:\n{result.payload}")
         return result.payload
 
     def _send_payload(self, payload: StringDict) -> None:
@@ -518,7 +532,10 @@ class SolidLanguageServerHandler:
         Handle the response received from the server for a request, using the id to determine the request
         """
         with self._response_handlers_lock:
-            request = self._pending_requests.pop(response["id"])
+            request = self._pending_requests.pop(response["id"], None)
+        if request is None:
+            log.debug("Ignoring response to request %s, which was abandoned", response["id"])
+            return
 
         if "result" in response and "error" not in response:
             request.on_result(response["result"])
@@ -0,0 +1,539 @@
+"""
+Management of the lifecycle of language server processes, which are kept running (warm) across uses and which are shared
+by the repositories' pools of language servers for the individual languages
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Self
+
+import psutil
+
+from solidlsp.ls import SolidLanguageServer
+from solidlsp.ls_config import Language
+from solidlsp.ls_deadline import RequestDeadline
+
+log = logging.getLogger(__name__)
+
+_current_leases: contextvars.ContextVar["LanguageServerLeases | None"] = contextvars.ContextVar(
+    "current_language_server_leases", default=None
+)
+
+
+@dataclass(frozen=True)
+class LanguageServerKey:
+    """
+    Identifies a language server process
+    """
+
+    language: Language
+    repository_root: str
+
+    def __str__(self) -> str:
+        return f"{self.language.value} language server for {self.repository_root}"
+
+
+@dataclass
+class _ManagedLanguageServer:
+    language_server: SolidLanguageServer
+    start_time: float
+    last_use_time: float
+    memory_usage_mb: float = 0.0
+    """the memory usage of the language server processes as of the last sampling (see `LanguageServerManager`)"""
+
+
+class LanguageServerLeases:
+    """
+    The leases of the language servers used within an operation (such as the execution of a tool).
+    Entering the leases as a context manager makes them the current leases (see `get_current`): Every language server which is
+    obtained from a `LanguageServerManager` in the same context is leased until the context is exited, and the manager does not
+    stop leased language servers (not even in order to comply with its limits), such that the operation can safely keep using
+    the language servers it obtained, even if other operations (which may be executed concurrently) request further language servers.
+
+    Leases are tracked via a context variable, so functions which are run in other threads on behalf of the operation
+    should be run in a copy of the current context (see `contextvars.copy_context`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._leased_keys: dict[LanguageServerKey, "LanguageServerManager"] = {}
+        self._context_tokens: list[contextvars.Token] = []
+
+    @staticmethod
+    def get_current() -> "LanguageServerLeases | None":
+        """
+        :return: the leases which apply to the current context (if any)
+        """
+        return _current_leases.get()
+
+    def __enter__(self) -> Self:
+        self._context_tokens.append(_current_leases.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:  # type: ignore
+        _current_leases.reset(self._context_tokens.pop())
+        if not self._context_tokens:
+            self.release_all()
+
+    def add(self, key: "LanguageServerKey", manager: "LanguageServerManager") -> bool:
+        """
+        Records a lease of the given language server.
+        Must be called by the manager while holding its lock.
+
+        :return: True if the lease is new, False if the language server was already leased
+        """
+        with self._lock:
+            if key in self._leased_keys:
+                return False
+            self._leased_keys[key] = manager
+            return True
+
+    def get_leased_keys(self) -> list["LanguageServerKey"]:
+        with self._lock:
+            return list(self._leased_keys)
+
+    def release_all(self) -> None:
+        """
+        Releases all leases, allowing the manager to stop the language servers (when they are next requested).
+        """
+        with self._lock:
+            leased_keys = list(self._leased_keys.items())
+            self._leased_keys.clear()
+        for key, manager in leased_keys:
+            manager._release_lease(key)
+
+
+@dataclass
+class _RestartState:
+    num_consecutive_failures: int = 0
+    """the number of failures (crashes or failed starts) since the language server last ran stably"""
+    next_start_time: float = 0.0
+    """the (monotonic) time before which the language server shall not be started again"""
+
+
+class LanguageServerManager:
+    """
+    Manages the running language servers, which are identified by their language and repository root.
+    Language servers are kept running after use, such that they can be reused (e.g. when a project is activated again)
+    without paying for their startup and indexing again.
+    They are stopped once they have not been used for some time or in order to comply with the limits on the number
+    of running language servers and their total memory usage (the least recently used language servers being stopped first).
+    Language servers which are leased (see `LanguageServerLeases`) are never stopped in this way, i.e. the limits may
+    temporarily be exceeded while the leases are held.
+    Language servers which have terminated unexpectedly are restarted when they are next requested, applying an exponential
+    backoff to repeated failures.
+    The memory limit is checked against the memory usage as of the last sampling, which is repeated (upon requests) at most
+    once per sampling interval, because inspecting the language server processes is comparatively expensive.
+    """
+
+    def __init__(
+        self,
+        max_running_language_servers: int | None = None,
+        max_memory_mb: float | None = None,
+        idle_timeout: float | None = None,
+        restart_backoff_initial: float = 1.0,
+        restart_backoff_max: float = 30.0,
+        memory_sampling_interval: float = 5.0,
+    ):
+        """
+        :param max_running_language_servers: the maximum number of running language servers (None for no limit);
+            the language server that is currently requested and pinned language servers are always kept running
+        :param max_memory_mb: the maximum memory (resident set size in MB) of all language server processes (None for no limit)
+        :param idle_timeout: the time (in seconds) after which language servers which have not been used are stopped
+            (None for no timeout)
+        :param restart_backoff_initial: the time (in seconds) to wait before restarting a language server after a first failure;
+            the waiting time doubles with every further failure
+        :param restart_backoff_max: the maximum time (in seconds) to wait before restarting a language server. A language server
+            which ran for longer than this before terminating is considered to have run stably, i.e. its failure count is reset.
+        :param memory_sampling_interval: the minimum time (in seconds) between samplings of the memory usage of the language servers
+            (which apply only if there is a memory limit)
+        """
+        if max_running_language_servers is not None and max_running_language_servers < 1:
+            raise ValueError(f"The maximum number of running language servers must be at least 1, got {max_running_language_servers}")
+        self._max_running_language_servers = max_running_language_servers
+        self._max_memory_mb = max_memory_mb
+        self._idle_timeout = idle_timeout
+        self._restart_backoff_initial = restart_backoff_initial
+        self._restart_backoff_max = restart_backoff_max
+        self._memory_sampling_interval = memory_sampling_interval
+        self._last_memory_sampling_time: float | None = None
+        self._memory_sampling_lock = threading.Lock()
+        self._entries: dict[LanguageServerKey, _ManagedLanguageServer] = {}
+        self._restart_states: dict[LanguageServerKey, _RestartState] = defaultdict(_RestartState)
+        self._pinned_keys: set[LanguageServerKey] = set()
+        self._lease_counts: Counter[LanguageServerKey] = Counter()
+        """the number of leases held for each language server (see `LanguageServerLeases`)"""
+        self._lock = threading.Lock()
+        self._start_locks: dict[LanguageServerKey, threading.Lock] = defaultdict(threading.Lock)
+        """locks which ensure that each language server is started only once, while other language servers remain usable"""
+
+    def set_pinned_keys(self, keys: Iterable[LanguageServerKey]) -> None:
+        """
+        :param keys: the keys of the language servers which shall never be stopped by the manager (replacing the previous ones)
+        """
+        with self._lock:
+            self._pinned_keys = set(keys)
+
+    def get_language_server(self, key: LanguageServerKey, create_language_server: Callable[[], SolidLanguageServer]) -> SolidLanguageServer:
+        """
+        Gets the running language server with the given key, starting it if necessary (e.g. if it was not yet started,
+        was stopped or has terminated). The language server is leased if there are current leases (see `LanguageServerLeases`).
+
+        :param key: the key of the language server
+        :param create_language_server: a function which creates the (not yet started) language server
+        :return: the language server
+        """
+        self._sample_memory_usage_if_due()
+        with self._start_locks[key]:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and not entry.language_server.is_running():
+                    log.warning(f"The {key} is no longer running and will be restarted")
+                    del self._entries[key]
+                    if time.monotonic() - entry.start_time > self._restart_backoff_max:
+                        self._restart_states.pop(key, None)
+                    self._record_failure(key)
+                    entry = None
+                if entry is not None:
+                    entry.last_use_time = time.monotonic()
+                    language_server = entry.language_server
+                    self._add_current_lease(key)
+                    entries_to_stop = self._remove_entries_to_stop(key, num_reserved=0)
+                else:
+                    entries_to_stop = self._remove_entries_to_stop(key, num_reserved=1)
+                next_start_time = self._restart_states[key].next_start_time if key in self._restart_states else 0.0
+            self._stop_entries(entries_to_stop)
+            if entry is not None:
+                return language_server
+
+            backoff_time = next_start_time - time.monotonic()
+            if backoff_time > 0:
+                self._wait_for_restart(key, backoff_time)
+            log.info(f"Starting the {key}")
+            try:
+                language_server = create_language_server()
+                language_server.start()
+                if not language_server.is_running():
+                    raise RuntimeError(f"Failed to start the {key}")
+            except Exception:
+                with self._lock:
+                    self._record_failure(key)
+                raise
+            with self._lock:
+                now = time.monotonic()
+                self._entries[key] = _ManagedLanguageServer(language_server=language_server, start_time=now, last_use_time=now)
+                self._add_current_lease(key)
+            return language_server
+
+    @staticmethod
+    def _wait_for_restart(key: LanguageServerKey, backoff_time: float) -> None:
+        """
+        Waits for the backoff time to pass before the language server is restarted, respecting the current deadline
+        (see `RequestDeadline`): If the backoff time exceeds the remaining time, an exception is raised right away,
+        and the waiting is abandoned if the deadline is cancelled.
+
+        :param key: the key of the language server
+        :param backoff_time: the time (in seconds) before which the language server shall not be started
+        """
+        deadline = RequestDeadline.get_current()
+        remaining_time = deadline.get_remaining_time() if deadline is not None else None
+        if remaining_time is not None and remaining_time < backoff_time:
+            raise TimeoutError(
+                f"The {key} terminated and will be restarted in {backoff_time:.1f} seconds, which exceeds the operation's "
+                f"remaining time of {remaining_time:.1f} seconds; retry later"
+            )
+        log.info(f"Waiting {backoff_time:.1f} seconds before restarting the {key}")
+        if deadline is None:
+            time.sleep(backoff_time)
+            return
+        cancelled = threading.Event()
+        remove_cancellation_callback = deadline.add_cancellation_callback(cancelled.set)
+        try:
+            cancelled.wait(backoff_time)
+        finally:
+            remove_cancellation_callback()
+        deadline.check(f"The restart of the {key}")
+
+    def get_language_server_if_running(self, key: LanguageServerKey) -> SolidLanguageServer | None:
+        """
+        :return: the language server with the given key if it is running, None otherwise; the language server is leased
+            if there are current leases (see `LanguageServerLeases`)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.language_server.is_running():
+                return None
+            self._add_current_lease(key)
+        return entry.language_server
+
+    def get_running_language_servers(self, keys: Iterable[LanguageServerKey] | None = None) -> dict[LanguageServerKey, SolidLanguageServer]:
+        """
+        :param keys: the keys of the language servers to consider; if None, all language servers are considered.
+            Only the considered language servers are leased, so callers should restrict the keys to the language servers they use.
+        :return: a mapping from keys to the respective running language servers, which are leased if there are
+            current leases (see `LanguageServerLeases`)
+        """
+        with self._lock:
+            considered_keys = self._entries.keys() if keys is None else [key for key in keys if key in self._entries]
+            running_entries = {key: self._entries[key] for key in considered_keys if self._entries[key].language_server.is_running()}
+            for key in running_entries:
+                self._add_current_lease(key)
+        return {key: entry.language_server for key, entry in running_entries.items()}
+
+    def stop_language_server(self, key: LanguageServerKey) -> None:
+        """
+        Stops the language server with the given key (if it is running).
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._restart_states.pop(key, None)
+        if entry is not None:
+            self._stop_entries([(key, entry)])
+
+    def stop_idle_language_servers(self) -> None:
+        """
+        Stops the language servers which have exceeded the idle timeout or which must be stopped in order to comply with the limits.
+        This happens whenever a language server is requested, but it can also be triggered explicitly.
+        """
+        self._sample_memory_usage_if_due()
+        with self._lock:
+            entries_to_stop = self._remove_entries_to_stop(None, num_reserved=0)
+        self._stop_entries(entries_to_stop)
+
+    def stop_all(self) -> None:
+        """
+        Stops all language servers (saving their caches).
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+            self._restart_states.clear()
+        self._stop_entries(entries)
+
+    def _add_current_lease(self, key: LanguageServerKey) -> None:
+        """
+        Leases the given language server for the current leases (if any).
+        Must be called while holding the lock.
+        """
+        leases = LanguageServerLeases.get_current()
+        if leases is not None and leases.add(key, self):
+            self._lease_counts[key] += 1
+
+    def _release_lease(self, key: LanguageServerKey) -> None:
+        with self._lock:
+            self._lease_counts[key] -= 1
+            if self._lease_counts[key] <= 0:
+                del self._lease_counts[key]
+
+    def _record_failure(self, key: LanguageServerKey) -> None:
+        """
+        Records a failure of the given language server, postponing its next start.
+        Must be called while holding the lock.
+        """
+        restart_state = self._restart_states[key]
+        restart_state.num_consecutive_failures += 1
+        backoff_time = min(self._restart_backoff_initial * 2 ** (restart_state.num_consecutive_failures - 1), self._restart_backoff_max)
+        restart_state.next_start_time = time.monotonic() + backoff_time
+        if restart_state.num_consecutive_failures > 1:
+            log.warning(f"The {key} failed {restart_state.num_consecutive_failures} times in a row")
+
+    @staticmethod
+    def _get_memory_usage_mb(language_server: SolidLanguageServer) -> float:
+        """
+        :return: the resident set size (in MB) of the language server process and its child processes
+        """
+        process = language_server.server.process
+        if process is None:
+            return 0.0
+        try:
+            ps_process = psutil.Process(process.pid)
+            rss = ps_process.memory_info().rss
+            for child in ps_process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def _sample_memory_usage_if_due(self) -> None:
+        """
+        Samples the memory usage of the running language servers if there is a memory limit and the sampling interval has
+        passed since the last sampling.
+        Must be called without holding the lock, such that the (comparatively expensive) inspection of the language server
+        processes does not block other requests.
+        """
+        if self._max_memory_mb is None or not self._memory_sampling_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if self._last_memory_sampling_time is not None and now - self._last_memory_sampling_time < self._memory_sampling_interval:
+                return
+            self._last_memory_sampling_time = now
+            with self._lock:
+                entries = list(self._entries.values())
+            memory_usage_mb = [self._get_memory_usage_mb(entry.language_server) for entry in entries]
+            with self._lock:
+                for entry, entry_memory_usage_mb in zip(entries, memory_usage_mb, strict=True):
+                    entry.memory_usage_mb = entry_memory_usage_mb
+        finally:
+            self._memory_sampling_lock.release()
+
+    def _remove_entries_to_stop(
+        self, requested_key: LanguageServerKey | None, num_reserved: int
+    ) -> list[tuple[LanguageServerKey, _ManagedLanguageServer]]:
+        """
+        Determines the language servers that shall be stopped and removes them from the manager.
+        Must be called while holding the lock.
+
+        :param requested_key: the key of the language server which is requested (and shall thus not be stopped, just like
+            pinned and leased language servers)
+        :param num_reserved: the number of language servers which are about to be started (and which count towards the limit
+            on the number of language servers)
+        :return: the removed entries, whose language servers must be stopped
+        """
+        now = time.monotonic()
+        protected_keys = {*self._pinned_keys, *self._lease_counts, requested_key}
+        # candidates in the order in which they shall be stopped (least recently used first)
+        candidates = sorted(
+            ((key, entry) for key, entry in self._entries.items() if key not in protected_keys),
+            key=lambda item: item[1].last_use_time,
+        )
+        removed_entries = []
+
+        def remove(key: LanguageServerKey, entry: _ManagedLanguageServer, reason: str) -> None:
+            log.info(f"Stopping the {key} ({reason})")
+            del self._entries[key]
+            removed_entries.append((key, entry))
+
+        for key, entry in list(candidates):
+            if self._idle_timeout is not None and now - entry.last_use_time > self._idle_timeout:
+                remove(key, entry, f"unused for more than {self._idle_timeout} seconds")
+                candidates.remove((key, entry))
+
+        if self._max_running_language_servers is not None:
+            while candidates and len(self._entries) + num_reserved > self._max_running_language_servers:
+                key, entry = candidates.pop(0)
+                remove(key, entry, f"at most {self._max_running_language_servers} language servers may be running")
+
+        if self._max_memory_mb is not None and candidates:
+            total_memory_usage_mb = sum(entry.memory_usage_mb for entry in self._entries.values())
+            while candidates and total_memory_usage_mb > self._max_memory_mb:
+                key, entry = candidates.pop(0)
+                remove(key, entry, f"the language servers use {total_memory_usage_mb:.0f} MB, exceeding {self._max_memory_mb} MB")
+                total_memory_usage_mb -= entry.memory_usage_mb
+
+        return removed_entries
+
+    @staticmethod
+    def _stop_entries(entries: list[tuple[LanguageServerKey, _ManagedLanguageServer]]) -> None:
+        for key, entry in entries:
+            try:
+                entry.language_server.stop()
+            except Exception as e:
+                log.error(f"Error while stopping the {key}: {e}", exc_info=e)
+
+
+class LanguageServerPool:
+    """
+    Provides the language servers for the languages of a repository, where each file is handled by the language server of
+    the language whose source file patterns match it.
+    The language servers are obtained from a `LanguageServerManager`, which starts them on demand (when they are first
+    requested), keeps them running for later reuse and stops them when they are no longer needed.
+    """
+
+    def __init__(
+        self,
+        repository_root: str,
+        languages: Sequence[Language],
+        create_language_server: Callable[[Language], SolidLanguageServer],
+        manager: LanguageServerManager | None = None,
+    ):
+        """
+        :param repository_root: the root directory of the repository
+        :param languages: the languages, starting with the main language; files matching the source file patterns of several
+            languages are handled by the language server of the first of these languages
+        :param create_language_server: a function which creates the (not yet started) language server for a language
+        :param manager: the manager of the language server processes, which may be shared by several pools;
+            if None, a manager without limits is used
+        """
+        if len(languages) == 0:
+            raise ValueError("At least one language is required")
+        self._repository_root = repository_root
+        self._languages = list(dict.fromkeys(languages))
+        self._create_language_server = create_language_server
+        self._manager = manager if manager is not None else LanguageServerManager()
+
+    @property
+    def repository_root(self) -> str:
+        return self._repository_root
+
+    @property
+    def main_language(self) -> Language:
+        return self._languages[0]
+
+    @property
+    def languages(self) -> list[Language]:
+        return list(self._languages)
+
+    def get_key(self, language: Language) -> LanguageServerKey:
+        return LanguageServerKey(language=language, repository_root=self._repository_root)
+
+    def get_language_of_file(self, relative_path: str) -> Language | None:
+        """
+        :param relative_path: the relative path of a file
+        :return: the language whose language server handles the file or None if the file is not a source file of any of the languages
+        """
+        for language in self._languages:
+            if language.get_source_fn_matcher().is_relevant_filename(relative_path):
+                return language
+        return None
+
+    def get_language_server(self, language: Language) -> SolidLanguageServer:
+        """
+        Gets the running language server for the given language, starting it if necessary (see `LanguageServerManager`).
+
+        :param language: one of the pool's languages
+        :return: the language server
+        """
+        if language not in self._languages:
+            raise ValueError(f"Language {language.value} is not among the languages of the pool: {[l.value for l in self._languages]}")
+        return self._manager.get_language_server(self.get_key(language), lambda: self._create_language_server(language))
+
+    def get_language_server_for_file(self, relative_path: str) -> SolidLanguageServer:
+        """
+        Gets the language server which handles the given file (see `get_language_server`).
+        Files which are not source files of any of the languages are handled by the language server of the main language.
+        """
+        language = self.get_language_of_file(relative_path)
+        return self.get_language_server(language if language is not None else self.main_language)
+
+    def get_language_server_if_running(self, language: Language) -> SolidLanguageServer | None:
+        """
+        :return: the language server for the given language if it is running, None otherwise
+        """
+        return self._manager.get_language_server_if_running(self.get_key(language))
+
+    def get_running_language_servers(self) -> dict[Language, SolidLanguageServer]:
+        """
+        :return: a mapping from the pool's languages to the respective running language servers
+        """
+        running_language_servers = self._manager.get_running_language_servers([self.get_key(l) for l in self._languages])
+        return {
+            language: running_language_servers[self.get_key(language)]
+            for language in self._languages
+            if self.get_key(language) in running_language_servers
+        }
+
+    def stop_all(self) -> None:
+        """
+        Stops the pool's language servers (saving their caches).
+        """
+        for language in self._languages:
+            self._manager.stop_language_server(self.get_key(language))
@@ -0,0 +1,134 @@
+"""
+An index of the names of the (cached) document symbols, which supports finding symbols by name without traversing symbol trees
+"""
+
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import NamedTuple
+
+from solidlsp.ls_cache import CompactDocumentSymbols
+from solidlsp.ls_types import SymbolKind
+
+
+class IndexedSymbol(NamedTuple):
+    relative_path: str
+    """the relative path of the file containing the symbol"""
+    symbol_index: int
+    """the index of the symbol within all symbols of the file (in pre-order, as returned by `request_document_symbols`)"""
+    kind: int
+    name_path_parts: list[str]
+    """the names of the symbol's ancestors within the file and the symbol's own name"""
+
+
+class SymbolNameIndex:
+    """
+    Maps symbol names to the symbols with these names, supporting exact and substring lookups.
+    Substring lookups are performed on the distinct symbol names, which are pre-filtered using a trigram index.
+
+    The index is not thread-safe; it is intended to be updated and queried while holding the lock of the cache
+    whose entries it indexes.
+    """
+
+    TRIGRAM_LENGTH = 3
+
+    def __init__(self) -> None:
+        self._symbols_by_path: dict[str, CompactDocumentSymbols] = {}
+        self._postings: dict[str, dict[str, list[int]]] = {}
+        """maps each symbol name to a mapping from relative paths to the indices of the symbols with the name in the file"""
+        self._names_by_trigram: dict[str, set[str]] = defaultdict(set)
+
+    def __contains__(self, relative_path: str) -> bool:
+        return relative_path in self._symbols_by_path
+
+    def __len__(self) -> int:
+        """
+        :return: the number of indexed files
+        """
+        return len(self._symbols_by_path)
+
+    @classmethod
+    def _get_trigrams(cls, text: str) -> set[str]:
+        return {text[i : i + cls.TRIGRAM_LENGTH] for i in range(len(text) - cls.TRIGRAM_LENGTH + 1)}
+
+    def set_file_symbols(self, relative_path: str, symbols: CompactDocumentSymbols) -> None:
+        """
+        Adds the symbols of the given file to the index, replacing the previously indexed symbols of the file.
+        """
+        if self._symbols_by_path.get(relative_path) is symbols:
+            return
+        self.remove_file(relative_path)
+        self._symbols_by_path[relative_path] = symbols
+        for index, name in enumerate(symbols.names):
+            postings = self._postings.get(name)
+            if postings is None:
+                postings = {}
+                self._postings[name] = postings
+                for trigram in self._get_trigrams(name):
+                    self._names_by_trigram[trigram].add(name)
+            postings.setdefault(relative_path, []).append(index)
+
+    def remove_file(self, relative_path: str) -> None:
+        """
+        Removes the symbols of the given file from the index (if any).
+        """
+        symbols = self._symbols_by_path.pop(relative_path, None)
+        if symbols is None:
+            return
+        for name in set(symbols.names):
+            postings = self._postings[name]
+            del postings[relative_path]
+            if not postings:
+                del self._postings[name]
+                for trigram in self._get_trigrams(name):
+                    names = self._names_by_trigram[trigram]
+                    names.discard(name)
+                    if not names:
+                        del self._names_by_trigram[trigram]
+
+    def find_names(self, name: str, substring_matching: bool = False) -> list[str]:
+        """
+        :param name: the name to search for
+        :param substring_matching: whether to find all names containing the given name (rather than only the name itself)
+        :return: the distinct indexed symbol names which match
+        """
+        if not substring_matching:
+            return [name] if name in self._postings else []
+        if len(name) < self.TRIGRAM_LENGTH:
+            return [n for n in self._postings if name in n]
+        candidate_sets = sorted((self._names_by_trigram.get(trigram, set()) for trigram in self._get_trigrams(name)), key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+        return [n for n in candidates if name in n]
+
+    def find(self, name: str, substring_matching: bool = False, relative_paths: Sequence[str] | None = None) -> list[IndexedSymbol]:
+        """
+        Finds the symbols whose names match the given name.
+
+        :param name: the name to search for
+        :param substring_matching: whether to find all symbols whose names contain the given name
+        :param relative_paths: the files to which the search is restricted (None for all indexed files);
+            the result is ordered by the position of the files in this sequence
+        :return: the matching symbols, ordered by file and by position within the file (pre-order)
+        """
+        file_positions = {path: i for i, path in enumerate(relative_paths)} if relative_paths is not None else None
+        matches: list[tuple[str, int]] = []
+        for matching_name in self.find_names(name, substring_matching=substring_matching):
+            for relative_path, indices in self._postings[matching_name].items():
+                if file_positions is not None and relative_path not in file_positions:
+                    continue
+                matches.extend((relative_path, index) for index in indices)
+        if file_positions is not None:
+            matches.sort(key=lambda m: (file_positions[m[0]], m[1]))
+        else:
+            matches.sort()
+        return [self._create_indexed_symbol(relative_path, index) for relative_path, index in matches]
+
+    def _create_indexed_symbol(self, relative_path: str, index: int) -> IndexedSymbol:
+        symbols = self._symbols_by_path[relative_path]
+        name_path_parts = [symbols.names[index]]
+        # ancestors are included up to (excluding) the first ancestor of kind File (as in `LanguageServerSymbol.get_name_path_parts`)
+        parent_index = symbols.parent_indices[index]
+        while parent_index >= 0 and symbols.kinds[parent_index] != SymbolKind.File:
+            name_path_parts.append(symbols.names[parent_index])
+            parent_index = symbols.parent_indices[parent_index]
+        name_path_parts.reverse()
+        return IndexedSymbol(relative_path=relative_path, symbol_index=index, kind=symbols.kinds[index], name_path_parts=name_path_parts)
@@ -2,18 +2,19 @@
 This file contains various utility functions like I/O operations, handling paths, etc.
 """
 
+import bisect
 import gzip
 import logging
+import math
 import os
 import platform
 import shutil
 import subprocess
 import uuid
+from collections.abc import Sequence
 from enum import Enum
 from pathlib import Path, PurePath
 
-import requests
-
 from solidlsp.ls_exceptions import SolidLSPException
 from solidlsp.ls_logger import LanguageServerLogger
 from solidlsp.ls_types import UnifiedSymbolInformation
@@ -109,6 +110,179 @@ class TextUtils:
         return new_text, new_l, new_c
 
 
+class LineOffsetTable:
+    """
+    Holds the offsets at which the lines of a text start, such that ranges of lines can be extracted
+    without splitting the full text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._line_starts = [0]
+        idx = text.find("\n")
+        while idx != -1:
+            self._line_starts.append(idx + 1)
+            idx = text.find("\n", idx + 1)
+
+    @property
+    def num_lines(self) -> int:
+        return len(self._line_starts)
+
+    def get_lines(self, start_line: int, end_line: int, start_column: int = 0) -> str:
+        """
+        Returns the text of the given (zero-indexed, inclusive) range of lines (including the line breaks between them
+        but not the one after the last line), omitting the first `start_column` characters.
+        """
+        if start_line >= self.num_lines:
+            return ""
+        start_idx = self._line_starts[start_line] + start_column
+        end_idx = self._line_starts[end_line + 1] - 1 if end_line + 1 < self.num_lines else len(self.text)
+        return self.text[start_idx:end_idx]
+
+
+class LineBuffer:
+    """
+    A mutable text which is stored as a list of lines, such that (line, column) positions are resolved without scanning
+    the text and edits only rebuild the lines they affect.
+    The full text is assembled lazily (and cached until the next edit).
+    Edits are equivalent to the corresponding functions of `TextUtils`.
+    """
+
+    def __init__(self, text: str):
+        self._lines = text.split("\n")
+        self._text: str | None = text
+
+    @property
+    def num_lines(self) -> int:
+        return len(self._lines)
+
+    def get_line(self, line: int) -> str:
+        return self._lines[line]
+
+    def get_text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self._lines)
+        return self._text
+
+    def set_text(self, text: str) -> None:
+        self._lines = text.split("\n")
+        self._text = text
+
+    def _is_within_line(self, line: int, col: int) -> bool:
+        if line >= len(self._lines):
+            raise InvalidTextLocationError
+        return col <= len(self._lines[line])
+
+    def insert_text(self, line: int, col: int, text_to_be_inserted: str) -> tuple[int, int]:
+        """
+        Inserts the given text at the given zero-indexed line and column (see `TextUtils.insert_text_at_position`).
+
+        :return: the line and column after the inserted text
+        """
+        if line == len(self._lines) and col == 0:
+            # insert at new line after full text, adding missing newline
+            text_to_be_inserted = "\n" + text_to_be_inserted
+            self._lines[-1] += text_to_be_inserted
+            self._lines[-1:] = self._lines[-1].split("\n")
+            self._text = None
+        elif self._is_within_line(line, col):
+            line_text = self._lines[line]
+            self._lines[line : line + 1] = (line_text[:col] + text_to_be_inserted + line_text[col:]).split("\n")
+            self._text = None
+        else:
+            # the column exceeds the line, so the position refers to an index in a subsequent line
+            new_text, _, _ = TextUtils.insert_text_at_position(self.get_text(), line, col, text_to_be_inserted)
+            self.set_text(new_text)
+        return TextUtils._get_updated_position_from_line_and_column_and_edit(line, col, text_to_be_inserted)
+
+    def delete_text(self, start_line: int, start_col: int, end_line: int, end_col: int) -> str:
+        """
+        Deletes the text between the given zero-indexed positions (see `TextUtils.delete_text_between_positions`).
+
+        :return: the deleted text
+        """
+        if (
+            self._is_within_line(start_line, start_col)
+            and self._is_within_line(end_line, end_col)
+            and (start_line, start_col) <= (end_line, end_col)
+        ):
+            start_line_text = self._lines[start_line]
+            end_line_text = self._lines[end_line]
+            if start_line == end_line:
+                deleted_text = start_line_text[start_col:end_col]
+            else:
+                deleted_text = "\n".join([start_line_text[start_col:], *self._lines[start_line + 1 : end_line], end_line_text[:end_col]])
+            self._lines[start_line : end_line + 1] = [start_line_text[:start_col] + end_line_text[end_col:]]
+            self._text = None
+        else:
+            new_text, deleted_text = TextUtils.delete_text_between_positions(self.get_text(), start_line, start_col, end_line, end_col)
+            self.set_text(new_text)
+        return deleted_text
+
+
+class ContainingSymbolIndex:
+    """
+    An index over the ranges of (a subset of) the symbols of a file, which finds the innermost symbol containing a
+    position without considering all symbols.
+    A symbol contains a position if the position is not before the symbol's start and not after its end line (the end
+    column is disregarded).
+    Queries take O(log n + d) time, where d is the nesting depth of the symbols' ranges.
+    """
+
+    def __init__(self, symbols: Sequence[UnifiedSymbolInformation]):
+        """
+        :param symbols: the symbols, all of which must have a location; if several symbols starting on the same line contain a
+            position, the one which comes first is returned
+        """
+        sorted_indices = sorted(range(len(symbols)), key=lambda i: self._get_start_position(symbols[i]))
+        self._symbols = [symbols[i] for i in sorted_indices]
+        self._original_indices = sorted_indices
+        self._start_positions = [self._get_start_position(s) for s in self._symbols]
+        self._end_lines = [s["location"]["range"]["end"]["line"] for s in self._symbols]
+
+        # for each symbol, the index of the symbol with the greatest start position before it which contains its start;
+        # following these links from a symbol enumerates all preceding symbols containing its start (innermost first)
+        self._enclosing_indices: list[int] = []
+        for i, start_position in enumerate(self._start_positions):
+            j = i - 1
+            while j != -1 and not self._contains(j, *start_position):
+                j = self._enclosing_indices[j]
+            self._enclosing_indices.append(j)
+
+    @staticmethod
+    def _get_start_position(symbol: UnifiedSymbolInformation) -> tuple[int, int]:
+        start = symbol["location"]["range"]["start"]
+        return start["line"], start["character"]
+
+    def _contains(self, i: int, line: int, column: float) -> bool:
+        return self._start_positions[i] <= (line, column) and self._end_lines[i] >= line
+
+    def find_containing_symbol(self, line: int, column: int | None = None) -> UnifiedSymbolInformation | None:
+        """
+        Finds the symbol containing the given position with the greatest start line.
+
+        :param line: the 0-based line
+        :param column: the 0-based column; if None, only the line is considered
+        :return: the symbol or None if no symbol contains the position
+        """
+        position = (line, math.inf if column is None else column)
+        i = bisect.bisect_right(self._start_positions, position) - 1
+        while i != -1 and not self._contains(i, *position):
+            i = self._enclosing_indices[i]
+        if i == -1:
+            return None
+
+        # among the containing symbols starting on the same line, prefer the first one
+        result_index = i
+        start_line = self._start_positions[i][0]
+        i = self._enclosing_indices[i]
+        while i != -1 and self._start_positions[i][0] == start_line:
+            if self._contains(i, *position) and self._original_indices[i] < self._original_indices[result_index]:
+                result_index = i
+            i = self._enclosing_indices[i]
+        return self._symbols[result_index]
+
+
 class PathUtils:
     """
     Utilities for platform-agnostic path operations.
@@ -183,6 +357,9 @@ class FileUtils:
         """
         Downloads the file from the given URL to the given {target_path}
         """
+        # imported lazily, since downloads are rare and requests is slow to import
+        import requests
+
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
         try:
             response = requests.get(url, stream=True, timeout=60)
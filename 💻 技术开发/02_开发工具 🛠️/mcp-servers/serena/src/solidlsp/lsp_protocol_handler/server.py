@@ -29,10 +29,12 @@ SOFTWARE.
 """
 
 import dataclasses
+import importlib
 import json
 import logging
 import os
-from typing import Any, Union
+from collections.abc import Callable
+from typing import IO, Any, Union
 
 from .lsp_types import ErrorCodes
 
@@ -95,8 +97,77 @@ class StopLoopException(Exception):
     pass
 
 
+class JsonCodec:
+    """
+    Encodes and decodes JSON-RPC payloads, using a fast JSON library (orjson or msgspec) if it is installed.
+    Payloads which the fast library cannot handle (e.g. integers exceeding 64 bits or non-standard constants like NaN)
+    are processed with the standard library's json module, such that the results are always the same.
+    """
+
+    FAST_CODEC_NAMES = ("orjson", "msgspec")
+    STDLIB_CODEC_NAME = "json"
+
+    def __init__(self, name: str | None = None):
+        """
+        :param name: the name of the codec to use (one of FAST_CODEC_NAMES or STDLIB_CODEC_NAME); if None, use the first
+            fast codec that is installed (falling back to the standard library)
+        """
+        self._fast_encode: Callable[[Any], bytes] | None = None
+        self._fast_decode: Callable[[bytes], Any] | None = None
+        if name is None:
+            self.name = self.STDLIB_CODEC_NAME
+            for fast_codec_name in self.FAST_CODEC_NAMES:
+                try:
+                    self._init_fast_codec(fast_codec_name)
+                    self.name = fast_codec_name
+                    break
+                except ImportError:
+                    continue
+        else:
+            if name != self.STDLIB_CODEC_NAME:
+                self._init_fast_codec(name)
+            self.name = name
+
+    def _init_fast_codec(self, name: str) -> None:
+        match name:
+            case "orjson":
+                orjson = importlib.import_module("orjson")
+                self._fast_encode = lambda payload: orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+                self._fast_decode = orjson.loads
+            case "msgspec":
+                msgspec_json = importlib.import_module("msgspec.json")
+                self._fast_encode = msgspec_json.encode
+                self._fast_decode = msgspec_json.decode
+            case _:
+                raise ValueError(f"Unknown JSON codec: {name}")
+
+    def encode(self, payload: PayloadLike) -> bytes:
+        if self._fast_encode is not None:
+            try:
+                return self._fast_encode(payload)
+            except (TypeError, ValueError, OverflowError):
+                pass
+        return json.dumps(payload, check_circular=False, ensure_ascii=False, separators=(",", ":")).encode(ENCODING)
+
+    def decode(self, data: bytes) -> Any:
+        """
+        :raises json.JSONDecodeError: if the data is not valid JSON
+        :raises UnicodeDecodeError: if the data is not valid UTF-8
+        """
+        if self._fast_decode is not None:
+            try:
+                return self._fast_decode(data)
+            except (TypeError, ValueError):
+                pass
+        return json.loads(data)
+
+
+JSON_CODEC = JsonCodec()
+"""the codec with which all JSON-RPC payloads are encoded and decoded"""
+
+
 def create_message(payload: PayloadLike):
-    body = json.dumps(payload, check_circular=False, ensure_ascii=False, separators=(",", ":")).encode(ENCODING)
+    body = JSON_CODEC.encode(payload)
     return (
         f"Content-Length: {len(body)}\r\n".encode(ENCODING),
         "Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n\r\n".encode(ENCODING),
@@ -120,3 +191,126 @@ def content_length(line: bytes) -> int | None:
         except ValueError:
             raise ValueError(f"Invalid Content-Length header: {value}")
     return None
+
+
+class MessageReader:
+    """
+    Reads the bodies of messages framed with Content-Length headers from a binary stream.
+    The stream is read in large chunks (rather than line by line), from which the headers and small bodies are extracted;
+    larger bodies are read directly into a buffer of the required size.
+    Header blocks without a (valid) Content-Length header are skipped.
+    """
+
+    _CONTENT_LENGTH_PREFIX = CONTENT_LENGTH.encode(ENCODING)
+
+    def __init__(self, stream: IO[bytes], chunk_size: int = 64 * 1024):
+        """
+        :param stream: the stream to read from; for buffered streams, reads return the data that is available (via `read1`)
+            instead of waiting for entire chunks, and unbuffered streams are read directly (via `read`)
+        :param chunk_size: the maximum number of bytes to read from the stream at once
+        """
+        self._stream = stream
+        self._read_available: Callable[[int], bytes] = getattr(stream, "read1", stream.read)
+        self._readinto: Callable[[memoryview], int | None] | None = getattr(stream, "readinto", None)
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._pos = 0
+        """the position in the buffer up to which the data has been consumed"""
+        self._has_partial_message = False
+
+    def has_partial_message(self) -> bool:
+        """
+        :return: whether the end of the stream was reached within a message
+        """
+        return self._has_partial_message or len(self._buffer[self._pos :].strip()) > 0
+
+    def _read_chunk(self) -> bool:
+        """
+        Reads the next chunk from the stream into the buffer, discarding the consumed data.
+
+        :return: False if the end of the stream was reached
+        """
+        chunk = self._read_available(self._chunk_size)
+        if not chunk:
+            return False
+        if self._pos > 0:
+            del self._buffer[: self._pos]
+            self._pos = 0
+        self._buffer += chunk
+        return True
+
+    def read_message(self) -> bytes | None:
+        """
+        Reads the next message (blocking until it is available).
+
+        :return: the message's body or None if the end of the stream was reached
+        """
+        buffer = self._buffer
+        while True:
+            # find the empty line terminating the headers ("\r\n\r\n", tolerating missing carriage returns)
+            headers_end = buffer.find(b"\n\r\n", self._pos)
+            body_start = headers_end + 3
+            lf_headers_end = buffer.find(b"\n\n", self._pos, len(buffer) if headers_end == -1 else headers_end + 1)
+            if lf_headers_end != -1:
+                headers_end = lf_headers_end
+                body_start = lf_headers_end + 2
+            if headers_end == -1:
+                if not self._read_chunk():
+                    return None
+                continue
+
+            body_length = self._get_content_length(buffer, self._pos, headers_end)
+            self._pos = body_start
+            if body_length is None:
+                log.warning("Skipping header block without Content-Length")
+                continue
+
+            body_end = body_start + body_length
+            if body_end <= len(buffer):
+                self._pos = body_end
+                return bytes(buffer[body_start:body_end])
+            return self._read_body(body_length)
+
+    def _read_body(self, body_length: int) -> bytes | None:
+        """
+        Reads a body which extends beyond the buffered data.
+        """
+        body = bytearray(body_length)
+        num_bytes_read = len(self._buffer) - self._pos
+        body[:num_bytes_read] = self._buffer[self._pos :]
+        self._buffer.clear()
+        self._pos = 0
+        with memoryview(body) as body_view:
+            while num_bytes_read < body_length:
+                if self._readinto is not None:
+                    n = self._readinto(body_view[num_bytes_read:])
+                else:
+                    data = self._stream.read(body_length - num_bytes_read)
+                    n = len(data)
+                    body_view[num_bytes_read : num_bytes_read + n] = data
+                if not n:
+                    self._has_partial_message = True
+                    return None
+                num_bytes_read += n
+        return bytes(body)
+
+    @classmethod
+    def _get_content_length(cls, buffer: bytearray, start: int, end: int) -> int | None:
+        """
+        :return: the value of the Content-Length header within the given range of the buffer (None if there is no valid one)
+        """
+        if buffer.startswith(cls._CONTENT_LENGTH_PREFIX, start):
+            # the header usually comes first
+            line_end = buffer.find(b"\n", start, end)
+            try:
+                return int(buffer[start + len(cls._CONTENT_LENGTH_PREFIX) : end if line_end == -1 else line_end])
+            except ValueError:
+                return None
+        for line in bytes(buffer[start:end]).split(b"\n"):
+            try:
+                num_bytes = content_length(line.strip())
+            except ValueError:
+                return None
+            if num_bytes is not None:
+                return num_bytes
+        return None
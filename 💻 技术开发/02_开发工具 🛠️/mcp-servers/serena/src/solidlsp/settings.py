@@ -10,6 +10,24 @@ from dataclasses import dataclass
 @dataclass
 class SolidLSPSettings:
     solidlsp_dir: str = str(pathlib.Path.home() / ".solidlsp")
+    document_symbol_request_window: int = 8
+    """
+    the maximum number of `textDocument/documentSymbol` requests that are kept in flight when building
+    the full symbol tree of a project (or a directory within it); set to 1 to request the symbols one file at a time
+    """
+    position_request_memo_size: int = 256
+    """
+    the maximum number of results of definition, references and hover requests that are memoized (until a file changes);
+    set to 0 to disable memoization (identical requests which are in flight at the same time are still sent only once).
+    As the results may depend on any file, memoization should only be enabled if changes to files which are not made via the
+    language server are reported to it (see `SolidLanguageServer.invalidate_document_symbols`).
+    """
+    file_changes_reported: bool = True
+    """
+    whether changes to files which are not made via the language server are reported to it (see
+    `SolidLanguageServer.invalidate_document_symbols`). If so, symbol name lookups retain the source files they consider and
+    which files' cached symbols are up to date, instead of walking the directory tree and checking every file for each lookup.
+    """
 
     def __post_init__(self):
         os.makedirs(str(self.solidlsp_dir), exist_ok=True)
@@ -136,3 +136,22 @@ class TestProjectConfigAutogenerate:
 
         # Check example includes comment about language options
         assert any("# or typescript, java, csharp" in line for line in error_lines)
+
+
+class TestProjectConfigLanguages:
+    def test_additional_languages(self):
+        config = ProjectConfig._from_dict(
+            {"project_name": "multi", "language": "python", "additional_languages": ["TypeScript", "go", "python", "go"]}
+        )
+        assert config.language == Language.PYTHON
+        # duplicates and the main language are dropped
+        assert config.additional_languages == [Language.TYPESCRIPT, Language.GO]
+        assert config.languages == [Language.PYTHON, Language.TYPESCRIPT, Language.GO]
+
+    def test_additional_languages_default_to_empty(self):
+        config = ProjectConfig._from_dict({"project_name": "single", "language": "javascript"})
+        assert config.languages == [Language.TYPESCRIPT]
+
+    def test_invalid_additional_language(self):
+        with pytest.raises(ValueError, match="Invalid language"):
+            ProjectConfig._from_dict({"project_name": "multi", "language": "python", "additional_languages": ["cobol"]})
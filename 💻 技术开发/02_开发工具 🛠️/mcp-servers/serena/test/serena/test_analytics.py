@@ -0,0 +1,66 @@
+import pytest
+
+from serena.analytics import ApproximateTokenCountEstimator, RegisteredTokenCountEstimator, ToolUsageStats
+
+
+class TestApproximateTokenCountEstimator:
+    def test_estimate_with_default_ratio(self) -> None:
+        estimator = ApproximateTokenCountEstimator()
+        assert estimator.estimate_token_count("") == 0
+        assert estimator.estimate_token_count("a" * 8) == 2
+        assert estimator.estimate_token_count("a" * 9) == 3
+
+    def test_calibration(self) -> None:
+        estimator = ApproximateTokenCountEstimator()
+        estimator.add_calibration_sample("a" * 20, 10)
+        estimator.add_calibration_sample("a" * 40, 10)
+        assert estimator.chars_per_token == 3.0
+        assert estimator.estimate_token_count("a" * 30) == 10
+
+
+class TestToolUsageStats:
+    def test_record_tool_usage(self) -> None:
+        stats = ToolUsageStats(RegisteredTokenCountEstimator.CHAR_COUNT)
+        stats.record_tool_usage("read_file", "a" * 8, "b" * 40, latency=0.5)
+        stats.record_tool_usage("read_file", "a" * 4, "b" * 4, latency=0.1)
+        stats.record_tool_usage("list_dir", "a" * 4, "b" * 4)
+        stats.wait_until_recorded()
+
+        entry = stats.get_stats("read_file")
+        assert (entry.num_times_called, entry.input_tokens, entry.output_tokens) == (2, 3, 11)
+        stats_dict = stats.get_tool_stats_dict()
+        assert stats_dict["read_file"]["latency_p50"] == 0.1
+        assert stats_dict["read_file"]["latency_p99"] == 0.5
+        assert stats_dict["list_dir"] == {
+            "num_times_called": 1,
+            "input_tokens": 1,
+            "output_tokens": 1,
+            "latency_p50": 0.0,
+            "latency_p95": 0.0,
+            "latency_p99": 0.0,
+        }
+
+        stats.clear()
+        assert stats.get_tool_stats_dict() == {}
+
+    @pytest.mark.parametrize("sampling_rate", [0.0, 0.5])
+    def test_sampling_uses_calibrated_approximation(self, sampling_rate: float) -> None:
+        stats = ToolUsageStats(RegisteredTokenCountEstimator.CHAR_COUNT, sampling_rate=sampling_rate)
+        for _ in range(50):
+            stats.record_tool_usage("tool", "a" * 40, "b" * 400)
+        stats.wait_until_recorded()
+        entry = stats.get_stats("tool")
+        # the exact and the approximate estimates coincide for the character-based estimator
+        assert (entry.num_times_called, entry.input_tokens, entry.output_tokens) == (50, 500, 5000)
+
+    def test_latency_percentiles(self) -> None:
+        entry = ToolUsageStats.Entry()
+        for latency in range(1, 101):
+            entry.update_on_call(latency / 1000)
+        assert entry.get_latency_percentile(50) == 0.05
+        assert entry.get_latency_percentile(95) == 0.095
+        assert entry.get_latency_percentile(99) == 0.099
+
+    def test_invalid_sampling_rate(self) -> None:
+        with pytest.raises(ValueError):
+            ToolUsageStats(RegisteredTokenCountEstimator.CHAR_COUNT, sampling_rate=1.5)
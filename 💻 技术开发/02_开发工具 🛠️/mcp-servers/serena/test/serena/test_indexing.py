@@ -0,0 +1,75 @@
+import csv
+import shutil
+from pathlib import Path
+
+import pytest
+
+from serena.indexing import FileIndexingResult, ProjectIndexer, ProjectIndexingResult
+from serena.project import Project
+from solidlsp.ls_config import Language
+from test.conftest import get_repo_path
+
+
+@pytest.fixture
+def python_project(tmp_path: Path) -> Project:
+    # the repository is copied such that indexing starts from an empty cache and does not modify the test resources
+    repo_path = tmp_path / "test_repo"
+    shutil.copytree(get_repo_path(Language.PYTHON), repo_path, ignore=shutil.ignore_patterns("cache"))
+    return Project.load(repo_path)
+
+
+class TestProjectIndexingResult:
+    def test_timings_are_written_slowest_first(self, tmp_path: Path) -> None:
+        result = ProjectIndexingResult(
+            file_results=[
+                FileIndexingResult("a.py", 0.5),
+                FileIndexingResult("b.py", 2.0, error="TimeoutError: timed out"),
+                FileIndexingResult("c.py", 1.0),
+            ],
+            duration=2.0,
+        )
+        assert result.files_per_second == 1.5
+        assert [r.relative_path for r in result.failed_file_results] == ["b.py"]
+
+        timings_file = tmp_path / "timings.csv"
+        result.write_timings(str(timings_file))
+        with open(timings_file, newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows == [
+            ["path", "seconds", "error"],
+            ["b.py", "2.000", "TimeoutError: timed out"],
+            ["c.py", "1.000", ""],
+            ["a.py", "0.500", ""],
+        ]
+
+
+@pytest.mark.python
+class TestProjectIndexer:
+    def test_shards_preserve_order(self, python_project: Project) -> None:
+        indexer = ProjectIndexer(python_project, num_workers=2)
+        relative_paths = [f"file_{i}.py" for i in range(20)]
+        shards = indexer._create_shards(relative_paths)
+        assert len(shards) == 7
+        assert [path for shard in shards for path in shard] == relative_paths
+
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_index_and_resume(self, python_project: Project, num_workers: int) -> None:
+        indexer = ProjectIndexer(python_project, num_workers=num_workers, checkpoint_interval=2)
+        relative_paths, num_up_to_date_files = indexer.find_files_to_index()
+        assert num_up_to_date_files == 0
+        assert len(relative_paths) > 2
+
+        # index only a part of the files, as if indexing had been interrupted
+        indexed_paths = relative_paths[:2]
+        indexed_file_results = []
+        result = indexer.index(indexed_paths, on_file_indexed=indexed_file_results.append)
+        assert result.file_results == indexed_file_results
+        assert sorted(r.relative_path for r in result.file_results) == sorted(indexed_paths)
+        assert result.failed_file_results == []
+        assert result.num_unprocessed_files == 0
+
+        # a new run (with a new indexer) only indexes the remaining files
+        indexer = ProjectIndexer(python_project, num_workers=num_workers)
+        remaining_paths, num_up_to_date_files = indexer.find_files_to_index()
+        assert remaining_paths == relative_paths[2:]
+        assert num_up_to_date_files == 2
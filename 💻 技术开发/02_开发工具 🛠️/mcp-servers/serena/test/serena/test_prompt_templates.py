@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+from interprompt.jinja_template import JinjaTemplate, _JinjaEnvProvider, set_template_bytecode_cache_dir
+
+
+class TestJinjaTemplate:
+    def test_templates_with_same_source_share_compiled_template(self) -> None:
+        template = JinjaTemplate("Tools: {{ available_tools | join(', ') }}")
+        same_template = JinjaTemplate("Tools: {{ available_tools | join(', ') }}")
+        assert template._compiled_template is same_template._compiled_template
+        assert template.get_parameters() == ["available_tools"]
+        assert same_template.render(available_tools=["a", "b"]) == "Tools: a, b"
+        assert JinjaTemplate("Tools: {{ tools }}")._compiled_template is not template._compiled_template
+
+    def test_static_template_is_rendered_once(self) -> None:
+        template = JinjaTemplate("{% for i in [1, 2] %}{{ i }}{% endfor %}")
+        assert template.get_parameters() == []
+        assert template.render() == "12"
+        assert template._compiled_template._static_rendering == "12"
+        assert JinjaTemplate("{% for i in [1, 2] %}{{ i }}{% endfor %}").render() == "12"
+
+    def test_bytecode_is_persisted(self, tmp_path: Path) -> None:
+        previous_bytecode_cache_dir = _JinjaEnvProvider()._bytecode_cache_dir
+        bytecode_cache_dir = str(tmp_path / "bytecode")
+        set_template_bytecode_cache_dir(bytecode_cache_dir)
+        try:
+            assert JinjaTemplate("Persisted {{ name }}").render(name="template") == "Persisted template"
+            assert len(os.listdir(bytecode_cache_dir)) == 1
+        finally:
+            set_template_bytecode_cache_dir(previous_bytecode_cache_dir)
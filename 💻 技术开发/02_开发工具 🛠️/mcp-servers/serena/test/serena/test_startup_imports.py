@@ -0,0 +1,13 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize("module", ["serena.cli", "serena.agent"])
+def test_optional_dependencies_are_not_imported_at_startup(module: str) -> None:
+    # the modules are imported in a fresh interpreter, since other tests may already have imported the optional dependencies
+    deferred_modules = ["anthropic", "tiktoken", "flask", "serena.dashboard", "serena.gui_log_viewer", "requests", "joblib"]
+    code = f"import sys, {module}; print(','.join(m for m in {deferred_modules!r} if m in sys.modules))"
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert process.stdout.strip() == ""
@@ -1,6 +1,10 @@
+from pathlib import Path
+
 import pytest
 
-from src.serena.symbol import LanguageServerSymbol
+from solidlsp.ls_config import Language
+from solidlsp.ls_pool import LanguageServerManager, LanguageServerPool
+from src.serena.symbol import LanguageServerSymbol, LanguageServerSymbolRetriever
 
 
 class TestSymbolNameMatching:
@@ -160,3 +164,47 @@ class TestSymbolNameMatching:
         result = LanguageServerSymbol.match_name_path(name_path_pattern, symbol_name_path_parts, is_substring_match)
         error_msg = self._create_assertion_error_message(name_path_pattern, symbol_name_path_parts, is_substring_match, expected, result)
         assert result == expected, error_msg
+
+
+class FakeLanguageServer:
+    def __init__(self, language: Language, repository_root_path: str) -> None:
+        self.language = language
+        self.repository_root_path = repository_root_path
+        self.running = False
+
+    def start(self) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def is_ignored_path(self, relative_path: str, ignore_unsupported_files: bool = True, is_dir: bool | None = None) -> bool:
+        return relative_path.startswith("node_modules")
+
+
+class TestLanguageServerSymbolRetriever:
+    def test_language_servers_are_started_only_for_languages_with_files(self, tmp_path: Path) -> None:
+        for relative_path in ["src/main.py", "web/app.ts", "node_modules/lib/main.go"]:
+            (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / relative_path).write_text("")
+        pool = LanguageServerPool(
+            str(tmp_path),
+            [Language.PYTHON, Language.TYPESCRIPT, Language.GO],
+            lambda language: FakeLanguageServer(language, str(tmp_path)),  # type: ignore[arg-type,return-value]
+            manager=LanguageServerManager(),
+        )
+        retriever = LanguageServerSymbolRetriever(pool.get_language_server(Language.PYTHON), language_server_pool=pool)
+
+        language_servers = retriever._get_language_servers("src")
+        assert [ls.language for ls in language_servers] == [Language.PYTHON]
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON}
+
+        language_servers = retriever._get_language_servers("web")
+        assert [ls.language for ls in language_servers] == [Language.PYTHON, Language.TYPESCRIPT]
+        # the Go files are ignored
+        language_servers = retriever._get_language_servers(None)
+        assert [ls.language for ls in language_servers] == [Language.PYTHON, Language.TYPESCRIPT]
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON, Language.TYPESCRIPT}
@@ -1,8 +1,18 @@
 import re
+from pathlib import Path
 
 import pytest
 
-from serena.text_utils import LineType, search_files, search_text
+from serena.text_utils import (
+    LineType,
+    MatchedConsecutiveLines,
+    ProcessPoolSearchBackend,
+    ThreadingSearchBackend,
+    default_file_reader,
+    search_files,
+    search_text,
+)
+from serena.util.file_search import is_byte_compatible_pattern, search_file_compact
 
 
 class TestSearchText:
@@ -482,3 +492,115 @@ class TestGlobMatch:
         from src.serena.text_utils import glob_match
 
         assert glob_match(pattern, path) == expected
+
+
+SEARCH_BACKEND_TEST_FILES = {
+    "plain.py": "def foo():\n    return 1\n\n\ndef bar():\n    return foo()\n",
+    "crlf.py": "def foo():\r\n    return 1\r\n\r\ndef baz():\r\n    return foo()",
+    "unicode.py": "# Größe: ü\ndef foo(): return 'ä'\n\u2028x = foo\u0085\ndef qux(): pass\n",
+    "no_match.txt": "nothing to see here\n",
+    "empty.txt": "",
+    "invalid_utf8.py": b"def foo():\n    return b'\xff'\n",
+}
+
+
+def _to_comparable(matches: list[MatchedConsecutiveLines]) -> list[tuple]:
+    return [(m.source_file_path, [(line.line_number, line.line_content, line.match_type) for line in m.lines]) for m in matches]
+
+
+class TestSearchBackends:
+    PATTERNS = [
+        "foo",
+        r"def \w+\(\)",
+        r"return .*?foo",
+        "^def",
+        r"foo\(\)$",
+        r"foo\(\):\n",
+        r"return 1$",
+        "(?i)DEF",
+        "[a-z]+: [a-z]+",
+        "Größe",
+        "def (foo|bar)",
+        r"x?$",
+    ]
+
+    @pytest.fixture
+    def tree(self, tmp_path: Path) -> Path:
+        for rel_path, content in SEARCH_BACKEND_TEST_FILES.items():
+            if isinstance(content, bytes):
+                (tmp_path / rel_path).write_bytes(content)
+            else:
+                (tmp_path / rel_path).write_bytes(content.encode("utf-8"))
+        return tmp_path
+
+    @pytest.mark.parametrize("pattern", PATTERNS)
+    @pytest.mark.parametrize("context_lines", [0, 2])
+    def test_compact_search_is_equivalent_to_search_text(self, tree: Path, pattern: str, context_lines: int) -> None:
+        """Test that the (memory-mapping) file search used by worker processes yields the same matches as search_text."""
+        for rel_path in SEARCH_BACKEND_TEST_FILES:
+            abs_path = str(tree / rel_path)
+            try:
+                expected = search_text(
+                    pattern,
+                    content=default_file_reader(abs_path),
+                    source_file_path=rel_path,
+                    allow_multiline_match=True,
+                    context_lines_before=context_lines,
+                    context_lines_after=context_lines,
+                )
+            except UnicodeDecodeError:
+                # undecodable files must not produce matches (but they need not be decoded if there are none)
+                try:
+                    assert search_file_compact(abs_path, pattern, context_lines, context_lines) == []
+                except UnicodeDecodeError:
+                    pass
+                continue
+            except AssertionError:
+                # empty matches at the end of the file cannot be represented; this is handled by the backends (see below)
+                continue
+            compact_matches = search_file_compact(abs_path, pattern, context_lines, context_lines)
+            actual = [
+                (
+                    m.start_line,
+                    m.matched_lines[0].line_number,
+                    m.matched_lines[-1].line_number,
+                    tuple(line.line_content for line in m.lines),
+                )
+                for m in expected
+            ]
+            assert compact_matches == actual, f"Mismatch for {rel_path}"
+
+    @pytest.mark.parametrize(
+        "pattern, expected",
+        [
+            ("foo", True),
+            (r"def [a-z_]+\(", True),
+            ("^(foo|bar)+$", True),
+            ("a.b", False),
+            (r"\w+", False),
+            ("[^a]", False),
+            ("(?i)foo", False),
+            ("Größe", False),
+            (r"\bfoo", False),
+        ],
+    )
+    def test_is_byte_compatible_pattern(self, pattern: str, expected: bool) -> None:
+        assert is_byte_compatible_pattern(pattern) == expected
+
+    def test_process_pool_backend_is_equivalent_to_threading_backend(self, tree: Path) -> None:
+        paths = list(SEARCH_BACKEND_TEST_FILES) + ["missing.py"]
+        try:
+            for pattern in self.PATTERNS:
+                threading_matches = search_files(
+                    paths, pattern, root_path=str(tree), context_lines_before=1, backend=ThreadingSearchBackend()
+                )
+                process_pool_matches = search_files(
+                    paths, pattern, root_path=str(tree), context_lines_before=1, backend=ProcessPoolSearchBackend(max_workers=2)
+                )
+                assert _to_comparable(process_pool_matches) == _to_comparable(threading_matches), f"Mismatch for pattern {pattern}"
+        finally:
+            ProcessPoolSearchBackend.shutdown()
+
+    def test_process_pool_backend_rejects_custom_file_reader(self) -> None:
+        with pytest.raises(ValueError):
+            search_files(["a.py"], "match", file_reader=mock_reader_always_match, backend=ProcessPoolSearchBackend())
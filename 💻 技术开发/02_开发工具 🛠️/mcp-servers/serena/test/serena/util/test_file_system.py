@@ -1,10 +1,14 @@
+import inspect
 import os
 import shutil
+import sys
 import tempfile
 from pathlib import Path
 
 # Assuming the gitignore parser code is in a module named 'gitignore_parser'
-from serena.util.file_system import GitignoreParser, GitignoreSpec
+import pathspec
+
+from serena.util.file_system import GitignoreParser, GitignoreSpec, IgnoreMatcher, match_path, scan_directory, walk_directory
 
 
 class TestGitignoreParser:
@@ -706,3 +710,162 @@ src/*.o
 
         # foo.txt in other/ should NOT be ignored (outside foo/ subtree)
         assert not parser.should_ignore("other/foo.txt"), "other/foo.txt should NOT be ignored by foo/.gitignore"
+
+
+class TestIgnoreMatcher:
+    """Test class for IgnoreMatcher functionality."""
+
+    PATTERNS = [
+        "*.log",
+        "/build/",
+        "src/**/generated",
+        "src/lib/*.tmp",
+        "!src/lib/keep.tmp",
+        "docs/temp/",
+        "**/cache",
+        "/top.txt",
+        "a/b/c/d.txt",
+    ]
+
+    @staticmethod
+    def _create_tree(root: Path) -> list[tuple[str, bool]]:
+        """
+        :return: all (relative_path, is_dir) pairs in the created tree
+        """
+        paths = [
+            "top.txt",
+            "app.log",
+            "build/out.o",
+            "src/build/out.o",
+            "src/generated/x.py",
+            "src/sub/generated/y.py",
+            "src/lib/a.tmp",
+            "src/lib/keep.tmp",
+            "src/lib/cache/z.py",
+            "docs/temp/draft.md",
+            "docs/api.md",
+            "other/top.txt",
+            "other/src/lib/a.tmp",
+            "a/b/c/d.txt",
+            "a/b/d.txt",
+            ".hidden/file.py",
+        ]
+        result = set()
+        for path in paths:
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+            (root / path).touch()
+            result.add((path, False))
+            parent = os.path.dirname(path)
+            while parent:
+                result.add((parent, True))
+                parent = os.path.dirname(parent)
+        return sorted(result)
+
+    def test_is_ignored_is_equivalent_to_path_spec_matching(self, tmp_path: Path) -> None:
+        entries = self._create_tree(tmp_path)
+        spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, self.PATTERNS)
+        matcher = IgnoreMatcher(str(tmp_path), [spec])
+        for rel_path, is_dir in entries:
+            expected = match_path(rel_path, spec, root_path=str(tmp_path))
+            assert matcher.is_ignored(rel_path, is_dir) == expected, f"Mismatch for {rel_path}"
+
+    def test_ignored_dirnames_apply_to_subtrees(self, tmp_path: Path) -> None:
+        self._create_tree(tmp_path)
+        matcher = IgnoreMatcher(str(tmp_path), [], is_ignored_dirname=lambda dirname: dirname.startswith("."))
+        assert matcher.is_ignored(".hidden", True)
+        assert matcher.is_ignored(".hidden/file.py", False)
+        assert not matcher.is_ignored(".file.py", False)
+        assert not matcher.is_ignored("src/lib/a.tmp", False)
+
+    def test_any_spec_can_ignore(self, tmp_path: Path) -> None:
+        """Test that negations only apply within their own spec (as for separate gitignore files)."""
+        spec1 = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, ["*.tmp"])
+        spec2 = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, ["!keep.tmp"])
+        matcher = IgnoreMatcher(str(tmp_path), [spec1, spec2])
+        assert matcher.is_ignored("src/lib/keep.tmp", False)
+
+    def test_scan_directory_with_entry_filter(self, tmp_path: Path) -> None:
+        self._create_tree(tmp_path)
+        spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, self.PATTERNS)
+        matcher = IgnoreMatcher(str(tmp_path), [spec], is_ignored_dirname=lambda dirname: dirname.startswith("."))
+        _, files = scan_directory(
+            str(tmp_path),
+            recursive=True,
+            relative_to=str(tmp_path),
+            is_ignored_entry=lambda entry: matcher.is_ignored(os.path.relpath(entry.path, tmp_path), entry.is_dir()),
+        )
+        assert sorted(files) == [
+            "a/b/d.txt",
+            "docs/api.md",
+            "other/src/lib/a.tmp",
+            "other/top.txt",
+            "src/build/out.o",
+            "src/lib/keep.tmp",
+        ]
+
+
+class TestWalkDirectory:
+    """Test class for walk_directory functionality."""
+
+    def test_depth_limit(self, tmp_path: Path) -> None:
+        (tmp_path / "a" / "b" / "c").mkdir(parents=True)
+        (tmp_path / "top.txt").touch()
+        (tmp_path / "a" / "b" / "deep.txt").touch()
+        (tmp_path / "a" / "b" / "c" / "deeper.txt").touch()
+
+        def walk(**kwargs) -> list[tuple[str, bool]]:
+            return sorted(walk_directory(str(tmp_path), relative_to=str(tmp_path), **kwargs))
+
+        assert walk() == [("a", True), ("top.txt", False)]
+        assert walk(recursive=True, max_depth=2) == [("a", True), (os.path.join("a", "b"), True), ("top.txt", False)]
+        assert walk(recursive=True) == [
+            ("a", True),
+            (os.path.join("a", "b"), True),
+            (os.path.join("a", "b", "c"), True),
+            (os.path.join("a", "b", "c", "deeper.txt"), False),
+            (os.path.join("a", "b", "deep.txt"), False),
+            ("top.txt", False),
+        ]
+
+    def test_results_are_consistent_with_scan_directory(self, tmp_path: Path) -> None:
+        (tmp_path / "src" / "pkg").mkdir(parents=True)
+        (tmp_path / "src" / "pkg" / "mod.py").touch()
+        (tmp_path / "src" / "main.py").touch()
+        (tmp_path / "ignored").mkdir()
+        (tmp_path / "ignored" / "x.py").touch()
+        is_ignored_dir = lambda path: os.path.basename(path) == "ignored"
+        entries = list(walk_directory(str(tmp_path), recursive=True, is_ignored_dir=is_ignored_dir))
+        dirs, files = scan_directory(str(tmp_path), recursive=True, is_ignored_dir=is_ignored_dir)
+        assert dirs == [e.path for e in entries if e.is_dir]
+        assert files == [e.path for e in entries if not e.is_dir]
+        assert sorted(files) == [str(tmp_path / "src" / "main.py"), str(tmp_path / "src" / "pkg" / "mod.py")]
+
+    def test_deep_tree_is_walked_without_recursion(self, tmp_path: Path) -> None:
+        depth = 300
+        current_path = tmp_path
+        for _ in range(depth):
+            current_path = current_path / "d"
+            current_path.mkdir()
+        (current_path / "leaf.txt").touch()
+        # the walk must succeed with a recursion limit that is lower than the depth of the tree
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack()) + depth // 2)
+        try:
+            files = [e.path for e in walk_directory(str(tmp_path), recursive=True, relative_to=str(tmp_path)) if not e.is_dir]
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        assert files == [os.path.join(*(["d"] * depth), "leaf.txt")]
+
+    def test_walk_is_lazy(self, tmp_path: Path) -> None:
+        for i in range(10):
+            (tmp_path / f"dir_{i}").mkdir()
+            (tmp_path / f"dir_{i}" / "file.txt").touch()
+        checked_paths = []
+
+        def is_ignored_entry(entry: os.DirEntry) -> bool:
+            checked_paths.append(entry.path)
+            return False
+
+        walker = walk_directory(str(tmp_path), recursive=True, is_ignored_entry=is_ignored_entry)
+        next(walker)
+        assert len(checked_paths) == 1
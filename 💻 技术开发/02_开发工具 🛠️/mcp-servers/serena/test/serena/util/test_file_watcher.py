@@ -0,0 +1,137 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from serena.config.serena_config import ProjectConfig
+from serena.project import Project
+from serena.util.file_watcher import FileWatcher, InotifyFileWatcher, PollingFileWatcher
+from solidlsp.ls_config import Language
+
+
+class ChangeCollector:
+    def __init__(self) -> None:
+        self.changes: set[str] = set()
+        self._condition = threading.Condition()
+
+    def __call__(self, changes: set[str]) -> None:
+        with self._condition:
+            self.changes.update(changes)
+            self._condition.notify_all()
+
+    def wait_for(self, *paths: str, timeout: float = 10.0) -> set[str]:
+        expected = {os.path.join(*p.split("/")) for p in paths}
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not expected.issubset(self.changes):
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    raise AssertionError(f"Changes {expected - self.changes} were not reported; got {self.changes}")
+                self._condition.wait(remaining_time)
+            return set(self.changes)
+
+
+def create_watcher(watcher_class: type[FileWatcher], root: Path, collector: ChangeCollector) -> FileWatcher:
+    def is_ignored_dir(relative_path: str) -> bool:
+        return os.path.basename(relative_path) == "ignored"
+
+    kwargs = {"poll_interval_seconds": 0.1} if watcher_class is PollingFileWatcher else {}
+    return watcher_class(str(root), collector, is_ignored_dir=is_ignored_dir, debounce_seconds=0.1, **kwargs)  # type: ignore
+
+
+watcher_classes = [PollingFileWatcher]
+if InotifyFileWatcher.is_supported():
+    watcher_classes.append(InotifyFileWatcher)
+
+
+@pytest.mark.parametrize("watcher_class", watcher_classes)
+def test_watcher_reports_changed_files(tmp_path: Path, watcher_class: type[FileWatcher]) -> None:
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / "modified.py").write_text("a = 1\n")
+    (tmp_path / "sub" / "deleted.py").write_text("b = 1\n")
+
+    collector = ChangeCollector()
+    watcher = create_watcher(watcher_class, tmp_path, collector)
+    watcher.start()
+    try:
+        (tmp_path / "modified.py").write_text("a = 22\n")
+        (tmp_path / "sub" / "deleted.py").unlink()
+        (tmp_path / "created.py").write_text("c = 1\n")
+        (tmp_path / "new_dir").mkdir()
+        (tmp_path / "new_dir" / "nested.py").write_text("d = 1\n")
+        (tmp_path / "ignored" / "file.py").write_text("e = 1\n")
+        changes = collector.wait_for("modified.py", "sub/deleted.py", "created.py", "new_dir/nested.py")
+
+        # files in new directories are watched, too
+        (tmp_path / "new_dir" / "nested.py").write_text("d = 22\n")
+        collector.changes.clear()
+        collector.wait_for("new_dir/nested.py")
+    finally:
+        watcher.stop()
+    assert os.path.join("ignored", "file.py") not in changes
+    assert not watcher.is_running()
+
+
+@pytest.mark.skipif(not InotifyFileWatcher.is_supported(), reason="inotify is not supported")
+def test_inotify_watcher_reports_removed_directories(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    for name in ["moved_away", "deleted", "renamed"]:
+        (root / name).mkdir(parents=True)
+        (root / name / "module.py").write_text("a = 1\n")
+
+    collector = ChangeCollector()
+    watcher = create_watcher(InotifyFileWatcher, root, collector)
+    watcher.start()
+    try:
+        shutil.move(root / "moved_away", tmp_path / "elsewhere")
+        shutil.rmtree(root / "deleted")
+        (root / "renamed").rename(root / "new_name")
+        collector.wait_for("moved_away", "deleted", "renamed", "new_name/module.py")
+
+        # the directory which was moved away is no longer watched, while the renamed one is watched under its new name
+        (tmp_path / "elsewhere" / "module.py").write_text("a = 22\n")
+        (root / "new_name" / "module.py").write_text("a = 22\n")
+        collector.changes.clear()
+        changes = collector.wait_for("new_name/module.py")
+    finally:
+        watcher.stop()
+    assert changes == {os.path.join("new_name", "module.py")}
+
+
+def test_failed_watcher_reports_unknown_changes(tmp_path: Path) -> None:
+    class FailingFileWatcher(PollingFileWatcher):
+        def _wait_for_changes(self, timeout: float) -> None:
+            raise OSError("watching failed")
+
+    unknown_changes_reported = threading.Event()
+    watcher = FailingFileWatcher(str(tmp_path), ChangeCollector(), on_unknown_changes=unknown_changes_reported.set)
+    watcher.start()
+    try:
+        assert unknown_changes_reported.wait(timeout=10)
+        assert not watcher.is_running()
+    finally:
+        watcher.stop()
+
+
+def test_project_refreshes_ignored_paths_on_gitignore_change(tmp_path: Path) -> None:
+    (tmp_path / "module.py").write_text("a = 1\n")
+    (tmp_path / "generated.py").write_text("b = 1\n")
+    (tmp_path / ".gitignore").write_text("")
+    project = Project(str(tmp_path), ProjectConfig(project_name="test", language=Language.PYTHON))
+    assert not project.is_ignored_path("generated.py")
+
+    collector = ChangeCollector()
+    project.add_file_change_listener(collector)
+    project.start_file_watcher()
+    try:
+        (tmp_path / ".gitignore").write_text("generated.py\n")
+        collector.wait_for(".gitignore")
+    finally:
+        project.stop_file_watcher()
+    assert project.is_ignored_path("generated.py")
+    assert not project.is_ignored_path("module.py")
+    assert "generated.py" in project.ignored_patterns
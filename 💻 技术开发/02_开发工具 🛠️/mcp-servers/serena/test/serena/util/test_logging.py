@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from serena.util.logging import LogBuffer
+
+
+def _create_buffer(num_messages: int, max_messages: int) -> LogBuffer:
+    log_buffer = LogBuffer(max_messages=max_messages)
+    for i in range(num_messages):
+        log_buffer.append(f"msg {i}")
+    return log_buffer
+
+
+class TestLogBuffer:
+    def test_empty_buffer(self) -> None:
+        log_messages = LogBuffer().get_log_messages_from(0)
+        assert (log_messages.messages, log_messages.start_idx, log_messages.max_idx) == ([], 0, -1)
+
+    @pytest.mark.parametrize("num_messages", [0, 3, 5, 6, 12, 17])
+    @pytest.mark.parametrize("start_idx", [0, 2, 7, 11, 16, 20])
+    def test_messages_from_index(self, num_messages: int, start_idx: int) -> None:
+        max_messages = 5
+        log_buffer = _create_buffer(num_messages, max_messages)
+        first_retained_idx = max(0, num_messages - max_messages)
+        expected_start_idx = max(start_idx, first_retained_idx)
+
+        log_messages = log_buffer.get_log_messages_from(start_idx)
+
+        assert log_messages.messages == [f"msg {i}" for i in range(expected_start_idx, num_messages)]
+        assert log_messages.start_idx == expected_start_idx
+        assert log_messages.max_idx == num_messages - 1
+        assert log_buffer.get_log_messages() == [f"msg {i}" for i in range(first_retained_idx, num_messages)]
+
+    def test_wait_for_new_messages(self) -> None:
+        log_buffer = _create_buffer(2, 10)
+        timer = threading.Timer(0.1, lambda: log_buffer.append("new"))
+        timer.start()
+        try:
+            log_messages = log_buffer.get_log_messages_from(2, timeout=10)
+        finally:
+            timer.cancel()
+        assert (log_messages.messages, log_messages.start_idx, log_messages.max_idx) == (["new"], 2, 2)
+
+    def test_wait_times_out(self) -> None:
+        log_buffer = _create_buffer(2, 10)
+        start_time = time.perf_counter()
+        log_messages = log_buffer.get_log_messages_from(2, timeout=0.1)
+        assert time.perf_counter() - start_time >= 0.1
+        assert (log_messages.messages, log_messages.max_idx) == ([], 1)
@@ -0,0 +1,104 @@
+import threading
+from collections.abc import Callable
+
+import pytest
+
+from serena.tools import FindReferencingSymbolsTool, ListDirTool, ReadFileTool, ReplaceSymbolBodyTool, Tool
+from serena.util.task_executor import TaskExecutor
+
+
+class EventLog:
+    def __init__(self) -> None:
+        self.events: list[str] = []
+        self._lock = threading.Lock()
+
+    def append(self, event: str) -> None:
+        with self._lock:
+            self.events.append(event)
+
+
+@pytest.fixture
+def executor():
+    executor = TaskExecutor(max_concurrent_read_only_tasks=3)
+    yield executor
+    executor.shutdown()
+
+
+def blocking_task(name: str, event_log: EventLog, release_event: threading.Event) -> Callable[[], str]:
+    def task() -> str:
+        event_log.append(f"start {name}")
+        assert release_event.wait(10)
+        event_log.append(f"end {name}")
+        return name
+
+    return task
+
+
+class TestTaskExecutor:
+    def test_read_only_tasks_run_concurrently(self, executor: TaskExecutor) -> None:
+        barrier = threading.Barrier(3, timeout=10)
+
+        def task() -> int:
+            # would time out if the tasks were not executed concurrently
+            return barrier.wait()
+
+        futures = [executor.submit(task, name="read", read_only=True) for _ in range(3)]
+        assert sorted(f.result(timeout=10) for f in futures) == [0, 1, 2]
+
+    def test_concurrency_limit(self, executor: TaskExecutor) -> None:
+        event_log = EventLog()
+        release_event = threading.Event()
+        futures = [executor.submit(blocking_task(f"r{i}", event_log, release_event), name="read", read_only=True) for i in range(5)]
+        stats = executor.get_stats()["read"]
+        assert stats.num_running == 3
+        assert stats.num_queued == 2
+        release_event.set()
+        assert [f.result(timeout=10) for f in futures] == [f"r{i}" for i in range(5)]
+        stats = executor.get_stats()["read"]
+        assert (stats.num_running, stats.num_queued, stats.num_started) == (0, 0, 5)
+
+    def test_exclusive_tasks_are_not_overtaken(self, executor: TaskExecutor) -> None:
+        event_log = EventLog()
+        release_reader = threading.Event()
+        release_writer = threading.Event()
+        reader_future = executor.submit(blocking_task("reader", event_log, release_reader), name="read", read_only=True)
+        writer_future = executor.submit(blocking_task("writer", event_log, release_writer), name="write")
+        late_reader_future = executor.submit(lambda: event_log.append("late reader"), name="read", read_only=True)
+
+        # the writer waits for the running reader, and the late reader waits for the writer
+        assert executor.get_queue_length() == 2
+        release_reader.set()
+        reader_future.result(timeout=10)
+        release_writer.set()
+        writer_future.result(timeout=10)
+        late_reader_future.result(timeout=10)
+        assert event_log.events == ["start reader", "end reader", "start writer", "end writer", "late reader"]
+        assert executor.get_stats()["write"].max_wait_time > 0
+
+    def test_single_worker_executes_tasks_in_order(self) -> None:
+        executor = TaskExecutor(max_concurrent_read_only_tasks=1)
+        try:
+            event_log = EventLog()
+            futures = [executor.submit(lambda i=i: event_log.append(str(i)), name="task", read_only=i % 2 == 0) for i in range(20)]
+            for future in futures:
+                future.result(timeout=10)
+            assert event_log.events == [str(i) for i in range(20)]
+        finally:
+            executor.shutdown()
+
+    def test_exceptions_are_propagated(self, executor: TaskExecutor) -> None:
+        def failing_task() -> None:
+            raise ValueError("failure")
+
+        with pytest.raises(ValueError, match="failure"):
+            executor.submit(failing_task, name="fail").result(timeout=10)
+        # the executor remains usable
+        assert executor.submit(lambda: 42, name="task").result(timeout=10) == 42
+
+
+@pytest.mark.parametrize(
+    "tool_class, is_read_only",
+    [(ReadFileTool, True), (ListDirTool, True), (FindReferencingSymbolsTool, True), (ReplaceSymbolBodyTool, False)],
+)
+def test_tool_is_read_only(tool_class: type[Tool], is_read_only: bool) -> None:
+    assert tool_class.is_read_only() == is_read_only
@@ -0,0 +1,103 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from serena.text_utils import search_files
+from serena.util.trigram_index import TrigramIndex, TrigramQuery
+
+FILES = {
+    "a.py": "def foo_bar():\n    return 'Hello World'\n",
+    "b.py": "class FooBaz:\n    pass\n",
+    "sub/c.txt": "line one\r\nline two with Bar\r\n",
+    "sub/d.md": "# Título\nNothing to see here\n",
+}
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    for rel_path, content in FILES.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content.encode("utf-8"))
+    return tmp_path
+
+
+def _make_old(path: Path) -> None:
+    """Sets the modification time to the past, such that the index trusts the file's stat information"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+
+
+class TestTrigramQuery:
+    def test_literal(self) -> None:
+        assert TrigramQuery.from_regex("Hello").trigrams == {b"hel", b"ell", b"llo"}
+
+    def test_unrestricted(self) -> None:
+        for pattern in ["ab", ".*", "a.b.c", "(foo)?", "x*", "[abc]+", "foo|.*", "(unclosed"]:
+            assert TrigramQuery.from_regex(pattern).is_unrestricted(), pattern
+
+    def test_groups_repetitions_and_alternatives(self) -> None:
+        query = TrigramQuery.from_regex(r"def (foo|quux)+\s*\(")
+        assert query.trigrams == {b"def", b"ef "}
+        assert [sorted(alternative.trigrams) for alternative in query.alternatives[0]] == [[b"foo"], [b"quu", b"uux"]]
+
+    def test_case_insensitive_characters_with_non_ascii_equivalents_are_excluded(self) -> None:
+        assert TrigramQuery.from_regex("(?i)hello").trigrams == {b"hel", b"ell", b"llo"}
+        assert TrigramQuery.from_regex("(?i)kitten").trigrams == {b"tte", b"ten"}
+        assert TrigramQuery.from_regex("kitten").trigrams == {b"kit", b"itt", b"tte", b"ten"}
+
+
+class TestTrigramIndex:
+    @pytest.mark.parametrize(
+        "pattern",
+        ["Hello", "hello", "(?i)hello", "foo_?ba[rz]", "Foo|World", r"one\nline", "def .*?World", "Título", "xyz", "a"],
+    )
+    def test_candidates_contain_all_matching_files(self, tree: Path, pattern: str) -> None:
+        index = TrigramIndex(tree / "index.db", str(tree))
+        candidates = index.filter_candidates(pattern, list(FILES))
+        compiled_pattern = re.compile(pattern, re.DOTALL)
+        for rel_path in FILES:
+            with open(tree / rel_path, encoding="utf-8") as f:
+                if compiled_pattern.search(f.read()):
+                    assert rel_path in candidates
+        index.close()
+
+    def test_candidates_are_narrowed_down(self, tree: Path) -> None:
+        index = TrigramIndex(tree / "index.db", str(tree))
+        assert index.filter_candidates("Hello", list(FILES)) == ["a.py"]
+        assert index.filter_candidates("(?i)foo", list(FILES)) == ["a.py", "b.py"]
+        assert index.filter_candidates("nonexistent", list(FILES)) == []
+        index.close()
+
+    def test_incremental_update_and_persistence(self, tree: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        index = TrigramIndex(tree / "index.db", str(tree))
+        assert index.filter_candidates("Goodbye", list(FILES)) == []
+        (tree / "b.py").write_text("print('Goodbye')\n")
+        os.remove(tree / "sub" / "d.md")
+        remaining_files = ["a.py", "b.py", "sub/c.txt"]
+        assert index.filter_candidates("Goodbye", remaining_files) == ["b.py"]
+        index.close()
+
+        # the index is loaded from disk, and unchanged files are not re-read
+        for rel_path in remaining_files:
+            _make_old(tree / rel_path)
+        index = TrigramIndex(tree / "index.db", str(tree))
+        index.update(remaining_files)
+
+        def fail_open(*args, **kwargs):  # type: ignore
+            raise AssertionError("Unchanged files must not be read")
+
+        monkeypatch.setattr("serena.util.trigram_index.open", fail_open, raising=False)
+        assert index.filter_candidates("Goodbye", remaining_files) == ["b.py"]
+        assert index.filter_candidates("Hello", remaining_files) == ["a.py"]
+        index.close()
+
+    def test_search_files_with_index(self, tree: Path) -> None:
+        index = TrigramIndex(tree / "index.db", str(tree))
+        for pattern in ["Hello", "(?i)bar", "line.*?two"]:
+            matches = search_files(list(FILES), pattern, root_path=str(tree))
+            indexed_matches = search_files(list(FILES), pattern, root_path=str(tree), trigram_index=index)
+            assert [m.to_display_string() for m in indexed_matches] == [m.to_display_string() for m in matches]
+        index.close()
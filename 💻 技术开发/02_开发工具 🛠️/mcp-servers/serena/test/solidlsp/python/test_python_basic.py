@@ -6,13 +6,16 @@ like request_references using the test repository.
 """
 
 import os
+import sqlite3
 
 import pytest
 
 from serena.project import Project
 from serena.text_utils import LineType
 from solidlsp import SolidLanguageServer
+from solidlsp.ls_cache import DocumentSymbolsStore
 from solidlsp.ls_config import Language
+from test.conftest import create_ls
 
 
 @pytest.mark.python
@@ -34,6 +37,102 @@ class TestLanguageServerBasics:
         references = language_server.request_references(file_path, sel_start["line"], sel_start["character"])
         assert len(references) > 1, "User class should be referenced in multiple files (using selectionRange if present)"
 
+    @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
+    def test_repeated_references_requests_are_memoized(self, language_server: SolidLanguageServer) -> None:
+        """Test that identical references requests are answered from the memo until a file changes."""
+        file_path = os.path.join("test_repo", "models.py")
+        symbols = language_server.request_document_symbols(file_path)
+        user_symbol = next(s for s in symbols[0] if s.get("name") == "User")
+        sel_start = user_symbol["selectionRange"]["start"]
+        memo = language_server._position_request_memo
+        references = language_server.request_references(file_path, sel_start["line"], sel_start["character"])
+        num_hits = memo.num_hits
+        assert language_server.request_references(file_path, sel_start["line"], sel_start["character"]) == references
+        assert memo.num_hits == num_hits + 1
+
+        language_server.invalidate_document_symbols([file_path])
+        assert len(memo) == 0
+        assert language_server.request_references(file_path, sel_start["line"], sel_start["character"]) == references
+        assert memo.num_hits == num_hits + 1
+
+        # e.g. when a warm language server is reattached to its project
+        language_server.discard_memoized_responses()
+        assert len(memo) == 0
+
+    def test_stop_saves_and_closes_document_symbols_store(self) -> None:
+        """Test that stopping the language server closes the persistent store, which retains the saved entries."""
+        file_path = os.path.join("test_repo", "models.py")
+        language_server = create_ls(Language.PYTHON)
+        language_server.start()
+        try:
+            language_server.request_document_symbols(file_path)
+            document_symbols_store = language_server._document_symbols_store
+            assert document_symbols_store is not None
+        finally:
+            language_server.stop()
+
+        assert language_server._document_symbols_store is None
+        with pytest.raises(sqlite3.ProgrammingError):
+            document_symbols_store.get(file_path)
+        reopened_store = DocumentSymbolsStore(language_server.cache_path)
+        try:
+            assert reopened_store.get(file_path) is not None
+        finally:
+            reopened_store.close()
+
+    @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
+    def test_symbol_name_lookups_are_incremental(self, language_server: SolidLanguageServer, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that repeated name lookups neither walk the directory tree nor check all files again until files change."""
+        num_walks = 0
+        num_checks = 0
+        unreported_changed_path: str | None = None
+        collect_source_files = language_server._collect_source_files
+        is_up_to_date = language_server.is_document_symbols_cache_up_to_date
+
+        def counting_collect_source_files(within_relative_path: str | None) -> tuple[list[str], list[str]]:
+            nonlocal num_walks
+            num_walks += 1
+            return collect_source_files(within_relative_path)
+
+        def counting_is_up_to_date(relative_file_path: str) -> bool:
+            nonlocal num_checks, unreported_changed_path
+            num_checks += 1
+            if relative_file_path == unreported_changed_path:
+                unreported_changed_path = None
+                return False
+            return is_up_to_date(relative_file_path)
+
+        monkeypatch.setattr(language_server, "_collect_source_files", counting_collect_source_files)
+        monkeypatch.setattr(language_server, "is_document_symbols_cache_up_to_date", counting_is_up_to_date)
+        # the language server is shared by other tests, which may have performed lookups before
+        language_server.discard_verified_source_files()
+        file_path = os.path.join("test_repo", "models.py")
+        symbols, _ = language_server.request_symbols_by_name("User")
+        assert any(s.relative_path == file_path for s in symbols)
+        assert num_walks == 1 and num_checks > 0
+        # only the files containing matches are checked in later lookups
+        num_matched_files = len({s.relative_path for s in symbols})
+
+        num_checks = 0
+        assert language_server.request_symbols_by_name("User")[0] == symbols
+        assert num_walks == 1 and num_checks == num_matched_files
+
+        # a modified file is checked again, without walking the directory tree
+        num_checks = 0
+        language_server.invalidate_document_symbols([file_path])
+        assert language_server.request_symbols_by_name("User")[0] == symbols
+        assert num_walks == 1 and num_checks == 1 + num_matched_files
+
+        # a changed directory (e.g. one that was moved) requires the directory tree to be walked again
+        language_server.invalidate_document_symbols(["test_repo"])
+        assert language_server.request_symbols_by_name("User")[0] == symbols
+        assert num_walks == 2
+
+        # a change which was not reported is detected in a file containing a match, after which the lookup is repeated
+        unreported_changed_path = file_path
+        assert language_server.request_symbols_by_name("User")[0] == symbols
+        assert num_walks == 3
+
     @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
     def test_request_references_item_class(self, language_server: SolidLanguageServer) -> None:
         """Test request_references on the Item class."""
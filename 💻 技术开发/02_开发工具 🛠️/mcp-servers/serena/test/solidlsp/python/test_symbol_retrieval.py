@@ -414,6 +414,80 @@ class TestLanguageServerSymbols:
             _, user_management_roots = language_server.request_document_symbols(os.path.join("examples", "user_management.py"))
             assert user_management_roots == user_management_node["children"]
 
+    @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
+    def test_symbol_tree_pipelined_matches_sequential(self, language_server: SolidLanguageServer) -> None:
+        """Test that requesting document symbols with several requests in flight yields the same tree as requesting them one by one."""
+
+        def flatten(symbols: list, parent_name: str | None = None) -> list[tuple]:
+            result = []
+            for s in symbols:
+                assert (s.get("parent") or {}).get("name") == parent_name
+                result.append((s["name"], s["kind"], s["location"]["relativePath"], s["location"]["range"]))
+                result.extend(flatten(s["children"], s["name"]))
+            return result
+
+        settings = language_server._solidlsp_settings
+        original_window = settings.document_symbol_request_window
+        try:
+            settings.document_symbol_request_window = 1
+            sequential_tree = language_server.request_full_symbol_tree()
+            settings.document_symbol_request_window = 4
+            pipelined_tree = language_server.request_full_symbol_tree()
+        finally:
+            settings.document_symbol_request_window = original_window
+        assert flatten(pipelined_tree) == flatten(sequential_tree)
+
+    @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
+    def test_document_symbols_of_unchanged_file_are_returned_without_reading_it(self, language_server: SolidLanguageServer) -> None:
+        """Test that cached document symbols are returned based on the file's signature and that a changed signature forces a re-read."""
+        file_path = os.path.join("test_repo", "services.py")
+        _, roots = language_server.request_document_symbols(file_path)
+
+        original_open_file = language_server.open_file
+        opened_files = []
+
+        def open_file(relative_file_path: str):
+            opened_files.append(relative_file_path)
+            return original_open_file(relative_file_path)
+
+        language_server.open_file = open_file  # type: ignore
+        absolute_file_path = os.path.join(language_server.repository_root_path, file_path)
+        stat = os.stat(absolute_file_path)
+        try:
+            _, cached_roots = language_server.request_document_symbols(file_path)
+            assert cached_roots == roots
+            assert opened_files == []
+
+            # a different modification time invalidates the signature, so the file is read (and hashed) again
+            os.utime(absolute_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+            _, reread_roots = language_server.request_document_symbols(file_path)
+            assert reread_roots == roots
+            assert opened_files == [file_path]
+        finally:
+            language_server.open_file = original_open_file  # type: ignore
+            os.utime(absolute_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
+    def test_document_symbols_with_and_without_body_share_cache_entry(self, language_server: SolidLanguageServer) -> None:
+        """Test that bodies are added on demand to copies of the cached symbols, which themselves do not hold bodies."""
+        file_path = os.path.join("test_repo", "services.py")
+        all_symbols, roots = language_server.request_document_symbols(file_path, include_body=False)
+        all_symbols_with_body, roots_with_body = language_server.request_document_symbols(file_path, include_body=True)
+
+        assert [s["name"] for s in all_symbols_with_body] == [s["name"] for s in all_symbols]
+        assert all("body" not in s for s in all_symbols)
+        assert all(s["parent"] is None for s in roots_with_body)
+        user_service = next(s for s in all_symbols_with_body if s["name"] == "UserService")
+        assert user_service["body"].startswith("class UserService")
+        create_user = next(s for s in user_service["children"] if s["name"] == "create_user")
+        assert create_user["parent"] is user_service
+        assert create_user["body"].startswith("def create_user")
+        assert create_user["body"] in user_service["body"]
+
+        with language_server._cache_lock:
+            assert file_path in language_server._document_symbols_cache
+            assert all(not key.startswith(file_path + "-") for key in language_server._document_symbols_cache)
+
     @pytest.mark.parametrize("language_server", [Language.PYTHON], indirect=True)
     def test_request_dir_overview(self, language_server: SolidLanguageServer) -> None:
         """Test that request_dir_overview returns correct symbol information for files in a directory."""
@@ -0,0 +1,345 @@
+import json
+import pickle
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from solidlsp import ls_types
+from solidlsp.ls_cache import (
+    CachedFileMetadata,
+    CompactDocumentSymbols,
+    DebouncedCacheSaver,
+    DocumentSymbolsStore,
+    FileSignature,
+    SingleFlightMemo,
+)
+from solidlsp.ls_deadline import RequestDeadline
+from solidlsp.ls_exceptions import RequestCancelledException
+
+
+def _symbols(name: str) -> tuple[list[dict], list[dict]]:
+    root = {"name": name, "kind": 5, "children": [], "parent": None}
+    child = {"name": f"{name}_method", "kind": 6, "children": [], "parent": root}
+    root["children"].append(child)
+    return [root, child], [root]
+
+
+def test_put_and_get_roundtrip(tmp_path: Path) -> None:
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    store.put_many({"a.py": ("hash_a", _symbols("A")), "b.py": ("hash_b", _symbols("B"))})
+    store.close()
+
+    # entries are persisted and loaded individually
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    assert sorted(store.keys()) == ["a.py", "b.py"]
+    content_hash, (all_symbols, roots) = store.get("a.py")
+    assert content_hash == "hash_a"
+    assert roots[0]["name"] == "A"
+    # back-references to parents survive the roundtrip
+    assert all_symbols[1]["parent"] is roots[0]
+    assert store.get("c.py") is None
+    store.close()
+
+
+def test_put_replaces_only_given_entries(tmp_path: Path) -> None:
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    store.put_many({"a.py": ("hash_a", _symbols("A")), "b.py": ("hash_b", _symbols("B"))})
+    store.put_many({"a.py": ("hash_a2", _symbols("A2"))})
+    assert store.get("a.py")[0] == "hash_a2"
+    assert store.get("b.py")[0] == "hash_b"
+    store.delete(["b.py"])
+    assert store.get("b.py") is None
+    assert len(store) == 1
+    store.close()
+
+
+def test_corrupt_store_is_recreated(tmp_path: Path) -> None:
+    db_path = tmp_path / "cache.db"
+    db_path.write_bytes(b"this is not a database" * 100)
+    store = DocumentSymbolsStore(db_path)
+    assert len(store) == 0
+    store.put_many({"a.py": ("hash_a", _symbols("A"))})
+    assert store.get("a.py") is not None
+    store.close()
+
+
+def test_compaction_releases_unused_space(tmp_path: Path) -> None:
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    store.put_many({f"file_{i}.py": (f"hash_{i}", _symbols("X" * 1000)) for i in range(2000)})
+    store.delete([f"file_{i}.py" for i in range(1900)])
+    assert store.needs_compaction()
+    store.compact_in_background_if_needed()
+    store.close()  # waits for the compaction to finish
+
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    assert not store.needs_compaction()
+    assert len(store) == 100
+    store.close()
+
+
+def test_file_metadata_roundtrip(tmp_path: Path) -> None:
+    file_path = tmp_path / "a.py"
+    file_path.write_text("x = 1\n")
+    file_range = ls_types.Range(start=ls_types.Position(line=0, character=0), end=ls_types.Position(line=2, character=0))
+    metadata = CachedFileMetadata(signature=FileSignature.from_path(str(file_path)), content_hash="hash_a", range=file_range)
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    store.put_file_metadata({"a.py": metadata})
+    store.close()
+
+    store = DocumentSymbolsStore(tmp_path / "cache.db")
+    assert store.get_file_metadata("a.py") == metadata
+    assert store.get_file_metadata("b.py") is None
+    store.close()
+
+
+def _range(start_line: int, start_character: int, end_line: int, end_character: int) -> dict:
+    return {"start": {"line": start_line, "character": start_character}, "end": {"line": end_line, "character": end_character}}
+
+
+def _document_symbols(uri: str, absolute_path: str, relative_path: str) -> list[dict]:
+    def location(range_: dict) -> dict:
+        return {"uri": uri, "range": range_, "absolutePath": absolute_path, "relativePath": relative_path}
+
+    method = {"name": "run", "kind": 6, "detail": "def run()", "range": _range(2, 4, 3, 12), "selectionRange": _range(2, 8, 2, 11)}
+    method["location"] = location(method["range"])
+    method["children"] = []
+    cls = {"name": "Runner", "kind": 5, "range": _range(1, 0, 3, 12), "selectionRange": _range(1, 6, 1, 12), "children": [method]}
+    cls["location"] = location(cls["range"])
+    # a symbol without a range (as given by a SymbolInformation) with a location in another file
+    variable = {"name": "x", "kind": 13, "tags": [1], "children": []}
+    variable["location"] = {"uri": "file:///other.py", "range": _range(0, 0, 0, 1), "absolutePath": "/other.py", "relativePath": "other.py"}
+    variable["selectionRange"] = variable["location"]["range"]
+    method["parent"] = cls
+    cls["parent"] = None
+    variable["parent"] = None
+    return [cls, variable]
+
+
+def _strip_parents(symbol: dict) -> dict:
+    return {
+        key: ([_strip_parents(child) for child in value] if key == "children" else value)
+        for key, value in symbol.items()
+        if key != "parent"
+    }
+
+
+def test_compact_document_symbols_roundtrip() -> None:
+    uri, absolute_path, relative_path = "file:///repo/a.py", "/repo/a.py", "a.py"
+    root_symbols = _document_symbols(uri, absolute_path, relative_path)
+    compact_symbols = CompactDocumentSymbols.from_symbols(relative_path, absolute_path, uri, root_symbols)
+    assert len(compact_symbols) == 3
+    # the locations within the file are not stored explicitly
+    assert set(compact_symbols.extras) == {1, 2}
+    assert "location" in compact_symbols.extras[2]
+
+    for symbols in (compact_symbols, pickle.loads(pickle.dumps(compact_symbols))):
+        all_symbols, roots = symbols.to_symbols()
+        assert [_strip_parents(s) for s in roots] == [_strip_parents(s) for s in root_symbols]
+        assert [s["name"] for s in all_symbols] == ["Runner", "run", "x"]
+        assert all_symbols[1]["parent"] is roots[0]
+        assert roots[0]["children"][0] is all_symbols[1]
+        assert roots[0]["parent"] is None
+
+
+def test_compact_document_symbols_are_smaller_when_pickled() -> None:
+    uri, absolute_path, relative_path = "file:///repo/pkg/module.py", "/repo/pkg/module.py", "pkg/module.py"
+    root_symbols = []
+    for i in range(200):
+        root_symbol = _document_symbols(uri, absolute_path, relative_path)[0]
+        root_symbol["name"] = f"Runner{i}"
+        del root_symbol["children"][0]["parent"]
+        # symbols decoded from the language server's responses do not share any objects
+        root_symbols.append(json.loads(json.dumps(root_symbol)))
+    compact_symbols = CompactDocumentSymbols.from_symbols(relative_path, absolute_path, uri, root_symbols)
+    assert len(pickle.dumps(compact_symbols)) < len(pickle.dumps(root_symbols)) / 2
+
+
+class SaveRecorder:
+    def __init__(self) -> None:
+        self.save_times: list[float] = []
+        self._condition = threading.Condition()
+
+    def __call__(self) -> None:
+        with self._condition:
+            self.save_times.append(time.monotonic())
+            self._condition.notify_all()
+
+    def wait_for_saves(self, num_saves: int, timeout: float = 10.0) -> None:
+        with self._condition:
+            assert self._condition.wait_for(lambda: len(self.save_times) >= num_saves, timeout), f"Got only {len(self.save_times)} saves"
+
+
+def test_debounced_saver_batches_changes() -> None:
+    recorder = SaveRecorder()
+    saver = DebouncedCacheSaver(recorder, max_delay_seconds=0.2, max_pending_changes=100)
+    try:
+        start_time = time.monotonic()
+        for i in range(10):
+            saver.notify_changes(i + 1)
+        recorder.wait_for_saves(1)
+        assert recorder.save_times[0] - start_time >= 0.2
+        time.sleep(0.3)
+        assert len(recorder.save_times) == 1
+    finally:
+        saver.stop()
+
+
+def test_debounced_saver_saves_immediately_when_many_changes_are_pending() -> None:
+    recorder = SaveRecorder()
+    saver = DebouncedCacheSaver(recorder, max_delay_seconds=60, max_pending_changes=5)
+    try:
+        saver.notify_changes(1)
+        saver.notify_changes(5)
+        recorder.wait_for_saves(1)
+    finally:
+        saver.stop()
+
+
+def test_debounced_saver_can_be_stopped_and_reused() -> None:
+    recorder = SaveRecorder()
+    saver = DebouncedCacheSaver(recorder, max_delay_seconds=0.1)
+    saver.notify_changes(1)
+    saver.stop()
+    # pending changes are not saved when stopping, but further notifications start a new thread
+    assert recorder.save_times == []
+    saver.notify_changes(1)
+    recorder.wait_for_saves(1)
+    saver.stop()
+
+
+def test_memo_returns_memoized_results_of_recently_used_keys() -> None:
+    memo = SingleFlightMemo(max_entries=2)
+    computed_keys = []
+
+    def compute(key: str) -> str:
+        computed_keys.append(key)
+        return key.upper()
+
+    for key in ["a", "b", "a", "c", "b", "a"]:
+        assert memo.get(key, lambda k=key: compute(k)) == key.upper()
+    # "b" was evicted when "c" was added ("a" having been used more recently), then "a" was evicted when "b" was added
+    assert computed_keys == ["a", "b", "c", "b", "a"]
+    assert memo.num_hits == 1
+
+    memo.clear()
+    assert len(memo) == 0
+    memo.get("a", lambda: compute("a"))
+    assert computed_keys[-1] == "a"
+
+
+def test_memo_coalesces_concurrent_computations() -> None:
+    memo = SingleFlightMemo(max_entries=0)
+    started = threading.Event()
+    release = threading.Event()
+    num_computations = 0
+
+    def compute() -> int:
+        nonlocal num_computations
+        num_computations += 1
+        started.set()
+        release.wait(timeout=10)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memo.get("key", compute))) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(timeout=10)
+    for thread in threads[1:]:
+        thread.start()
+    # wait for the other threads to join the computation in flight
+    deadline = time.monotonic() + 10
+    while memo.num_hits < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert results == [42] * 4
+    assert num_computations == 1
+    # with max_entries=0, the result is not memoized
+    assert len(memo) == 0
+
+
+def test_memo_does_not_memoize_exceptions_or_results_computed_before_clearing() -> None:
+    memo = SingleFlightMemo(max_entries=10)
+
+    def fail() -> int:
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        memo.get("key", fail)
+
+    def compute_and_clear() -> int:
+        memo.clear()
+        return 1
+
+    assert memo.get("key", compute_and_clear) == 1
+    assert memo.get("key", lambda: 2) == 2
+    assert memo.get("key", lambda: 3) == 2
+
+
+def test_memo_recomputes_when_joined_computation_was_abandoned() -> None:
+    memo = SingleFlightMemo(max_entries=10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def abandoned_computation() -> int:
+        started.set()
+        release.wait(timeout=10)
+        raise TimeoutError
+
+    errors = []
+
+    def request_abandoned_computation() -> None:
+        try:
+            memo.get("key", abandoned_computation)
+        except TimeoutError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=request_abandoned_computation)
+    thread.start()
+    assert started.wait(timeout=10)
+    results = []
+    joining_thread = threading.Thread(target=lambda: results.append(memo.get("key", lambda: 1, recompute_on=(TimeoutError,))))
+    joining_thread.start()
+    deadline = time.monotonic() + 10
+    while memo.num_hits < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    thread.join(timeout=10)
+    joining_thread.join(timeout=10)
+    assert len(errors) == 1
+    assert results == [1]
+
+
+@pytest.mark.parametrize("cancel", [False, True])
+def test_memo_waits_for_computation_in_flight_within_current_deadline(cancel: bool) -> None:
+    memo = SingleFlightMemo(max_entries=10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_computation() -> int:
+        started.set()
+        release.wait(timeout=10)
+        return 1
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(memo.get("key", slow_computation)))
+    thread.start()
+    assert started.wait(timeout=10)
+    try:
+        deadline = RequestDeadline(None if cancel else 0.1)
+        if cancel:
+            threading.Timer(0.1, deadline.cancel).start()
+        start_time = time.monotonic()
+        with deadline:
+            with pytest.raises(RequestCancelledException if cancel else TimeoutError):
+                memo.get("key", lambda: 2, recompute_on=(TimeoutError, RequestCancelledException))
+        assert time.monotonic() - start_time < 5
+    finally:
+        release.set()
+        thread.join(timeout=10)
+    # the computation in flight was not affected by the waiter giving up
+    assert results == [1]
+    assert memo.get("key", lambda: 2) == 1
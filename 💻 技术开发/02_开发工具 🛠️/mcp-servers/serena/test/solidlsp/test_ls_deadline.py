@@ -0,0 +1,122 @@
+import contextvars
+import io
+import threading
+import time
+
+import pytest
+
+from solidlsp.ls_deadline import RequestDeadline
+from solidlsp.ls_exceptions import RequestCancelledException
+from solidlsp.ls_handler import SolidLanguageServerHandler
+from solidlsp.lsp_protocol_handler.server import ProcessLaunchInfo
+
+
+class TestRequestDeadline:
+    def test_request_timeout_is_limited_to_remaining_time(self) -> None:
+        deadline = RequestDeadline(0.5)
+        assert 0 < deadline.get_request_timeout(None) <= 0.5  # type: ignore[operator]
+        assert deadline.get_request_timeout(0.1) == 0.1
+        assert RequestDeadline(None).get_request_timeout(3.0) == 3.0
+        assert RequestDeadline(None).get_remaining_time() is None
+
+        expired_deadline = RequestDeadline(0.0)
+        assert expired_deadline.get_request_timeout(1.0) == 0.0
+        with pytest.raises(TimeoutError):
+            expired_deadline.check("Request")
+
+    def test_current_deadline_is_propagated_to_copied_contexts(self) -> None:
+        assert RequestDeadline.get_current() is None
+        deadline = RequestDeadline(10)
+        nested_deadline = RequestDeadline(1)
+        with deadline:
+            assert RequestDeadline.get_current() is deadline
+            with nested_deadline:
+                assert RequestDeadline.get_current() is nested_deadline
+            assert RequestDeadline.get_current() is deadline
+
+            result = []
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=lambda: result.append(context.run(RequestDeadline.get_current)))
+            thread.start()
+            thread.join()
+            assert result == [deadline]
+        assert RequestDeadline.get_current() is None
+
+    def test_cancellation_callbacks(self) -> None:
+        deadline = RequestDeadline(None)
+        calls = []
+        deadline.add_cancellation_callback(lambda: calls.append("a"))
+        remove_callback = deadline.add_cancellation_callback(lambda: calls.append("b"))
+        remove_callback()
+        deadline.cancel()
+        deadline.cancel()
+        assert calls == ["a"]
+        assert deadline.is_cancelled()
+        # callbacks added after the cancellation are called immediately
+        deadline.add_cancellation_callback(lambda: calls.append("c"))
+        assert calls == ["a", "c"]
+        with pytest.raises(RequestCancelledException):
+            deadline.check("Request")
+
+
+class FakeProcess:
+    """
+    Stands in for a language server process which never responds, recording the messages sent to it
+    """
+
+    def __init__(self) -> None:
+        self.stdin = io.BytesIO()
+        self.returncode = None
+
+    def get_sent_messages(self) -> str:
+        return self.stdin.getvalue().decode("utf-8")
+
+
+def create_handler() -> tuple[SolidLanguageServerHandler, FakeProcess]:
+    handler = SolidLanguageServerHandler(ProcessLaunchInfo(cmd="fake-language-server"), request_timeout=10)
+    process = FakeProcess()
+    handler.process = process  # type: ignore[assignment]
+    return handler, process
+
+
+class TestRequestCancellation:
+    def test_request_timing_out_at_deadline_is_cancelled(self) -> None:
+        handler, process = create_handler()
+        start_time = time.monotonic()
+        with RequestDeadline(0.1):
+            with pytest.raises(TimeoutError):
+                handler.send_request("workspace/symbol", {"query": "User"})
+        assert time.monotonic() - start_time < 5
+        assert handler._pending_requests == {}
+        assert '"method":"$/cancelRequest"' in process.get_sent_messages().replace(" ", "")
+
+        # a late response to the abandoned request is ignored
+        handler._response_handler({"jsonrpc": "2.0", "id": 1, "result": []})
+
+    def test_request_is_cancelled_with_deadline(self) -> None:
+        handler, process = create_handler()
+        deadline = RequestDeadline(None)
+        errors = []
+
+        def send_request() -> None:
+            with deadline:
+                try:
+                    handler.send_request("textDocument/references", {})
+                except Exception as e:
+                    errors.append(e)
+
+        thread = threading.Thread(target=send_request)
+        thread.start()
+        while not handler._pending_requests:
+            time.sleep(0.01)
+        deadline.cancel()
+        thread.join(timeout=10)
+        assert len(errors) == 1 and isinstance(errors[0], RequestCancelledException)
+        assert handler._pending_requests == {}
+        assert "$/cancelRequest" in process.get_sent_messages()
+
+        # no further requests are sent once the deadline is cancelled
+        with deadline:
+            with pytest.raises(RequestCancelledException):
+                handler.send_request("textDocument/references", {})
+        assert process.get_sent_messages().count('"method"') == 2
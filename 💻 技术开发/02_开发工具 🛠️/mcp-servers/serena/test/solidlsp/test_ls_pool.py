@@ -0,0 +1,298 @@
+import threading
+import time
+
+import pytest
+
+from solidlsp.ls_config import Language
+from solidlsp.ls_deadline import RequestDeadline
+from solidlsp.ls_exceptions import RequestCancelledException
+from solidlsp.ls_pool import LanguageServerKey, LanguageServerLeases, LanguageServerManager, LanguageServerPool
+
+
+class FakeLanguageServer:
+    def __init__(self, language: Language, fail_start: bool = False) -> None:
+        self.language = language
+        self.running = False
+        self.num_stops = 0
+        self.fail_start = fail_start
+
+    def start(self) -> None:
+        self.running = not self.fail_start
+
+    def stop(self) -> None:
+        self.running = False
+        self.num_stops += 1
+
+    def is_running(self) -> bool:
+        return self.running
+
+
+class FakeLanguageServerFactory:
+    def __init__(self) -> None:
+        self.created: list[FakeLanguageServer] = []
+        self.fail_start = False
+
+    def __call__(self, language: Language) -> FakeLanguageServer:
+        language_server = FakeLanguageServer(language, fail_start=self.fail_start)
+        self.created.append(language_server)
+        return language_server
+
+    def created_languages(self) -> list[Language]:
+        return [ls.language for ls in self.created]
+
+
+def create_pool(
+    factory: FakeLanguageServerFactory, manager: LanguageServerManager | None = None, repository_root: str = "/repo"
+) -> LanguageServerPool:
+    return LanguageServerPool(repository_root, [Language.PYTHON, Language.TYPESCRIPT, Language.GO], factory, manager=manager)  # type: ignore[arg-type]
+
+
+class TestLanguageServerPool:
+    def test_language_servers_are_started_on_demand(self) -> None:
+        factory = FakeLanguageServerFactory()
+        pool = create_pool(factory)
+        assert factory.created == []
+        assert pool.get_language_server_if_running(Language.TYPESCRIPT) is None
+
+        language_server = pool.get_language_server_for_file("web/app.ts")
+        assert factory.created_languages() == [Language.TYPESCRIPT]
+        assert pool.get_language_server(Language.TYPESCRIPT) is language_server
+        assert len(factory.created) == 1
+        assert pool.get_running_language_servers() == {Language.TYPESCRIPT: language_server}
+
+    def test_files_are_routed_by_language(self) -> None:
+        pool = create_pool(FakeLanguageServerFactory())
+        assert pool.get_language_of_file("src/main.py") == Language.PYTHON
+        assert pool.get_language_of_file("cmd/main.go") == Language.GO
+        assert pool.get_language_of_file("README.md") is None
+        # files not belonging to any language are handled by the main language server
+        assert pool.get_language_server_for_file("README.md").language == Language.PYTHON  # type: ignore[attr-defined]
+
+    def test_unknown_language_is_rejected(self) -> None:
+        pool = create_pool(FakeLanguageServerFactory())
+        with pytest.raises(ValueError):
+            pool.get_language_server(Language.RUST)
+
+    def test_language_servers_are_reused_by_new_pool(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager()
+        language_server = create_pool(factory, manager).get_language_server(Language.PYTHON)
+        other_language_server = create_pool(factory, manager, repository_root="/other_repo").get_language_server(Language.PYTHON)
+        assert other_language_server is not language_server
+
+        # a new pool for the first repository (e.g. after the project was activated again) reattaches to the running server
+        pool = create_pool(factory, manager)
+        assert pool.get_running_language_servers() == {Language.PYTHON: language_server}
+        assert pool.get_language_server(Language.PYTHON) is language_server
+        assert len(factory.created) == 2
+
+    def test_stop_all_stops_only_pool_language_servers(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager()
+        pool = create_pool(factory, manager)
+        for language in pool.languages:
+            pool.get_language_server(language)
+        other_language_server = create_pool(factory, manager, repository_root="/other_repo").get_language_server(Language.PYTHON)
+        pool.stop_all()
+        assert pool.get_running_language_servers() == {}
+        assert all(ls.num_stops == 1 for ls in factory.created if ls is not other_language_server)
+        assert manager.get_running_language_servers() == {LanguageServerKey(Language.PYTHON, "/other_repo"): other_language_server}
+
+
+class TestLanguageServerManager:
+    def test_least_recently_used_language_server_is_stopped(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(max_running_language_servers=2)
+        pool = create_pool(factory, manager)
+        manager.set_pinned_keys([pool.get_key(Language.PYTHON)])
+        python_ls = pool.get_language_server(Language.PYTHON)
+        typescript_ls = pool.get_language_server(Language.TYPESCRIPT)
+        go_ls = pool.get_language_server(Language.GO)
+        # the pinned language server is never stopped, so the TypeScript server is stopped instead
+        assert python_ls.is_running() and go_ls.is_running()
+        assert not typescript_ls.is_running()
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON, Language.GO}
+
+        # requesting TypeScript again restarts it and stops the (now least recently used) Go server
+        pool.get_language_server(Language.TYPESCRIPT)
+        assert not go_ls.is_running()
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON, Language.TYPESCRIPT}
+
+    def test_leased_language_servers_are_not_stopped(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(max_running_language_servers=2)
+        pool = create_pool(factory, manager)
+        with LanguageServerLeases() as leases:
+            language_servers = [pool.get_language_server(language) for language in pool.languages]
+            # the limit is exceeded while the language servers are leased
+            assert all(ls.is_running() for ls in language_servers)
+            assert len(leases.get_leased_keys()) == 3
+
+            # concurrent operations cannot stop the language servers either
+            thread = threading.Thread(target=manager.stop_idle_language_servers)
+            thread.start()
+            thread.join(timeout=10)
+            assert all(ls.is_running() for ls in language_servers)
+
+        # once released, the least recently used language server is stopped (when a language server is next requested)
+        pool.get_language_server(Language.GO)
+        assert [ls.is_running() for ls in language_servers] == [False, True, True]
+
+    def test_running_language_servers_are_leased(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(max_running_language_servers=1)
+        pool = create_pool(factory, manager)
+        python_ls = pool.get_language_server(Language.PYTHON)
+        with LanguageServerLeases():
+            assert pool.get_running_language_servers() == {Language.PYTHON: python_ls}
+            with LanguageServerLeases():
+                typescript_ls = pool.get_language_server(Language.TYPESCRIPT)
+            # the TypeScript server was only leased by the inner leases, which were released
+            assert python_ls.is_running() and typescript_ls.is_running()
+        manager.stop_idle_language_servers()
+        assert pool.get_running_language_servers() == {Language.TYPESCRIPT: typescript_ls}
+
+    def test_running_language_servers_of_other_repositories_are_not_leased(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(idle_timeout=0.05)
+        pool = create_pool(factory, manager)
+        other_language_server = create_pool(factory, manager, repository_root="/other_repo").get_language_server(Language.PYTHON)
+        python_ls = pool.get_language_server(Language.PYTHON)
+        time.sleep(0.1)
+        with LanguageServerLeases() as leases:
+            assert pool.get_running_language_servers() == {Language.PYTHON: python_ls}
+            assert leases.get_leased_keys() == [pool.get_key(Language.PYTHON)]
+            manager.stop_idle_language_servers()
+            assert python_ls.is_running()
+            assert not other_language_server.is_running()
+
+    def test_idle_language_servers_are_stopped(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(idle_timeout=0.05)
+        pool = create_pool(factory, manager)
+        manager.set_pinned_keys([pool.get_key(Language.PYTHON)])
+        python_ls = pool.get_language_server(Language.PYTHON)
+        go_ls = pool.get_language_server(Language.GO)
+        time.sleep(0.1)
+        manager.stop_idle_language_servers()
+        assert not go_ls.is_running()
+        assert python_ls.is_running()
+
+    def test_memory_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(LanguageServerManager, "_get_memory_usage_mb", staticmethod(lambda language_server: 400.0))
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(max_memory_mb=1000, memory_sampling_interval=0.0)
+        pool = create_pool(factory, manager)
+        manager.set_pinned_keys([pool.get_key(Language.PYTHON)])
+        pool.get_language_server(Language.PYTHON)
+        typescript_ls = pool.get_language_server(Language.TYPESCRIPT)
+        pool.get_language_server(Language.GO)
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON, Language.TYPESCRIPT, Language.GO}
+        # the limit is checked upon the next request, stopping the least recently used server
+        pool.get_language_server(Language.GO)
+        assert not typescript_ls.is_running()
+        assert set(pool.get_running_language_servers()) == {Language.PYTHON, Language.GO}
+
+    def test_memory_usage_is_sampled_at_most_once_per_interval_without_holding_the_lock(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(max_memory_mb=1000, memory_sampling_interval=0.2)
+        sampled_while_locked = []
+
+        def get_memory_usage_mb(language_server: object) -> float:
+            sampled_while_locked.append(manager._lock.locked())
+            return 400.0
+
+        monkeypatch.setattr(LanguageServerManager, "_get_memory_usage_mb", staticmethod(get_memory_usage_mb))
+        pool = create_pool(factory, manager)
+        python_ls = pool.get_language_server(Language.PYTHON)
+        pool.get_language_server(Language.TYPESCRIPT)
+        pool.get_language_server(Language.GO)
+        # only the first request sampled the memory usage (when no language server was running yet)
+        assert sampled_while_locked == []
+        time.sleep(0.2)
+        pool.get_language_server(Language.GO)
+        assert sampled_while_locked == [False] * 3
+        assert not python_ls.is_running()
+
+    def test_terminated_language_server_is_restarted_with_backoff(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(restart_backoff_initial=0.05, restart_backoff_max=1.0)
+        pool = create_pool(factory, manager)
+        language_server = pool.get_language_server(Language.GO)
+        language_server.running = False  # type: ignore[attr-defined]
+        assert pool.get_language_server_if_running(Language.GO) is None
+
+        start_time = time.monotonic()
+        restarted_language_server = pool.get_language_server(Language.GO)
+        assert time.monotonic() - start_time >= 0.05
+        assert restarted_language_server is not language_server
+        assert restarted_language_server.is_running()
+
+        # the backoff time doubles with every consecutive failure
+        restarted_language_server.running = False  # type: ignore[attr-defined]
+        start_time = time.monotonic()
+        pool.get_language_server(Language.GO)
+        assert time.monotonic() - start_time >= 0.1
+
+    def test_failed_start_postpones_next_start(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(restart_backoff_initial=0.05, restart_backoff_max=1.0)
+        pool = create_pool(factory, manager)
+        factory.fail_start = True
+        with pytest.raises(RuntimeError):
+            pool.get_language_server(Language.GO)
+        factory.fail_start = False
+        start_time = time.monotonic()
+        assert pool.get_language_server(Language.GO).is_running()
+        assert time.monotonic() - start_time >= 0.04
+
+    def test_backoff_exceeding_deadline_fails_fast(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(restart_backoff_initial=5.0, restart_backoff_max=10.0)
+        pool = create_pool(factory, manager)
+        pool.get_language_server(Language.GO).running = False  # type: ignore[attr-defined]
+        start_time = time.monotonic()
+        with RequestDeadline(1.0):
+            with pytest.raises(TimeoutError, match="will be restarted in"):
+                pool.get_language_server(Language.GO)
+        assert time.monotonic() - start_time < 1.0
+        assert factory.created_languages() == [Language.GO]
+
+    def test_backoff_is_abandoned_when_deadline_is_cancelled(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager(restart_backoff_initial=5.0, restart_backoff_max=10.0)
+        pool = create_pool(factory, manager)
+        pool.get_language_server(Language.GO).running = False  # type: ignore[attr-defined]
+        deadline = RequestDeadline(None)
+        threading.Timer(0.05, deadline.cancel).start()
+        start_time = time.monotonic()
+        with deadline:
+            with pytest.raises(RequestCancelledException):
+                pool.get_language_server(Language.GO)
+        assert time.monotonic() - start_time < 5.0
+        assert factory.created_languages() == [Language.GO]
+
+    def test_concurrent_requests_start_language_server_once(self) -> None:
+        factory = FakeLanguageServerFactory()
+        pool = create_pool(factory)
+        barrier = threading.Barrier(4, timeout=10)
+
+        def request() -> None:
+            barrier.wait()
+            pool.get_language_server(Language.GO)
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert factory.created_languages() == [Language.GO]
+
+    def test_stop_all(self) -> None:
+        factory = FakeLanguageServerFactory()
+        manager = LanguageServerManager()
+        for repository_root in ["/repo", "/other_repo"]:
+            create_pool(factory, manager, repository_root=repository_root).get_language_server(Language.PYTHON)
+        manager.stop_all()
+        assert manager.get_running_language_servers() == {}
+        assert all(ls.num_stops == 1 for ls in factory.created)
@@ -0,0 +1,61 @@
+from solidlsp.ls_cache import CompactDocumentSymbols
+from solidlsp.ls_symbol_index import SymbolNameIndex
+from solidlsp.ls_types import SymbolKind
+
+
+def create_symbols(relative_path: str, classes: dict[str, list[str]]) -> CompactDocumentSymbols:
+    def symbol(name: str, kind: SymbolKind, children: list[dict]) -> dict:
+        range_ = {"start": {"line": 0, "character": 0}, "end": {"line": 1, "character": 0}}
+        return {"name": name, "kind": kind, "range": range_, "selectionRange": range_, "children": children}
+
+    root_symbols = [
+        symbol(class_name, SymbolKind.Class, [symbol(method_name, SymbolKind.Method, []) for method_name in method_names])
+        for class_name, method_names in classes.items()
+    ]
+    absolute_path = f"/repo/{relative_path}"
+    return CompactDocumentSymbols.from_symbols(relative_path, absolute_path, f"file://{absolute_path}", root_symbols)  # type: ignore[arg-type]
+
+
+def create_index() -> SymbolNameIndex:
+    index = SymbolNameIndex()
+    index.set_file_symbols("models.py", create_symbols("models.py", {"User": ["get_name", "save"], "Item": ["save"]}))
+    index.set_file_symbols("services.py", create_symbols("services.py", {"UserService": ["create_user"]}))
+    return index
+
+
+class TestSymbolNameIndex:
+    def test_exact_lookup(self) -> None:
+        index = create_index()
+        symbols = index.find("save")
+        assert [(s.relative_path, s.symbol_index, s.name_path_parts) for s in symbols] == [
+            ("models.py", 2, ["User", "save"]),
+            ("models.py", 4, ["Item", "save"]),
+        ]
+        assert symbols[0].kind == SymbolKind.Method
+        assert index.find("Use") == []
+
+    def test_substring_lookup(self) -> None:
+        index = create_index()
+        assert sorted(index.find_names("ser", substring_matching=True)) == ["User", "UserService", "create_user"]
+        # patterns shorter than a trigram are matched against all names
+        assert sorted(index.find_names("Us", substring_matching=True)) == ["User", "UserService"]
+        symbols = index.find("User", substring_matching=True, relative_paths=["services.py", "models.py"])
+        # results are ordered by the position of the files in the given sequence
+        assert [s.name_path_parts for s in symbols] == [["UserService"], ["User"]]
+
+    def test_lookup_is_restricted_to_given_files(self) -> None:
+        index = create_index()
+        assert [s.relative_path for s in index.find("save", relative_paths=["services.py"])] == []
+
+    def test_files_are_replaced_and_removed(self) -> None:
+        index = create_index()
+        index.set_file_symbols("models.py", create_symbols("models.py", {"Account": ["save"]}))
+        assert index.find("User") == []
+        assert [s.name_path_parts for s in index.find("save")] == [["Account", "save"]]
+        assert index.find_names("Use", substring_matching=True) == ["UserService"]
+
+        index.remove_file("models.py")
+        assert "models.py" not in index
+        assert len(index) == 1
+        assert index.find("save") == []
+        assert index.find_names("ccou", substring_matching=True) == []
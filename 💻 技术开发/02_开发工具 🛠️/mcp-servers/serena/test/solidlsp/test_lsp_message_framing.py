@@ -0,0 +1,91 @@
+import io
+import math
+
+import pytest
+
+from solidlsp.lsp_protocol_handler.server import JsonCodec, MessageReader, create_message
+
+PAYLOADS = [
+    {"jsonrpc": "2.0", "id": 1, "result": None},
+    {"jsonrpc": "2.0", "method": "window/logMessage", "params": {"type": 3, "message": "Ünïcödé \r\n text"}},
+    {"jsonrpc": "2.0", "id": 2, "result": [{"name": f"symbol_{i}", "kind": 12} for i in range(100)]},
+]
+
+
+def _create_stream() -> bytes:
+    stream = b""
+    for payload in PAYLOADS:
+        header, content_type, body = create_message(payload)
+        stream += header + content_type + body
+    return stream
+
+
+class ChunkedStream(io.RawIOBase):
+    """
+    A stream which returns (at most) a given number of bytes per read, like a pipe
+    """
+
+    def __init__(self, data: bytes, chunk_size: int):
+        self._data = data
+        self._pos = 0
+        self._chunk_size = chunk_size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore
+        n = min(len(buffer), self._chunk_size, len(self._data) - self._pos)
+        buffer[:n] = self._data[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+
+def _read_all_messages(reader: MessageReader) -> list[bytes]:
+    bodies = []
+    while (body := reader.read_message()) is not None:
+        bodies.append(body)
+    return bodies
+
+
+class TestMessageReader:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 10**6])
+    @pytest.mark.parametrize("reader_chunk_size", [16, 64 * 1024])
+    def test_chunked_stream(self, chunk_size: int, reader_chunk_size: int) -> None:
+        stream = io.BufferedReader(ChunkedStream(_create_stream(), chunk_size))
+        reader = MessageReader(stream, chunk_size=reader_chunk_size)
+        assert [JsonCodec().decode(body) for body in _read_all_messages(reader)] == PAYLOADS
+        assert not reader.has_partial_message()
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10**6])
+    def test_unbuffered_stream(self, chunk_size: int) -> None:
+        reader = MessageReader(ChunkedStream(_create_stream(), chunk_size), chunk_size=16)
+        assert [JsonCodec().decode(body) for body in _read_all_messages(reader)] == PAYLOADS
+        assert not reader.has_partial_message()
+
+    @pytest.mark.parametrize("data", [b"Content-Length: 10\r\n\r\n{}", b"Content-Length: 10\r\n"])
+    def test_partial_message(self, data: bytes) -> None:
+        reader = MessageReader(io.BufferedReader(io.BytesIO(data)), chunk_size=4)
+        assert reader.read_message() is None
+        assert reader.has_partial_message()
+
+    def test_invalid_headers_and_unterminated_lines(self) -> None:
+        data = b"starting server\n\nContent-Length: x\r\n\r\nnoise\nContent-Length: 2\n\n{}Content-Length: 4\r\n\r\nnull"
+        reader = MessageReader(io.BufferedReader(io.BytesIO(data)))
+        assert _read_all_messages(reader) == [b"{}", b"null"]
+        assert not reader.has_partial_message()
+
+
+class TestJsonCodec:
+    @pytest.mark.parametrize("name", [None, JsonCodec.STDLIB_CODEC_NAME, "orjson"])
+    def test_fallback_to_stdlib(self, name: str | None) -> None:
+        if name == "orjson":
+            pytest.importorskip("orjson")
+        codec = JsonCodec(name)
+        payload = {"big": 2**70, "values": [1.5, "ü"], 3: True}
+        assert codec.decode(codec.encode(payload)) == {"big": 2**70, "values": [1.5, "ü"], "3": True}
+        assert math.isnan(codec.decode(b'{"x": NaN}')["x"])
+        assert codec.encode({"a": "ü"}) == '{"a":"ü"}'.encode()
+
+    def test_unknown_codec(self) -> None:
+        with pytest.raises(ValueError):
+            JsonCodec("unknown")
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from solidlsp.ls_types import UnifiedSymbolInformation
+from solidlsp.ls_utils import ContainingSymbolIndex, InvalidTextLocationError, LineBuffer, LineOffsetTable, TextUtils
+
+TEXT = "class A:\n    def f(self):\n        pass\n\nx = 1\n"
+
+
+@pytest.mark.parametrize(
+    "start_line, end_line, start_column",
+    [(0, 0, 0), (1, 2, 4), (0, 4, 0), (3, 3, 0), (4, 5, 0), (2, 10, 8), (5, 5, 0), (6, 7, 0), (1, 2, 30)],
+)
+def test_get_lines_matches_splitting(start_line: int, end_line: int, start_column: int) -> None:
+    expected = "\n".join(TEXT.split("\n")[start_line : end_line + 1])[start_column:]
+    assert LineOffsetTable(TEXT).get_lines(start_line, end_line, start_column=start_column) == expected
+
+
+def test_num_lines() -> None:
+    assert LineOffsetTable(TEXT).num_lines == len(TEXT.split("\n"))
+    assert LineOffsetTable("").num_lines == 1
+
+
+def _create_symbol(name: str, start_line: int, start_character: int, end_line: int) -> UnifiedSymbolInformation:
+    symbol_range = {"start": {"line": start_line, "character": start_character}, "end": {"line": end_line, "character": 0}}
+    return {"name": name, "kind": 12, "location": {"range": symbol_range}}  # type: ignore
+
+
+def _find_containing_symbol_by_scanning(
+    symbols: list[UnifiedSymbolInformation], line: int, column: int | None
+) -> UnifiedSymbolInformation | None:
+    containing_symbols = []
+    for symbol in symbols:
+        start = symbol["location"]["range"]["start"]
+        end = symbol["location"]["range"]["end"]
+        if end["line"] >= line >= start["line"] and (column is None or line != start["line"] or column >= start["character"]):
+            containing_symbols.append(symbol)
+    if not containing_symbols:
+        return None
+    return max(containing_symbols, key=lambda s: s["location"]["range"]["start"]["line"])
+
+
+class TestContainingSymbolIndex:
+    def test_nested_symbols(self) -> None:
+        outer = _create_symbol("Outer", 0, 0, 10)
+        method = _create_symbol("method", 2, 4, 5)
+        other_method = _create_symbol("other_method", 7, 4, 9)
+        index = ContainingSymbolIndex([outer, method, other_method])
+        assert index.find_containing_symbol(3, 8) is method
+        assert index.find_containing_symbol(2, 2) is outer
+        assert index.find_containing_symbol(2) is method
+        assert index.find_containing_symbol(6, 0) is outer
+        assert index.find_containing_symbol(9, 4) is other_method
+        assert index.find_containing_symbol(11, 0) is None
+
+    def test_symbols_starting_on_the_same_line(self) -> None:
+        first = _create_symbol("first", 3, 8, 4)
+        second = _create_symbol("second", 3, 0, 4)
+        index = ContainingSymbolIndex([first, second])
+        assert index.find_containing_symbol(3, 10) is first
+        assert index.find_containing_symbol(3, 4) is second
+        assert index.find_containing_symbol(4, 0) is first
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_results_match_scanning_all_symbols(self, seed: int) -> None:
+        rng = random.Random(seed)
+        symbols = []
+        for i in range(200):
+            start_line = rng.randint(0, 300)
+            symbols.append(_create_symbol(f"symbol_{i}", start_line, rng.randint(0, 8), start_line + rng.choice([0, 1, 5, 30, 100])))
+        index = ContainingSymbolIndex(symbols)
+        for line in range(420):
+            for column in (None, 0, 4, 9):
+                assert index.find_containing_symbol(line, column) is _find_containing_symbol_by_scanning(symbols, line, column)
+
+
+class TestLineBuffer:
+    @pytest.mark.parametrize(
+        "line, col, text_to_be_inserted",
+        [
+            (0, 0, "# header\n"),
+            (1, 4, "x"),
+            (2, 12, "\n        return 1"),
+            (4, 5, "0\n\ny = 2"),
+            (5, 0, "z = 3\n"),
+            (6, 0, "end"),
+            (1, 30, "a"),
+        ],
+    )
+    def test_insert_matches_text_utils(self, line: int, col: int, text_to_be_inserted: str) -> None:
+        expected_text, expected_line, expected_col = TextUtils.insert_text_at_position(TEXT, line, col, text_to_be_inserted)
+        buffer = LineBuffer(TEXT)
+        assert buffer.insert_text(line, col, text_to_be_inserted) == (expected_line, expected_col)
+        assert buffer.get_text() == expected_text
+
+    @pytest.mark.parametrize(
+        "start_line, start_col, end_line, end_col",
+        [(0, 0, 0, 5), (1, 4, 2, 12), (0, 8, 5, 0), (3, 0, 4, 0), (2, 8, 2, 8), (1, 30, 2, 0), (2, 4, 1, 0)],
+    )
+    def test_delete_matches_text_utils(self, start_line: int, start_col: int, end_line: int, end_col: int) -> None:
+        expected_text, expected_deleted_text = TextUtils.delete_text_between_positions(TEXT, start_line, start_col, end_line, end_col)
+        buffer = LineBuffer(TEXT)
+        assert buffer.delete_text(start_line, start_col, end_line, end_col) == expected_deleted_text
+        assert buffer.get_text() == expected_text
+
+    def test_invalid_positions(self) -> None:
+        buffer = LineBuffer(TEXT)
+        with pytest.raises(InvalidTextLocationError):
+            buffer.insert_text(7, 0, "x")
+        with pytest.raises(InvalidTextLocationError):
+            buffer.insert_text(6, 1, "x")
+        with pytest.raises(InvalidTextLocationError):
+            buffer.delete_text(0, 0, 6, 0)
+        assert buffer.get_text() == TEXT
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_edit_sequence_matches_text_utils(self, seed: int) -> None:
+        rng = random.Random(seed)
+        text = TEXT
+        buffer = LineBuffer(TEXT)
+        for _ in range(200):
+            lines = text.split("\n")
+            line = rng.randrange(len(lines))
+            col = rng.randint(0, len(lines[line]))
+            if rng.random() < 0.6:
+                text_to_be_inserted = rng.choice(["a", "\n", "def g():\n    pass\n", "  "])
+                text, new_line, new_col = TextUtils.insert_text_at_position(text, line, col, text_to_be_inserted)
+                assert buffer.insert_text(line, col, text_to_be_inserted) == (new_line, new_col)
+            else:
+                end_line = rng.randint(line, min(line + 3, len(lines) - 1))
+                end_col = rng.randint(col if end_line == line else 0, len(lines[end_line]))
+                text, deleted_text = TextUtils.delete_text_between_positions(text, line, col, end_line, end_col)
+                assert buffer.delete_text(line, col, end_line, end_col) == deleted_text
+            assert buffer.num_lines == len(text.split("\n"))
+        assert buffer.get_text() == text